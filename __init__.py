@@ -1,22 +1,46 @@
 """
 PPG 项目数据管理系统
 主包初始化文件
+
+导出的符号按需导入（PEP 562 模块 __getattr__）：import ppg 不会加载 PySide6、
+pydantic 或 psycopg2，批处理任务和无显示环境的服务器只为实际用到的模块付出导入开销。
 """
 
 # ppg/__init__.py
-from .views.main_windows import MainWindow
-from .views.entry_form import ProjectEntryForm
-from .core.models import ProjectHisModel
-from .core.database import DatabaseManager
-from .config import DB_CONFIG
-
-__all__ = [
-    "MainWindow",
-    "ProjectEntryForm",
-    "ProjectHisModel",
-    "DatabaseManager",
-    "DB_CONFIG",
-]
+import importlib
+from typing import TYPE_CHECKING
+
+# 导出名 -> (子模块, 属性名)
+_LAZY_EXPORTS = {
+    "MainWindow": (".views.main_windows", "MainWindow"),
+    "ProjectEntryForm": (".views.entry_form", "ProjectEntryForm"),
+    "ProjectHisModel": (".core.models", "ProjectHisModel"),
+    "DatabaseManager": (".core.database", "DatabaseManager"),
+    "DB_CONFIG": (".config", "DB_CONFIG"),
+}
+
+__all__ = list(_LAZY_EXPORTS)
 
 __version__ = "1.0.0"
 __author__ = "Jinhua Tian"
+
+if TYPE_CHECKING:
+    from .views.main_windows import MainWindow
+    from .views.entry_form import ProjectEntryForm
+    from .core.models import ProjectHisModel
+    from .core.database import DatabaseManager
+    from .config import DB_CONFIG
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), attr)
+    globals()[name] = value  # 缓存，之后的访问不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
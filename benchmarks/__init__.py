@@ -0,0 +1,4 @@
+"""
+性能基准脚本
+运行方式：python -m ppg.benchmarks.<脚本名>
+"""
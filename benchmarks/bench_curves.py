@@ -0,0 +1,62 @@
+# benchmarks/bench_curves.py
+"""
+部分负荷曲线插值吞吐：CurveStore.cop 每秒可计算的 (型号, 负荷率, 冷凝温度) 点数
+
+用法：python -m ppg.benchmarks.bench_curves [--models 2000] [--points 100000 1000000 10000000] [--json]
+曲线按随机额定 COP 生成（rated_curves），不读写 CURVE_DIR；同时给出全部型号 IPLV 的计算用时。
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from ..core.curves import CurveStore, rated_curves
+
+
+def _best(func, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="部分负荷曲线插值吞吐")
+    parser.add_argument("--models", type=int, default=2000)
+    parser.add_argument("--points", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快一次")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    air = rng.random(args.models) < 0.3
+    store = CurveStore([f"M{i}" for i in range(args.models)], rated_curves(rng.uniform(3.0, 7.0, args.models), air), air)
+
+    results = []
+    for n in args.points:
+        index = rng.integers(0, args.models, n)
+        load_ratio = rng.uniform(0.0, 1.1, n)
+        temp = rng.uniform(10.0, 45.0, n)
+        seconds = _best(lambda: store.cop(index, load_ratio, temp), args.repeat)
+        results.append({"points": n, "seconds": round(seconds, 4), "m_points_per_s": round(n / seconds / 1e6, 1)})
+    iplv_ms = _best(store.iplv, args.repeat) * 1000
+
+    if args.json:
+        print(json.dumps({"models": args.models, "results": results, "iplv_ms": round(iplv_ms, 3)}, indent=2))
+        return 0
+    print(f"{args.models} 个型号")
+    print(f"{'点数':>10} {'用时(s)':>9} {'百万点/秒':>10}")
+    for r in results:
+        print(f"{r['points']:>10} {r['seconds']:>9.4f} {r['m_points_per_s']:>10.1f}")
+    print(f"全部型号 IPLV：{iplv_ms:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# benchmarks/bench_import.py
+"""
+冷启动导入耗时：每次在新的 Python 进程中导入模块，取中位数
+
+用法：python -m ppg.benchmarks.bench_import [-n 次数] [--budget 毫秒] [--profile 模块]
+- 同时检查导入后是否加载了 PySide6（core 必须可以在无显示环境中导入）
+- import ppg.core 超过预算（默认 150 ms）或加载了 Qt 时返回非零退出码，可放进 CI
+- --profile 输出 python -X importtime 中累计耗时最高的子模块
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "ppg",
+    "ppg.core",
+    "ppg.core.models",
+    "ppg.core.database",
+    "ppg.core.pgsql",
+    "ppg.core.sqlite",
+    "ppg.views",
+]
+GUARDED_MODULE = "ppg.core"
+DEFAULT_BUDGET_MS = 150.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "qt": "PySide6" in sys.modules}}))
+"""
+
+
+def _env():
+    # 子进程沿用当前进程的模块搜索路径，保证能导入 ppg
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    return env
+
+
+def measure(module: str, runs: int) -> dict:
+    """在 runs 个新进程中分别导入 module（第一次运行会生成 .pyc，不计入结果）"""
+    env = _env()
+    samples, qt_loaded = [], False
+    for i in range(runs + 1):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            capture_output=True,
+            text=True,
+            env=env,
+            check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if i:
+            samples.append(result["ms"])
+        qt_loaded = qt_loaded or result["qt"]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1),
+        "qt_loaded": qt_loaded,
+    }
+
+
+def profile(module: str, top: int = 15) -> list:
+    """python -X importtime 中累计耗时最高的 top 个模块：[(累计微秒, 模块名)]"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=_env(),
+        check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        # 格式：import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="模块冷启动导入耗时")
+    parser.add_argument("-n", type=int, default=7, help="每个模块的测量次数")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="ppg.core 导入预算（毫秒）")
+    parser.add_argument("--profile", metavar="MODULE", help="输出该模块的导入耗时分解")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        for cumulative_us, name in profile(args.profile):
+            print(f"{cumulative_us / 1000:>9.1f} ms  {name}")
+        return 0
+
+    results = [measure(module, args.n) for module in MODULES]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'模块':<22}{'中位数':>10}{'最小':>10}{'最大':>10}  Qt")
+        for r in results:
+            qt = "是" if r["qt_loaded"] else "否"
+            print(
+                f"{r['module']:<24}{r['median_ms']:>10.1f}{r['min_ms']:>10.1f}{r['max_ms']:>10.1f}  {qt}"
+            )
+
+    guarded = next(r for r in results if r["module"] == GUARDED_MODULE)
+    if guarded["qt_loaded"]:
+        print(f"❌ {GUARDED_MODULE} 导入时加载了 PySide6")
+        return 1
+    if guarded["median_ms"] > args.budget:
+        print(f"❌ {GUARDED_MODULE} 导入耗时 {guarded['median_ms']} ms，超过预算 {args.budget} ms")
+        return 1
+    print(f"✅{GUARDED_MODULE} 导入耗时 {guarded['median_ms']} ms（预算 {args.budget} ms）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# benchmarks/bench_metrics.py
+"""
+计时开销：insert_project 路径上开启 / 关闭 core.metrics 的延迟对比
+
+用法：python -m ppg.benchmarks.bench_metrics [-n 2000] [--rounds 5] [--backend postgres|sqlite]
+开启与关闭交替运行多轮、各取中位数，消除缓存与后台负载的影响；
+单机上端到端差异往往小于测量噪声，因此另外单独测量一次完整计时（timed 上下文，含 record）的开销，
+乘以每次插入的计时次数（取连接、执行、提交）给出插入路径上的开销估计。
+postgres 后端在独立 schema 中建表（见 suite.PostgresBackend），结束后删除。
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+
+from ..core import metrics
+from ..core.models import ProjectHisModel
+from ..core.pool import close_pool
+from .datagen import generate_projects
+from .suite import PostgresBackend, SQLiteBackend
+
+
+def _insert_round(backend, projects) -> float:
+    """逐条插入（每条独立取连接、提交，与界面保存相同），返回每条平均秒数"""
+    start = time.perf_counter()
+    for project in projects:
+        with backend.db() as db:
+            db.insert_project(project)
+    return (time.perf_counter() - start) / len(projects)
+
+
+def _timed_cost(calls: int = 200000) -> float:
+    metrics.set_enabled(True)
+    metrics.reset()
+    start = time.perf_counter()
+    for _ in range(calls):
+        with metrics.timed("bench.record"):
+            pass
+    elapsed = (time.perf_counter() - start) / calls
+    metrics.reset()
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="core.metrics 在插入路径上的开销")
+    parser.add_argument("-n", type=int, default=2000, help="每轮插入条数")
+    parser.add_argument("--rounds", type=int, default=5, help="开启 / 关闭各运行的轮数")
+    parser.add_argument("--backend", choices=["postgres", "sqlite"], default="postgres")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    projects = [ProjectHisModel(**r) for r in generate_projects(args.n, prefix="metrics-")]
+    timed_s = _timed_cost()
+    samples = {True: [], False: []}
+    backend = PostgresBackend() if args.backend == "postgres" else SQLiteBackend()
+    with backend, contextlib.redirect_stdout(io.StringIO()):
+        for i in range(args.rounds):
+            # 每轮交换先后顺序，抵消缓存预热与后台负载的漂移
+            for enabled in (False, True) if i % 2 == 0 else (True, False):
+                # 计时游标在建连时决定，切换后重建连接池
+                metrics.set_enabled(enabled)
+                close_pool()
+                _insert_round(backend, projects[:50])  # 预热连接
+                samples[enabled].append(_insert_round(backend, projects))
+                backend.reset()
+    metrics.set_enabled(True)
+    close_pool()
+
+    off = statistics.median(samples[False])
+    on = statistics.median(samples[True])
+    result = {
+        "backend": args.backend,
+        "rows": args.n,
+        "insert_ms_off": round(off * 1000, 4),
+        "insert_ms_on": round(on * 1000, 4),
+        "overhead_pct": round((on - off) / off * 100, 2),
+        "timed_us": round(timed_s * 1e6, 3),
+        # 每次插入：取连接 + 执行 + 提交
+        "timed_overhead_pct": round(3 * timed_s / off * 100, 3),
+    }
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    print(f"后端 {args.backend}，每轮 {args.n} 条，{args.rounds} 轮取中位数")
+    print(f"  关闭统计   {result['insert_ms_off']:.4f} ms/条")
+    print(f"  开启统计   {result['insert_ms_on']:.4f} ms/条  （差异 {result['overhead_pct']:+.2f}%，含测量噪声）")
+    print(f"  单次计时   {result['timed_us']:.3f} µs/次，每条插入约 {result['timed_overhead_pct']:.3f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
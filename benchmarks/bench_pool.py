@@ -0,0 +1,104 @@
+# benchmarks/bench_pool.py
+"""
+对比“每次保存新建连接”与“连接池”两种方式的单次保存耗时
+
+用法：python -m ppg.benchmarks.bench_pool [-n 次数]
+会向 projects_his 写入名称以 __bench_pool__ 开头的测试记录，结束后自动删除
+"""
+import argparse
+import statistics
+import time
+
+import psycopg2
+
+from ..config import DB_CONFIG
+from ..core.models import ProjectHisModel
+from ..core.pgsql import DB
+from ..core.pool import get_pool
+
+BENCH_PREFIX = "__bench_pool__"
+
+
+def make_project(i: int) -> ProjectHisModel:
+    return ProjectHisModel(
+        name=f"{BENCH_PREFIX}{i}",
+        client_name="基准测试",
+        project_type="写字楼",
+        area_sqm=8000,
+        location_city="上海",
+        total_cooling_load_kw=960,
+        total_heating_load_kw=640,
+        selected_products={"主机": "MWPS-F1000", "数量": 2},
+    )
+
+
+def save_without_pool(project: ProjectHisModel):
+    """旧实现：每次保存都 connect → insert → close"""
+    conn = psycopg2.connect(**{k: v for k, v in DB_CONFIG.items() if v is not None})
+    db = DB()
+    db.conn = conn
+    try:
+        db.insert_project(project)
+    finally:
+        db.conn = None
+        conn.close()
+
+
+def save_with_pool(project: ProjectHisModel):
+    """新实现：与 ProjectEntryForm.save_record 相同的 with DB() 写法"""
+    with DB() as db:
+        db.insert_project(project)
+
+
+def run(func, n: int) -> list:
+    timings = []
+    for i in range(n):
+        project = make_project(i)
+        start = time.perf_counter()
+        func(project)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(name: str, timings: list) -> dict:
+    ordered = sorted(timings)
+    result = {
+        "name": name,
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": ordered[len(ordered) // 2],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+    print(
+        f"{name:<12} n={result['n']:<5} mean={result['mean_ms']:.2f}ms "
+        f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms"
+    )
+    return result
+
+
+def cleanup():
+    with get_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "delete from projects_his where name like %s;", (BENCH_PREFIX + "%",)
+            )
+        conn.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="连接池保存耗时基准")
+    parser.add_argument("-n", type=int, default=200, help="每种方式的保存次数")
+    args = parser.parse_args(argv)
+
+    try:
+        # 预热：排除首次导入与建池开销
+        run(save_with_pool, 5)
+        without = summarize("no-pool", run(save_without_pool, args.n))
+        with_pool = summarize("pool", run(save_with_pool, args.n))
+        print(f"speedup: {without['mean_ms'] / with_pool['mean_ms']:.1f}x")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_report.py
+"""
+方案报告批量生成：不同进程数下的吞吐与加速比
+
+用法：python -m ppg.benchmarks.bench_report [--projects 1000] [--workers 1 2 4] [--format docx pdf] [--json]
+项目由 datagen 生成（不读数据库），selected_products 为 {"items": {型号: {...}}} 写法，不触发自动选型；
+报告写到临时目录，结束后删除。加速比以 1 个进程为基准，受 CPU 核数与磁盘限制。
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from ..core.models import ProjectHisModel
+from ..core.report import FORMATS, generate_reports
+from .datagen import generate_projects
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="方案报告批量生成吞吐")
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="默认 1 到 CPU 核数的 2 的幂")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--chunk-size", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    workers_list = args.workers or sorted({1, cpus} | {2**i for i in range(8) if 2**i <= cpus})
+    projects = [
+        (i, ProjectHisModel(**record))
+        for i, record in enumerate(generate_projects(args.projects, prefix="report-"))
+    ]
+
+    results = []
+    for workers in workers_list:
+        out_dir = tempfile.mkdtemp(prefix="ppg-report-")
+        try:
+            stats = generate_reports(
+                out_dir,
+                formats=args.format,
+                projects=projects,
+                workers=workers,
+                chunk_size=args.chunk_size,
+                recommend=False,
+            )
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+        if stats["failed"]:
+            print(f"❌ {stats['failed']} 个项目生成失败：{stats['errors'][:3]}")
+            return 1
+        results.append(
+            {
+                "workers": workers,
+                "seconds": stats["seconds"],
+                "reports_per_s": round(stats["projects"] / stats["seconds"], 1),
+                "mb": round(stats["bytes"] / 1024 / 1024, 2),
+            }
+        )
+    base = results[0]["seconds"]
+    for result in results:
+        result["speedup"] = round(base / result["seconds"], 2)
+
+    if args.json:
+        print(json.dumps({"cpus": cpus, "projects": args.projects, "results": results}, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{args.projects} 个项目，格式 {' + '.join(args.format)}，CPU {cpus} 核")
+    print(f"{'进程数':>6} {'用时(s)':>9} {'个/秒':>9} {'加速比':>7} {'大小(MB)':>9}")
+    for r in results:
+        print(f"{r['workers']:>6} {r['seconds']:>9.2f} {r['reports_per_s']:>9.1f} {r['speedup']:>7.2f} {r['mb']:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# benchmarks/bench_save_stall.py
+"""
+测量保存过程中 Qt 事件循环的最大卡顿时间（同步保存 vs 后台 SaveWorker）
+
+用法：python -m ppg.benchmarks.bench_save_stall [--size-mb 200]
+界面线程上运行 5ms 定时器，记录相邻两次触发的最大间隔；间隔越接近 5ms，界面越流畅。
+项目写入临时目录中的写前日志（不同步到数据库），结束后删除；附件 blob 保留在附件库。
+自动化检查（超过阈值即失败）见 tests/test_save_stall.py。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication, QElapsedTimer, QThreadPool, QTimer
+
+from ..core.journal import SaveJournal
+from ..core.models import ProjectHisModel
+from ..views.save_worker import SaveWorker
+
+BENCH_PREFIX = "__bench_stall__"
+TICK_MS = 5
+
+
+class StallMonitor:
+    """界面线程心跳：记录定时器两次触发之间的最大间隔"""
+
+    def __init__(self):
+        self.timer = QTimer()
+        self.timer.setInterval(TICK_MS)
+        self.timer.timeout.connect(self._tick)
+        self.clock = QElapsedTimer()
+        self.max_gap_ms = 0.0
+
+    def _tick(self):
+        gap = self.clock.nsecsElapsed() / 1e6
+        self.max_gap_ms = max(self.max_gap_ms, gap)
+        self.clock.restart()
+
+    def start(self):
+        self.max_gap_ms = 0.0
+        self.clock.start()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+
+def make_project(tag: str) -> ProjectHisModel:
+    return ProjectHisModel(name=f"{BENCH_PREFIX}{tag}", client_name="基准测试")
+
+
+def run_sync(app, monitor, files, journal) -> dict:
+    """旧流程：在界面线程里直接执行保存"""
+    monitor.start()
+    app.processEvents()
+    start = time.perf_counter()
+    worker = SaveWorker(make_project("sync"), files, journal=journal)
+    result = {}
+    worker.signals.finished.connect(lambda pid: result.setdefault("id", pid))
+    worker.run()
+    app.processEvents()
+    monitor.stop()
+    return {
+        "mode": "sync",
+        "total_ms": (time.perf_counter() - start) * 1000,
+        "max_stall_ms": monitor.max_gap_ms,
+        "seq": result.get("id"),
+    }
+
+
+def run_async(app, monitor, files, journal) -> dict:
+    """新流程：SaveWorker 在线程池中执行，界面线程继续处理事件"""
+    result = {}
+    worker = SaveWorker(make_project("async"), files, journal=journal)
+    worker.setAutoDelete(False)
+    worker.signals.finished.connect(lambda pid: result.setdefault("id", pid))
+    worker.signals.failed.connect(lambda msg: result.setdefault("error", msg))
+    monitor.start()
+    start = time.perf_counter()
+    QThreadPool.globalInstance().start(worker)
+    while "id" not in result and "error" not in result:
+        app.processEvents()
+        time.sleep(0.001)
+    monitor.stop()
+    return {
+        "mode": "async",
+        "total_ms": (time.perf_counter() - start) * 1000,
+        "max_stall_ms": monitor.max_gap_ms,
+        "seq": result.get("id"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="保存过程界面卡顿基准")
+    parser.add_argument("--size-mb", type=int, default=200, help="测试附件大小")
+    args = parser.parse_args(argv)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    monitor = StallMonitor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        attachment = os.path.join(tmp, "drawing.dwg")
+        with open(attachment, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        journal = SaveJournal(os.path.join(tmp, "journal.jsonl"))
+        results = [run_sync(app, monitor, [attachment], journal), run_async(app, monitor, [attachment], journal)]
+        journal.close()
+
+    for r in results:
+        print(f"{r['mode']:<6} total={r['total_ms']:.1f}ms max_stall={r['max_stall_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
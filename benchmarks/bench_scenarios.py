@@ -0,0 +1,72 @@
+# benchmarks/bench_scenarios.py
+"""
+多方案比选耗时：不同方案数下 compare_scenarios 的用时（进程内 / 进程池）
+
+用法：python -m ppg.benchmarks.bench_scenarios [--scenarios 100 500 5000] [--workers 2] [--json]
+方案由 build_scenarios 按全部系统形式生成后循环补足到指定数量（需要产品库，从快照或数据库载入），
+产品库载入与方案生成不计入用时；方案数不超过一块（256 个）时进程池模式同样在进程内计算。
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from ..core.catalog import get_catalog
+from ..core.models import ProjectHisModel
+from ..core.scenarios import build_scenarios, compare_scenarios
+
+PROJECT = ProjectHisModel(
+    name="方案比选基准",
+    client_name="benchmark",
+    project_type="写字楼",
+    area_sqm=20000,
+    location_city="上海",
+    total_cooling_load_kw=2400.0,
+    total_heating_load_kw=1500.0,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="多方案比选耗时")
+    parser.add_argument("--scenarios", type=int, nargs="+", default=[100, 500, 5000])
+    parser.add_argument("--workers", type=int, default=None, help="进程池进程数（默认 CPU 核数）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快一次")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    catalog = get_catalog()
+    base = build_scenarios(PROJECT, top_k=40, catalog=catalog)
+    results = []
+    for n in args.scenarios:
+        scenarios = (base * (n // len(base) + 1))[:n]
+        row = {"scenarios": n}
+        outputs = {}
+        for mode, options in (("inline", {"workers": 1}), ("pool", {"workers": args.workers, "parallel_threshold": 0})):
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                outputs[mode] = compare_scenarios(PROJECT, scenarios, catalog=catalog, **options)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            row[f"{mode}_s"] = round(best, 3)
+        same = np.allclose(
+            outputs["inline"]["results"]["lifecycle_cost_cny"], outputs["pool"]["results"]["lifecycle_cost_cny"]
+        )
+        if not same:
+            print(f"❌ {n} 个方案：进程池与进程内结果不一致")
+            return 1
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{'方案数':>8} {'进程内(s)':>10} {'进程池(s)':>10}")
+    for r in results:
+        print(f"{r['scenarios']:>8} {r['inline_s']:>10.3f} {r['pool_s']:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+# benchmarks/bench_theme.py
+"""
+主题切换耗时：旧方式（每次读 .qss + 逐个控件 setStyleSheet）vs 缓存的单一样式表
+
+用法：python -m ppg.benchmarks.bench_theme [--forms 1 5 20 50] [-n 10] [--json]
+每个规模在窗口中放若干个项目录入表单（每个约 60 个控件），来回切换 n 次主题，
+计时包含 setStyleSheet 本身和随后的重新 polish / 布局（processEvents）。
+“加速”按窗口级计算（主窗口使用的方式）；应用级对进程内所有控件重新 polish，代价更高。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEvent
+from PySide6.QtWidgets import (
+    QApplication,
+    QDoubleSpinBox,
+    QLineEdit,
+    QSpinBox,
+    QTextEdit,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ..views.entry_form_ import ProjectEntryForm
+from ..views.theme import STYLE_DIR, ThemeManager
+
+_LEGACY_COLORS = {
+    "dark": ("#333", "#fff", "#444", "#444", "#555"),
+    "light": ("#f0f0f0", "#333", "#fff", "#fff", "#ccc"),
+}
+_LEGACY_INPUT = """
+    {sel} {{
+        padding: 5px; border: 1px solid {border}; border-radius: 4px;
+        background-color: {input_bg}; color: {text};
+    }}
+    {focus} {{ border: 2px solid #4CAF50; }}
+"""
+_LEGACY_BUTTON = """
+    QPushButton {{
+        padding: 8px 15px; border-radius: 4px; font-weight: bold;
+        background-color: {bg}; color: white;
+    }}
+    QPushButton:hover {{ background-color: {hover}; }}
+"""
+
+
+def legacy_apply(window: QWidget, forms: list, theme: str):
+    """改造前的做法：每次切换都读取 .qss，并为每个控件重新生成、设置样式表"""
+    with open(os.path.join(STYLE_DIR, f"{theme}.qss"), "r", encoding="utf-8") as f:
+        window.setStyleSheet(f.read())
+    bg, text, input_bg, container_bg, border = _LEGACY_COLORS[theme]
+    for form in forms:
+        form.setStyleSheet(f"QWidget {{ background-color: {bg}; }}")
+        form.title_label.setStyleSheet(f"QLabel {{ color: {text}; font-size: 18px; font-weight: bold; }}")
+        for field_name in form.fields:
+            form.widgets[f"{field_name}_container"].setStyleSheet(
+                f"background-color: {container_bg}; border-radius: 5px;"
+            )
+            form.widgets[f"{field_name}_label"].setStyleSheet(f"color: {text}; font-weight: bold;")
+            hint = form.widgets.get(f"{field_name}_hint")
+            if hint:
+                hint.setStyleSheet("font-size: 10px; color: gray;")
+            widget = form.widgets[field_name]
+            if isinstance(widget, QTextEdit):
+                sel, focus = "QTextEdit", "QTextEdit:focus"
+            elif isinstance(widget, QLineEdit):
+                sel, focus = "QLineEdit", "QLineEdit:focus"
+            elif isinstance(widget, (QSpinBox, QDoubleSpinBox)):
+                sel, focus = "QSpinBox, QDoubleSpinBox", "QSpinBox:focus, QDoubleSpinBox:focus"
+            widget.setStyleSheet(
+                _LEGACY_INPUT.format(sel=sel, focus=focus, border=border, input_bg=input_bg, text=text)
+            )
+        form.file_container.setStyleSheet(f"background-color: {container_bg}; border-radius: 5px;")
+        form.file_label.setStyleSheet(f"color: {text}; font-weight: bold;")
+        form.file_list_widget.setStyleSheet(
+            f"QListWidget {{ background-color: {input_bg}; color: {text}; border: 1px solid {border}; }}"
+        )
+        for btn, color, hover in (
+            (form.save_btn, "#4CAF50", "#45a049"),
+            (form.clear_btn, "#f44336", "#da190b"),
+            (form.file_btn, "#2196F3", "#0b7dda"),
+            (form.cancel_btn, "#ff9800", "#e68a00"),
+        ):
+            btn.setStyleSheet(_LEGACY_BUTTON.format(bg=color, hover=hover))
+
+
+def _build(app, count: int):
+    window = QWidget()
+    layout = QVBoxLayout(window)
+    forms = [ProjectEntryForm() for _ in range(count)]
+    for form in forms:
+        layout.addWidget(form)
+    window.show()
+    app.processEvents()
+    widgets = len(window.findChildren(QWidget)) + 1
+    return window, forms, widgets
+
+
+def _time_toggles(app, switch, runs: int) -> list:
+    samples = []
+    themes = ("dark", "light")
+    for i in range(runs):
+        start = time.perf_counter()
+        switch(themes[i % 2])
+        app.processEvents()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _destroy(app, window):
+    # processEvents 不处理 deleteLater，需要显式投递，否则残留控件会拖慢后面的测量
+    window.close()
+    window.deleteLater()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+    app.setStyleSheet("")
+
+
+def measure(app, count: int, runs: int) -> dict:
+    # 旧方式：所有样式挂在窗口和各个控件上
+    window, forms, widgets = _build(app, count)
+    app.setStyleSheet("")
+    legacy = _time_toggles(app, lambda theme: legacy_apply(window, forms, theme), runs)
+    _destroy(app, window)
+
+    # 新方式：样式表预编译缓存，切换时只设置一次样式表（QApplication 级 / 顶层窗口级）
+    manager = ThemeManager()
+    manager.preload()
+    window, forms, widgets = _build(app, count)
+    app_level = _time_toggles(app, lambda theme: manager.apply(theme, app), runs)
+    _destroy(app, window)
+
+    window, forms, widgets = _build(app, count)
+    window_level = _time_toggles(app, lambda theme: manager.apply(theme, window), runs)
+    _destroy(app, window)
+
+    legacy_ms = statistics.median(legacy)
+    window_ms = statistics.median(window_level)
+    return {
+        "forms": count,
+        "widgets": widgets,
+        "legacy_ms": round(legacy_ms, 2),
+        "app_ms": round(statistics.median(app_level), 2),
+        "window_ms": round(window_ms, 2),
+        "speedup": round(legacy_ms / window_ms, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="主题切换耗时对比")
+    parser.add_argument("--forms", type=int, nargs="+", default=[1, 5, 20, 50], help="窗口中的表单数量")
+    parser.add_argument("-n", type=int, default=10, help="每个规模切换的次数")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = [measure(app, count, args.n) for count in args.forms]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{'表单数':>6}{'控件数':>8}{'旧方式(ms)':>14}{'应用级(ms)':>14}{'窗口级(ms)':>14}{'加速':>8}")
+    for r in results:
+        print(
+            f"{r['forms']:>8}{r['widgets']:>10}{r['legacy_ms']:>14.2f}"
+            f"{r['app_ms']:>14.2f}{r['window_ms']:>14.2f}{r['speedup']:>9.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# benchmarks/bench_validation.py
+"""
+批量校验吞吐：逐条构造 ProjectHisModel（旧流程）vs validate_batch
+
+用法：python -m ppg.benchmarks.bench_validation [--rows 1000 10000 100000] [--error-rate 0.01] [--json]
+数据模拟 CSV 导入：数值为字符串、选型产品为 JSON 字符串，按 error-rate 混入坏数据。
+旧流程：validate_json_string 先解析一遍 JSON，再逐条 ProjectHisModel(**record)，遇错只拿到异常文本。
+新流程：validate_batch 整批校验，JSON 只解析一次，逐行逐列报告全部错误。
+"""
+import argparse
+import json
+import sys
+import time
+
+from ..core.models import ProjectHisModel, validate_batch
+from ..core.utils import validate_json_string
+from .datagen import generate_projects
+
+
+def make_records(rows: int, error_rate: float, seed: int = 0) -> list:
+    return list(generate_projects(rows, seed, error_rate, as_strings=True))
+
+
+def run_per_object(records) -> tuple:
+    valid, rejected = 0, 0
+    for record in records:
+        if record.get("selected_products") and not validate_json_string(record["selected_products"]):
+            rejected += 1
+            continue
+        try:
+            ProjectHisModel(**record).model_dump()
+            valid += 1
+        except Exception:
+            rejected += 1
+    return valid, rejected
+
+
+def run_batch(records, chunk_size: int = 5000) -> tuple:
+    valid, rejected_rows = 0, set()
+    columns = list(ProjectHisModel.model_fields)
+    for start in range(0, len(records), chunk_size):
+        ok, errors = validate_batch(ProjectHisModel, records[start : start + chunk_size], start)
+        for _, project in ok:
+            [getattr(project, c) for c in columns]
+        valid += len(ok)
+        rejected_rows.update(e["row"] for e in errors)
+    return valid, len(rejected_rows)
+
+
+def _best(func, records, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(records)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ProjectHisModel 批量校验吞吐")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--error-rate", type=float, default=0.01, help="坏数据比例")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快一次")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    validate_batch(ProjectHisModel, make_records(10, 0))  # 预先构建 TypeAdapter
+    results = []
+    for rows in args.rows:
+        records = make_records(rows, args.error_rate)
+        legacy_s, legacy = _best(run_per_object, records, args.repeat)
+        batch_s, batch = _best(run_batch, records, args.repeat)
+        if legacy != batch:
+            print(f"❌ 结果不一致：逐条 {legacy}，批量 {batch}")
+            return 1
+        results.append(
+            {
+                "rows": rows,
+                "valid": batch[0],
+                "rejected": batch[1],
+                "per_object_rows_per_s": round(rows / legacy_s),
+                "batch_rows_per_s": round(rows / batch_s),
+                "speedup": round(legacy_s / batch_s, 2),
+            }
+        )
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{'行数':>8}{'拒绝':>8}{'逐条(行/秒)':>16}{'批量(行/秒)':>16}{'加速':>8}")
+    for r in results:
+        print(
+            f"{r['rows']:>10}{r['rejected']:>10}{r['per_object_rows_per_s']:>16}"
+            f"{r['batch_rows_per_s']:>16}{r['speedup']:>9.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
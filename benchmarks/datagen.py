@@ -0,0 +1,109 @@
+# benchmarks/datagen.py
+"""
+合成数据生成器：projects_his / products
+
+同一个 seed 生成的数据完全相同，便于在不同版本之间对比基准结果。
+记录逐条产出（生成器），100 万行也不需要一次放进内存。
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+CITIES = ["广州", "哈尔滨", "上海", "成都", "武汉", "北京"]
+PROJECT_TYPES = ["工厂", "商场", "酒店", "学校", "写字楼", "医院"]
+SYSTEM_TYPES = ["螺杆机+锅炉", "离心机+锅炉", "多联机", "风冷热泵", "地源热泵"]
+BRANDS = ["格力", "美的", "海尔", "约克", "开利", "特灵"]
+CATEGORIES = ["螺杆机", "离心机", "风冷热泵", "多联机", "锅炉"]
+
+# 单位面积冷 / 热负荷指标（W/㎡），只用于生成数量级合理的数据
+_LOAD_INDEX = {
+    "工厂": (150, 80),
+    "商场": (220, 110),
+    "酒店": (120, 80),
+    "学校": (110, 70),
+    "写字楼": (130, 80),
+    "医院": (140, 90),
+}
+_EPOCH = datetime(2020, 1, 1)
+
+
+def parse_rows(text: str) -> int:
+    """'1k' / '100k' / '1m' / '2500' → 行数"""
+    text = str(text).strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def generate_projects(rows: int, seed: int = 0, error_rate: float = 0.0, as_strings: bool = False, prefix: str = ""):
+    """
+    产出 projects_his 记录（dict）
+    :param error_rate: 混入校验不通过的记录的比例（面积与选型 JSON 写错）
+    :param as_strings: True 时数值与 JSON 字段为字符串，模拟从 CSV 读取的原始数据
+    :param prefix: 项目名称前缀，便于测试后清理
+    """
+    rng = random.Random(seed)
+    for i in range(rows):
+        project_type = rng.choice(PROJECT_TYPES)
+        area = round(rng.uniform(500, 50000), 1)
+        cooling_index, heating_index = _LOAD_INDEX[project_type]
+        cooling = round(area * cooling_index * rng.uniform(0.85, 1.15) / 1000, 1)
+        heating = round(area * heating_index * rng.uniform(0.85, 1.15) / 1000, 1)
+        units = rng.randint(1, 4)
+        products = {
+            "items": {
+                f"SC-{rng.randint(100, 999)}": {"数量": units, "单价": rng.randint(20, 200) * 1000}
+            }
+        }
+        record = {
+            "name": f"{prefix}项目{i}",
+            "client_name": f"客户{i % 997}",
+            "project_type": project_type,
+            "area_sqm": area,
+            "location_city": rng.choice(CITIES),
+            "total_heating_load_kw": heating,
+            "total_cooling_load_kw": cooling,
+            "system_type": rng.choice(SYSTEM_TYPES),
+            "selected_products": products,
+            "total_cost_cny": round(area * rng.uniform(400, 900)),
+            "annual_energy_consumption_kwh": round(area * rng.uniform(60, 180)),
+            "solution_summary": f"{project_type}项目，{units} 台主机，常规冷热源方案",
+            "success_rating": rng.randint(1, 5),
+            "create_at": _EPOCH + timedelta(minutes=i),
+        }
+        if as_strings:
+            record = {
+                key: json.dumps(value, ensure_ascii=False)
+                if isinstance(value, dict)
+                else value.isoformat()
+                if isinstance(value, datetime)
+                else str(value)
+                for key, value in record.items()
+            }
+        if error_rate and rng.random() < error_rate:
+            record["area_sqm"] = "约两万"
+            record["selected_products"] = "{型号: SC-100"
+        yield record
+
+
+def generate_products(rows: int, seed: int = 0):
+    """产出 products 记录（dict），model_code 唯一"""
+    rng = random.Random(seed)
+    for i in range(rows):
+        category = rng.choice(CATEGORIES)
+        cooling = round(rng.uniform(50, 3000), 1)
+        cop = round(rng.uniform(3.0, 6.5), 2)
+        yield {
+            "name": f"{category}{i}",
+            "category": category,
+            "brand": rng.choice(BRANDS),
+            "model_code": f"BM-{i:07d}",
+            "cooling_capacity_kw": cooling,
+            "heating_capacity_kw": round(cooling * rng.uniform(0.8, 1.1), 1),
+            "power_kw": round(cooling / cop, 1),
+            "cop": cop,
+            "noise_db": round(rng.uniform(55, 85), 1),
+            "dimensions": {"length": rng.randint(1000, 6000), "width": rng.randint(800, 2500), "height": rng.randint(1200, 2800)},
+            "price_cny": round(cooling * rng.uniform(600, 1500)),
+            "energy_level": rng.randint(1, 5),
+            "tags": rng.sample(["变频", "低噪", "高效", "热回收", "防腐"], 2),
+        }
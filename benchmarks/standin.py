@@ -0,0 +1,138 @@
+# benchmarks/standin.py
+"""
+DB 的进程内替身：数据保存在内存里，不经过网络与 SQL
+
+只实现基准测试用到的接口（insert_project / insert_many / bulk_insert_projects / upsert_products /
+iter_projects / select_columns），用来把 Python 侧的开销与数据库的开销分开测量。
+"""
+import itertools
+import re
+
+from ..core.models import ProductModel, ProjectHisModel, group_errors, validate_batch
+
+PROJECT_FIELDS = list(ProjectHisModel.model_fields)
+PRODUCT_FIELDS = list(ProductModel.model_fields)
+
+_SIMPLE_SELECT = re.compile(r"^\s*select\s+(.+?)\s+from\s+(\w+)\s*$", re.I | re.S)
+
+
+class MemoryStore:
+    """替身的“数据库”：表名 → 行列表（projects_his）或 型号 → 行（products）"""
+
+    def __init__(self):
+        self.projects = []  # [(id, *字段)]
+        self.products = {}  # model_code -> (字段...)
+        self._ids = itertools.count(1)
+
+    def truncate(self):
+        self.projects.clear()
+        self.products.clear()
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+
+class MemoryDB:
+    """与 pgsql.DB 用法相同：with MemoryDB(store) as db: ..."""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.conn = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def insert_project(self, project: ProjectHisModel):
+        project_id = self.store.next_id()
+        self.store.projects.append((project_id, *(getattr(project, f) for f in PROJECT_FIELDS)))
+        return project_id
+
+    def insert_many(self, projects, page_size: int = 500, commit_every: int = 5000, on_reject=None) -> list:
+        ids = []
+        records = iter(projects)
+        while True:
+            chunk = list(itertools.islice(records, commit_every))
+            if not chunk:
+                break
+            chunk_ids = [None] * len(chunk)
+            valid, errors = validate_batch(ProjectHisModel, chunk)
+            if on_reject:
+                for row, message in group_errors(errors).items():
+                    on_reject(chunk[row], message)
+            for row, project in valid:
+                chunk_ids[row] = self.insert_project(project)
+            ids.extend(chunk_ids)
+        return ids
+
+    def bulk_insert_projects(self, projects, batch_size: int = 5000, on_reject=None) -> int:
+        inserted = 0
+        records = iter(projects)
+        while True:
+            chunk = list(itertools.islice(records, batch_size))
+            if not chunk:
+                break
+            valid, errors = validate_batch(ProjectHisModel, chunk)
+            if on_reject:
+                for row, message in group_errors(errors).items():
+                    on_reject(chunk[row], message)
+            for _, project in valid:
+                self.insert_project(project)
+            inserted += len(valid)
+        return inserted
+
+    def upsert_products(self, products, batch_size: int = 1000, on_reject=None) -> int:
+        upserted = 0
+        records = iter(products)
+        while True:
+            chunk = list(itertools.islice(records, batch_size))
+            if not chunk:
+                break
+            valid, errors = validate_batch(ProductModel, chunk)
+            if on_reject:
+                for row, message in group_errors(errors).items():
+                    on_reject(chunk[row], message)
+            for _, product in valid:
+                self.store.products[product.model_code] = tuple(getattr(product, f) for f in PRODUCT_FIELDS)
+            upserted += len(valid)
+        return upserted
+
+    def iter_projects(self, where: str = None, params=None, itersize: int = 2000, with_id: bool = False):
+        if where:
+            raise NotImplementedError("内存替身不支持过滤条件")
+        for row in self.store.projects:
+            values = {f: v for f, v in zip(PROJECT_FIELDS, row[1:]) if v is not None}
+            project = ProjectHisModel(**values)
+            yield (row[0], project) if with_id else project
+
+    def select_columns(self, query, params=None, batch_size: int = 10000) -> dict:
+        """只支持 "select 列, 列 from 表" 形式的查询，结果与 DB.select_columns 相同（列名 → 数组）"""
+        import numpy as np
+
+        match = _SIMPLE_SELECT.match(str(query))
+        if not match or params:
+            raise NotImplementedError(f"内存替身不支持该查询：{query}")
+        columns = [c.strip() for c in match.group(1).split(",")]
+        table = match.group(2)
+        if table == "projects_his":
+            fields, rows = ["id"] + PROJECT_FIELDS, self.store.projects
+        elif table == "products":
+            fields, rows = PRODUCT_FIELDS, list(self.store.products.values())
+        else:
+            raise NotImplementedError(f"内存替身没有表：{table}")
+
+        result = {}
+        for column in columns:
+            index = fields.index(column)
+            values = [row[index] for row in rows]
+            if values and all(type(v) is int for v in values):
+                result[column] = np.array(values, dtype=np.int64)
+                continue
+            try:
+                result[column] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            except (TypeError, ValueError):
+                result[column] = np.array(values, dtype=object)
+        return result
@@ -0,0 +1,479 @@
+# benchmarks/suite.py
+"""
+数据层与引擎的基准测试套件，结果写成 JSON，便于不同版本之间对比
+
+用法：
+    python -m ppg.benchmarks.suite --backend memory --rows 100k
+    python -m ppg.benchmarks.suite --backend temp-postgres --rows 1k 100k --output results.json
+    python -m ppg.benchmarks.suite --backend postgres --rows 1m --compare old.json --tolerance 0.15
+
+后端（--backend）：
+    memory          进程内替身（standin.MemoryDB），只测 Python 侧开销
+    postgres        已配置的数据库（DB_CONFIG），在独立 schema ppg_bench 中建表（DB.create_tables），结束后删除
+    temp-postgres   在临时目录 initdb 一个新集群（unix socket），结束后删除；
+                    initdb / pg_ctl 取自 PATH 或 PPG_PG_BIN，root 下需用 PPG_PG_RUN_AS 指定运行用户
+    sqlite          临时目录中的 SQLite 文件（core/sqlite.SQLiteDB），结束后删除
+
+用例（--cases，默认全部）：
+    insert_project  逐条 DB.insert_project（最多 --single-inserts 条），给出延迟分位数
+    insert_many     DB.insert_many 批量插入并取回 id（每批 5000 行提交）
+    bulk_load       DB.bulk_insert_projects（含校验与 COPY）
+    read_iter       DB.iter_projects 逐条读回 ProjectHisModel
+    read_columns    DB.select_columns 列式读取数值列
+    products        DB.upsert_products
+    validate        validate_batch 批量校验（不经过数据库）
+    attachments     AttachmentStore.put_files，首次写入与重复内容去重
+
+--compare 与旧结果逐项比较吞吐，下降超过 tolerance 时返回非零退出码。
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from ..config import BASE_DIR, DB_CONFIG
+from ..core.attachments import AttachmentStore
+from ..core.models import ProjectHisModel, validate_batch
+from .datagen import generate_products, generate_projects, parse_rows
+from .standin import MemoryDB, MemoryStore
+
+BENCH_SCHEMA = "ppg_bench"
+CASES = ["insert_project", "insert_many", "bulk_load", "read_iter", "read_columns", "products", "validate", "attachments"]
+READ_CASES = ("read_iter", "read_columns")
+RESET_CASES = ("insert_project", "insert_many", "products")  # 会清空数据表
+READ_COLUMNS = ["id", "area_sqm", "total_cooling_load_kw", "total_heating_load_kw", "total_cost_cny"]
+
+# ---------- 后端 ----------
+class MemoryBackend:
+    name = "memory"
+
+    def __enter__(self):
+        self.store = MemoryStore()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.store = None
+
+    def db(self):
+        return MemoryDB(self.store)
+
+    def reset(self):
+        self.store.truncate()
+
+
+class PostgresBackend:
+    """已配置的数据库：所有表建在独立 schema 中，不影响正式数据"""
+
+    name = "postgres"
+
+    def __init__(self, schema: str = BENCH_SCHEMA):
+        self.schema = schema
+        self._saved_config = None
+
+    def _use_config(self, **overrides):
+        # DB 通过共享连接池取连接，修改 DB_CONFIG 后重建连接池即可切换数据库 / search_path
+        from ..core.pool import close_pool
+
+        if self._saved_config is None:
+            self._saved_config = dict(DB_CONFIG)
+        DB_CONFIG.update(overrides)
+        close_pool()
+
+    def _restore_config(self):
+        from ..core.pool import close_pool
+
+        if self._saved_config is not None:
+            DB_CONFIG.clear()
+            DB_CONFIG.update(self._saved_config)
+            self._saved_config = None
+        close_pool()
+
+    def _execute(self, statements: str):
+        from ..core.pgsql import DB
+
+        with DB() as db:
+            if not db.conn:
+                raise ConnectionError("数据库连接失败")
+            with db.conn.cursor() as cursor:
+                cursor.execute(statements)
+            db.conn.commit()
+
+    def _create_tables(self):
+        """与正式库相同的建表语句（pgsql.SCHEMA_SQL，含 updated_at 触发器与索引），建在当前 search_path 中"""
+        from ..core.pgsql import DB
+
+        with DB() as db:
+            if not db.create_tables():
+                raise RuntimeError("基准测试建表失败")
+
+    def __enter__(self):
+        self._use_config(options=f"-c search_path={self.schema}")
+        self._execute(f"drop schema if exists {self.schema} cascade; create schema {self.schema};")
+        self._create_tables()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self._execute(f"drop schema if exists {self.schema} cascade;")
+        finally:
+            self._restore_config()
+
+    def db(self):
+        from ..core.pgsql import DB
+
+        return DB()
+
+    def reset(self):
+        self._execute("truncate projects_his, products restart identity;")
+
+
+class TempPostgresBackend(PostgresBackend):
+    """临时 PostgreSQL 集群：只监听 unix socket，测完即删"""
+
+    name = "temp-postgres"
+
+    def __init__(self):
+        super().__init__(schema="public")
+        self.data_dir = None
+        self.port = None
+
+    @staticmethod
+    def _tool(name: str) -> str:
+        bin_dir = os.getenv("PPG_PG_BIN")
+        path = os.path.join(bin_dir, name) if bin_dir else shutil.which(name)
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"找不到 {name}，请把 PostgreSQL 的 bin 目录加入 PATH 或设置 PPG_PG_BIN")
+        return path
+
+    def _run(self, *args):
+        command = list(args)
+        run_as = os.getenv("PPG_PG_RUN_AS")
+        if run_as:
+            command = ["runuser", "-u", run_as, "--"] + command
+        elif hasattr(os, "geteuid") and os.geteuid() == 0:
+            raise PermissionError("initdb 不能以 root 运行，请设置 PPG_PG_RUN_AS=<普通用户>")
+        subprocess.run(command, check=True, capture_output=True)
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+    def __enter__(self):
+        self.data_dir = tempfile.mkdtemp(prefix="ppg_bench_pg_")
+        run_as = os.getenv("PPG_PG_RUN_AS")
+        if run_as:
+            shutil.chown(self.data_dir, user=run_as)
+        self.port = self._free_port()
+        pgdata = os.path.join(self.data_dir, "data")
+        try:
+            self._run(self._tool("initdb"), "-D", pgdata, "-U", "postgres", "-A", "trust", "-E", "UTF8", "--no-sync")
+            self._run(
+                self._tool("pg_ctl"), "-D", pgdata, "-l", os.path.join(self.data_dir, "server.log"), "-w", "start",
+                "-o", f"-k {self.data_dir} -c listen_addresses='' -p {self.port} -c fsync=off",
+            )
+        except Exception:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+            raise
+        self._use_config(host=self.data_dir, port=str(self.port), database="postgres", user="postgres", password=None)
+        try:
+            self._create_tables()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._restore_config()
+        with contextlib.suppress(Exception):
+            self._run(self._tool("pg_ctl"), "-D", os.path.join(self.data_dir, "data"), "-m", "fast", "-w", "stop")
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+class SQLiteBackend:
+    """临时 SQLite 文件，与正式的本地库 / 只读副本互不影响"""
+
+    name = "sqlite"
+
+    def __enter__(self):
+        self.data_dir = tempfile.mkdtemp(prefix="ppg_bench_sqlite_")
+        self.path = os.path.join(self.data_dir, "bench.sqlite3")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def db(self):
+        from ..core.sqlite import SQLiteDB
+
+        return SQLiteDB(self.path)
+
+    def reset(self):
+        with self.db() as db:
+            db.conn.executescript("delete from projects_his; delete from products; delete from sqlite_sequence;")
+
+
+BACKENDS = {
+    MemoryBackend.name: MemoryBackend,
+    PostgresBackend.name: PostgresBackend,
+    TempPostgresBackend.name: TempPostgresBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+
+def register_backend(name: str, factory):
+    """注册其他后端：factory() 返回上下文管理器，提供 db() 与 reset()"""
+    BACKENDS[name] = factory
+
+
+# ---------- 用例 ----------
+def _result(case: str, rows: int, seconds: float, **extra) -> dict:
+    return {
+        "case": case,
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds, 1) if seconds > 0 else None,
+        **extra,
+    }
+
+
+def _percentiles(samples_ms: list) -> dict:
+    if len(samples_ms) < 2:
+        return {}
+    q = statistics.quantiles(samples_ms, n=100)
+    return {"p50_ms": round(q[49], 3), "p95_ms": round(q[94], 3), "p99_ms": round(q[98], 3)}
+
+
+def case_insert_project(backend, rows: int, args) -> dict:
+    count = min(rows, args.single_inserts)
+    projects = [ProjectHisModel(**r) for r in generate_projects(count, seed=args.seed)]
+    backend.reset()
+    samples = []
+    with backend.db() as db:
+        start = time.perf_counter()
+        for project in projects:
+            t0 = time.perf_counter()
+            db.insert_project(project)
+            samples.append((time.perf_counter() - t0) * 1000)
+        elapsed = time.perf_counter() - start
+    return _result("insert_project", count, elapsed, **_percentiles(samples))
+
+
+def case_insert_many(backend, rows: int, args) -> dict:
+    backend.reset()
+    with backend.db() as db:
+        start = time.perf_counter()
+        ids = db.insert_many(generate_projects(rows, seed=args.seed), commit_every=5000)
+        elapsed = time.perf_counter() - start
+    return _result("insert_many", sum(i is not None for i in ids), elapsed)
+
+
+def _load(backend, rows: int, seed: int):
+    backend.reset()
+    with backend.db() as db:
+        return db.bulk_insert_projects(generate_projects(rows, seed=seed), batch_size=5000)
+
+
+def case_bulk_load(backend, rows: int, args) -> dict:
+    start = time.perf_counter()
+    inserted = _load(backend, rows, args.seed)
+    # 包含数据生成的时间（约占 1/10），与从文件读取的真实导入相当
+    return _result("bulk_load", inserted, time.perf_counter() - start)
+
+
+def case_read_iter(backend, rows: int, args, loaded: bool = False) -> dict:
+    if not loaded:
+        _load(backend, rows, args.seed)
+    with backend.db() as db:
+        start = time.perf_counter()
+        count = sum(1 for _ in db.iter_projects(itersize=5000))
+        elapsed = time.perf_counter() - start
+    return _result("read_iter", count, elapsed)
+
+
+def case_read_columns(backend, rows: int, args, loaded: bool = False) -> dict:
+    if not loaded:
+        _load(backend, rows, args.seed)
+    with backend.db() as db:
+        start = time.perf_counter()
+        columns = db.select_columns(f"select {', '.join(READ_COLUMNS)} from projects_his")
+        elapsed = time.perf_counter() - start
+    return _result("read_columns", len(columns["id"]), elapsed, columns=len(READ_COLUMNS))
+
+
+def case_products(backend, rows: int, args) -> dict:
+    backend.reset()
+    with backend.db() as db:
+        start = time.perf_counter()
+        upserted = db.upsert_products(generate_products(rows, seed=args.seed), batch_size=1000)
+        elapsed = time.perf_counter() - start
+    return _result("products", upserted, elapsed)
+
+
+def case_validate(backend, rows: int, args) -> dict:
+    # 分块生成，只累计校验本身的时间
+    chunk_size, elapsed, valid = 10000, 0.0, 0
+    records = generate_projects(rows, seed=args.seed, error_rate=0.01, as_strings=True)
+    for start in range(0, rows, chunk_size):
+        chunk = [next(records) for _ in range(min(chunk_size, rows - start))]
+        t0 = time.perf_counter()
+        ok, _ = validate_batch(ProjectHisModel, chunk, start)
+        elapsed += time.perf_counter() - t0
+        valid += len(ok)
+    return _result("validate", rows, elapsed, valid=valid)
+
+
+def case_attachments(backend, rows: int, args) -> dict:
+    total_mb, files = args.attachment_mb, 8
+    with tempfile.TemporaryDirectory(prefix="ppg_bench_att_") as tmp:
+        src_dir = os.path.join(tmp, "src")
+        os.makedirs(src_dir)
+        paths = []
+        for i in range(files):
+            path = os.path.join(src_dir, f"附件{i}.bin")
+            with open(path, "wb") as f:
+                f.write(os.urandom(total_mb * 1024 * 1024 // files))
+            paths.append(path)
+        store = AttachmentStore(os.path.join(tmp, "store"))
+        start = time.perf_counter()
+        store.put_files(paths, project_id=1)
+        first = time.perf_counter() - start
+        # 同样的内容再存一次：命中摘要缓存，只建硬链接
+        start = time.perf_counter()
+        store.put_files(paths, project_id=2)
+        dedup = time.perf_counter() - start
+    return _result(
+        "attachments", files, first,
+        mb=total_mb, mb_per_s=round(total_mb / first, 1), dedup_seconds=round(dedup, 4),
+    )
+
+
+CASE_FUNCS = {
+    "insert_project": case_insert_project,
+    "insert_many": case_insert_many,
+    "bulk_load": case_bulk_load,
+    "read_iter": case_read_iter,
+    "read_columns": case_read_columns,
+    "products": case_products,
+    "validate": case_validate,
+    "attachments": case_attachments,
+}
+
+
+def run_suite(backend_name: str, sizes, cases, args) -> dict:
+    import numpy  # noqa: F401  提前导入，避免首个列式读取用例计入导入耗时
+
+    results = []
+    with BACKENDS[backend_name]() as backend:
+        for rows in sizes:
+            loaded = False  # 表中是否已有本规模的 bulk_load 数据，读取用例可直接复用
+            for case in cases:
+                # 数据层每条写入都会打印提示，测量期间屏蔽
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    if case in READ_CASES:
+                        result = CASE_FUNCS[case](backend, rows, args, loaded=loaded)
+                    else:
+                        result = CASE_FUNCS[case](backend, rows, args)
+                if case in READ_CASES or case == "bulk_load":
+                    loaded = True
+                elif case in RESET_CASES:
+                    loaded = False
+                result["size"] = rows
+                results.append(result)
+                print(f"  {case:<16}{rows:>9} 行  {result['seconds']:>9.3f} s  {result['rows_per_s'] or 0:>12.0f} 行/秒")
+    return {"meta": environment(backend_name), "results": results}
+
+
+# ---------- 结果 ----------
+def _git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment(backend_name: str) -> dict:
+    import psycopg2
+    import pydantic
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "backend": backend_name,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pydantic": pydantic.VERSION,
+        "psycopg2": psycopg2.__version__.split()[0],
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """逐项（用例, 行数）比较吞吐，返回下降超过 tolerance 的项"""
+    old = {(r["case"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n对比基线（{baseline['meta'].get('revision')} @ {baseline['meta'].get('timestamp')}）")
+    for r in current["results"]:
+        before = old.get((r["case"], r["size"]))
+        if not before or not before.get("rows_per_s") or not r.get("rows_per_s"):
+            continue
+        ratio = r["rows_per_s"] / before["rows_per_s"]
+        flag = "  ⚠" if ratio < 1 - tolerance else ""
+        print(f"  {r['case']:<16}{r['size']:>9} 行  {ratio:>7.2f}x{flag}")
+        if flag:
+            regressions.append({"case": r["case"], "size": r["size"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="数据层与引擎基准测试")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="memory")
+    parser.add_argument("--rows", nargs="+", default=["1k"], help="数据规模，如 1k 100k 1m")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--single-inserts", type=int, default=2000, help="insert_project 最多执行的条数")
+    parser.add_argument("--attachment-mb", type=int, default=64, help="attachments 用例写入的总大小")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="结果 JSON 文件")
+    parser.add_argument("--compare", metavar="BASELINE", help="与旧结果 JSON 对比")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="允许的吞吐下降比例")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_rows(r) for r in args.rows]
+    print(f"后端 {args.backend}，规模 {', '.join(args.rows)}")
+    try:
+        report = run_suite(args.backend, sizes, args.cases, args)
+    except Exception as e:
+        print(f"❌ 基准测试失败：{e}")
+        return 1
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅结果已写入：{args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} 项吞吐下降超过 {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,8 +13,63 @@ DB_CONFIG = {
     "port": os.getenv("POSTGRES_PORT"),
 }
 
+# 数据库连接池配置（进程内共享，DB 与 DatabaseManager 共用）
+DB_POOL_CONFIG = {
+    "minconn": int(os.getenv("POSTGRES_POOL_MIN", "1")),
+    "maxconn": int(os.getenv("POSTGRES_POOL_MAX", "5")),
+    "idle_timeout": float(os.getenv("POSTGRES_POOL_IDLE_TIMEOUT", "300")),  # 秒
+    "health_check_interval": float(os.getenv("POSTGRES_POOL_HEALTH_CHECK", "30")),
+    "acquire_timeout": float(os.getenv("POSTGRES_POOL_ACQUIRE_TIMEOUT", "10")),
+}
+
+# 单条插入使用服务端 prepared statement（每个连接按列签名 prepare 一次）；
+# 经 PgBouncer 等事务级连接池访问数据库时需设置 PPG_PREPARED=0
+PREPARED_STATEMENTS = os.getenv("PPG_PREPARED", "1") != "0"
+
 # 默认主题
 DEFAULT_THEME = "dark"  # 可选: "light", "dark"
 
 # 项目根路径（用于资源定位）
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 本地数据目录（检索索引等），可通过 PPG_DATA_DIR 覆盖
+DATA_DIR = os.getenv("PPG_DATA_DIR", os.path.join(BASE_DIR, "data"))
+
+# 存储实现：postgres（默认）或 sqlite（本地单文件，离线 / 测试时使用），见 core/storage.py
+STORAGE_BACKEND = os.getenv("PPG_STORAGE", "postgres")
+SQLITE_PATH = os.getenv("PPG_SQLITE_PATH", os.path.join(DATA_DIR, "ppg.sqlite3"))
+
+# 本地只读副本（SQLite 文件）：设置后产品库、历史项目等只读查询读副本，
+# 用 python -m ppg.core.sqlite sync 从 PostgreSQL 同步；为空表示不使用
+READ_REPLICA_PATH = os.getenv("PPG_READ_REPLICA", "")
+
+# 产品库 / 历史项目的本地列式快照（python -m ppg.core.snapshot refresh 生成），存在时启动直接映射载入
+SNAPSHOT_DIR = os.getenv("PPG_SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshot"))
+
+# 产品部分负荷性能曲线（python -m ppg.core.curves import 导入），存在时能耗模拟按曲线计算
+CURVE_DIR = os.getenv("PPG_CURVE_DIR", os.path.join(DATA_DIR, "curves"))
+
+# 热点路径计时（core/metrics.py）：PPG_METRICS=0 关闭
+METRICS_ENABLED = os.getenv("PPG_METRICS", "1") != "0"
+# 慢操作日志（JSON Lines），为空表示只保留在内存中
+SLOW_LOG_PATH = os.getenv("PPG_SLOW_LOG", os.path.join(DATA_DIR, "slow_ops.jsonl"))
+# 慢操作阈值（毫秒）：按操作名、再按前缀（db.*）、最后按 default 匹配
+SLOW_THRESHOLDS_MS = {
+    "default": 200,
+    "db.*": 200,
+    "db.acquire": 100,
+    "db.commit": 100,
+    "file.*": 1000,
+}
+
+# 录入表单的本地写前日志（core/journal.py）：保存先写入这里，后台按批同步到数据库
+JOURNAL_PATH = os.getenv("PPG_JOURNAL", os.path.join(DATA_DIR, "journal", "projects.jsonl"))
+JOURNAL_SYNC_BATCH = int(os.getenv("PPG_JOURNAL_BATCH", "500"))  # 每次同步的最大条数
+JOURNAL_RETRY_MIN = float(os.getenv("PPG_JOURNAL_RETRY_MIN", "1"))  # 同步失败后的重试间隔（秒），逐次翻倍
+JOURNAL_RETRY_MAX = float(os.getenv("PPG_JOURNAL_RETRY_MAX", "60"))
+
+# 方案报告模板（JSON，结构同 core/report.py 中的 DEFAULT_TEMPLATE），为空时使用内置模板
+REPORT_TEMPLATE_PATH = os.getenv("PPG_REPORT_TEMPLATE", "")
+
+# 附件目录：blobs/ 下按内容哈希去重存储，<project_id>/ 下为指向 blob 的硬链接
+ATTACHMENT_DIR = os.getenv("PPG_ATTACHMENT_DIR", "save")
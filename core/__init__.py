@@ -1,9 +1,33 @@
 """
 核心逻辑模块
 包含数据库、模型、工具函数等
+
+本包不依赖 Qt，可在无显示环境中使用；导出符号按需导入，见 ppg/__init__.py
 """
+import importlib
+from typing import TYPE_CHECKING
+
+_LAZY_EXPORTS = {
+    "DatabaseManager": (".database", "DatabaseManager"),
+    "ProjectHisModel": (".models", "ProjectHisModel"),
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+    from .models import ProjectHisModel
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), attr)
+    globals()[name] = value
+    return value
 
-from .database import DatabaseManager
-from .models import ProjectHisModel
 
-__all__ = ["DatabaseManager", "ProjectHisModel"]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
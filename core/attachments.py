@@ -0,0 +1,196 @@
+# core/attachments.py
+"""
+附件内容寻址存储（按 SHA-256 去重）
+
+目录结构（ATTACHMENT_DIR，默认 save/）：
+    blobs/ab/abcdef...      每份内容只存一次，文件名即摘要
+    blobs/stat_cache.jsonl  (路径, 大小, 修改时间) → 摘要，未改动的文件无需重新计算哈希
+    <project_id>/文件名      指向 blob 的硬链接，保留原来按项目浏览的目录（不占额外空间）；
+                            同一项目中重名的附件依次命名为 "文件名 (2).扩展名" 等
+
+写入流程：摘要缓存命中且 blob 已存在时不读取文件；否则只读一遍，边计算摘要边写入临时文件，
+blob 已存在则删除临时文件，不存在则原子重命名为 blob。
+"""
+import hashlib
+import json
+import os
+import threading
+
+from ..config import ATTACHMENT_DIR
+from . import metrics
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+class AttachmentCancelled(Exception):
+    """写入过程中被取消"""
+
+
+class AttachmentStore:
+    def __init__(self, root: str = ATTACHMENT_DIR):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self._stat_cache = None
+        self._lock = threading.Lock()
+
+    # ---------- 路径 ----------
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def has_blob(self, digest: str) -> bool:
+        return os.path.exists(self.blob_path(digest))
+
+    # ---------- 摘要缓存 ----------
+    @property
+    def _stat_cache_path(self):
+        return os.path.join(self.blob_dir, "stat_cache.jsonl")
+
+    @staticmethod
+    def _stat_key(file_path: str) -> str:
+        st = os.stat(file_path)
+        return f"{os.path.realpath(file_path)}|{st.st_size}|{st.st_mtime_ns}"
+
+    def _load_stat_cache(self):
+        if self._stat_cache is not None:
+            return
+        self._stat_cache = {}
+        if os.path.exists(self._stat_cache_path):
+            with open(self._stat_cache_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        key, digest = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue
+                    self._stat_cache[key] = digest
+
+    def _cached_digest(self, file_path: str):
+        with self._lock:
+            self._load_stat_cache()
+            return self._stat_cache.get(self._stat_key(file_path))
+
+    def _remember_digest(self, file_path: str, digest: str):
+        key = self._stat_key(file_path)
+        with self._lock:
+            self._load_stat_cache()
+            if self._stat_cache.get(key) == digest:
+                return
+            self._stat_cache[key] = digest
+            os.makedirs(self.blob_dir, exist_ok=True)
+            with open(self._stat_cache_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps([key, digest], ensure_ascii=False) + "\n")
+
+    # ---------- 写入 ----------
+    def _stream(self, file_path, dst=None, on_chunk=None, is_cancelled=None) -> str:
+        """分块读取文件计算 SHA-256，dst 不为空时同时写入"""
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as src:
+            while True:
+                if is_cancelled and is_cancelled():
+                    raise AttachmentCancelled()
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha.update(chunk)
+                if dst is not None:
+                    dst.write(chunk)
+                if on_chunk:
+                    on_chunk(len(chunk))
+        return sha.hexdigest()
+
+    def put(self, file_path: str, on_chunk=None, is_cancelled=None) -> dict:
+        """
+        存入单个文件
+        :param on_chunk: 回调 on_chunk(本次处理的字节数)
+        :return: {"name", "sha256", "size", "copied"}，copied 为 False 表示内容已存在未复制
+        """
+        size = os.path.getsize(file_path)
+        digest = self._cached_digest(file_path)
+        copied = False
+        if digest is not None and self.has_blob(digest):
+            if on_chunk:
+                on_chunk(size)
+        else:
+            os.makedirs(self.blob_dir, exist_ok=True)
+            tmp_path = os.path.join(self.blob_dir, f"{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with metrics.timed("file.copy", detail=file_path), open(tmp_path, "wb") as dst:
+                    digest = self._stream(file_path, dst, on_chunk, is_cancelled)
+                    if not self.has_blob(digest):
+                        dst.flush()
+                        os.fsync(dst.fileno())
+                        copied = True
+                if copied:
+                    final_path = self.blob_path(digest)
+                    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                    os.replace(tmp_path, final_path)
+                    # blob 与项目目录下的硬链接共用同一份数据，设为只读防止被误改
+                    os.chmod(final_path, 0o444)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        self._remember_digest(file_path, digest)
+        return {
+            "name": os.path.basename(file_path),
+            "sha256": digest,
+            "size": size,
+            "copied": copied,
+        }
+
+    def put_files(
+        self, files: list, project_id=None, on_progress=None, is_cancelled=None
+    ) -> list:
+        """
+        存入一组附件，并在 <root>/<project_id>/ 下建立硬链接
+        :param on_progress: 回调 on_progress(已处理字节数, 总字节数, 当前文件名)
+        :param is_cancelled: 返回 True 时抛出 AttachmentCancelled
+        :return: 写入 file_attachments 的引用列表 [{"name", "sha256", "size"}]
+        """
+        files = [f for f in files if os.path.exists(f)]
+        # 每个文件最多读一遍
+        total = sum(os.path.getsize(f) for f in files)
+        done = 0
+        refs = []
+        for file_path in files:
+            name = os.path.basename(file_path)
+
+            def on_chunk(n, name=name):
+                nonlocal done
+                done += n
+                if on_progress:
+                    on_progress(min(done, total), total, name)
+
+            ref = self.put(file_path, on_chunk, is_cancelled)
+            if project_id is not None:
+                self.link(ref["sha256"], project_id, name)
+            refs.append({k: ref[k] for k in ("name", "sha256", "size")})
+        return refs
+
+    def link(self, digest: str, project_id, name: str):
+        """
+        在项目目录下创建指向 blob 的硬链接；文件系统不支持时跳过（引用已记录在数据库）
+        同名文件已链接到这份内容时直接复用（重放日志不会重复创建），
+        同名但内容不同时改用 "文件名 (2).扩展名" 等不冲突的名称，不覆盖已有附件
+        :return: 项目目录下实际使用的文件名，链接失败时为 None
+        """
+        project_dir = os.path.join(self.root, str(project_id))
+        os.makedirs(project_dir, exist_ok=True)
+        blob = self.blob_path(digest)
+        stem, ext = os.path.splitext(name)
+        candidate, n = name, 1
+        while True:
+            target = os.path.join(project_dir, candidate)
+            if not os.path.exists(target):
+                break
+            if os.path.samefile(target, blob):
+                return candidate
+            n += 1
+            candidate = f"{stem} ({n}){ext}"
+        try:
+            os.link(blob, target)
+        except OSError:
+            return None
+        return candidate
+
+    def open(self, digest: str, mode: str = "rb"):
+        return open(self.blob_path(digest), mode)
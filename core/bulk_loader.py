@@ -0,0 +1,178 @@
+# core/bulk_loader.py
+"""
+历史项目批量导入：CSV / JSONL / JSON 数组 → projects_his
+
+用法：
+    python -m ppg.core.bulk_loader projects.csv
+    python -m ppg.core.bulk_loader projects.jsonl --rejects bad_rows.jsonl --batch-size 2000
+    python -m ppg.core.bulk_loader projects.json     # [{...}, {...}]，也可以是每行一个对象
+
+文件按行流式读取，经 ProjectHisModel 校验后由 DB.bulk_insert_projects 分批 COPY 入库；
+校验失败或被数据库拒绝的行写入拒绝文件（JSONL），不会中断整个导入。
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from .models import ProjectHisModel
+from .storage import open_storage
+
+
+# 行中单元格少于表头时 DictReader 填入的占位值
+_MISSING = object()
+
+
+def read_csv(path: str, on_reject=None):
+    """
+    逐行读取 CSV（首行为字段名），空单元格视为 None
+    单元格数与表头不一致的行、csv 模块无法解析的行（如含 NUL 字符）交给 on_reject，不中断读取
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f, restval=_MISSING)
+        try:
+            reader.fieldnames  # 先读表头：表头出错时不能把下一行当作表头继续
+        except csv.Error as e:
+            if on_reject:
+                on_reject({"line": 1}, f"CSV 表头格式错误: {e}")
+            return
+        while True:
+            # 出错时 DictReader.line_num 不更新，读取位置看底层 reader
+            line_no = reader.reader.line_num
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                if on_reject:
+                    on_reject({"line": line_no + 1}, f"CSV 格式错误: {e}")
+                if reader.reader.line_num == line_no:
+                    break  # 读取位置没有前进，无法跳过这一行
+                continue
+            if None in row or _MISSING in row.values():
+                if on_reject:
+                    values = [v for k, v in row.items() if k is not None and v is not _MISSING] + row.get(None, [])
+                    on_reject(
+                        {"line": reader.line_num, "raw": values},
+                        f"单元格数（{len(values)}）与表头列数（{len(reader.fieldnames)}）不一致",
+                    )
+                continue
+            yield {
+                key.strip(): (value if value and value.strip() else None)
+                for key, value in row.items()
+                if key
+            }
+
+
+def read_jsonl(path: str, on_reject=None):
+    """逐行读取 JSONL，每行一个 JSON 对象；无法解析的行交给 on_reject"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                if on_reject:
+                    on_reject({"line": line_no, "raw": line.rstrip("\n")}, f"JSON 格式错误: {e}")
+                continue
+            if not isinstance(record, dict):
+                if on_reject:
+                    on_reject({"line": line_no, "raw": record}, "每行必须是 JSON 对象")
+                continue
+            yield record
+
+
+def read_json(path: str, on_reject=None):
+    """
+    读取 .json：以 [ 开头时按 JSON 数组整体解析（数组需要一次读入内存，大文件请用 JSONL），
+    否则按 JSONL 逐行读取；数组中不是对象的元素交给 on_reject
+    """
+    with open(path, encoding="utf-8") as f:
+        head = f.read(4096).lstrip("\ufeff \t\r\n")
+        if not head.startswith("["):
+            yield from read_jsonl(path, on_reject)
+            return
+        f.seek(0)
+        try:
+            records = json.loads(f.read().lstrip("\ufeff"))
+        except json.JSONDecodeError as e:
+            if on_reject:
+                on_reject({"path": path}, f"JSON 格式错误: {e}")
+            return
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            if on_reject:
+                on_reject({"index": index, "raw": record}, "数组元素必须是 JSON 对象")
+            continue
+        yield record
+
+
+def read_records(path: str, on_reject=None):
+    """按扩展名选择读取方式"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return read_csv(path, on_reject)
+    if ext in (".jsonl", ".ndjson"):
+        return read_jsonl(path, on_reject)
+    if ext == ".json":
+        return read_json(path, on_reject)
+    raise ValueError(f"不支持的文件类型：{ext}（仅支持 .csv / .jsonl / .ndjson / .json）")
+
+
+class RejectWriter:
+    """把被拒绝的行写入 JSONL 文件：{"error": ..., "record": ...}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def __call__(self, record, error: str):
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+        if isinstance(record, ProjectHisModel):
+            record = record.model_dump()
+        self._file.write(
+            json.dumps({"error": error, "record": record}, ensure_ascii=False, default=str)
+            + "\n"
+        )
+        self.count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="批量导入历史项目到 projects_his")
+    parser.add_argument("path", help="CSV、JSONL 或 JSON 数组文件")
+    parser.add_argument("--rejects", help="拒绝行输出文件，默认 <输入文件>.rejects.jsonl")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每批 COPY 行数")
+    args = parser.parse_args(argv)
+
+    rejects_path = args.rejects or args.path + ".rejects.jsonl"
+    with RejectWriter(rejects_path) as rejects, open_storage() as db:
+        if not db.conn:
+            return 1
+        inserted = db.bulk_insert_projects(
+            read_records(args.path, rejects),
+            batch_size=args.batch_size,
+            on_reject=rejects,
+        )
+
+    print(f"导入成功 {inserted} 条，拒绝 {rejects.count} 条")
+    if rejects.count:
+        print(f"拒绝行已写入：{rejects_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+# core/catalog.py
+"""
+产品库内存索引（智能产品选型助手的数据源）
+
+products 表一次性载入内存，按 category 分组存为列式 NumPy 数组：
+- 每个分类按 cooling_capacity_kw 排序，其余数值列按需生成排序索引
+- 区间条件用二分查找（np.searchsorted）定位，其余条件用向量化掩码过滤
+- refresh() 只拉取 updated_at 不早于水位线的行（与水位线同一时刻写入的行也不会漏掉），
+  按 id 去掉与缓存相同的行后重建受影响的分类
+- 有本地快照（core/snapshot）时启动先从快照载入，再用 refresh() 补齐快照之后的变化
+
+示例：
+    catalog = get_catalog()
+    chillers = catalog.query("冷水机组", cooling_capacity_kw=(400, 600),
+                             min_cop=5.5, max_noise_db=75, sort_by="price_cny")
+"""
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from .snapshot import open_snapshot
+from .storage import open_reader
+
+# 数值列：缺失值以 NaN 存储，比较运算时自动被排除
+NUMERIC_COLUMNS = [
+    "cooling_capacity_kw",
+    "heating_capacity_kw",
+    "power_kw",
+    "cop",
+    "noise_db",
+    "price_cny",
+    "energy_level",
+]
+PRIMARY_COLUMN = "cooling_capacity_kw"
+
+# 只用 PostgreSQL 与 SQLite 都支持的写法，数值类型转换与更新时间的缺省值在 _row 中处理
+_SELECT_SQL = """
+select id, name, category, brand, model_code,
+       cooling_capacity_kw, heating_capacity_kw, power_kw,
+       cop, noise_db, price_cny, energy_level,
+       tags, updated_at, created_at
+from products
+"""
+_ROW_FIELDS = ["id", "name", "category", "brand", "model_code"] + NUMERIC_COLUMNS + [
+    "tags",
+    "updated_at",
+    "created_at",
+]
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _row(values) -> dict:
+    row = dict(zip(_ROW_FIELDS, values))
+    for col in NUMERIC_COLUMNS:
+        if row[col] is not None:
+            row[col] = float(row[col])
+    created_at = row.pop("created_at")
+    row["updated_at"] = row["updated_at"] or created_at or _EPOCH
+    return row
+
+
+class CategoryColumns:
+    """单个分类的列式存储，行顺序按 cooling_capacity_kw 升序（缺失值排在最后）"""
+
+    def __init__(self, rows: list):
+        rows = sorted(
+            rows,
+            key=lambda r: (r[PRIMARY_COLUMN] is None, r[PRIMARY_COLUMN] or 0.0, r["id"]),
+        )
+        n = len(rows)
+        self.ids = np.fromiter((r["id"] for r in rows), dtype=np.int64, count=n)
+        self.names = np.array([r["name"] for r in rows], dtype=object)
+        self.model_codes = np.array([r["model_code"] for r in rows], dtype=object)
+        # 品牌做字典编码：brands[brand_codes[i]] 为第 i 行的品牌
+        self.brands, brand_codes = np.unique(
+            np.array([r["brand"] or "" for r in rows], dtype=object), return_inverse=True
+        )
+        self.brand_codes = brand_codes.astype(np.int32)
+        self.tags = [tuple(r["tags"] or ()) for r in rows]
+        self.numeric = {
+            col: np.array(
+                [np.nan if r[col] is None else r[col] for r in rows], dtype=np.float64
+            )
+            for col in NUMERIC_COLUMNS
+        }
+        self._order = {PRIMARY_COLUMN: np.arange(n)}
+        self._sorted = {PRIMARY_COLUMN: self.numeric[PRIMARY_COLUMN]}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def sorted_view(self, column: str):
+        """返回 (排序后的值, 对应行号)，首次使用时计算并缓存"""
+        if column not in self._order:
+            order = np.argsort(self.numeric[column], kind="stable")
+            self._order[column] = order
+            self._sorted[column] = self.numeric[column][order]
+        return self._sorted[column], self._order[column]
+
+    def range_positions(self, column: str, low=None, high=None) -> np.ndarray:
+        """二分查找 low <= column <= high 的行号（缺失值不命中）"""
+        values, order = self.sorted_view(column)
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        if high is None:
+            end = len(values) - int(np.isnan(values).sum())
+        else:
+            end = np.searchsorted(values, high, side="right")
+        return order[start:end]
+
+    def brand_code(self, brand: str) -> int:
+        pos = np.searchsorted(self.brands, brand)
+        if pos < len(self.brands) and self.brands[pos] == brand:
+            return int(pos)
+        return -1
+
+    def row(self, pos: int) -> dict:
+        row = {
+            "id": int(self.ids[pos]),
+            "name": self.names[pos],
+            "brand": self.brands[self.brand_codes[pos]] or None,
+            "model_code": self.model_codes[pos],
+            "tags": list(self.tags[pos]),
+        }
+        for col in NUMERIC_COLUMNS:
+            value = self.numeric[col][pos]
+            row[col] = None if np.isnan(value) else float(value)
+        return row
+
+
+class ProductCatalog:
+    def __init__(self):
+        self._rows = {}  # id -> 行数据
+        self._categories = {}  # category -> CategoryColumns
+        self._watermark = None  # 已载入数据中最大的 updated_at
+        self._id_of_code = {}  # model_code -> id
+        self._lock = threading.RLock()
+
+    # ---------- 载入与刷新 ----------
+    def _fetch(self, where: str = "", params=None) -> list:
+        with open_reader() as db:
+            if not db.conn:
+                raise ConnectionError("数据库连接失败，无法载入产品库")
+            return [_row(r) for r in db.fetch_all(_SELECT_SQL + where, params)]
+
+    def _product_count(self):
+        with open_reader() as db:
+            if not db.conn:
+                raise ConnectionError("数据库连接失败，无法刷新产品库")
+            return db.fetch_all("select count(*) from products")[0][0]
+
+    def load(self, rows: list = None):
+        """全量载入（rows 为空时从 products 表读取）"""
+        rows = self._fetch() if rows is None else rows
+        with self._lock:
+            self._rows = {r["id"]: r for r in rows}
+            self._rebuild(set(r["category"] for r in rows), full=True)
+        return len(rows)
+
+    def load_snapshot(self) -> bool:
+        """
+        从本地快照载入并从数据库补齐增量；没有快照时返回 False
+        数据库不可用时保留快照中的数据（离线使用）
+        """
+        snapshot = open_snapshot("products")
+        if snapshot is None:
+            return False
+        self.load([_row(r) for r in snapshot.rows(_ROW_FIELDS)])
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"❌ 产品库增量刷新失败，使用快照数据: {e}")
+        return True
+
+    def refresh(self) -> int:
+        """
+        增量刷新：拉取 updated_at 不早于水位线的行
+        用 >= 是因为水位线时刻可能有尚未载入的行（同一时间戳的多行跨两次刷新提交）；
+        重复拉到的已缓存行按 id 比较后丢弃
+        表中行数与缓存不一致（说明有删除）时退化为全量载入
+        :return: 变化的行数
+        """
+        if self._watermark is None:
+            return self.load()
+
+        fetched = self._fetch(
+            "where updated_at >= %s or (updated_at is null and created_at >= %s)",
+            (self._watermark, self._watermark),
+        )
+        with self._lock:
+            changed = [row for row in fetched if self._rows.get(row["id"]) != row]
+            affected = set()
+            for row in changed:
+                old = self._rows.get(row["id"])
+                if old is not None:
+                    affected.add(old["category"])
+                affected.add(row["category"])
+                self._rows[row["id"]] = row
+            if changed:
+                self._rebuild(affected)
+
+        if self._product_count() != len(self._rows):
+            return self.load()
+        return len(changed)
+
+    def _rebuild(self, categories: set, full: bool = False):
+        grouped = {c: [] for c in categories}
+        for row in self._rows.values():
+            if row["category"] in grouped:
+                grouped[row["category"]].append(row)
+
+        categories_ = {} if full else dict(self._categories)
+        for category, rows in grouped.items():
+            if rows:
+                categories_[category] = CategoryColumns(rows)
+            else:
+                categories_.pop(category, None)
+        self._categories = categories_
+        self._id_of_code = {r["model_code"]: r["id"] for r in self._rows.values()}
+        self._watermark = max(
+            (r["updated_at"] for r in self._rows.values()), default=datetime.min
+        )
+
+    # ---------- 查询 ----------
+    @property
+    def categories(self) -> list:
+        return sorted(self._categories, key=lambda c: (c is None, c or ""))
+
+    def columns(self, category: str) -> CategoryColumns:
+        """返回分类的列式数据，供选型等引擎直接做向量化计算"""
+        return self._categories.get(category)
+
+    def find(
+        self,
+        category: str,
+        cooling_capacity_kw: tuple = None,
+        heating_capacity_kw: tuple = None,
+        min_cop: float = None,
+        max_noise_db: float = None,
+        max_price_cny: float = None,
+        brand: str = None,
+        tags: list = None,
+        sort_by: str = "price_cny",
+        descending: bool = False,
+        limit: int = None,
+    ) -> np.ndarray:
+        """
+        按条件筛选，返回该分类 CategoryColumns 中的行号数组
+        区间参数为 (下限, 上限)，任一端可为 None
+        """
+        cols = self._categories.get(category)
+        if cols is None:
+            return np.empty(0, dtype=np.int64)
+
+        ranges = [
+            (col, bounds)
+            for col, bounds in (
+                ("cooling_capacity_kw", cooling_capacity_kw),
+                ("heating_capacity_kw", heating_capacity_kw),
+            )
+            if bounds is not None
+        ]
+        if ranges:
+            col, (low, high) = ranges[0]
+            positions = cols.range_positions(col, low, high)
+        else:
+            positions = np.arange(len(cols))
+
+        mask = np.ones(len(positions), dtype=bool)
+        for col, (low, high) in ranges[1:]:
+            values = cols.numeric[col][positions]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        if min_cop is not None:
+            mask &= cols.numeric["cop"][positions] >= min_cop
+        if max_noise_db is not None:
+            mask &= cols.numeric["noise_db"][positions] <= max_noise_db
+        if max_price_cny is not None:
+            mask &= cols.numeric["price_cny"][positions] <= max_price_cny
+        if brand is not None:
+            mask &= cols.brand_codes[positions] == cols.brand_code(brand)
+        positions = positions[mask]
+
+        if tags:
+            required = set(tags)
+            positions = positions[
+                np.fromiter(
+                    (required.issubset(cols.tags[p]) for p in positions),
+                    dtype=bool,
+                    count=len(positions),
+                )
+            ]
+
+        if sort_by:
+            key = cols.numeric[sort_by][positions]
+            # 取负实现降序，NaN 始终排在最后
+            positions = positions[np.argsort(-key if descending else key, kind="stable")]
+        if limit is not None:
+            positions = positions[:limit]
+        return positions
+
+    def product(self, product_id=None, model_code: str = None) -> dict:
+        """按 id 或型号编码取单个产品，不存在返回 None"""
+        with self._lock:
+            if product_id is None and model_code is not None:
+                product_id = self._id_of_code.get(model_code)
+            row = self._rows.get(product_id)
+            return dict(row) if row is not None else None
+
+    def query(self, category: str, **conditions) -> list:
+        """与 find 参数相同，返回行字典列表"""
+        with self._lock:
+            positions = self.find(category, **conditions)
+            cols = self._categories.get(category)
+            return [cols.row(p) for p in positions] if cols is not None else []
+
+
+# ---------- 进程级单例 ----------
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ProductCatalog:
+    """获取共享的产品库索引，首次调用时从快照或数据库全量载入"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = ProductCatalog()
+                if not catalog.load_snapshot():
+                    catalog.load()
+                _catalog = catalog
+    return _catalog
@@ -0,0 +1,344 @@
+# core/curves.py
+"""
+产品部分负荷性能曲线：COP 随负荷率与冷凝温度变化，供能耗模拟与选型使用
+
+每个型号一条曲线，存为固定网格上的 COP（float32，冷凝温度 × 负荷率 = 6 × 10）：
+    负荷率    LOAD_RATIOS      0.1, 0.2, … 1.0
+    冷凝温度  CONDENSER_TEMPS  15, 20, … 40 ℃（水冷为冷却水进水温度，风冷为室外干球温度）
+全部型号的曲线拼成一个 (n, 6, 10) 数组，按行号存取；网格等距，插值时直接算出所在格子，
+不做查找，四个角点一次取出后双线性插值，整批点一次数组运算完成。
+
+文件（CURVE_DIR，与 core/snapshot 相同按版本目录存放）：
+    v<N>/cop.npy      (n, 6, 10) float32，载入时内存映射
+    v<N>/models.json  型号列表、是否风冷与网格，行号与 cop.npy 对应
+    CURRENT           当前版本目录名；新版本写完后原子替换，读取方不会看到两个文件不配套的中间状态
+
+用法：
+    python -m ppg.core.curves import curves.csv [--replace]   # 导入厂家数据
+    python -m ppg.core.curves rated                           # 未导入曲线的产品按额定 COP 生成典型曲线
+    python -m ppg.core.curves show <型号>
+
+导入文件为 CSV，每行一个工况点：model_code, condenser_temp, load_ratio, cop[, air_cooled]；
+同一型号的工况点须构成完整的矩形网格（任意温度 × 任意负荷率），导入时重采样到上述固定网格，
+网格外按边界值取值。
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import threading
+
+import numpy as np
+
+from ..config import CURVE_DIR
+
+LOAD_RATIOS = np.linspace(0.1, 1.0, 10)
+CONDENSER_TEMPS = np.linspace(15.0, 40.0, 6)
+_RATIO_STEP = LOAD_RATIOS[1] - LOAD_RATIOS[0]
+_TEMP_STEP = CONDENSER_TEMPS[1] - CONDENSER_TEMPS[0]
+_NR = len(LOAD_RATIOS)
+_NT = len(CONDENSER_TEMPS)
+
+# 额定工况冷凝温度（℃）：水冷冷却水进水 30℃，风冷室外 35℃（GB/T 18430）
+RATED_TEMP_WATER = 30.0
+RATED_TEMP_AIR = 35.0
+# 典型曲线：冷凝温度每升高 1℃ COP 下降的比例
+TEMP_SLOPE = 0.025
+
+# IPLV（GB 50189-2015）：100% / 75% / 50% / 25% 负荷的权重与对应冷凝温度
+IPLV_LOADS = (1.0, 0.75, 0.5, 0.25)
+IPLV_WEIGHTS = (0.012, 0.328, 0.397, 0.261)
+IPLV_TEMPS_WATER = (30.0, 26.0, 23.0, 19.0)
+IPLV_TEMPS_AIR = (35.0, 31.5, 28.0, 24.5)
+
+# 水冷机组的冷却水进水温度按室外干球温度估算：室外 35℃ 时为 30℃，每降 1℃ 降 0.5℃，不低于 19℃
+_WATER_DESIGN_OUTDOOR = 35.0
+_WATER_SLOPE = 0.5
+_WATER_MIN = 19.0
+
+
+def rated_curves(cops, air_cooled=False) -> np.ndarray:
+    """
+    由额定 COP 生成典型曲线：负荷率按 energy.EIR_FPLR，冷凝温度按 TEMP_SLOPE 线性修正
+    :return: (n, 6, 10) float32
+    """
+    from .energy import EIR_FPLR
+
+    cops = np.asarray(cops, dtype=np.float64).reshape(-1, 1, 1)
+    rated_temp = np.where(np.asarray(air_cooled).reshape(-1, 1, 1), RATED_TEMP_AIR, RATED_TEMP_WATER)
+    a, b, c = EIR_FPLR
+    plr = LOAD_RATIOS.reshape(1, 1, -1)
+    part_load = plr / (a + b * plr + c * plr * plr)
+    temp = np.maximum(1 - TEMP_SLOPE * (CONDENSER_TEMPS.reshape(1, -1, 1) - rated_temp), 0.3)
+    return (cops * part_load * temp).astype(np.float32)
+
+
+def resample(condenser_temps, load_ratios, cop) -> np.ndarray:
+    """
+    矩形网格上的工况点 → 固定网格（先沿负荷率、再沿温度线性插值，网格外取边界值）
+    :param cop: (len(condenser_temps), len(load_ratios))，两个轴须递增
+    :return: (6, 10) float32
+    """
+    cop = np.asarray(cop, dtype=np.float64)
+    rows = np.array([np.interp(LOAD_RATIOS, load_ratios, row) for row in cop])
+    grid = np.array([np.interp(CONDENSER_TEMPS, condenser_temps, rows[:, k]) for k in range(_NR)]).T
+    return grid.astype(np.float32)
+
+
+class CurveStore:
+    """全部型号的曲线；cop 为 (n, 6, 10) 数组（可以是内存映射），行号即曲线编号"""
+
+    def __init__(self, models: list, cop: np.ndarray, air_cooled=None):
+        cop = np.asarray(cop, dtype=np.float32)
+        if cop.shape != (len(models), _NT, _NR):
+            raise ValueError(f"曲线数组形状 {cop.shape} 与型号数 {len(models)} 或网格不一致")
+        self.models = list(models)
+        self.cop_grid = cop
+        self.air_cooled = np.zeros(len(models), dtype=bool) if air_cooled is None else np.asarray(air_cooled, bool)
+        self._flat = cop.reshape(-1)
+        self._index = {code: i for i, code in enumerate(self.models)}
+
+    def __len__(self):
+        return len(self.models)
+
+    def index(self, model_codes) -> np.ndarray:
+        """型号 → 行号，没有曲线的为 -1"""
+        if isinstance(model_codes, str):
+            return np.int64(self._index.get(model_codes, -1))
+        return np.fromiter((self._index.get(m, -1) for m in model_codes), dtype=np.int64)
+
+    def cop(self, index, load_ratio, condenser_temp) -> np.ndarray:
+        """
+        双线性插值求 COP，三个参数按 NumPy 规则广播（如 (n, 1) 的行号 × (n, h) 的负荷率 × (h,) 的温度）
+        超出网格的负荷率与温度按边界值计算；行号为 -1（没有曲线）或负荷率 / 温度为 NaN 的点结果为 NaN
+        """
+        index = np.asarray(index, dtype=np.int64)
+        load_ratio = np.asarray(load_ratio, dtype=np.float64)
+        condenser_temp = np.asarray(condenser_temp, dtype=np.float64)
+        invalid = (index < 0) | np.isnan(load_ratio) | np.isnan(condenser_temp)
+        if invalid.any():
+            # 先换成有效值再取数（NaN 转整数会得到极小值，-1 会读到最后一个型号的曲线），最后把这些点置为 NaN
+            index = np.maximum(index, 0)
+            load_ratio = np.nan_to_num(load_ratio, nan=LOAD_RATIOS[-1])
+            condenser_temp = np.nan_to_num(condenser_temp, nan=CONDENSER_TEMPS[0])
+        # 网格坐标（以格为单位）：整数部分为所在格子，小数部分为格内位置
+        x = np.clip((load_ratio - LOAD_RATIOS[0]) / _RATIO_STEP, 0, _NR - 1)
+        t = np.clip((condenser_temp - CONDENSER_TEMPS[0]) / _TEMP_STEP, 0, _NT - 1)
+        i = np.minimum(x.astype(np.int64), _NR - 2)
+        j = np.minimum(t.astype(np.int64), _NT - 2)
+        x = x - i
+        t = t - j
+        base = index * (_NT * _NR) + j * _NR + i
+        flat = self._flat
+        low = flat[base]
+        low = low + (flat[base + 1] - low) * x
+        high = flat[base + _NR]
+        high = high + (flat[base + _NR + 1] - high) * x
+        result = low + (high - low) * t
+        if invalid.any():
+            result = np.where(invalid, np.nan, result)
+        return result
+
+    def condenser_temp(self, index, outdoor_temp) -> np.ndarray:
+        """室外干球温度 → 冷凝温度：风冷机组即室外温度，水冷机组按 _WATER_* 估算冷却水进水温度"""
+        outdoor_temp = np.asarray(outdoor_temp, dtype=np.float64)
+        water = np.maximum(RATED_TEMP_WATER - _WATER_SLOPE * (_WATER_DESIGN_OUTDOOR - outdoor_temp), _WATER_MIN)
+        return np.where(self.air_cooled[index], outdoor_temp, water)
+
+    def iplv(self, index=None) -> np.ndarray:
+        """综合部分负荷性能系数（GB 50189-2015），index 为空时计算全部型号"""
+        index = np.arange(len(self)) if index is None else np.asarray(index, dtype=np.int64)
+        temps = np.where(self.air_cooled[index, None], IPLV_TEMPS_AIR, IPLV_TEMPS_WATER)
+        cops = self.cop(index[:, None], IPLV_LOADS, temps)
+        return cops @ np.asarray(IPLV_WEIGHTS)
+
+    def merge(self, other: "CurveStore", replace: bool = False) -> "CurveStore":
+        """合并另一组曲线：同型号以 other 为准；replace 为 True 时只保留 other"""
+        if replace:
+            return other
+        keep = [i for i, m in enumerate(self.models) if m not in other._index]
+        return CurveStore(
+            [self.models[i] for i in keep] + other.models,
+            np.concatenate([self.cop_grid[keep], other.cop_grid]),
+            np.concatenate([self.air_cooled[keep], other.air_cooled]),
+        )
+
+    # ---------- 文件 ----------
+    def save(self, path: str = CURVE_DIR) -> str:
+        """
+        写入新版本目录 v<N>（cop.npy 与 models.json），写完后原子切换 CURRENT，再删除旧版本
+        :return: 新版本目录
+        """
+        os.makedirs(path, exist_ok=True)
+        versions = [int(e[1:]) for e in os.listdir(path) if e.startswith("v") and e[1:].isdigit()]
+        name = f"v{max(versions, default=0) + 1}"
+        tmp_dir = os.path.join(path, f".{name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, "cop.npy"), np.ascontiguousarray(self.cop_grid, dtype=np.float32))
+        meta = {
+            "load_ratios": LOAD_RATIOS.tolist(),
+            "condenser_temps": CONDENSER_TEMPS.tolist(),
+            "models": self.models,
+            "air_cooled": self.air_cooled.tolist(),
+        }
+        with open(os.path.join(tmp_dir, "models.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_dir, os.path.join(path, name))
+
+        current_tmp = os.path.join(path, "CURRENT.tmp")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(current_tmp, os.path.join(path, "CURRENT"))
+
+        # 旧版本可能仍被其他进程映射：POSIX 下删除不影响已打开的映射，其他平台删不掉时留到下次
+        for entry in os.listdir(path):
+            if entry.startswith("v") and entry != name:
+                shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+        for legacy in ("cop.npy", "models.json"):
+            if os.path.exists(os.path.join(path, legacy)):
+                os.remove(os.path.join(path, legacy))
+        return os.path.join(path, name)
+
+    @classmethod
+    def load(cls, path: str = CURVE_DIR):
+        """从 CURVE_DIR 的当前版本载入（cop.npy 内存映射），没有曲线文件返回 None"""
+        try:
+            with open(os.path.join(path, "CURRENT"), encoding="utf-8") as f:
+                version_dir = os.path.join(path, f.read().strip())
+        except FileNotFoundError:
+            version_dir = path  # 早期版本直接写在 CURVE_DIR 下
+        meta_path = os.path.join(version_dir, "models.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if not (
+            np.allclose(meta["load_ratios"], LOAD_RATIOS) and np.allclose(meta["condenser_temps"], CONDENSER_TEMPS)
+        ):
+            raise ValueError(f"曲线文件的网格与当前版本不一致，请重新导入：{path}")
+        cop = np.load(os.path.join(version_dir, "cop.npy"), mmap_mode="r")
+        return cls(meta["models"], cop, meta["air_cooled"])
+
+    @classmethod
+    def from_points(cls, records, on_reject=None) -> "CurveStore":
+        """
+        由工况点生成曲线
+        :param records: 可迭代的 dict，键 model_code / condenser_temp / load_ratio / cop / air_cooled（可选）
+        :param on_reject: 回调 on_reject(model_code, error)，接收工况点不完整的型号
+        """
+        points = {}
+        air = {}
+        for r in records:
+            code = str(r["model_code"]).strip()
+            points.setdefault(code, {})[(float(r["condenser_temp"]), float(r["load_ratio"]))] = float(r["cop"])
+            if str(r.get("air_cooled") or "").strip().lower() in ("1", "true", "yes", "风冷"):
+                air[code] = True
+
+        models, grids = [], []
+        for code, values in points.items():
+            temps = sorted({t for t, _ in values})
+            ratios = sorted({x for _, x in values})
+            if len(values) != len(temps) * len(ratios):
+                if on_reject:
+                    on_reject(code, f"工况点不完整：{len(temps)} 个温度 × {len(ratios)} 个负荷率，只有 {len(values)} 个点")
+                continue
+            grid = [[values[(t, x)] for x in ratios] for t in temps]
+            if min(min(row) for row in grid) <= 0:
+                if on_reject:
+                    on_reject(code, "COP 须大于 0")
+                continue
+            models.append(code)
+            grids.append(resample(temps, ratios, grid))
+        cop = np.array(grids, dtype=np.float32).reshape(len(models), _NT, _NR)
+        return cls(models, cop, [air.get(code, False) for code in models])
+
+
+# ---------- 进程级单例 ----------
+_curves = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def get_curves():
+    """进程内共享的曲线（CURVE_DIR），没有导入过曲线时返回 None"""
+    global _curves, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                try:
+                    _curves = CurveStore.load()
+                except Exception as e:
+                    print(f"❌ 部分负荷曲线载入失败，按额定 COP 计算：{e}")
+                    _curves = None
+                _loaded = True
+    return _curves
+
+
+def reload_curves():
+    """曲线文件更新后重新载入"""
+    global _loaded
+    with _lock:
+        _loaded = False
+    return get_curves()
+
+
+def _is_air_cooled(product: dict) -> bool:
+    text = f"{product.get('category') or ''}{product.get('name') or ''}"
+    return "风冷" in text or "多联" in text
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="产品部分负荷性能曲线")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="从 CSV 导入厂家曲线")
+    imp.add_argument("path")
+    imp.add_argument("--replace", action="store_true", help="清空已有曲线后导入")
+    sub.add_parser("rated", help="未导入曲线的产品按额定 COP 生成典型曲线")
+    show = sub.add_parser("show", help="查看型号的曲线与 IPLV")
+    show.add_argument("model_code")
+    args = parser.parse_args(argv)
+
+    current = CurveStore.load() or CurveStore([], np.zeros((0, _NT, _NR), np.float32))
+    if args.command == "show":
+        i = int(current.index(args.model_code))
+        if i < 0:
+            print(f"❌ 没有型号 {args.model_code} 的曲线")
+            return 1
+        print(f"{args.model_code}（{'风冷' if current.air_cooled[i] else '水冷'}）IPLV {current.iplv([i])[0]:.2f}")
+        print("温度\\负荷率 " + " ".join(f"{x:>5.1f}" for x in LOAD_RATIOS))
+        for t, row in zip(CONDENSER_TEMPS, current.cop_grid[i]):
+            print(f"{t:>10.0f}  " + " ".join(f"{v:>5.2f}" for v in row))
+        return 0
+
+    if args.command == "import":
+        rejected = []
+        with open(args.path, encoding="utf-8-sig", newline="") as f:
+            new = CurveStore.from_points(csv.DictReader(f), lambda code, error: rejected.append((code, error)))
+        for code, error in rejected:
+            print(f"❌ {code}: {error}")
+    else:
+        from .catalog import get_catalog
+
+        catalog = get_catalog()
+        products = [
+            p
+            for category in catalog.categories
+            for p in catalog.query(category)
+            if p.get("cop") and p.get("model_code") and int(current.index(p["model_code"])) < 0
+        ]
+        air = [_is_air_cooled(p) for p in products]
+        new = CurveStore([p["model_code"] for p in products], rated_curves([p["cop"] for p in products], air), air)
+
+    store = current.merge(new, replace=getattr(args, "replace", False))
+    store.save()
+    print(f"✅曲线已保存：新增或更新 {len(new)} 个型号，共 {len(store)} 个（{CURVE_DIR}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
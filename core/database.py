@@ -1,9 +1,8 @@
 # core/database.py
-import psycopg2
-from psycopg2.extras import Json
-from psycopg2 import sql
-from ..config import DB_CONFIG
 from .models import ProjectHisModel
+from .pgsql import execute_insert
+from .storage import notify_inserted
+from .pool import get_pool
 
 
 class DatabaseManager:
@@ -12,55 +11,40 @@ class DatabaseManager:
 
     def connect(self):
         try:
-            self.conn = psycopg2.connect(**DB_CONFIG)
+            self.conn = get_pool().getconn()
             return True
         except Exception as e:
             print(f"❌ 数据库连接失败: {e}")
             return False
 
     def close(self):
+        # 归还连接池而不是真正关闭
         if self.conn:
-            self.conn.close()
+            get_pool().putconn(self.conn)
+            self.conn = None
 
-    def insert_project(self, project: ProjectHisModel) -> bool:
+    def insert_project(self, project: ProjectHisModel):
         """
-        插入一条项目记录
+        插入一条项目记录（与 DB.insert_project 共用缓存的语句）
+        :return: 新记录的 id，失败返回 None
         """
         if not self.conn:
             if not self.connect():
-                return False
+                return None
 
         cursor = self.conn.cursor()
-
-        # 构建字段和值
-        fields = []
-        values = []
-        placeholders = []
-
-        for field_name, value in project.dict().items():
-            if value is not None:  # 只插入非空字段（或根据需求调整）
-                fields.append(field_name)
-                if field_name in ["selected_products", "file_attachments"]:
-                    values.append(Json(value))
-                else:
-                    values.append(value)
-                placeholders.append("%s")
-
-        query = sql.SQL("INSERT INTO projects_his ({}) VALUES ({})").format(
-            sql.SQL(", ").join(map(sql.Identifier, fields)),
-            sql.SQL(", ").join(sql.Placeholder() * len(fields)),
-        )
-
         try:
-            cursor.execute(query, values)
+            project_id = execute_insert(cursor, project)
             self.conn.commit()
-            cursor.close()
-            return True
+            notify_inserted(project_id, project)
+            return project_id
         except Exception as e:
             print(f"❌ 插入失败: {e}")
-            self.conn.rollback()
+            if not self.conn.closed:
+                self.conn.rollback()
+            return None
+        finally:
             cursor.close()
-            return False
 
     def __enter__(self):
         self.connect()
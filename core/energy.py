@@ -0,0 +1,639 @@
+# core/energy.py
+"""
+全年 8760 小时能耗模拟（annual_energy_consumption_kwh）
+
+流程（全部为整年数组运算，不逐小时循环）：
+1. 逐时气象：优先读取 data/weather/<城市>.epw，没有时按气候参数表生成典型年
+   （年周期 + 日周期 + 按城市固定种子的逐日扰动，平均温度按 HDD18 校准）
+2. 逐时负荷：设计负荷 × 室外温度线性比例 × 建筑类型运行时间表
+3. 设备：由 selected_products 汇总制冷/制热容量、台数和额定 COP，按台数分级加载，
+   部分负荷效率用 DOE-2 EIR-fPLR 曲线修正；主机导入了部分负荷曲线（core/curves.py）时
+   改按曲线取逐时 COP（负荷率 × 冷凝温度）；无热泵时按锅炉效率折算供热能耗
+4. 全年电耗 = 制冷耗电 + 供热能耗（水泵、风机等输配能耗不计入）
+
+批量模式按 (城市, 建筑类型) 分组切块，块内共用逐时负荷率曲线并只计算有负荷的小时，
+用 ProcessPoolExecutor 在多核上并行模拟。
+
+用法：
+    python -m ppg.core.energy                # 模拟全部历史项目并输出统计
+    python -m ppg.core.energy --write        # 回填缺失的 annual_energy_consumption_kwh
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from ..config import DATA_DIR
+from .curves import get_curves
+from .loads import (
+    BUILDING_LOAD_INDEX,
+    building_type_code,
+    estimate_loads_batch,
+    load_climate_table,
+)
+from .models import ProjectHisModel
+from .storage import open_storage, open_reader
+
+HOURS = 8760
+WEATHER_DIR = os.path.join(DATA_DIR, "weather")
+
+# 典型年生成参数（℃）
+DAILY_SWING = 8.0  # 日较差
+DAY_NOISE_STD = 2.5  # 逐日扰动标准差
+DAY_NOISE_SMOOTH = 3  # 扰动平滑天数
+COLDEST_DAY = 15  # 1 月中旬最冷
+PEAK_HOUR = 15  # 下午 3 点最热
+
+# 负荷平衡点温度：高于/低于该温度开始需要制冷/供热
+COOLING_BALANCE = 20.0
+HEATING_BALANCE = 15.0
+
+# 缺省设备参数（未选型或产品缺少参数时使用）
+DEFAULT_COOLING_COP = 5.0
+DEFAULT_UNITS = 2
+BOILER_EFFICIENCY = 0.9
+
+# DOE-2 电动冷水机组 EIR-fPLR 曲线：EIR(plr)/EIR(1) = a + b·plr + c·plr²
+EIR_FPLR = (0.17149273, 0.58820208, 0.23737257)
+MIN_PLR = 0.1  # 低于最小负荷率时启停运行
+
+# 建筑类型运行时间表：(开始小时, 结束小时, 每周运行天数, 非运行时段负荷系数, 是否有寒暑假)
+OPERATING_SCHEDULES = {
+    "写字楼": (8, 18, 5, 0.0, False),
+    "医院": (7, 20, 7, 0.6, False),
+    "酒店": (0, 24, 7, 1.0, False),
+    "商场": (9, 22, 7, 0.0, False),
+    "学校": (8, 17, 5, 0.0, True),
+    "工厂": (8, 20, 6, 0.0, False),
+    "住宅": (18, 8, 7, 0.3, False),  # 跨零点
+    "餐饮": (10, 22, 7, 0.0, False),
+    "影剧院": (10, 23, 7, 0.0, False),
+    "体育馆": (9, 21, 7, 0.0, False),
+}
+DEFAULT_SCHEDULE = (8, 18, 7, 0.0, False)
+# 寒暑假（一年中的第几天，含起止）
+VACATIONS = ((20, 50), (195, 243))
+
+RESULT_FIELDS = [
+    "annual_energy_consumption_kwh",
+    "cooling_electricity_kwh",
+    "heating_energy_kwh",
+    "cooling_load_kwh",
+    "heating_load_kwh",
+    "unmet_cooling_hours",
+    "unmet_heating_hours",
+    "seasonal_cooling_cop",
+]
+
+_HOUR = np.arange(HOURS)
+_DAY = _HOUR // 24
+_HOUR_OF_DAY = _HOUR % 24
+
+
+# ---------- 逐时气象 ----------
+def read_epw(path: str) -> np.ndarray:
+    """读取 EnergyPlus 气象文件的干球温度列（8 行文件头之后，第 7 列）"""
+    temps = np.loadtxt(path, delimiter=",", skiprows=8, usecols=6, dtype=np.float64)
+    if len(temps) < HOURS:
+        raise ValueError(f"气象文件不足 {HOURS} 小时：{path}")
+    return temps[:HOURS]
+
+
+def synthetic_weather(city: str, climate: dict) -> np.ndarray:
+    """
+    按气候参数生成典型年逐时干球温度
+    年振幅取使"平均温度 + 振幅 + 日较差/2 + 1 倍扰动"等于夏季空调室外计算干球温度，
+    再用二分法调整年平均温度，使 HDD18 与气候参数表一致
+    """
+    rng = np.random.default_rng(zlib.crc32(city.encode("utf-8")))
+    noise = rng.normal(0, 1, 365 + DAY_NOISE_SMOOTH - 1)
+    noise = np.convolve(noise, np.ones(DAY_NOISE_SMOOTH) / DAY_NOISE_SMOOTH, mode="valid")
+    noise = np.clip(noise / noise.std(), -2.5, 2.5) * DAY_NOISE_STD
+    shape = -np.cos(2 * np.pi * (np.arange(365) - COLDEST_DAY) / 365)
+    peak = climate["summer_ac_db"] - DAILY_SWING / 2 - DAY_NOISE_STD
+
+    def daily_mean(mean):
+        return mean + max(peak - mean, 1.0) * shape + noise
+
+    mean = (climate["summer_ac_db"] + climate["winter_ac_db"]) / 2
+    hdd = climate["hdd18"]
+    if hdd > 0:
+        low, high = -30.0, min(peak, 40.0)
+        for _ in range(50):
+            mid = (low + high) / 2
+            if np.maximum(18.0 - daily_mean(mid), 0).sum() > hdd:
+                low = mid
+            else:
+                high = mid
+        mean = (low + high) / 2
+
+    daily = DAILY_SWING / 2 * np.cos(2 * np.pi * (_HOUR_OF_DAY - PEAK_HOUR) / 24)
+    return daily_mean(mean)[_DAY] + daily
+
+
+@lru_cache(maxsize=64)
+def _weather_year(city: str) -> np.ndarray:
+    path = os.path.join(WEATHER_DIR, f"{city}.epw")
+    if os.path.exists(path):
+        temps = read_epw(path)
+    else:
+        climate = load_climate_table().get(city)
+        if climate is None:
+            raise ValueError(f"未收录城市的气候参数：{city}")
+        temps = synthetic_weather(climate["city"], climate)
+    temps.setflags(write=False)
+    return temps
+
+
+def weather_year(city: str) -> np.ndarray:
+    """城市全年逐时干球温度（8760 个值，只读，进程内缓存）"""
+    climate = load_climate_table().get(city)
+    return _weather_year(climate["city"] if climate else str(city).strip())
+
+
+@lru_cache(maxsize=None)
+def operating_schedule(type_code: int) -> np.ndarray:
+    """建筑类型全年逐时负荷系数（0~1），1 月 1 日按周一计"""
+    names = list(BUILDING_LOAD_INDEX)
+    name = names[type_code] if type_code < len(names) else None
+    start, end, days, off_factor, vacation = OPERATING_SCHEDULES.get(name, DEFAULT_SCHEDULE)
+
+    if start < end:
+        in_hours = (_HOUR_OF_DAY >= start) & (_HOUR_OF_DAY < end)
+    else:
+        in_hours = (_HOUR_OF_DAY >= start) | (_HOUR_OF_DAY < end)
+    working_day = (_DAY % 7) < days
+    if vacation:
+        for first, last in VACATIONS:
+            working_day &= ~((_DAY >= first) & (_DAY <= last))
+
+    schedule = np.where(in_hours & working_day, 1.0, off_factor)
+    schedule.setflags(write=False)
+    return schedule
+
+
+# ---------- 设备 ----------
+def selection_items(selected) -> list:
+    """
+    selected_products → 设备条目列表
+    支持 select_equipment 的结果（含 items）、条目列表、{"items": {型号: {"数量", "单价"}}}
+    以及 {"主机": 型号, "数量": n} 简写
+    """
+    if isinstance(selected, dict):
+        items = selected.get("items")
+        if isinstance(items, list):
+            return [item for item in items if isinstance(item, dict)]
+        if isinstance(items, dict):
+            return [
+                dict(value, model_code=key) if isinstance(value, dict) else {"model_code": key}
+                for key, value in items.items()
+            ]
+        if selected.get("model_code") or selected.get("主机"):
+            return [selected]
+    elif isinstance(selected, list):
+        return [item for item in selected if isinstance(item, dict)]
+    return []
+
+
+def equipment_from_selection(selected, catalog=None) -> dict:
+    """
+    由 selected_products 汇总设备参数（条目写法见 selection_items）；
+    条目缺少容量/COP 时按 product_id 或 model_code 从产品库补全
+    :return: cooling_unit_kw / cooling_units / cooling_cop / heating_unit_kw / heating_units / heating_cop，
+             缺失为 NaN 或 0；cooling_curve 为制冷容量最大的型号在 get_curves() 中的行号，没有曲线为 -1
+    """
+    totals = {"cooling": [0.0, 0, 0.0], "heating": [0.0, 0, 0.0]}  # 容量, 台数, 容量×COP
+    main_model, main_kw = None, 0.0
+    for item in selection_items(selected):
+        item = dict(item)
+        item.setdefault("model_code", item.get("主机"))
+        qty = item.get("running_qty") or item.get("qty") or item.get("数量") or 1
+        if catalog is not None and (
+            item.get("cooling_capacity_kw") is None or item.get("cop") is None
+        ):
+            product = catalog.product(item.get("product_id"), item.get("model_code"))
+            for key, value in (product or {}).items():
+                if item.get(key) is None:
+                    item[key] = value
+
+        cop = item.get("cop")
+        for mode in ("cooling", "heating"):
+            capacity = item.get(f"{mode}_capacity_kw")
+            if not capacity:
+                continue
+            mode_cop = item.get(f"{mode}_cop") or cop
+            if not mode_cop and item.get("power_kw"):
+                mode_cop = capacity / item["power_kw"]
+            mode_cop = mode_cop or (DEFAULT_COOLING_COP if mode == "cooling" else np.nan)
+            totals[mode][0] += capacity * qty
+            totals[mode][1] += qty
+            totals[mode][2] += capacity * qty * mode_cop
+            if mode == "cooling" and capacity * qty > main_kw:
+                main_model, main_kw = item.get("model_code"), capacity * qty
+
+    result = {}
+    for mode, (capacity, units, weighted_cop) in totals.items():
+        result[f"{mode}_unit_kw"] = capacity / units if units else np.nan
+        result[f"{mode}_units"] = units
+        result[f"{mode}_cop"] = weighted_cop / capacity if capacity else np.nan
+    curves = get_curves() if main_model else None
+    result["cooling_curve"] = int(curves.index(main_model)) if curves is not None else -1
+    return result
+
+
+# ---------- 模拟核心 ----------
+def load_profiles(temps, schedule, cooling_design_temp, heating_design_temp):
+    """
+    逐时负荷率（占设计负荷的比例）= 室外温度线性比例 × 运行系数
+    只与城市和建筑类型有关，同城同类型的项目可共用
+    :return: (cooling_profile, heating_profile)
+    """
+    cooling = np.clip(
+        (temps - COOLING_BALANCE) / (cooling_design_temp - COOLING_BALANCE), 0, 1
+    )
+    heating = np.clip(
+        (HEATING_BALANCE - temps) / (HEATING_BALANCE - heating_design_temp), 0, 1
+    )
+    return cooling * schedule, heating * schedule
+
+
+def _part_load(load, unit_kw, units, cop, linear=None, curve=None):
+    """
+    按台数分级加载计算输入能耗
+    运行台数 = ceil(负荷 / 单台容量)，每台负荷率 plr 相同，
+    输入功率 = 运行容量 × EIR-fPLR(plr) / COP，展开后避免单独计算 plr 数组；
+    plr 低于 MIN_PLR 时按启停运行，功率与负荷成正比
+    :param load: (n, h) 逐时负荷，其余参数为 (n, 1)
+    :param linear: 为 True 的行效率不随负荷率变化（锅炉）
+    :param curve: (CurveStore, 曲线行号 (n, 1), 逐时室外温度)，行号 >= 0 的行按曲线插值取逐时 COP，
+                  不再使用 EIR-fPLR 与额定 COP；启停运行时按 MIN_PLR 处的 COP 计算
+    :return: (满足的负荷, 输入能耗)
+    """
+    served = np.minimum(load, unit_kw * units)
+    running_kw = np.clip(np.ceil(served / unit_kw), 1, units) * unit_kw
+    a, b, c = EIR_FPLR
+    power = a * running_kw + b * served + c * served * served / running_kw
+    low_rate = (a + b * MIN_PLR + c * MIN_PLR**2) / MIN_PLR
+    power = np.where(served <= MIN_PLR * unit_kw, served * low_rate, power)
+    if linear is not None:
+        power = np.where(linear, served, power)
+    power /= cop
+    if curve is not None:
+        curves, index, outdoor = curve
+        rows = np.flatnonzero(index[:, 0] >= 0)
+        if len(rows):
+            if np.ndim(outdoor) == 2:
+                outdoor = outdoor[rows]
+            plr = np.maximum(served[rows] / running_kw[rows], MIN_PLR)
+            condenser = curves.condenser_temp(index[rows], outdoor)
+            power[rows] = served[rows] / curves.cop(index[rows], plr, condenser)
+    return served, power
+
+
+def simulate_arrays(
+    cooling_profile,
+    heating_profile,
+    cooling_design_kw,
+    heating_design_kw,
+    cooling_unit_kw,
+    cooling_units,
+    cooling_cop,
+    heating_unit_kw,
+    heating_units,
+    heating_cop,
+    hourly: bool = False,
+    cooling_curve=None,
+    outdoor_temp=None,
+) -> dict:
+    """
+    向量化模拟 n 个项目
+    :param cooling_profile / heating_profile: load_profiles 的结果，(n, 8760)，
+           或所有项目共用的一维数组（此时只计算负荷率大于 0 的小时）
+    :param 其余参数: 长度为 n 的数组；缺少制热设备（heating_units 为 0）时按锅炉计算
+    :param hourly: 是否返回逐时数组（cooling_load / heating_load / cooling_power / heating_power）
+    :param cooling_curve: 制冷主机的曲线行号（equipment_from_selection 的 cooling_curve，-1 或 NaN 为无曲线）
+    :param outdoor_temp: 逐时室外干球温度，形状同 cooling_profile；与 cooling_curve 同时给出时按曲线计算
+    :return: RESULT_FIELDS 对应的长度为 n 的数组
+    """
+
+    def col(values):
+        return np.asarray(values, dtype=np.float64).reshape(-1, 1)
+
+    cooling_profile = np.asarray(cooling_profile)
+    heating_profile = np.asarray(heating_profile)
+    if not hourly:
+        if cooling_profile.ndim == 1:
+            if outdoor_temp is not None:
+                outdoor_temp = np.asarray(outdoor_temp)[cooling_profile > 0]
+            cooling_profile = cooling_profile[cooling_profile > 0]
+        if heating_profile.ndim == 1:
+            heating_profile = heating_profile[heating_profile > 0]
+
+    cooling_design_kw = np.nan_to_num(col(cooling_design_kw))
+    heating_design_kw = np.nan_to_num(col(heating_design_kw))
+    cooling_load = cooling_design_kw * cooling_profile
+    heating_load = heating_design_kw * heating_profile
+
+    # 未选型时按设计负荷、缺省台数和 COP 配置
+    cooling_units = col(cooling_units)
+    no_cooling = ~(cooling_units > 0)
+    cooling_unit_kw = np.where(no_cooling, cooling_design_kw / DEFAULT_UNITS, col(cooling_unit_kw))
+    cooling_units = np.where(no_cooling, DEFAULT_UNITS, cooling_units)
+    cooling_cop = np.where(np.isnan(col(cooling_cop)), DEFAULT_COOLING_COP, col(cooling_cop))
+
+    heating_units = col(heating_units)
+    heating_cop = col(heating_cop)
+    boiler = ~(heating_units > 0) | np.isnan(heating_cop)
+    heating_unit_kw = np.where(boiler, heating_design_kw, col(heating_unit_kw))
+    heating_units = np.where(boiler, 1, heating_units)
+    heating_cop = np.where(boiler, BOILER_EFFICIENCY, heating_cop)
+
+    curve = None
+    if cooling_curve is not None and outdoor_temp is not None:
+        index = np.nan_to_num(col(cooling_curve), nan=-1).astype(np.int64)
+        curves = get_curves() if (index >= 0).any() else None
+        if curves is not None:
+            index[index >= len(curves)] = -1
+            curve = (curves, index, outdoor_temp)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cooling_served, cooling_power = _part_load(
+            cooling_load, cooling_unit_kw, cooling_units, cooling_cop, curve=curve
+        )
+        heating_served, heating_power = _part_load(
+            heating_load, heating_unit_kw, heating_units, heating_cop, linear=boiler
+        )
+    cooling_power = np.nan_to_num(cooling_power, copy=False)
+    heating_power = np.nan_to_num(heating_power, copy=False)
+
+    cooling_kwh = cooling_power.sum(axis=1)
+    heating_kwh = heating_power.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seasonal_cop = np.where(cooling_kwh > 0, cooling_served.sum(axis=1) / cooling_kwh, np.nan)
+    tolerance = 1e-6
+    result = {
+        "annual_energy_consumption_kwh": cooling_kwh + heating_kwh,
+        "cooling_electricity_kwh": cooling_kwh,
+        "heating_energy_kwh": heating_kwh,
+        "cooling_load_kwh": cooling_load.sum(axis=1),
+        "heating_load_kwh": heating_load.sum(axis=1),
+        "unmet_cooling_hours": (cooling_load - cooling_served > tolerance).sum(axis=1),
+        "unmet_heating_hours": (heating_load - heating_served > tolerance).sum(axis=1),
+        "seasonal_cooling_cop": seasonal_cop,
+    }
+    if hourly:
+        result.update(
+            cooling_load=cooling_load,
+            heating_load=heating_load,
+            cooling_power=cooling_power,
+            heating_power=heating_power,
+        )
+    return result
+
+
+def design_loads(project: ProjectHisModel) -> tuple:
+    """
+    项目的设计冷 / 热负荷，未填写时按面积指标估算
+    :return: (cooling_kw, heating_kw)，无法估算的一项为 NaN
+    """
+    cooling_kw = project.total_cooling_load_kw
+    heating_kw = project.total_heating_load_kw
+    if cooling_kw is None or heating_kw is None:
+        est_cooling, est_heating = estimate_loads_batch(
+            [project.area_sqm], [project.project_type], [project.location_city]
+        )
+        cooling_kw = est_cooling[0] if cooling_kw is None else cooling_kw
+        heating_kw = est_heating[0] if heating_kw is None else heating_kw
+    if np.isnan(cooling_kw) and np.isnan(heating_kw):
+        raise ValueError("缺少冷热负荷，且无法按面积和建筑类型估算")
+    return float(cooling_kw), float(heating_kw)
+
+
+def simulate_project(project: ProjectHisModel, catalog=None, hourly: bool = False) -> dict:
+    """
+    模拟单个项目；未填写冷热负荷时按面积指标估算
+    :return: RESULT_FIELDS 字典（hourly=True 时附带 8760 逐时数组）
+    """
+    climate = load_climate_table().get(project.location_city)
+    if climate is None:
+        raise ValueError(f"未收录城市的气候参数：{project.location_city}")
+
+    cooling_kw, heating_kw = design_loads(project)
+    equipment = equipment_from_selection(project.selected_products, catalog)
+    temps = weather_year(climate["city"])
+    cooling_profile, heating_profile = load_profiles(
+        temps,
+        operating_schedule(building_type_code(project.project_type)),
+        climate["summer_ac_db"],
+        climate["winter_ac_db"],
+    )
+    result = simulate_arrays(
+        cooling_profile,
+        heating_profile,
+        [cooling_kw],
+        [heating_kw],
+        hourly=hourly,
+        outdoor_temp=temps,
+        **{k: [v] for k, v in equipment.items()},
+    )
+    summary = {}
+    for key, values in result.items():
+        if key in RESULT_FIELDS:
+            value = float(values[0])
+            summary[key] = None if math.isnan(value) else round(value, 1)
+        else:
+            summary[key] = values[0]
+    return summary
+
+
+# ---------- 批量模拟 ----------
+_EQUIPMENT_FIELDS = [
+    "cooling_unit_kw",
+    "cooling_units",
+    "cooling_cop",
+    "heating_unit_kw",
+    "heating_units",
+    "heating_cop",
+    "cooling_curve",
+]
+
+
+@lru_cache(maxsize=256)
+def shared_profiles(city_code: int, type_code: int):
+    """按城市、建筑类型编码取逐时负荷率 (cooling_profile, heating_profile)，进程内缓存，同城同类型的项目共用"""
+    table = load_climate_table()
+    return load_profiles(
+        _weather_year(table.cities[city_code]),
+        operating_schedule(type_code),
+        table.summer_ac_db[city_code],
+        table.winter_ac_db[city_code],
+    )
+
+
+def shared_weather(city_code: int) -> np.ndarray:
+    """按城市编码取全年逐时干球温度（进程内缓存，与 shared_profiles 对应）"""
+    return _weather_year(load_climate_table().cities[city_code])
+
+
+def _simulate_chunk(chunk: dict) -> dict:
+    """子进程入口：chunk 内的项目城市和建筑类型相同，共用一条逐时负荷率曲线"""
+    n = len(chunk["cooling_design_kw"])
+    city_code, type_code = chunk["city_code"], chunk["type_code"]
+    if city_code == load_climate_table().unknown:
+        return {field: np.full(n, np.nan) for field in RESULT_FIELDS}
+    cooling_profile, heating_profile = shared_profiles(city_code, type_code)
+    return simulate_arrays(
+        cooling_profile,
+        heating_profile,
+        chunk["cooling_design_kw"],
+        chunk["heating_design_kw"],
+        outdoor_temp=shared_weather(city_code),
+        **{k: chunk[k] for k in _EQUIPMENT_FIELDS},
+    )
+
+
+def load_history(batch_size: int = 20000) -> dict:
+    """按列流式读取模拟所需的 projects_his 字段"""
+    with open_reader() as db:
+        if not db.conn:
+            raise ConnectionError("数据库连接失败，无法读取历史项目")
+        return db.select_columns(
+            "select id, area_sqm, project_type, location_city, total_cooling_load_kw, "
+            "total_heating_load_kw, selected_products, annual_energy_consumption_kwh "
+            "from projects_his order by id",
+            batch_size=batch_size,
+        )
+
+
+def simulate_history(
+    workers: int = None,
+    chunk_size: int = 512,
+    write: bool = False,
+    overwrite: bool = False,
+    catalog=None,
+) -> dict:
+    """
+    多进程重新模拟 projects_his 全部记录
+    :param workers: 进程数，默认 CPU 核数
+    :param write: 是否写回 annual_energy_consumption_kwh（默认只回填缺失值）
+    :return: 统计信息
+    """
+    start = time.perf_counter()
+    columns = load_history()
+    n = len(columns["id"])
+    table = load_climate_table()
+
+    # 缺失的设计负荷按面积指标估算
+    est_cooling, est_heating = estimate_loads_batch(
+        columns["area_sqm"], columns["project_type"], columns["location_city"], table
+    )
+    cooling = columns["total_cooling_load_kw"]
+    heating = columns["total_heating_load_kw"]
+    cooling = np.where(np.isnan(cooling), est_cooling, cooling)
+    heating = np.where(np.isnan(heating), est_heating, heating)
+
+    # 设备参数在主进程汇总，子进程只做数组运算
+    if catalog is None and any(
+        s and not (isinstance(s, dict) and "items" in s) for s in columns["selected_products"]
+    ):
+        try:
+            from .catalog import get_catalog
+
+            catalog = get_catalog()
+        except Exception as e:
+            print(f"❌ 产品库载入失败，缺少参数的设备按缺省值计算：{e}")
+    equipment = {k: np.full(n, np.nan) for k in _EQUIPMENT_FIELDS}
+    for i, selected in enumerate(columns["selected_products"]):
+        if selected:
+            for key, value in equipment_from_selection(selected, catalog).items():
+                equipment[key][i] = value
+
+    city_codes = table.codes(columns["location_city"])
+    type_codes = np.fromiter(
+        (building_type_code(t) for t in columns["project_type"]), dtype=np.int32, count=n
+    )
+    params = {"cooling_design_kw": cooling, "heating_design_kw": heating, **equipment}
+    # 按 (城市, 建筑类型) 分组切块，块内共用逐时负荷率
+    order = np.lexsort((type_codes, city_codes))
+    keys = city_codes[order].astype(np.int64) * 1000 + type_codes[order]
+    bounds = np.flatnonzero(np.diff(keys)) + 1
+    chunks, chunk_rows = [], []
+    for group in np.split(order, bounds):
+        for i in range(0, len(group), chunk_size):
+            rows = group[i : i + chunk_size]
+            chunk = {k: v[rows] for k, v in params.items()}
+            chunk["city_code"] = int(city_codes[rows[0]])
+            chunk["type_code"] = int(type_codes[rows[0]])
+            chunks.append(chunk)
+            chunk_rows.append(rows)
+
+    results = {field: np.full(n, np.nan) for field in RESULT_FIELDS}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows, partial in zip(chunk_rows, pool.map(_simulate_chunk, chunks)):
+            for field in RESULT_FIELDS:
+                results[field][rows] = partial[field]
+    # 冷热负荷都无法确定的记录不给出结果
+    unknown = np.isnan(cooling) & np.isnan(heating)
+    for field in RESULT_FIELDS:
+        results[field][unknown] = np.nan
+
+    energy = np.round(results["annual_energy_consumption_kwh"], 1)
+    stats = {
+        "records": n,
+        "simulated": int(np.count_nonzero(~np.isnan(energy))),
+        "seconds": 0.0,
+        "updated": 0,
+    }
+    if write:
+        old = columns["annual_energy_consumption_kwh"]
+        target = ~np.isnan(energy) & (np.isnan(old) if not overwrite else (energy != old))
+        rows = [
+            (int(i), float(e)) for i, e in zip(columns["id"][target], energy[target])
+        ]
+        _write_energy(rows)
+        stats["updated"] = len(rows)
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    stats["results"] = results
+    stats["ids"] = columns["id"]
+    return stats
+
+
+def _write_energy(rows: list, page_size: int = 5000):
+    if not rows:
+        return
+    with open_storage() as db:
+        if not db.conn:
+            raise ConnectionError("数据库连接失败，无法写回能耗")
+        db.update_rows("projects_his", "id", ["annual_energy_consumption_kwh"], rows, page_size)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="8760 小时全年能耗模拟")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--write", action="store_true", help="回填缺失的全年能耗")
+    parser.add_argument("--overwrite", action="store_true", help="与 --write 同用，覆盖已有值")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = simulate_history(args.workers, write=args.write, overwrite=args.overwrite)
+    except Exception as e:
+        print(f"❌ 能耗模拟失败：{e}")
+        return 1
+
+    energy = stats["results"]["annual_energy_consumption_kwh"]
+    print(f"✅模拟完成：{stats['simulated']}/{stats['records']} 条，用时 {stats['seconds']} 秒")
+    if stats["simulated"]:
+        print(f"   全年能耗中位数：{np.nanmedian(energy):,.0f} kWh")
+    if args.write:
+        print(f"   写回 {stats['updated']} 条")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
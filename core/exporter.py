@@ -0,0 +1,87 @@
+# core/exporter.py
+"""
+历史项目导出：projects_his → CSV / JSONL（格式与 bulk_loader 导入一致，可直接回导）
+
+用法：
+    python -m ppg.core.exporter projects.csv
+    python -m ppg.core.exporter projects.jsonl --where "location_city = '上海'"
+
+用 DB.iter_rows 的服务端游标逐批读取、逐行写出，内存占用与表大小无关。
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+from psycopg2 import sql
+
+from .models import ProjectHisModel
+from .storage import open_storage, JSON_FIELDS
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def export_projects(path: str, where: str = None, params=None, itersize: int = 5000) -> int:
+    """
+    导出 projects_his（不含 id，便于导入到其他库）
+    :param where: 过滤条件（不含 where 关键字）
+    :return: 导出行数
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".csv", ".jsonl", ".ndjson"):
+        raise ValueError(f"不支持的文件类型：{ext}（仅支持 .csv / .jsonl）")
+
+    fields = list(ProjectHisModel.model_fields)
+    query = sql.SQL("select {} from projects_his{} order by id").format(
+        sql.SQL(", ").join(map(sql.Identifier, fields)),
+        sql.SQL(" where " + where) if where else sql.SQL(""),
+    )
+
+    count = 0
+    tmp_path = path + ".tmp"
+    with open_storage() as db, open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        if not db.conn:
+            raise ConnectionError("数据库连接失败，无法导出")
+        if ext == ".csv":
+            writer = csv.writer(f)
+            writer.writerow(fields)
+        for row in db.iter_rows(query, params, itersize):
+            record = {field: _plain(value) for field, value in zip(fields, row)}
+            if ext == ".csv":
+                for field in JSON_FIELDS:
+                    if record[field] is not None:
+                        record[field] = json.dumps(record[field], ensure_ascii=False)
+                writer.writerow(["" if v is None else v for v in record.values()])
+            else:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="导出 projects_his 到 CSV / JSONL")
+    parser.add_argument("path", help="输出文件（.csv 或 .jsonl）")
+    parser.add_argument("--where", help="过滤条件，如 \"location_city = '上海'\"")
+    args = parser.parse_args(argv)
+
+    try:
+        count = export_projects(args.path, args.where)
+    except Exception as e:
+        print(f"❌ 导出失败：{e}")
+        return 1
+    print(f"✅导出完成：{count} 条 → {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
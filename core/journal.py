@@ -0,0 +1,415 @@
+# core/journal.py
+"""
+录入表单的本地写前日志与后台同步
+
+保存时先把校验通过的 ProjectHisModel 追加到本地日志（fsync 后返回，不经网络），
+后台同步线程再按批（Storage.insert_many）写入数据库；数据库慢或不可用时按指数退避重试，
+日志中的记录在写入数据库之前不会丢失（包括程序崩溃、断电）。
+
+    journal = get_journal()
+    seq = journal.append(project, attachments)   # 保存：只写本地文件
+    syncer = get_syncer()              # 首次调用时启动同步线程，先同步上次未完成的记录
+    syncer.wake()
+    syncer.status()                    # {"pending", "rejected", "last_error", "retry_in", "synced"}
+
+日志格式（JOURNAL_PATH，JSON Lines，只追加）：
+    {"op": "put", "seq": 1, "key": "...", "ts": "...", "project": {...}}    待同步的记录（key 为幂等键）
+    {"op": "done", "seqs": [1, 2], "ids": [101, null]}        已处理的一批（id 为 null 表示被数据库拒绝）
+被数据库拒绝或重新读取时校验失败的记录连同错误信息另存到 <日志>.rejected.jsonl，不再重试，也不会丢弃。
+同一日志文件只能由一个进程打开：SaveJournal 打开时对 <日志>.lock 加排他锁（fcntl / msvcrt），
+已被其他进程占用时抛出 JournalLocked，避免两个进程重复写入同一批记录、或重写日志时另一进程仍在追加旧文件。
+打开日志时丢弃末尾写了一半的行（崩溃时正在写入）；没有待同步记录或已完成的行较多时重写日志文件。
+
+每条记录保存时生成一个幂等键（uuid），同步时随记录写入 projects_his.journal_key（唯一索引）：
+一批已提交、但 done 行写入之前程序崩溃时，下次启动重放这批记录，库中已有的键直接取回原 id，不会重复插入。
+附件在保存时已存入附件库（AttachmentStore，按内容去重），引用列表随项目写入 file_attachments，
+与记录在同一条 insert 中写入数据库；同步后只为新 id 建立项目目录下的硬链接。
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from ..config import JOURNAL_PATH, JOURNAL_RETRY_MAX, JOURNAL_RETRY_MIN, JOURNAL_SYNC_BATCH
+from . import metrics
+from .models import ProjectHisModel, group_errors, validate_batch
+
+_COMPACT_AFTER = 1000  # 已完成的记录超过该数量时重写日志
+
+
+def _fsync_dir(path: str):
+    """新建 / 替换文件后同步所在目录，保证目录项落盘（Windows 不支持时跳过）"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class JournalLocked(RuntimeError):
+    """日志文件已被其他进程（另一个正在运行的程序实例）打开"""
+
+
+def _lock_file(path: str):
+    """
+    对锁文件加非阻塞排他锁，进程退出时由操作系统自动释放
+    :return: 持有锁的文件对象（关闭即释放）；锁已被其他进程持有时返回 None
+    """
+    f = open(path, "a+b")
+    try:
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+class SaveJournal:
+    """只追加的本地日志；线程安全，同一日志文件只能由一个进程打开（见 JournalLocked）"""
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self.rejected_path = os.path.splitext(path)[0] + ".rejected.jsonl"
+        self._lock = threading.Lock()
+        self._pending = {}  # seq -> put 记录（dict），按写入顺序
+        self._seq = 0
+        self._done_lines = 0
+        self.rejected_count = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock_file = _lock_file(path + ".lock")
+        if self._lock_file is None:
+            raise JournalLocked(f"写前日志正被另一个程序实例使用: {path}")
+        try:
+            self._load()
+            self._file = open(self.path, "ab")
+        except BaseException:
+            self._lock_file.close()
+            raise
+
+    # ---------- 读取 ----------
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        good_size = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                good_size += len(line)
+                if entry["op"] == "put":
+                    self._pending[entry["seq"]] = entry
+                    self._seq = max(self._seq, entry["seq"])
+                elif entry["op"] == "done":
+                    for seq in entry["seqs"]:
+                        self._pending.pop(seq, None)
+                    self._done_lines += len(entry["seqs"])
+        if good_size < os.path.getsize(self.path):
+            print(f"❌ 写前日志末尾不完整，已丢弃 {os.path.getsize(self.path) - good_size} 字节: {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_size)
+                os.fsync(f.fileno())
+        if os.path.exists(self.rejected_path):
+            with open(self.rejected_path, "rb") as f:
+                self.rejected_count = sum(1 for _ in f)
+
+    def depth(self) -> int:
+        """待同步的记录数"""
+        return len(self._pending)
+
+    def pending(self, limit: int = None) -> tuple:
+        """
+        最早的若干条待同步记录，逐条校验（一条记录无效不影响其他记录）
+        :return: (entries, invalid)
+            entries：[(seq, 幂等键, ProjectHisModel)]，校验通过的记录（早期版本的记录没有幂等键，为 None）
+            invalid：{seq: 错误信息}，校验失败的记录
+        """
+        with self._lock:
+            entries = list(self._pending.values())[:limit]
+        projects = []
+        for e in entries:
+            project = e["project"]
+            # 早期版本的日志把附件引用单独记在 attachments 中
+            if e.get("attachments") and not project.get("file_attachments"):
+                project = {**project, "file_attachments": e["attachments"]}
+            projects.append(project)
+        valid, errors = validate_batch(ProjectHisModel, projects)
+        invalid = {entries[row]["seq"]: message for row, message in group_errors(errors).items()}
+        return [(entries[row]["seq"], entries[row].get("key"), project) for row, project in valid], invalid
+
+    # ---------- 写入 ----------
+    def _write(self, entries: list):
+        data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries).encode("utf-8")
+        new_file = self._file.tell() == 0
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if new_file:
+            _fsync_dir(self.path)
+
+    def append(self, project: ProjectHisModel, attachments: list = None) -> int:
+        """
+        追加一条待同步记录，落盘后返回
+        :param project: 已校验的项目数据
+        :param attachments: 已存入附件库的引用列表（AttachmentStore.put_files 的返回值），写入 file_attachments
+        :return: 记录序号
+        """
+        if attachments:
+            project = project.model_copy(update={"file_attachments": attachments})
+        with metrics.timed("journal.append"), self._lock:
+            self._seq += 1
+            entry = {
+                "op": "put",
+                "seq": self._seq,
+                "key": uuid.uuid4().hex,
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "project": project.model_dump(mode="json"),
+            }
+            self._write([entry])
+            self._pending[self._seq] = entry
+            return self._seq
+
+    def mark_done(self, seqs: list, ids: list, errors: dict = None):
+        """
+        记录一批已处理的记录
+        :param ids: 与 seqs 对应的新 id，None 表示被数据库拒绝
+        :param errors: seq -> 拒绝原因；被拒绝的记录另存到 rejected_path
+        """
+        with self._lock:
+            rejected = [
+                {**self._pending[seq], "error": (errors or {}).get(seq, "")}
+                for seq, project_id in zip(seqs, ids)
+                if project_id is None and seq in self._pending
+            ]
+            if rejected:
+                with open(self.rejected_path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in rejected)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.rejected_count += len(rejected)
+            self._write([{"op": "done", "seqs": list(seqs), "ids": list(ids)}])
+            for seq in seqs:
+                self._pending.pop(seq, None)
+            self._done_lines += len(seqs)
+            if not self._pending or self._done_lines >= _COMPACT_AFTER:
+                self._compact()
+
+    def _compact(self):
+        """只保留待同步记录重写日志（临时文件写完后原子替换）"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(
+                "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in self._pending.values()).encode("utf-8")
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        _fsync_dir(self.path)
+        self._file = open(self.path, "ab")
+        self._done_lines = 0
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._lock_file.close()
+
+
+class JournalSyncer:
+    """
+    后台同步线程：把日志中的记录按批写入数据库
+    连接失败或写入出错时整批保留在日志中，间隔 JOURNAL_RETRY_MIN 起逐次翻倍（加随机抖动，最多
+    JOURNAL_RETRY_MAX）后重试；被数据库拒绝的单条记录转入 rejected 文件，不阻塞后面的记录
+    """
+
+    def __init__(
+        self,
+        journal: SaveJournal,
+        batch_size: int = JOURNAL_SYNC_BATCH,
+        retry_min: float = JOURNAL_RETRY_MIN,
+        retry_max: float = JOURNAL_RETRY_MAX,
+        store=None,
+    ):
+        self.journal = journal
+        self.batch_size = batch_size
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.store = store
+        self.synced = 0  # 本次运行已写入数据库的记录数
+        self.last_error = None
+        self._retry_at = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """注册同步回调 callback(ids)，在同步线程中调用，ids 为本批写入的新 id"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ppg-journal-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """有新记录：立即同步（正在退避等待时也提前重试）"""
+        self._wake.set()
+
+    def status(self) -> dict:
+        retry_in = None
+        if self._retry_at is not None:
+            retry_in = max(0.0, self._retry_at - time.monotonic())
+        return {
+            "pending": self.journal.depth(),
+            "rejected": self.journal.rejected_count,
+            "synced": self.synced,
+            "last_error": self.last_error,
+            "retry_in": retry_in,
+        }
+
+    def _run(self):
+        delay = self.retry_min
+        while not self._stop.is_set():
+            if not self.journal.depth():
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                while self.journal.depth() and not self._stop.is_set():
+                    self.flush_once()
+                self.last_error = None
+                delay = self.retry_min
+            except Exception as e:
+                self.last_error = str(e).strip()
+                wait = delay * random.uniform(0.5, 1.0)
+                print(f"❌ 同步失败，{wait:.1f} 秒后重试（待同步 {self.journal.depth()} 条）: {self.last_error}")
+                self._retry_at = time.monotonic() + wait
+                self._wake.wait(wait)
+                self._wake.clear()
+                self._retry_at = None
+                delay = min(delay * 2, self.retry_max)
+
+    def flush_once(self) -> int:
+        """
+        同步最早的一批记录（同步线程调用；脚本中可直接调用）
+        :return: 本批写入数据库的条数
+        :raises ConnectionError: 数据库不可用，记录保留在日志中
+        """
+        from .storage import open_storage
+
+        entries, invalid = self.journal.pending(self.batch_size)
+        if invalid:
+            # 日志中无法通过校验的记录（如模型字段有变化）直接转入 rejected 文件，不阻塞后面的记录
+            print(f"❌ {len(invalid)} 条待同步记录校验失败，已转入 {self.journal.rejected_path}")
+            self.journal.mark_done(list(invalid), [None] * len(invalid), invalid)
+        if not entries:
+            return 0
+        seq_of = {id(project): seq for seq, _, project in entries}
+        errors = {}
+
+        def on_reject(record, error):
+            errors[seq_of.get(id(record))] = error
+
+        with metrics.timed("journal.sync", detail=lambda: f"{len(entries)} 条"), open_storage() as db:
+            # 附件引用在 file_attachments 中，与记录在同一个事务内写入；幂等键保证重放时不重复插入
+            ids = db.insert_many(
+                [project for _, _, project in entries],
+                commit_every=len(entries),
+                on_reject=on_reject,
+                keys=[key for _, key, _ in entries],
+            )
+        self.journal.mark_done([seq for seq, _, _ in entries], ids, errors)
+
+        new_ids = [i for i in ids if i is not None]
+        self.synced += len(new_ids)
+        self._link_attachments(entries, ids)
+        for callback in list(self._listeners):
+            try:
+                callback(new_ids)
+            except Exception as e:
+                print(f"❌ 同步回调执行失败: {e}")
+        return len(new_ids)
+
+    def _link_attachments(self, entries, ids):
+        """附件内容保存时已存入附件库，这里只建立 <project_id>/ 下的硬链接"""
+        linked = [
+            (project.file_attachments, i)
+            for (_, _, project), i in zip(entries, ids)
+            if i is not None and isinstance(project.file_attachments, list)
+        ]
+        if not linked:
+            return
+        from .attachments import AttachmentStore
+
+        store = self.store or AttachmentStore()
+        for attachments, project_id in linked:
+            for ref in attachments:
+                try:
+                    if isinstance(ref, dict) and store.has_blob(ref["sha256"]):
+                        store.link(ref["sha256"], project_id, ref["name"])
+                except Exception as e:
+                    print(f"❌ 附件链接失败 {project_id}: {e}")
+
+
+_journal = None
+_syncer = None
+_lock = threading.Lock()
+
+
+def get_journal() -> SaveJournal:
+    """
+    进程内共享的日志（JOURNAL_PATH）
+    :raises JournalLocked: 另一个程序实例正在使用该日志
+    """
+    global _journal
+    with _lock:
+        if _journal is None:
+            _journal = SaveJournal()
+        return _journal
+
+
+def get_syncer() -> JournalSyncer:
+    """
+    进程内共享的同步线程，首次调用时启动
+    :raises JournalLocked: 另一个程序实例正在使用该日志（由那个实例负责同步）
+    """
+    global _syncer
+    journal = get_journal()
+    with _lock:
+        if _syncer is None:
+            _syncer = JournalSyncer(journal)
+            _syncer.start()
+        return _syncer
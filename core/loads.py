@@ -0,0 +1,343 @@
+# core/loads.py
+"""
+建筑冷热负荷估算（面积指标法 + 城市气候修正）
+
+    冷负荷 = 面积 × 建筑类型冷指标 × 夏季气候修正系数
+    热负荷 = 面积 × 建筑类型热指标 × 冬季气候修正系数
+
+- 气候参数表 resources/data/climate.csv：各城市夏季空调室外计算干/湿球温度、冬季供暖/空调
+  室外计算温度、供暖度日数 HDD18、空调度日数 CDD26（取自 GB 50736 附录，方案阶段估算用）
+- 负荷指标按参考气候（上海）给出，只有围护结构和新风部分随室内外温差变化，
+  内扰（人员、照明、设备）部分不随城市变化
+- 批量估算全部为 NumPy 数组运算，城市与建筑类型先编码成整数再查表；
+  无法识别的城市或建筑类型结果为 NaN，不做猜测
+
+用法：
+    python -m ppg.core.loads              # 统计 projects_his 重新估算的结果
+    python -m ppg.core.loads --write      # 回填缺失的冷热负荷
+"""
+import argparse
+import csv
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from ..config import BASE_DIR
+from .models import ProjectHisModel
+from .storage import open_storage, open_reader
+
+CLIMATE_CSV = os.path.join(BASE_DIR, "resources", "data", "climate.csv")
+
+# 建筑类型负荷指标（W/m² 建筑面积）：(冷指标, 热指标)，参考《实用供热空调设计手册》估算指标
+BUILDING_LOAD_INDEX = {
+    "写字楼": (110.0, 70.0),
+    "医院": (120.0, 75.0),
+    "酒店": (100.0, 65.0),
+    "商场": (180.0, 70.0),
+    "学校": (110.0, 70.0),
+    "工厂": (120.0, 65.0),
+    "住宅": (80.0, 50.0),
+    "餐饮": (250.0, 100.0),
+    "影剧院": (230.0, 90.0),
+    "体育馆": (200.0, 110.0),
+}
+
+# 建筑类型别名：项目类型中包含关键字即归入对应类型（按顺序匹配）
+BUILDING_TYPE_ALIASES = [
+    ("办公", "写字楼"),
+    ("写字", "写字楼"),
+    ("医院", "医院"),
+    ("门诊", "医院"),
+    ("病房", "医院"),
+    ("酒店", "酒店"),
+    ("宾馆", "酒店"),
+    ("商场", "商场"),
+    ("商业", "商场"),
+    ("超市", "商场"),
+    ("学校", "学校"),
+    ("教学", "学校"),
+    ("幼儿园", "学校"),
+    ("工厂", "工厂"),
+    ("厂房", "工厂"),
+    ("车间", "工厂"),
+    ("住宅", "住宅"),
+    ("公寓", "住宅"),
+    ("别墅", "住宅"),
+    ("餐", "餐饮"),
+    ("影", "影剧院"),
+    ("剧院", "影剧院"),
+    ("体育", "体育馆"),
+]
+
+# 指标对应的参考气候（上海）与室内设计温度
+REF_SUMMER_DB = 34.4
+REF_WINTER_DB = -2.2
+INDOOR_SUMMER = 26.0
+INDOOR_WINTER = 20.0
+# 负荷中随室外温度变化的比例（围护结构 + 新风）
+COOLING_ENVELOPE_SHARE = 0.4
+HEATING_ENVELOPE_SHARE = 0.6
+
+_TYPE_NAMES = list(BUILDING_LOAD_INDEX)
+_COOLING_INDEX = np.array([BUILDING_LOAD_INDEX[t][0] for t in _TYPE_NAMES] + [np.nan])
+_HEATING_INDEX = np.array([BUILDING_LOAD_INDEX[t][1] for t in _TYPE_NAMES] + [np.nan])
+
+
+class ClimateTable:
+    """城市气候参数表，数值列为 float64 数组，末尾附加一行 NaN 作为"未知城市" """
+
+    NUMERIC_COLUMNS = (
+        "latitude",
+        "summer_ac_db",
+        "summer_ac_wb",
+        "winter_heating_db",
+        "winter_ac_db",
+        "hdd18",
+        "cdd26",
+    )
+
+    def __init__(self, rows: list):
+        self.cities = [row["city"] for row in rows]
+        self.provinces = [row.get("province") for row in rows]
+        self.climate_zones = [row.get("climate_zone") for row in rows]
+        self._code_of = {city: i for i, city in enumerate(self.cities)}
+        self.unknown = len(self.cities)
+        for col in self.NUMERIC_COLUMNS:
+            values = [_to_float(row.get(col)) for row in rows] + [np.nan]
+            setattr(self, col, np.array(values, dtype=np.float64))
+
+    @classmethod
+    def from_csv(cls, path: str = CLIMATE_CSV) -> "ClimateTable":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def __len__(self):
+        return len(self.cities)
+
+    def __contains__(self, city):
+        return self.code(city) != self.unknown
+
+    def code(self, city) -> int:
+        """城市名 → 行号，兼容"广州市"、" 广州 "等写法；未收录返回 self.unknown"""
+        if not city:
+            return self.unknown
+        city = str(city).strip()
+        code = self._code_of.get(city)
+        if code is None and city.endswith("市"):
+            code = self._code_of.get(city[:-1])
+        return self.unknown if code is None else code
+
+    def codes(self, cities) -> np.ndarray:
+        return _encode(cities, self.code)
+
+    def get(self, city) -> dict:
+        """单个城市的气候参数，未收录返回 None"""
+        code = self.code(city)
+        if code == self.unknown:
+            return None
+        params = {
+            "city": self.cities[code],
+            "province": self.provinces[code],
+            "climate_zone": self.climate_zones[code],
+        }
+        for col in self.NUMERIC_COLUMNS:
+            params[col] = float(getattr(self, col)[code])
+        return params
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _encode(values, code_func) -> np.ndarray:
+    """字符串序列 → 整数编码，重复值只解析一次"""
+    memo = {}
+
+    def lookup(value):
+        code = memo.get(value)
+        if code is None:
+            code = memo[value] = code_func(value)
+        return code
+
+    if isinstance(values, str) or values is None:
+        values = [values]
+    return np.fromiter((lookup(v) for v in values), dtype=np.int32, count=len(values))
+
+
+@lru_cache(maxsize=4)
+def load_climate_table(path: str = CLIMATE_CSV) -> ClimateTable:
+    """读取并缓存气候参数表"""
+    return ClimateTable.from_csv(path)
+
+
+def building_type_code(project_type) -> int:
+    """项目类型 → 负荷指标表行号，无法识别返回 len(BUILDING_LOAD_INDEX)"""
+    if not project_type:
+        return len(_TYPE_NAMES)
+    project_type = str(project_type).strip()
+    if project_type in BUILDING_LOAD_INDEX:
+        return _TYPE_NAMES.index(project_type)
+    for keyword, name in BUILDING_TYPE_ALIASES:
+        if keyword in project_type:
+            return _TYPE_NAMES.index(name)
+    return len(_TYPE_NAMES)
+
+
+def climate_factors(table: ClimateTable, city_codes: np.ndarray):
+    """
+    按城市计算冷、热负荷气候修正系数
+    :return: (cooling_factor, heating_factor)，未知城市为 NaN
+    """
+    summer_ratio = (table.summer_ac_db - INDOOR_SUMMER) / (REF_SUMMER_DB - INDOOR_SUMMER)
+    winter_ratio = (INDOOR_WINTER - table.winter_ac_db) / (INDOOR_WINTER - REF_WINTER_DB)
+    cooling = (1 - COOLING_ENVELOPE_SHARE) + COOLING_ENVELOPE_SHARE * np.clip(summer_ratio, 0, None)
+    heating = (1 - HEATING_ENVELOPE_SHARE) + HEATING_ENVELOPE_SHARE * np.clip(winter_ratio, 0, None)
+    return cooling[city_codes], heating[city_codes]
+
+
+def estimate_loads_batch(area_sqm, project_type, location_city, table: ClimateTable = None):
+    """
+    批量估算冷热负荷
+    :param area_sqm: 建筑面积数组（㎡），None/缺失为 NaN
+    :param project_type: 项目类型序列
+    :param location_city: 所在城市序列
+    :return: (cooling_kw, heating_kw) 两个 float64 数组，无法估算的位置为 NaN
+    """
+    table = table or load_climate_table()
+    area = np.asarray(area_sqm, dtype=np.float64).reshape(-1)
+    type_codes = _encode(project_type, building_type_code)
+    city_codes = table.codes(location_city)
+    if not (len(area) == len(type_codes) == len(city_codes)):
+        raise ValueError("area_sqm、project_type、location_city 长度不一致")
+
+    area = np.where(area > 0, area, np.nan)
+    cooling_factor, heating_factor = climate_factors(table, city_codes)
+    cooling_kw = area * _COOLING_INDEX[type_codes] * cooling_factor / 1000
+    heating_kw = area * _HEATING_INDEX[type_codes] * heating_factor / 1000
+    return np.round(cooling_kw, 1), np.round(heating_kw, 1)
+
+
+def estimate_loads(area_sqm, project_type, location_city, table: ClimateTable = None):
+    """
+    单个项目估算
+    :return: (cooling_kw, heating_kw)，无法估算时为 None
+    """
+    cooling, heating = estimate_loads_batch([area_sqm], [project_type], [location_city], table)
+    return _none_if_nan(cooling[0]), _none_if_nan(heating[0])
+
+
+def estimate_project(project: ProjectHisModel, table: ClimateTable = None) -> dict:
+    """按项目的面积、类型、城市估算，返回与 ProjectHisModel 字段同名的字典"""
+    cooling, heating = estimate_loads(
+        project.area_sqm, project.project_type, project.location_city, table
+    )
+    return {"total_cooling_load_kw": cooling, "total_heating_load_kw": heating}
+
+
+def _none_if_nan(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+# ---------- 历史数据 ----------
+def load_history_columns(batch_size: int = 20000) -> dict:
+    """按列流式读取 projects_his 估算所需的字段"""
+    with open_reader() as db:
+        if not db.conn:
+            raise ConnectionError("数据库连接失败，无法读取历史项目")
+        return db.select_columns(
+            "select id, area_sqm, project_type, location_city, "
+            "total_cooling_load_kw, total_heating_load_kw from projects_his order by id",
+            batch_size=batch_size,
+        )
+
+
+def reestimate_history(write: bool = False, overwrite: bool = False, batch_size: int = 5000) -> dict:
+    """
+    重新估算 projects_his 全部记录
+    :param write: 是否写回数据库
+    :param overwrite: 写回时是否覆盖已有值（默认只回填缺失值，不改动人工填写的负荷）
+    :return: 统计信息
+    """
+    columns = load_history_columns()
+    cooling, heating = estimate_loads_batch(
+        columns["area_sqm"], columns["project_type"], columns["location_city"]
+    )
+    old_cooling = columns["total_cooling_load_kw"]
+    old_heating = columns["total_heating_load_kw"]
+
+    stats = {
+        "records": len(columns["id"]),
+        "estimated": int(np.count_nonzero(~np.isnan(cooling) | ~np.isnan(heating))),
+        "cooling_ratio_median": _median_ratio(old_cooling, cooling),
+        "heating_ratio_median": _median_ratio(old_heating, heating),
+        "updated": 0,
+    }
+    if not write:
+        return stats
+
+    if overwrite:
+        new_cooling = np.where(np.isnan(cooling), old_cooling, cooling)
+        new_heating = np.where(np.isnan(heating), old_heating, heating)
+    else:
+        new_cooling = np.where(np.isnan(old_cooling), cooling, old_cooling)
+        new_heating = np.where(np.isnan(old_heating), heating, old_heating)
+    changed = ~(
+        _same(new_cooling, old_cooling) & _same(new_heating, old_heating)
+    )
+    rows = [
+        (int(i), _none_if_nan(c), _none_if_nan(h))
+        for i, c, h in zip(
+            columns["id"][changed], new_cooling[changed], new_heating[changed]
+        )
+    ]
+
+    with open_storage() as db:
+        if not db.conn:
+            raise ConnectionError("数据库连接失败，无法写回负荷")
+        db.update_rows(
+            "projects_his", "id", ["total_cooling_load_kw", "total_heating_load_kw"], rows, batch_size
+        )
+    stats["updated"] = len(rows)
+    return stats
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+def _median_ratio(actual: np.ndarray, estimated: np.ndarray):
+    """已有负荷与估算值之比的中位数，用于检查指标是否偏离历史数据"""
+    mask = (actual > 0) & (estimated > 0)
+    if not mask.any():
+        return None
+    return round(float(np.median(actual[mask] / estimated[mask])), 3)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="按面积、建筑类型和城市重新估算历史项目冷热负荷")
+    parser.add_argument("--write", action="store_true", help="写回数据库（默认只回填缺失值）")
+    parser.add_argument("--overwrite", action="store_true", help="与 --write 同用，覆盖已有值")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = reestimate_history(write=args.write, overwrite=args.overwrite)
+    except Exception as e:
+        print(f"❌ 负荷估算失败：{e}")
+        return 1
+
+    print(f"✅估算完成：{stats['estimated']}/{stats['records']} 条")
+    print(f"   已有冷负荷/估算值 中位数：{stats['cooling_ratio_median']}")
+    print(f"   已有热负荷/估算值 中位数：{stats['heating_ratio_median']}")
+    if args.write:
+        print(f"   写回 {stats['updated']} 条")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# core/metrics.py
+"""
+热点路径计时：数据库执行 / 提交 / 取连接、附件复制等操作的耗时分布与慢操作日志
+
+    with timed("file.copy", detail=path):
+        ...
+    record("db.execute", seconds, detail=lambda: sql)     # detail 可以是函数，只在记录慢日志时求值
+    snapshot()                                            # 当前统计，供诊断窗口与脚本读取
+
+耗时按对数分桶（每 2 倍分 4 档，约 19% 精度）统计，p50 / p95 / p99 从桶中估算，
+每次记录只做一次对数运算和计数，开销在微秒以下。
+超过阈值（SLOW_THRESHOLDS_MS）的操作追加到 SLOW_LOG_PATH（JSON Lines），最近的若干条同时保存在内存中。
+PPG_METRICS=0 时关闭统计，数据库连接也不再使用计时游标。
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from ..config import METRICS_ENABLED, SLOW_LOG_PATH, SLOW_THRESHOLDS_MS
+
+_MIN_SECONDS = 1e-6  # 最小桶的上界
+_STEPS_PER_DOUBLING = 4
+_BUCKETS = 112  # 1 µs ~ 约 4.5 分钟，更长的记入最后一个桶
+_SLOW_LOG_MAX_BYTES = 5 * 1024 * 1024
+_RECENT_SLOW = 200
+
+_enabled = METRICS_ENABLED
+
+
+def _bucket_upper(index: int) -> float:
+    return _MIN_SECONDS * 2 ** (index / _STEPS_PER_DOUBLING)
+
+
+class Histogram:
+    """单个操作的耗时分布（秒）；slow_after 为慢操作阈值（秒）"""
+
+    def __init__(self, slow_after: float = math.inf):
+        self.slow_after = slow_after
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, error: bool = False, _log2=math.log2):
+        # 分桶内联在这里：每次数据库执行都会调用，省掉一次函数调用与 min()
+        if seconds > _MIN_SECONDS:
+            index = int(_log2(seconds / _MIN_SECONDS) * _STEPS_PER_DOUBLING) + 1
+            if index >= _BUCKETS:
+                index = _BUCKETS - 1
+        else:
+            index = 0
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds < self.min:
+                self.min = seconds
+            if seconds > self.max:
+                self.max = seconds
+            if error:
+                self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """估算分位数（秒）：取累计计数达到 q 的桶的上界，并限制在 [min, max] 内"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, n in enumerate(self.counts):
+            cumulative += n
+            if cumulative >= target:
+                return min(max(_bucket_upper(index), self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        ms = 1000.0
+        with self._lock:
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "total_ms": round(self.total * ms, 3),
+                "mean_ms": round(self.total / self.count * ms, 3) if self.count else 0.0,
+                "min_ms": round(self.min * ms, 3) if self.count else 0.0,
+                "p50_ms": round(self.percentile(0.50) * ms, 3),
+                "p95_ms": round(self.percentile(0.95) * ms, 3),
+                "p99_ms": round(self.percentile(0.99) * ms, 3),
+                "max_ms": round(self.max * ms, 3),
+            }
+
+
+_histograms = {}
+_counters = {}
+_registry_lock = threading.Lock()
+_recent_slow = deque(maxlen=_RECENT_SLOW)
+_slow_lock = threading.Lock()
+_since = datetime.now()
+
+
+def _histogram(name: str) -> Histogram:
+    with _registry_lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram(threshold_ms(name) / 1000.0)
+    return histogram
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(value: bool):
+    """开关统计（已建立的数据库连接保持原有游标类型，重建连接池后生效）"""
+    global _enabled
+    _enabled = bool(value)
+
+
+def threshold_ms(name: str) -> float:
+    """慢操作阈值：先按完整名称，再按前缀（如 db.*），最后取 default"""
+    if name in SLOW_THRESHOLDS_MS:
+        return SLOW_THRESHOLDS_MS[name]
+    prefix = name.split(".", 1)[0] + ".*"
+    return SLOW_THRESHOLDS_MS.get(prefix, SLOW_THRESHOLDS_MS.get("default", 200))
+
+
+def record(name: str, seconds: float, detail=None, error: bool = False):
+    """
+    记录一次操作耗时
+    :param detail: 慢日志中的说明（如 SQL），可以是无参函数，只在超过阈值时调用
+    :param error: 操作是否失败（计入 errors）
+    """
+    if not _enabled:
+        return
+    histogram = _histograms.get(name) or _histogram(name)
+    histogram.add(seconds, error)
+    if seconds >= histogram.slow_after:
+        _log_slow(name, seconds, detail, error)
+
+
+def count(name: str, n: int = 1):
+    """累加计数器"""
+    if not _enabled:
+        return
+    with _registry_lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class timed:
+    """with timed("file.copy", detail=path): ... 计时一段代码，抛出异常时计为失败"""
+
+    __slots__ = ("name", "detail", "start")
+
+    def __init__(self, name: str, detail=None):
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        record(self.name, time.perf_counter() - self.start, self.detail, exc_type is not None)
+        return False
+
+
+# ---------- 慢操作日志 ----------
+def _log_slow(name: str, seconds: float, detail, error: bool):
+    if callable(detail):
+        try:
+            detail = detail()
+        except Exception as e:
+            detail = f"<{e}>"
+    entry = {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "op": name,
+        "ms": round(seconds * 1000.0, 3),
+        "threshold_ms": threshold_ms(name),
+        "thread": threading.current_thread().name,
+    }
+    if error:
+        entry["error"] = True
+    if detail is not None:
+        entry["detail"] = str(detail)[:500]
+    with _slow_lock:
+        _recent_slow.append(entry)
+        if not SLOW_LOG_PATH:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(SLOW_LOG_PATH)), exist_ok=True)
+            if os.path.exists(SLOW_LOG_PATH) and os.path.getsize(SLOW_LOG_PATH) > _SLOW_LOG_MAX_BYTES:
+                os.replace(SLOW_LOG_PATH, SLOW_LOG_PATH + ".1")
+            with open(SLOW_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"❌ 慢操作日志写入失败: {e}")
+
+
+def slow_operations(limit: int = 50) -> list:
+    """最近的慢操作（新的在前）"""
+    with _slow_lock:
+        return list(reversed(_recent_slow))[:limit]
+
+
+# ---------- 读取与重置 ----------
+def snapshot() -> dict:
+    """
+    当前统计
+    :return: {"since", "enabled", "timers": {操作: 汇总}, "counters": {名称: 值}, "slow": [最近慢操作]}
+    """
+    with _registry_lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+    return {
+        "since": _since.isoformat(timespec="seconds"),
+        "enabled": _enabled,
+        "timers": {name: histograms[name].summary() for name in sorted(histograms)},
+        "counters": counters,
+        "slow": slow_operations(),
+    }
+
+
+def reset():
+    """清空统计与内存中的慢操作记录（不删除慢日志文件）"""
+    global _since
+    with _registry_lock:
+        _histograms.clear()
+        _counters.clear()
+        _since = datetime.now()
+    with _slow_lock:
+        _recent_slow.clear()
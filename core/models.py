@@ -1,11 +1,36 @@
 # core/models.py
-from pydantic import BaseModel, validator, Field
-from typing import Optional, Dict, Any
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    TypeAdapter,
+    ValidationError,
+    WrapValidator,
+    field_validator,
+)
+from pydantic_core import from_json
+from typing import Optional, Dict, Any, List, Annotated, Union
 from datetime import datetime
-import json
+
+
+def _parse_json_field(v):
+    """
+    JSON 字段：字符串只在这里解析一次（空串视为 None），dict/list 原样交给类型校验
+    用 pydantic-core 的 from_json 解析，比 json.loads 快约 3 倍
+    """
+    if isinstance(v, str):
+        if not v.strip():
+            return None
+        try:
+            return from_json(v)
+        except ValueError:
+            raise ValueError("JSON 格式错误")
+    return v
 
 
 class ProjectHisModel(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     name: str
     client_name: str
     project_type: Optional[str] = None
@@ -18,20 +43,104 @@ class ProjectHisModel(BaseModel):
     total_cost_cny: Optional[float] = None
     annual_energy_consumption_kwh: Optional[float] = None
     solution_summary: Optional[str] = None
-    file_attachments: Optional[Dict[str, Any]] = None
+    # 附件引用列表 [{"name", "sha256", "size"}]（AttachmentStore.put_files），旧数据为路径列表或 dict
+    file_attachments: Optional[Union[List[Any], Dict[str, Any]]] = None
     success_rating: Optional[int] = Field(None, ge=1, le=5)  # 1~5 分
     create_at: datetime = Field(default_factory=datetime.now)
 
-    @validator("selected_products", "file_attachments", pre=True)
+    @field_validator("selected_products", "file_attachments", mode="before")
+    @classmethod
     def validate_json_fields(cls, v):
-        if isinstance(v, str):
-            if not v.strip():
-                return None
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                raise ValueError("JSON 格式错误")
-        return v
-
-    class Config:
-        arbitrary_types_allowed = True
+        return _parse_json_field(v)
+
+
+class ProductModel(BaseModel):
+    name: str
+    category: Optional[str] = None
+    brand: Optional[str] = None
+    model_code: str  # 型号编码，导入时按此字段去重/更新
+    cooling_capacity_kw: Optional[float] = None
+    heating_capacity_kw: Optional[float] = None
+    power_kw: Optional[float] = None
+    cop: Optional[float] = None
+    noise_db: Optional[float] = None
+    dimensions: Optional[Dict[str, Any]] = None  # {length, width, height}
+    price_cny: Optional[float] = None
+    energy_level: Optional[int] = Field(None, ge=1, le=5)  # 1~5 级
+    tags: Optional[List[str]] = None
+    documentation_link: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    @field_validator("dimensions", "tags", mode="before")
+    @classmethod
+    def validate_json_fields(cls, v):
+        return _parse_json_field(v)
+
+
+# ---------- 批量校验 ----------
+class _InvalidRow:
+    """批量校验中未通过的行，记录该行的全部错误"""
+
+    __slots__ = ("errors",)
+
+    def __init__(self, errors):
+        self.errors = errors
+
+
+def _keep_row_errors(value, handler):
+    # 单行失败时不抛出，整批继续校验，只需遍历一遍数据
+    try:
+        return handler(value)
+    except ValidationError as e:
+        return _InvalidRow(e.errors(include_url=False))
+
+
+_list_adapters = {}
+
+
+def _list_adapter(model) -> TypeAdapter:
+    adapter = _list_adapters.get(model)
+    if adapter is None:
+        adapter = _list_adapters[model] = TypeAdapter(
+            List[Annotated[model, WrapValidator(_keep_row_errors)]]
+        )
+    return adapter
+
+
+def validate_batch(model, records, start: int = 0):
+    """
+    批量校验：整批一次交给 pydantic-core，出错的行不会中断其他行
+    :param model: ProjectHisModel / ProductModel
+    :param records: dict 或模型实例的序列
+    :param start: 行号起始值（报告错误和返回结果时使用）
+    :return: (valid, errors)
+        valid：[(行号, 模型实例)]，按输入顺序
+        errors：[{"row": 行号, "column": 字段名或 None, "message": 错误信息, "input": 原始值}]，
+            同一行的多个错误分别列出
+    """
+    records = records if isinstance(records, list) else list(records)
+    valid, errors = [], []
+    for row, result in enumerate(_list_adapter(model).validate_python(records), start):
+        if type(result) is not _InvalidRow:
+            valid.append((row, result))
+            continue
+        for err in result.errors:
+            errors.append(
+                {
+                    "row": row,
+                    "column": ".".join(map(str, err["loc"])) or None,
+                    "message": err["msg"],
+                    "input": None if err["type"] == "missing" else err.get("input"),
+                }
+            )
+    return valid, errors
+
+
+def group_errors(errors) -> dict:
+    """把 validate_batch 的错误按行合并：{行号: "字段: 信息; 字段: 信息"}"""
+    grouped = {}
+    for err in errors:
+        text = f"{err['column']}: {err['message']}" if err["column"] else err["message"]
+        grouped[err["row"]] = f"{grouped[err['row']]}; {text}" if err["row"] in grouped else text
+    return grouped
@@ -1,112 +1,731 @@
-import psycopg2, os
+import io
+import itertools
+import json
+import threading
+import weakref
+from datetime import datetime
 from psycopg2 import sql
-from dotenv import load_dotenv
-from ..config import DB_CONFIG
-from .models import ProjectHisModel
-from psycopg2.extras import Json
+from ..config import PREPARED_STATEMENTS
+from .models import ProjectHisModel, ProductModel, group_errors, validate_batch
+from .pool import get_pool
+from .storage import JSON_FIELDS, PRODUCT_JSON_FIELDS, Storage, notify_inserted
+from psycopg2.extras import Json, execute_values
 
-load_dotenv()
+# 与 project_his.md / products_lib.md 中的建表语句一致；model_code 唯一约束是 upsert 的前提
+SCHEMA_SQL = """
+create table if not exists projects_his(
+  id bigserial primary key,
+  name varchar(200) not null,
+  client_name varchar(200) not null,
+  project_type varchar(50),
+  area_sqm numeric,
+  location_city varchar(50),
+  total_heating_load_kw numeric,
+  total_cooling_load_kw numeric,
+  system_type varchar(100),
+  selected_products jsonb,
+  total_cost_cny numeric,
+  annual_energy_consumption_kwh numeric,
+  solution_summary text,
+  file_attachments jsonb,
+  success_rating int,
+  create_at timestamp,
+  updated_at timestamp,
+  journal_key varchar(64)
+);
+-- 录入表单写前日志的幂等键（core/journal.py）：同步中途崩溃后重放时按它跳过已写入的记录
+alter table projects_his add column if not exists journal_key varchar(64);
+create unique index if not exists projects_his_journal_key_idx on projects_his (journal_key);
+-- 修改时间由触发器维护（update_rows / update_project_attachments 等任何 update），快照按它增量刷新
+alter table projects_his add column if not exists updated_at timestamp;
+create or replace function ppg_touch_updated_at() returns trigger as $$
+begin
+  new.updated_at := clock_timestamp()::timestamp;
+  return new;
+end
+$$ language plpgsql;
+do $$
+begin
+  if not exists (
+    select 1 from pg_trigger where tgname = 'projects_his_touch_updated_at' and tgrelid = 'projects_his'::regclass
+  ) then
+    create trigger projects_his_touch_updated_at before update on projects_his
+      for each row execute procedure ppg_touch_updated_at();
+  end if;
+end
+$$;
+create table if not exists products(
+  id bigserial primary key,
+  name varchar(200) not null,
+  category varchar(50),
+  brand varchar(50),
+  model_code varchar(100) not null unique,
+  cooling_capacity_kw numeric,
+  heating_capacity_kw numeric,
+  power_kw numeric,
+  cop numeric,
+  noise_db numeric,
+  dimensions jsonb,
+  price_cny numeric,
+  energy_level int,
+  tags jsonb,
+  documentation_link text,
+  created_at timestamp,
+  updated_at timestamp
+);
+"""
 
+# COPY 文本格式需要转义的字符
+_COPY_ESCAPES = str.maketrans(
+    {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+)
 
-class DB:
-    def __init__(self):
-        self.conn = None
+
+# 服务端游标编号（游标名在同一连接内必须唯一）
+_cursor_ids = itertools.count(1)
+
+
+def _copy_value(field_name, value) -> str:
+    """把单个字段值编码为 COPY ... FROM STDIN 的文本格式"""
+    if value is None:
+        return "\\N"
+    if field_name in JSON_FIELDS:
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.translate(_COPY_ESCAPES)
+
+
+# ---------- 单条插入：语句缓存与服务端 prepared statement ----------
+# 列签名（非空字段元组）→ (语句名, prepare 语句, execute 语句, 普通 insert 语句)，进程内只拼装一次；
+# ("values", 全部字段) → insert_many 使用的多行插入语句
+_insert_statements = {}
+_insert_lock = threading.Lock()
+# 各连接上已 prepare 的语句名；连接被连接池丢弃后随之释放
+_prepared = weakref.WeakKeyDictionary()
+
+
+def _insert_statement(conn, fields: tuple) -> tuple:
+    statement = _insert_statements.get(fields)
+    if statement is None:
+        with _insert_lock:
+            statement = _insert_statements.get(fields)
+            if statement is None:
+                columns = sql.SQL(", ").join(map(sql.Identifier, fields)).as_string(conn)
+                name = f"ppg_insert_project_{len(_insert_statements) + 1}"
+                placeholders = ", ".join(["%s"] * len(fields))
+                params = ", ".join(f"${i}" for i in range(1, len(fields) + 1))
+                statement = _insert_statements[fields] = (
+                    name,
+                    f"prepare {name} as insert into projects_his ({columns}) values ({params}) returning id",
+                    f"execute {name} ({placeholders})",
+                    f"insert into projects_his ({columns}) values ({placeholders}) returning id",
+                )
+    return statement
+
+
+def _insert_many_statement(conn, keyed: bool = False) -> str:
+    """多行插入（全部字段，keyed 时再加 journal_key 列，execute_values 的 values %s 形式），按字段签名缓存"""
+    fields = tuple(ProjectHisModel.model_fields) + (("journal_key",) if keyed else ())
+    statement = _insert_statements.get(("values", fields))
+    if statement is None:
+        statement = _insert_statements[("values", fields)] = sql.SQL(
+            "insert into projects_his ({}) values %s returning id"
+        ).format(sql.SQL(", ").join(map(sql.Identifier, fields))).as_string(conn)
+    return statement
+
+
+def _project_values(project: ProjectHisModel) -> tuple:
+    """(非空字段元组, 值列表)，JSON 字段用 Json 适配"""
+    fields, values = [], []
+    for field_name, value in project.model_dump().items():
+        if value is not None:
+            fields.append(field_name)
+            values.append(Json(value) if field_name in JSON_FIELDS else value)
+    return tuple(fields), values
+
+
+def execute_insert(cursor, project: ProjectHisModel, key: str = None) -> int:
+    """
+    在当前事务中插入一条项目记录（不提交），同一次往返中返回新 id
+    语句按列签名缓存；PREPARED_STATEMENTS 开启时每个连接首次遇到某个列签名时 prepare 一次，
+    之后只发送 execute，服务端不再重复解析和规划
+    :param key: 幂等键，写入 journal_key 列
+    :return: 新记录的 id
+    """
+    fields, values = _project_values(project)
+    if key is not None:
+        fields, values = fields + ("journal_key",), values + [key]
+    name, prepare, execute, plain = _insert_statement(cursor.connection, fields)
+    if not PREPARED_STATEMENTS:
+        cursor.execute(plain, values)
+        return cursor.fetchone()[0]
+    prepared = _prepared.get(cursor.connection)
+    if prepared is None:
+        prepared = _prepared[cursor.connection] = set()
+    if name not in prepared:
+        # prepare 不随事务回滚，执行成功后即可在该连接上一直使用
+        cursor.execute(prepare)
+        prepared.add(name)
+    cursor.execute(execute, values)
+    return cursor.fetchone()[0]
+
+
+# PostgreSQL 类型 OID：整数 / 浮点与 numeric
+_INT_OIDS = {20, 21, 23}
+_FLOAT_OIDS = {700, 701, 1700}
+
+
+def _column_array(values: list, type_code: int):
+    """单列值 → NumPy 数组：整数列无缺失时为 int64，数值列为 float64（缺失为 NaN），其余为 object"""
+    # 只有列式读取用到 NumPy，延迟导入以免拖慢 core.database 等模块的导入
+    import numpy as np
+
+    if type_code in _INT_OIDS and None not in values:
+        return np.array(values, dtype=np.int64)
+    if type_code in _INT_OIDS or type_code in _FLOAT_OIDS:
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class DB(Storage):
+    """PostgreSQL 实现（连接取自 core/pool 的进程级连接池）"""
+
+    name = "postgres"
 
     def db_connection(self) -> bool:
         """
-        数据库额连接
-        :return: 数据库连接对象
+        数据库额连接（从进程级连接池取出，不再每次新建 TCP 连接）
+        :return: 是否连接成功
         """
-        self.conn = psycopg2.connect(
-            host=DB_CONFIG["host"],
-            port=DB_CONFIG["port"],
-            database=DB_CONFIG["database"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-        )
-        if self.conn:
-            print("数据库连接成功")
+        try:
+            self.conn = get_pool().getconn()
             return True
-        else:
-            print("数据库连接失败")
+        except Exception as e:
+            print(f"数据库连接失败: {e}")
             return False
 
     def db_close(self) -> bool:
         """
-        数据库关闭连接
+        数据库关闭连接（归还连接池，断线连接由连接池丢弃）
         :return:
         """
         if self.conn:
-            self.conn.close()
+            get_pool().putconn(self.conn)
+            self.conn = None
             return True
         else:
             return False
 
-    def db_inert(self, project: ProjectHisModel) -> bool:
+    def insert_project(self, project: ProjectHisModel):
+        """
+        插入一条项目记录
+        :param project: 项目数据
+        :return: 新记录的 id，失败返回 None
         """
-        数据库插入数据
-        :param sql: sql语句
+        if not self.conn:
+            if not self.db_connection():
+                return None
+
+        cursor = self.conn.cursor()
+        try:
+            project_id = execute_insert(cursor, project)
+            self.conn.commit()
+            print("✅数据插入成功")
+            notify_inserted(project_id, project)
+            return project_id
+
+        except Exception as e:
+            if not self.conn.closed:
+                self.conn.rollback()
+            print(f"❌ 插入失败: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    def _insert_many_batch(self, projects: list, page_size: int, keys: list = None) -> list:
+        """一个事务内按 page_size 行一条多行 insert ... returning id（execute_values）后提交"""
+        query = _insert_many_statement(self.conn, keyed=keys is not None)
+        rows = [
+            tuple(Json(v) if c in JSON_FIELDS and v is not None else v for c, v in project.model_dump().items())
+            for project in projects
+        ]
+        if keys is not None:
+            rows = [row + (key,) for row, key in zip(rows, keys)]
+        cursor = self.conn.cursor()
+        try:
+            result = execute_values(cursor, query, rows, page_size=page_size, fetch=True)
+            self.conn.commit()
+            return [row[0] for row in result]
+        except Exception as e:
+            self._abort(e)
+            raise
+        finally:
+            cursor.close()
+
+    def _insert_one(self, project: ProjectHisModel, key: str = None) -> int:
+        cursor = self.conn.cursor()
+        try:
+            project_id = execute_insert(cursor, project, key)
+            self.conn.commit()
+            return project_id
+        except Exception as e:
+            self._abort(e)
+            raise
+        finally:
+            cursor.close()
+
+    def _abort(self, error):
+        """写入失败：连接已断开时抛出 ConnectionError（调用方据此区分“数据被拒绝”与“数据库不可用”），否则回滚"""
+        if self.conn.closed:
+            raise ConnectionError(f"数据库连接已断开：{error}") from error
+        self.conn.rollback()
+
+    def update_project_attachments(self, project_id, file_attachments) -> bool:
+        """
+        更新项目附件信息
+        :param project_id: 项目id
+        :param file_attachments: 附件列表（list 或 JSON 字符串）
         :return:
         """
+        if not self.conn:
+            if not self.db_connection():
+                return False
+
+        if isinstance(file_attachments, str):
+            file_attachments = json.loads(file_attachments)
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                "update projects_his set file_attachments = %s where id = %s;",
+                (Json(file_attachments), project_id),
+            )
+            self.conn.commit()
+            return True
 
+        except Exception as e:
+            if not self.conn.closed:
+                self.conn.rollback()
+            print(f"❌ 附件更新失败: {e}")
+            return False
+        finally:
+            cursor.close()
+
+    def delete_project(self, project_id) -> bool:
+        """
+        删除项目记录（后台保存被取消时撤销插入）
+        :param project_id: 项目id
+        :return:
+        """
         if not self.conn:
-            if self.db_connection():
+            if not self.db_connection():
                 return False
 
         cursor = self.conn.cursor()
-        # 构建字段和值
-        fields = []
-        values = []
-        placeholders = []
-
-        for filed_name, value in project.items():
-            if filed_name is not None:
-                fields.append(filed_name)
-                if filed_name in [""]:
-                    values.append(Json(value))
-                else:
-                    values.append(value)
-                placeholders.append("%s")
+        try:
+            cursor.execute("delete from projects_his where id = %s;", (project_id,))
+            self.conn.commit()
+            return True
+
+        except Exception as e:
+            if not self.conn.closed:
+                self.conn.rollback()
+            print(f"❌ 删除失败: {e}")
+            return False
+        finally:
+            cursor.close()
+
+    def bulk_insert_projects(self, projects, batch_size: int = 5000, on_reject=None) -> int:
+        """
+        批量导入历史项目：逐批校验（validate_batch）后 COPY FROM STDIN 并提交，内存占用只与 batch_size 有关
+        :param projects: ProjectHisModel 或 dict 的可迭代对象（可以是生成器）
+        :param batch_size: 每批行数
+        :param on_reject: 回调 on_reject(record, error)，接收校验或写入失败的行，不中断导入；
+            校验失败时 error 列出该行所有出错的字段
+        :return: 成功写入的行数
+        """
+        if not self.conn:
+            if not self.db_connection():
+                return 0
+
+        columns = list(ProjectHisModel.model_fields)
+        copy_sql = sql.SQL("copy projects_his ({}) from stdin").format(
+            sql.SQL(", ").join(map(sql.Identifier, columns))
+        ).as_string(self.conn)
+
+        inserted = 0
+        records = iter(projects)
+        while True:
+            chunk = list(itertools.islice(records, batch_size))
+            if not chunk:
+                break
+            valid, errors = validate_batch(ProjectHisModel, chunk)
+            if on_reject:
+                for row, message in group_errors(errors).items():
+                    on_reject(chunk[row], message)
+
+            batch = []
+            for row, project in valid:
+                line = "\t".join(_copy_value(c, getattr(project, c)) for c in columns) + "\n"
+                batch.append((chunk[row], line))
+            if batch:
+                inserted += self._copy_batch(copy_sql, batch, on_reject)
+
+        print(f"✅批量导入完成：{inserted} 条")
+        return inserted
 
-        sql_ = sql.SQL("insert into projects_his ({}) values ({});").format(
-            sql.SQL(", ").join(map(sql.Identifier, fields)),
-            sql.SQL(", ").join(map(sql.Placeholder, placeholders)),
+    def _copy_batch(self, copy_sql, batch, on_reject) -> int:
+        """
+        COPY 一批数据；失败时二分重试，把数据库拒绝的行交给 on_reject
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.copy_expert(copy_sql, io.StringIO("".join(l for _, l in batch)))
+            self.conn.commit()
+            return len(batch)
+        except Exception as e:
+            if self.conn.closed:
+                raise
+            self.conn.rollback()
+            if len(batch) == 1:
+                if on_reject:
+                    on_reject(batch[0][0], str(e).strip())
+                return 0
+        finally:
+            cursor.close()
+
+        mid = len(batch) // 2
+        return self._copy_batch(copy_sql, batch[:mid], on_reject) + self._copy_batch(
+            copy_sql, batch[mid:], on_reject
         )
 
+    def upsert_products(self, products, batch_size: int = 1000, on_reject=None) -> int:
+        """
+        批量写入产品库：按 model_code 执行 INSERT ... ON CONFLICT DO UPDATE
+        每批一条多行 INSERT，整次刷新在同一个事务中提交
+        :param products: ProductModel 或 dict 的可迭代对象（可以是生成器）
+        :param batch_size: 每条 INSERT 的行数
+        :param on_reject: 回调 on_reject(record, error)，接收校验失败的行
+        :return: 写入（新增或更新）的行数；内容没有变化的已有型号不更新（updated_at 保持不变），不计入
+        """
+        if not self.conn:
+            if not self.db_connection():
+                return 0
+
+        columns = list(ProductModel.model_fields)
+        update_columns = [c for c in columns if c not in ("model_code", "created_at")]
+        # 只比较内容列：updated_at 每次导入都是当前时间，参与比较会让所有行都被“修改”
+        compare_columns = [c for c in update_columns if c != "updated_at"]
+        query = sql.SQL(
+            "insert into products ({}) values %s on conflict (model_code) do update set {} "
+            "where ({}) is distinct from ({}) returning id"
+        ).format(
+            sql.SQL(", ").join(map(sql.Identifier, columns)),
+            sql.SQL(", ").join(
+                sql.SQL("{0} = excluded.{0}").format(sql.Identifier(c))
+                for c in update_columns
+            ),
+            sql.SQL(", ").join(sql.SQL("products.{}").format(sql.Identifier(c)) for c in compare_columns),
+            sql.SQL(", ").join(sql.SQL("excluded.{}").format(sql.Identifier(c)) for c in compare_columns),
+        ).as_string(self.conn)
+
+        cursor = self.conn.cursor()
+        upserted = 0
+        records = iter(products)
         try:
-            cursor.execute(sql_, values)
+            while True:
+                chunk = list(itertools.islice(records, batch_size))
+                if not chunk:
+                    break
+                valid, errors = validate_batch(ProductModel, chunk)
+                if on_reject:
+                    for row, message in group_errors(errors).items():
+                        on_reject(chunk[row], message)
+                # model_code -> 行；同一条语句不能两次更新同一行，批内重复型号只保留最后一条
+                batch = {}
+                for _, product in valid:
+                    values = product.model_dump()
+                    batch[product.model_code] = tuple(
+                        Json(values[c]) if c in PRODUCT_JSON_FIELDS and values[c] is not None
+                        else values[c]
+                        for c in columns
+                    )
+                if batch:
+                    upserted += len(execute_values(cursor, query, list(batch.values()), page_size=batch_size, fetch=True))
+
             self.conn.commit()
+            print(f"✅产品库更新完成：{upserted} 条")
+            return upserted
+
+        except Exception as e:
+            if not self.conn.closed:
+                self.conn.rollback()
+            print(f"❌ 产品库更新失败: {e}")
+            return 0
+        finally:
             cursor.close()
-            print("✅数据插入成功")
-            return True
 
+    def update_rows(self, table: str, key: str, columns: list, rows: list, page_size: int = 5000) -> int:
+        """
+        按主键批量更新：update ... from (values ...)，每 page_size 行一条语句，整批一个事务
+        :param key: 主键列，rows 中每行为 (key 值, *columns 值)
+        :return: 提交的行数；失败时回滚并抛出异常
+        """
+        if not rows:
+            return 0
+        if not self.conn:
+            if not self.db_connection():
+                raise ConnectionError("数据库连接失败")
+
+        cursor = self.conn.cursor()
+        try:
+            # values 列表中的 None 没有类型，按表中列的类型显式转换
+            cursor.execute(
+                "select attname, format_type(atttypid, atttypmod) from pg_attribute "
+                "where attrelid = %s::regclass and attnum > 0 and not attisdropped",
+                (table,),
+            )
+            types = dict(cursor.fetchall())
+            query = sql.SQL("update {} t set {} from (values %s) as v({}) where t.{} = v.{}").format(
+                sql.Identifier(table),
+                sql.SQL(", ").join(
+                    sql.SQL("{0} = v.{0}::{1}").format(sql.Identifier(c), sql.SQL(types[c]))
+                    for c in columns
+                ),
+                sql.SQL(", ").join(map(sql.Identifier, [key, *columns])),
+                sql.Identifier(key),
+                sql.Identifier(key),
+            ).as_string(self.conn)
+            execute_values(cursor, query, rows, page_size=page_size)
+            self.conn.commit()
+            return len(rows)
+        except Exception:
+            if not self.conn.closed:
+                self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def create_tables(self) -> bool:
+        """创建 projects_his / products（已存在时跳过）"""
+        if not self.conn:
+            if not self.db_connection():
+                return False
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(SCHEMA_SQL)
+            self.conn.commit()
+            return True
         except Exception as e:
+            if not self.conn.closed:
+                self.conn.rollback()
+            print(f"❌ 建表失败: {e}")
+            return False
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _search_clause(search: str, search_columns):
+        """关键字模糊匹配（任一列包含即命中），返回 (sql 片段, 参数) 或 (None, [])"""
+        if not search or not search_columns:
+            return None, []
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clause = sql.SQL("({})").format(
+            sql.SQL(" or ").join(
+                sql.SQL("{} ilike %s").format(sql.Identifier(c)) for c in search_columns
+            )
+        )
+        return clause, [pattern] * len(search_columns)
+
+    def select_page(
+        self,
+        table: str,
+        columns: list,
+        order_by: str = "id",
+        descending: bool = False,
+        after: tuple = None,
+        search: str = None,
+        search_columns=(),
+        limit: int = 200,
+    ) -> list:
+        """
+        键集分页（keyset pagination）：按 (order_by, id) 排序，从上一页最后一行之后继续取，
+        不使用 OFFSET，翻到多深都只扫描一页的数据；order_by 为空值的行始终排在最后
+        :param columns: 返回的列，必须包含 id；order_by 列不在其中时自动追加
+        :param after: 上一页最后一行的 (order_by 值, id)，取第一页时为 None
+        :return: 行元组列表
+        """
+        if not self.conn:
+            if not self.db_connection():
+                return []
+
+        select_columns = list(columns)
+        if order_by not in select_columns:
+            select_columns.append(order_by)
+        col = sql.Identifier(order_by)
+        op = sql.SQL("<" if descending else ">")
+        direction = sql.SQL("desc" if descending else "asc")
+
+        conditions, params = [], []
+        clause, search_params = self._search_clause(search, search_columns)
+        if clause is not None:
+            conditions.append(clause)
+            params.extend(search_params)
+        if after is not None:
+            last_value, last_id = after
+            if order_by == "id":
+                conditions.append(sql.SQL("id {} %s").format(op))
+                params.append(last_id)
+            elif last_value is None:
+                conditions.append(sql.SQL("({} is null and id {} %s)").format(col, op))
+                params.append(last_id)
+            else:
+                conditions.append(
+                    sql.SQL("(({}, id) {} (%s, %s) or {} is null)").format(col, op, col)
+                )
+                params.extend([last_value, last_id])
+
+        if order_by == "id":
+            order = sql.SQL("id {}").format(direction)
+        else:
+            order = sql.SQL("{} {} nulls last, id {}").format(col, direction, direction)
+        query = sql.SQL("select {} from {} {} order by {} limit %s").format(
+            sql.SQL(", ").join(map(sql.Identifier, select_columns)),
+            sql.Identifier(table),
+            sql.SQL("where ") + sql.SQL(" and ").join(conditions) if conditions else sql.SQL(""),
+            order,
+        )
+        params.append(limit)
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
             self.conn.rollback()
+
+    def count_rows(self, table: str, search: str = None, search_columns=()) -> int:
+        """满足 select_page 同样检索条件的行数"""
+        if not self.conn:
+            if not self.db_connection():
+                return 0
+        clause, params = self._search_clause(search, search_columns)
+        query = sql.SQL("select count(*) from {}").format(sql.Identifier(table))
+        if clause is not None:
+            query = query + sql.SQL(" where ") + clause
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+        finally:
             cursor.close()
-            print(f"❌ 插入失败: {e}")
-            return False
+            self.conn.rollback()
+
+    # ---------- 流式读取 ----------
+    def _named_cursor(self, itersize: int):
+        """服务端游标（名称在进程内唯一），结果按 itersize 分批从数据库拉取"""
+        if not self.conn:
+            if not self.db_connection():
+                raise ConnectionError("数据库连接失败")
+        cursor = self.conn.cursor(name=f"ppg_stream_{next(_cursor_ids)}")
+        cursor.itersize = itersize
+        return cursor
+
+    def _end_stream(self, cursor):
+        cursor.close()
+        # 服务端游标只在事务内有效，读完后结束只读事务
+        if not self.conn.closed:
+            self.conn.rollback()
 
-    def db_select(self, sql):
+    def iter_rows(self, query, params=None, itersize: int = 2000, as_dict: bool = False):
         """
-        数据库查询数据
-        :param sql: sql语句
-        :return: 查询结果
+        流式查询：用服务端游标逐批读取，内存只保留一批数据
+        :param query: SQL（字符串或 psycopg2.sql 对象），参数用 %s / %(name)s 占位
+        :param params: 查询参数
+        :param itersize: 每次从数据库拉取的行数
+        :param as_dict: True 时逐行返回 {列名: 值}
+        :return: 行生成器（需在 DB 连接关闭前迭代完）
         """
-        conn, cursor = self.db_connection()
+        cursor = self._named_cursor(itersize)
         try:
-            cursor.execute(sql)
+            cursor.execute(query, params)
+            names = None
+            for row in cursor:
+                if as_dict:
+                    if names is None:
+                        names = [d[0] for d in cursor.description]
+                    yield dict(zip(names, row))
+                else:
+                    yield row
+        finally:
+            self._end_stream(cursor)
+
+    def _column_batches(self, query, params, batch_size: int):
+        """逐批产出 (列描述, {列名: 数组})，结果为空时只产出一次空数组，保证列信息可用"""
+        cursor = self._named_cursor(batch_size)
+        try:
+            cursor.execute(query, params)
+            first = True
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows and not first:
+                    break
+                first = False
+                yield {
+                    d.name: _column_array([row[i] for row in rows], d.type_code)
+                    for i, d in enumerate(cursor.description)
+                }
+                if not rows:
+                    break
+        finally:
+            self._end_stream(cursor)
+
+    def fetch_all(self, query, params=None) -> list:
+        """
+        执行查询并返回全部行（只读事务，出错时抛出异常；大结果集请用 iter_rows）
+        :param query: SQL（字符串或 psycopg2.sql 对象），参数用 %s / %(name)s 占位
+        """
+        if not self.conn:
+            if not self.db_connection():
+                raise ConnectionError("数据库连接失败")
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            if not self.conn.closed:
+                self.conn.rollback()
+
+    def db_select(self, query, params=None):
+        """
+        数据库查询数据（一次性返回全部结果，大结果集请用 iter_rows）
+        :param query: sql语句
+        :param params: 查询参数
+        :return: 查询结果，失败返回 None
+        """
+        if not self.conn:
+            if not self.db_connection():
+                return None
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
             result = cursor.fetchall()
-            conn.close()
+            self.conn.rollback()
             print("数据查询成功")
             return result
 
         except Exception as e:
+            if not self.conn.closed:
+                self.conn.rollback()
             print("数据查询失败")
             print(e)
-
-    def __enter__(self):
-        self.db_connection()
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.db_close()
+            return None
+        finally:
+            cursor.close()
@@ -0,0 +1,315 @@
+# core/pool.py
+"""
+进程级数据库连接池
+DB 与 DatabaseManager 共享同一个池，避免每次保存都重新建立 TCP + 认证握手
+
+池中的连接使用计时游标（core/metrics）：execute / executemany / copy_expert / commit
+以及取连接、建连的耗时都会被统计，PPG_METRICS=0 时使用普通连接。
+"""
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+from ..config import DB_CONFIG, DB_POOL_CONFIG
+from . import metrics
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """连接池已满且在超时时间内没有可用连接"""
+
+
+class TimedCursor(extensions.cursor):
+    """记录每次执行耗时的游标：db.execute / db.executemany / db.copy，出错的执行计入 errors"""
+
+    def _statement(self):
+        # 慢日志才需要 SQL 文本：取 psycopg2 最近一次发送的语句（已绑定参数）
+        query = self.query
+        return query.decode("utf-8", "replace") if isinstance(query, bytes) else query
+
+    def _timed(self, name, method, *args):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = method(*args)
+            error = False
+            return result
+        finally:
+            metrics.record(name, time.perf_counter() - start, self._statement, error)
+
+    def execute(self, query, vars=None):
+        return self._timed("db.execute", super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._timed("db.executemany", super().executemany, query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed("db.copy", super().copy_expert, sql, file, size)
+
+
+class TimedConnection(extensions.connection):
+    """默认使用 TimedCursor，并记录 commit 耗时"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = TimedCursor
+
+    def commit(self):
+        start = time.perf_counter()
+        error = True
+        try:
+            super().commit()
+            error = False
+        finally:
+            metrics.record("db.commit", time.perf_counter() - start, error=error)
+
+
+class ConnectionPool:
+    """
+    线程安全的 psycopg2 连接池
+
+    - minconn / maxconn：常驻连接数与最大连接数
+    - idle_timeout：超过 minconn 的空闲连接存活秒数
+    - health_check_interval：空闲超过该秒数的连接在取出前先 SELECT 1 探活
+    - acquire_timeout：池满时等待可用连接的秒数
+    """
+
+    def __init__(
+        self,
+        minconn: int = 1,
+        maxconn: int = 5,
+        idle_timeout: float = 300,
+        health_check_interval: float = 30,
+        acquire_timeout: float = 10,
+        **conn_kwargs,
+    ):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("连接池大小配置错误：需满足 0 <= minconn <= maxconn")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.conn_kwargs = conn_kwargs
+
+        self._idle = []  # [(conn, 归还时间)]，后进先出
+        self._used = set()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "waits": 0}
+
+    # ---------- 内部方法 ----------
+    def _connect(self):
+        kwargs = self.conn_kwargs
+        if metrics.enabled() and "connection_factory" not in kwargs:
+            kwargs = dict(kwargs, connection_factory=TimedConnection)
+        with metrics.timed("db.connect"):
+            conn = psycopg2.connect(**kwargs)
+        self.stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        self.stats["discarded"] += 1
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn) -> bool:
+        """探活：执行 SELECT 1，失败即视为断线（用普通游标，不计入 db.execute 指标）"""
+        try:
+            with conn.cursor(cursor_factory=extensions.cursor) as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _prune_idle(self, now: float):
+        """关闭超过 idle_timeout 的多余空闲连接（保留 minconn 个）"""
+        total = len(self._idle) + len(self._used)
+        keep = []
+        # 从最久未使用的连接开始检查
+        for conn, last_used in self._idle:
+            if total > self.minconn and now - last_used > self.idle_timeout:
+                self._discard(conn)
+                total -= 1
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+    # ---------- 公共接口 ----------
+    def getconn(self, timeout: float = None):
+        """取出一个可用连接；断线连接会被丢弃并自动重连（耗时计入 db.acquire，含等待与建连）"""
+        start = time.perf_counter()
+        error = True
+        try:
+            conn = self._getconn(timeout)
+            error = False
+            return conn
+        finally:
+            metrics.record("db.acquire", time.perf_counter() - start, error=error)
+
+    def _getconn(self, timeout: float = None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn, last_used = self._reserve(deadline, timeout)
+            if last_used is None:
+                placeholder = conn
+                break
+            # 探活在锁外进行：断线时 SELECT 1 可能阻塞到 TCP 超时，期间不能挡住其他线程取还连接
+            if time.monotonic() - last_used <= self.health_check_interval or self._is_alive(conn):
+                with self._cond:
+                    self.stats["reused"] += 1
+                return conn
+            with self._cond:
+                self._used.discard(conn)
+                self._discard(conn)
+                self._cond.notify()
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._used.discard(placeholder)
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._used.discard(placeholder)
+            self._used.add(conn)
+        return conn
+
+    def _reserve(self, deadline: float, timeout: float):
+        """
+        在锁内取出一个空闲连接，或为新建连接占一个名额（两者都已计入 _used）
+        :return: (空闲连接, 归还时间)；或 (占位对象, None)，由调用方在锁外建连
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.InterfaceError("连接池已关闭")
+
+                now = time.monotonic()
+                self._prune_idle(now)
+
+                while self._idle:
+                    conn, last_used = self._idle.pop()
+                    if conn.closed:
+                        self._discard(conn)
+                        continue
+                    self._used.add(conn)
+                    return conn, last_used
+
+                if len(self._used) < self.maxconn:
+                    # 占位后在锁外建连，避免握手期间阻塞其他线程
+                    placeholder = object()
+                    self._used.add(placeholder)
+                    return placeholder, None
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"连接池已满（{self.maxconn}），{timeout} 秒内无可用连接"
+                    )
+                self.stats["waits"] += 1
+                self._cond.wait(remaining)
+
+    def putconn(self, conn, close: bool = False):
+        """归还连接；未结束的事务会被回滚，断线或出错的连接直接丢弃"""
+        # 回滚在锁外进行（连接此时仍计入 _used）：网络慢时不挡住其他线程取还连接
+        if not close and not conn.closed:
+            status = conn.info.transaction_status
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    close = True
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+        else:
+            close = True
+
+        with self._cond:
+            self._used.discard(conn)
+            if close or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """with pool.connection() as conn: ... 异常断线时自动丢弃连接"""
+        conn = self.getconn(timeout)
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, close=broken or bool(conn.closed))
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+            for conn in list(self._used):
+                if isinstance(conn, extensions.connection):
+                    self._discard(conn)
+            self._used.clear()
+            self._cond.notify_all()
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._used)
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+
+# ---------- 进程级单例 ----------
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    获取进程内共享的连接池（首次调用时按 DB_CONFIG / DB_POOL_CONFIG 创建）
+    fork 出的子进程会重新建池，不与父进程共用 socket
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            conn_kwargs = {k: v for k, v in DB_CONFIG.items() if v is not None}
+            _pool = ConnectionPool(**DB_POOL_CONFIG, **conn_kwargs)
+            _pool_pid = pid
+        return _pool
+
+
+def close_pool():
+    """关闭共享连接池（程序退出时调用）"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+        _pool_pid = None
+
+
+atexit.register(close_pool)
@@ -0,0 +1,183 @@
+# core/product_importer.py
+"""
+产品库导入：供应商产品表格（doc/products*.xls）→ products
+
+用法：
+    python -m ppg.core.product_importer                       # 默认导入 doc/products20250910.xls
+    python -m ppg.core.product_importer new_catalog.xlsx --create-table
+
+表格逐行流式读取并映射为 ProductModel，由 DB.upsert_products 按 model_code 分批 upsert。
+"""
+import argparse
+import os
+import re
+import sys
+
+from ..config import BASE_DIR
+from .bulk_loader import RejectWriter
+from .storage import open_storage
+
+DEFAULT_CATALOG = os.path.join(BASE_DIR, "doc", "products20250910.xls")
+
+# 表头（取中文逗号前的部分）→ 内部字段名
+HEADER_MAP = {
+    "产品名称": "name",
+    "产品分类": "category",
+    "品牌": "brand",
+    "产品型号": "model_code",
+    "产品规格": "spec",
+    "产品备注": "remark",
+    "采购价格": "purchase_price",
+    "销售价格": "sale_price",
+    "创建时间": "created_at",
+}
+
+# 规格/备注中可识别的参数
+_NUM = r"(\d+(?:\.\d+)?)"
+SPEC_PATTERNS = {
+    "cooling_capacity_kw": re.compile(r"制冷量[:：]?\s*" + _NUM + r"\s*kw", re.I),
+    "heating_capacity_kw": re.compile(r"制热量[:：]?\s*" + _NUM + r"\s*kw", re.I),
+    "cop": re.compile(r"(?:cop|能效比)[:：]?\s*" + _NUM, re.I),
+    "noise_db": re.compile(_NUM + r"\s*db\(?a?\)?", re.I),
+    "power_kw": re.compile(_NUM + r"\s*kw", re.I),
+}
+DIMENSIONS_PATTERN = re.compile(
+    _NUM + r"\s*[*×xX]\s*" + _NUM + r"\s*[*×xX]\s*" + _NUM
+)
+TAG_KEYWORDS = ["变频", "磁悬浮", "低温", "BACnet", "Modbus", "带显示", "带反馈", "弹簧复位"]
+
+
+def iter_sheet_rows(path: str):
+    """
+    流式读取表格第一个工作表，逐行产出 {表头: 值}
+    doc 目录下的 .xls 实际多为 xlsx 格式，按文件头判断而不是扩展名
+    """
+    with open(path, "rb") as f:
+        is_zip = f.read(2) == b"PK"
+
+    if is_zip:
+        try:
+            import openpyxl
+        except ImportError:
+            raise ImportError("读取 xlsx 需要安装 openpyxl：pip install openpyxl")
+        with open(path, "rb") as f:
+            workbook = openpyxl.load_workbook(f, read_only=True, data_only=True)
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            yield from _rows_to_dicts(rows)
+            workbook.close()
+    else:
+        try:
+            import xlrd
+        except ImportError:
+            raise ImportError("读取 xls 需要安装 xlrd：pip install xlrd")
+        workbook = xlrd.open_workbook(path, on_demand=True)
+        sheet = workbook.sheet_by_index(0)
+        rows = ([cell.value for cell in row] for row in sheet.get_rows())
+        yield from _rows_to_dicts(rows)
+        workbook.release_resources()
+
+
+def _rows_to_dicts(rows):
+    header = None
+    for row in rows:
+        if header is None:
+            header = [
+                HEADER_MAP.get(str(h).split("，")[0].strip()) if h is not None else None
+                for h in row
+            ]
+            continue
+        yield {key: value for key, value in zip(header, row) if key}
+
+
+def _text(value):
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _number(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def map_product(row: dict) -> dict:
+    """把一行表格数据映射为 products 表字段"""
+    model_code = _text(row.get("model_code"))
+    base_name = _text(row.get("name"))
+    spec = " ".join(filter(None, (_text(row.get("spec")), _text(row.get("remark")))))
+    # 名称里有时也带参数，如“水泵变频柜（90KW）”
+    search_text = " ".join(filter(None, (base_name, spec)))
+
+    product = {
+        "name": " ".join(filter(None, (base_name, model_code))),
+        "category": _text(row.get("category")),
+        "brand": _text(row.get("brand")),
+        "model_code": model_code,
+        "price_cny": _number(row.get("sale_price")),
+    }
+    if product["price_cny"] is None:
+        product["price_cny"] = _number(row.get("purchase_price"))
+
+    for field_name, pattern in SPEC_PATTERNS.items():
+        match = pattern.search(search_text)
+        if match:
+            product[field_name] = float(match.group(1))
+    # 出现“制冷量/制热量”时，其 kW 数值不是输入功率
+    if "power_kw" in product and (
+        product.get("cooling_capacity_kw") == product["power_kw"]
+        or product.get("heating_capacity_kw") == product["power_kw"]
+    ):
+        del product["power_kw"]
+
+    match = DIMENSIONS_PATTERN.search(spec)
+    if match:
+        length, width, height = (float(v) for v in match.groups())
+        product["dimensions"] = {"length": length, "width": width, "height": height}
+
+    tags = [kw for kw in TAG_KEYWORDS if kw.lower() in search_text.lower()]
+    if tags:
+        product["tags"] = tags
+
+    if row.get("created_at"):
+        product["created_at"] = row["created_at"]
+    return product
+
+
+def create_products_table(db) -> bool:
+    """建表（projects_his / products 已存在时跳过），建表语句见各存储实现的 SCHEMA_SQL"""
+    return db.create_tables()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="从供应商表格导入/刷新产品库")
+    parser.add_argument("path", nargs="?", default=DEFAULT_CATALOG, help="产品表格路径")
+    parser.add_argument("--create-table", action="store_true", help="products 表不存在时创建")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每条 INSERT 的行数")
+    parser.add_argument("--rejects", help="拒绝行输出文件，默认 <表格>.rejects.jsonl")
+    args = parser.parse_args(argv)
+
+    rejects_path = args.rejects or args.path + ".rejects.jsonl"
+    with RejectWriter(rejects_path) as rejects, open_storage() as db:
+        if not db.conn:
+            return 1
+        if args.create_table:
+            create_products_table(db)
+        upserted = db.upsert_products(
+            (map_product(row) for row in iter_sheet_rows(args.path)),
+            batch_size=args.batch_size,
+            on_reject=rejects,
+        )
+
+    print(f"写入 {upserted} 个产品，拒绝 {rejects.count} 行")
+    if rejects.count:
+        print(f"拒绝行已写入：{rejects_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,793 @@
+# core/report.py
+"""
+方案报告生成：ProjectHisModel → .docx / .pdf（封面、项目概况、方案摘要、系统配置、选型说明、关键指标）
+
+用法：
+    render_project(project, "out/项目A.docx")             # 单个项目，格式由扩展名决定
+    generate_reports("out", formats=("docx", "pdf"))      # 批量：历史项目全部生成
+    python -m ppg.core.report out --format docx pdf --where "location_city = '上海'" --limit 1000
+
+报告内容先按模板整理成与格式无关的块（标题 / 段落 / 表格 / 分页），再由 docx 或 pdf 写出：
+- 模板（默认 DEFAULT_TEMPLATE，或 REPORT_TEMPLATE_PATH 指向的 JSON）在每个进程内只解析、编译一次，
+  渲染时按编译好的片段直接拼接，缺失的字段显示为“—”
+- docx 由 zipfile 直接拼装 OOXML，样式、关系等静态部件在导入时生成
+- pdf 由内置的最小 PDF 写出器生成，中文使用阅读器自带的 STSong-Light（不嵌入字体，不依赖 Office）
+批量模式主进程流式读取项目、按块提交到进程池，在途块数不超过进程数的 2 倍，内存占用与项目数无关；
+每个文件先写临时文件再 os.replace，中断时不会留下不完整的报告。
+"""
+import argparse
+import io
+import json
+import math
+import os
+import re
+import string
+import sys
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from ..config import REPORT_TEMPLATE_PATH
+from .energy import selection_items
+from .models import ProjectHisModel
+
+FORMATS = ("docx", "pdf")
+MISSING = "—"
+
+DEFAULT_TEMPLATE = {
+    "title": "{name}",
+    "subtitle": "暖通空调系统方案",
+    "cover": ["建设单位：{client_name}", "编制日期：{report_date}"],
+    "sections": [
+        {
+            "heading": "一、项目概况",
+            "body": [
+                {
+                    "table": [
+                        ["项目名称", "{name}"],
+                        ["建设单位", "{client_name}"],
+                        ["项目地点", "{location_city}"],
+                        ["建筑类型", "{project_type}"],
+                        ["空调面积", "{area_sqm:,.0f} ㎡"],
+                    ]
+                }
+            ],
+        },
+        {"heading": "二、方案摘要", "body": [{"text": "{solution_summary}"}]},
+        {
+            "heading": "三、系统配置",
+            "body": [
+                {
+                    "text": "本项目采用{system_type}系统，设计冷负荷 {total_cooling_load_kw:,.0f} kW、"
+                    "设计热负荷 {total_heating_load_kw:,.0f} kW（{load_source}）。"
+                },
+                {"equipment": True},
+            ],
+        },
+        {"heading": "四、选型说明", "body": [{"text": "{selection_rationale}"}]},
+        {
+            "heading": "五、关键指标",
+            "body": [
+                {
+                    "table": [
+                        ["指标", "数值"],
+                        ["冷负荷指标", "{cooling_w_per_sqm:.0f} W/㎡"],
+                        ["热负荷指标", "{heating_w_per_sqm:.0f} W/㎡"],
+                        ["装机制冷量", "{installed_cooling_kw:,.0f} kW"],
+                        ["制冷量富余", "{cooling_margin:.1%}"],
+                        ["综合 COP", "{cop:.2f}"],
+                        ["工程总造价", "{total_cost_cny:,.0f} 元"],
+                        ["单位面积造价", "{cost_per_sqm:,.0f} 元/㎡"],
+                        ["全年能耗", "{annual_energy_consumption_kwh:,.0f} kWh"],
+                        ["单位面积能耗", "{energy_kwh_per_sqm:.1f} kWh/㎡"],
+                    ],
+                    "header": True,
+                }
+            ],
+        },
+    ],
+}
+EQUIPMENT_HEADER = ["型号", "名称", "品牌", "台数", "单台制冷量(kW)", "单价(元)"]
+OBJECTIVE_NAMES = {"cost": "造价最低", "efficiency": "综合能效最高"}
+
+
+# ---------- 模板 ----------
+_FORMATTER = string.Formatter()
+
+
+@lru_cache(maxsize=4096)
+def _compile(text: str) -> tuple:
+    """模板字符串 → ((文字, 字段名, 格式), ...)，同一字符串只解析一次"""
+    return tuple((literal, field, spec) for literal, field, spec, _ in _FORMATTER.parse(text))
+
+
+def _fill(text: str, context: dict, whole: bool = False) -> str:
+    """按编译结果填充；whole=True 时任一字段缺失则整体显示为“—”（表格单元格用，避免出现“— kW”）"""
+    out = []
+    for literal, field, spec in _compile(text):
+        out.append(literal)
+        if field is None:
+            continue
+        value = context.get(field)
+        if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+            if whole:
+                return MISSING
+            out.append(MISSING)
+            continue
+        try:
+            out.append(format(value, spec))
+        except (TypeError, ValueError):
+            out.append(str(value))
+    return "".join(out)
+
+
+class ReportTemplate:
+    """编译后的报告模板：build(context, equipment) 产出块列表"""
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        # 预先编译全部模板字符串，渲染时只做拼接
+        for text in self._strings(spec):
+            _compile(text)
+
+    @classmethod
+    def _strings(cls, node):
+        if isinstance(node, str):
+            yield node
+        elif isinstance(node, dict):
+            for value in node.values():
+                yield from cls._strings(value)
+        elif isinstance(node, list):
+            for value in node:
+                yield from cls._strings(value)
+
+    def build(self, context: dict, equipment: list) -> list:
+        """
+        :param equipment: 设备清单行（不含表头），为空时输出“尚未选型”
+        :return: [("title", 文字) | ("subtitle", 文字) | ("cover", 文字) | ("pagebreak",)
+                  | ("heading", 文字) | ("text", 文字) | ("table", 行列表, 是否有表头)]
+        """
+        spec = self.spec
+        blocks = [("title", _fill(spec.get("title", ""), context))]
+        if spec.get("subtitle"):
+            blocks.append(("subtitle", _fill(spec["subtitle"], context)))
+        blocks.extend(("cover", _fill(line, context)) for line in spec.get("cover", ()))
+        blocks.append(("pagebreak",))
+        for section in spec.get("sections", ()):
+            blocks.append(("heading", _fill(section["heading"], context)))
+            for item in section.get("body", ()):
+                if "text" in item:
+                    blocks.append(("text", _fill(item["text"], context)))
+                elif "table" in item:
+                    rows = [[_fill(cell, context, whole=True) for cell in row] for row in item["table"]]
+                    blocks.append(("table", rows, bool(item.get("header"))))
+                elif item.get("equipment"):
+                    if equipment:
+                        blocks.append(("table", [EQUIPMENT_HEADER] + equipment, True))
+                    else:
+                        blocks.append(("text", "尚未选型。"))
+        return blocks
+
+
+@lru_cache(maxsize=8)
+def _load_template(path: str, mtime: float) -> ReportTemplate:
+    with open(path, "r", encoding="utf-8") as f:
+        return ReportTemplate(json.load(f))
+
+
+def load_template(path: str = None) -> ReportTemplate:
+    """读取并缓存模板（文件修改后自动重新编译）；未指定且未配置 REPORT_TEMPLATE_PATH 时使用默认模板"""
+    path = path or REPORT_TEMPLATE_PATH
+    if not path:
+        return _default_template()
+    return _load_template(os.path.abspath(path), os.path.getmtime(path))
+
+
+@lru_cache(maxsize=1)
+def _default_template() -> ReportTemplate:
+    return ReportTemplate(DEFAULT_TEMPLATE)
+
+
+# ---------- 报告数据 ----------
+def _cell(value, spec: str = "") -> str:
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        return MISSING
+    try:
+        return format(value, spec)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def equipment_rows(selected) -> list:
+    """selected_products → 设备清单表格行（列见 EQUIPMENT_HEADER）"""
+    rows = []
+    for item in selection_items(selected):
+        rows.append(
+            [
+                _cell(item.get("model_code") or item.get("主机")),
+                _cell(item.get("name")),
+                _cell(item.get("brand")),
+                _cell(item.get("qty") or item.get("数量") or 1),
+                _cell(item.get("cooling_capacity_kw"), ",.0f"),
+                _cell(item.get("unit_price_cny") or item.get("单价"), ",.0f"),
+            ]
+        )
+    return rows
+
+
+def selection_rationale(selection: dict, recommended: bool = False) -> str:
+    """由选型结果生成选型说明；selection 为空时返回“尚未选型”"""
+    if not selection:
+        return "尚未选型，设备配置待定。"
+    items = selection_items(selection)
+    parts = []
+    if recommended:
+        parts.append("项目未保存选型，以下为按设计负荷在产品库中自动搜索的推荐组合。")
+    if selection.get("objective"):
+        parts.append(
+            f"以{OBJECTIVE_NAMES.get(selection['objective'], selection['objective'])}为目标，"
+            f"在满足设计冷负荷{'与热负荷' if selection.get('total_heating_capacity_kw') else ''}的"
+            f"型号 × 台数组合中择优，冗余配置 {selection.get('redundancy') or 'N'}。"
+        )
+    if items:
+        units = sum(int(item.get("qty") or item.get("数量") or 1) for item in items)
+        parts.append(f"共选用 {len(items)} 种型号、{units} 台设备。")
+    if selection.get("total_cooling_capacity_kw"):
+        text = f"装机制冷量 {selection['total_cooling_capacity_kw']:,.0f} kW"
+        if selection.get("cooling_margin") is not None:
+            text += f"，较设计冷负荷富余 {selection['cooling_margin']:.1%}"
+        parts.append(text + "。")
+    if selection.get("cop"):
+        parts.append(f"按容量加权的综合 COP 为 {selection['cop']:.2f}。")
+    return "".join(parts) or "按项目保存的设备清单配置。"
+
+
+def _recommend(project: ProjectHisModel):
+    if not project.total_cooling_load_kw:
+        return None
+    from .selection import select_for_project
+
+    try:
+        options = select_for_project(project, top_k=1)
+    except Exception as e:
+        print(f"❌ 自动选型失败（{project.name}）：{e}")
+        return None
+    return options[0] if options else None
+
+
+def _per_sqm(value, area, scale: float = 1.0):
+    if value is None or not area:
+        return None
+    return value * scale / area
+
+
+def report_context(project: ProjectHisModel, recommend: bool = False):
+    """
+    整理模板字段：项目字段 + 负荷 / 造价 / 能耗指标 + 选型汇总
+    :param recommend: 项目没有选型时按设计负荷自动选型
+    :return: (context, equipment_rows)
+    """
+    context = project.model_dump()
+    context["report_date"] = date.today().isoformat()
+
+    # 未填写设计负荷时按面积指标估算
+    context["load_source"] = "设计值"
+    if project.total_cooling_load_kw is None or project.total_heating_load_kw is None:
+        from .loads import estimate_project
+
+        estimated = estimate_project(project)
+        for key, value in estimated.items():
+            if context[key] is None and value is not None:
+                context[key] = value
+                context["load_source"] = "按面积指标估算"
+
+    area = project.area_sqm
+    context["cooling_w_per_sqm"] = _per_sqm(context["total_cooling_load_kw"], area, 1000.0)
+    context["heating_w_per_sqm"] = _per_sqm(context["total_heating_load_kw"], area, 1000.0)
+    context["cost_per_sqm"] = _per_sqm(project.total_cost_cny, area)
+    context["energy_kwh_per_sqm"] = _per_sqm(project.annual_energy_consumption_kwh, area)
+
+    selection = project.selected_products
+    recommended = False
+    if not selection_items(selection) and recommend:
+        selection = _recommend(project.model_copy(update={
+            "total_cooling_load_kw": context["total_cooling_load_kw"],
+            "total_heating_load_kw": context["total_heating_load_kw"],
+        }))
+        recommended = selection is not None
+    selection = selection or {}
+    context["installed_cooling_kw"] = selection.get("total_cooling_capacity_kw")
+    context["cooling_margin"] = selection.get("cooling_margin")
+    context["cop"] = selection.get("cop")
+    context["selection_rationale"] = selection_rationale(selection, recommended)
+    return context, equipment_rows(selection)
+
+
+# ---------- 写文件 ----------
+def _atomic_write(path: str, data: bytes):
+    """先写同目录临时文件再替换，读者不会看到写了一半的报告"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_UNSAFE_NAME = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def report_filename(project: ProjectHisModel, fmt: str, project_id=None) -> str:
+    name = _UNSAFE_NAME.sub("_", project.name).strip("._")[:60] or "project"
+    return f"{project_id}_{name}.{fmt}" if project_id is not None else f"{name}.{fmt}"
+
+
+# ---------- docx ----------
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_DOCX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '<Override PartName="/word/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+        'relationships/officeDocument" Target="word/document.xml"/>'
+        "</Relationships>"
+    ),
+    "word/_rels/document.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+        'relationships/styles" Target="styles.xml"/>'
+        "</Relationships>"
+    ),
+    "word/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:styles xmlns:w="{_W_NS}">'
+        '<w:docDefaults><w:rPrDefault><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial" '
+        'w:eastAsia="宋体"/><w:sz w:val="21"/></w:rPr></w:rPrDefault>'
+        '<w:pPrDefault><w:pPr><w:spacing w:after="120" w:line="360" w:lineRule="auto"/></w:pPr>'
+        "</w:pPrDefault></w:docDefaults>"
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+        '<w:style w:type="paragraph" w:styleId="Title"><w:name w:val="Title"/><w:basedOn w:val="Normal"/>'
+        '<w:pPr><w:spacing w:before="3600" w:after="480"/><w:jc w:val="center"/></w:pPr>'
+        '<w:rPr><w:rFonts w:eastAsia="黑体"/><w:b/><w:sz w:val="48"/></w:rPr></w:style>'
+        '<w:style w:type="paragraph" w:styleId="Subtitle"><w:name w:val="Subtitle"/><w:basedOn w:val="Normal"/>'
+        '<w:pPr><w:spacing w:after="2400"/><w:jc w:val="center"/></w:pPr>'
+        '<w:rPr><w:sz w:val="32"/></w:rPr></w:style>'
+        '<w:style w:type="paragraph" w:styleId="Cover"><w:name w:val="Cover"/><w:basedOn w:val="Normal"/>'
+        '<w:pPr><w:jc w:val="center"/></w:pPr><w:rPr><w:sz w:val="28"/></w:rPr></w:style>'
+        '<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/>'
+        '<w:basedOn w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="360" w:after="120"/>'
+        '<w:outlineLvl w:val="0"/></w:pPr><w:rPr><w:rFonts w:eastAsia="黑体"/><w:b/><w:sz w:val="30"/>'
+        "</w:rPr></w:style>"
+        '<w:style w:type="table" w:styleId="TableGrid"><w:name w:val="Table Grid"/><w:tblPr>'
+        '<w:tblBorders><w:top w:val="single" w:sz="4"/><w:left w:val="single" w:sz="4"/>'
+        '<w:bottom w:val="single" w:sz="4"/><w:right w:val="single" w:sz="4"/>'
+        '<w:insideH w:val="single" w:sz="4"/><w:insideV w:val="single" w:sz="4"/></w:tblBorders>'
+        '<w:tblCellMar><w:left w:w="108" w:type="dxa"/><w:right w:w="108" w:type="dxa"/></w:tblCellMar>'
+        "</w:tblPr></w:style>"
+        "</w:styles>"
+    ),
+}
+_DOCX_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<w:document xmlns:w="{_W_NS}"><w:body>'
+)
+_DOCX_TAIL = (
+    '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/><w:pgMar w:top="1440" w:right="1247" '
+    'w:bottom="1440" w:left="1247" w:header="851" w:footer="992" w:gutter="0"/></w:sectPr>'
+    "</w:body></w:document>"
+)
+_DOCX_STYLES = {"title": "Title", "subtitle": "Subtitle", "cover": "Cover", "heading": "Heading1"}
+
+
+def _docx_runs(text: str, bold: bool = False) -> str:
+    props = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    lines = [f'<w:t xml:space="preserve">{escape(line)}</w:t>' for line in text.split("\n")]
+    return f"<w:r>{props}{'<w:br/>'.join(lines)}</w:r>"
+
+
+def _docx_paragraph(text: str, style: str = None, bold: bool = False) -> str:
+    props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{props}{_docx_runs(text, bold)}</w:p>"
+
+
+def _docx_table(rows: list, header: bool) -> str:
+    out = ['<w:tbl><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:w="5000" w:type="pct"/></w:tblPr>']
+    for i, row in enumerate(rows):
+        bold = header and i == 0
+        # 表头行跨页时重复
+        out.append("<w:tr><w:trPr><w:tblHeader/></w:trPr>" if bold else "<w:tr>")
+        for cell in row:
+            out.append(f"<w:tc><w:p>{_docx_runs(cell, bold)}</w:p></w:tc>")
+        out.append("</w:tr>")
+    out.append("</w:tbl><w:p/>")
+    return "".join(out)
+
+
+def render_docx(blocks: list) -> bytes:
+    body = [_DOCX_HEAD]
+    for block in blocks:
+        kind = block[0]
+        if kind == "pagebreak":
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        elif kind == "table":
+            body.append(_docx_table(block[1], block[2]))
+        else:
+            body.append(_docx_paragraph(block[1], _DOCX_STYLES.get(kind)))
+    body.append(_DOCX_TAIL)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, content in _DOCX_STATIC.items():
+            z.writestr(name, content)
+        z.writestr("word/document.xml", "".join(body))
+    return buffer.getvalue()
+
+
+# ---------- pdf ----------
+_PAGE_W, _PAGE_H = 595.0, 842.0  # A4，单位 pt
+_MARGIN_X, _MARGIN_Y = 64.0, 72.0
+_CELL_PAD = 4.0
+_PDF_SIZES = {"title": 24.0, "subtitle": 16.0, "cover": 13.0, "heading": 15.0, "text": 10.5, "table": 10.0}
+
+
+def _char_width(ch: str) -> float:
+    """字宽（em）：ASCII 半角，其余按全角计（与字体 /W 声明一致）"""
+    return 0.5 if ch < "\x80" else 1.0
+
+
+def _text_width(text: str, size: float) -> float:
+    return sum(_char_width(ch) for ch in text) * size
+
+
+def _wrap(text: str, size: float, width: float) -> list:
+    """按字符折行（中文没有空格分词；英文单词较长时也会被截断）"""
+    lines = []
+    for paragraph in text.split("\n"):
+        line, used = [], 0.0
+        for ch in paragraph:
+            w = _char_width(ch) * size
+            if line and used + w > width:
+                lines.append("".join(line))
+                line, used = [], 0.0
+            line.append(ch)
+            used += w
+        lines.append("".join(line))
+    return lines
+
+
+def _pdf_hex(text: str) -> str:
+    # UniGB-UCS2-H 只覆盖基本平面，其余字符替换为问号
+    text = "".join(ch if ch < "\U00010000" else "?" for ch in text)
+    return text.encode("utf-16-be").hex().upper()
+
+
+class _PdfPages:
+    """逐页收集绘制指令，y 从页面顶部向下递减"""
+
+    def __init__(self):
+        self.pages = []
+        self.new_page()
+
+    def new_page(self):
+        self.ops = []
+        self.pages.append(self.ops)
+        self.y = _PAGE_H - _MARGIN_Y
+
+    def ensure(self, height: float):
+        if self.y - height < _MARGIN_Y and self.y < _PAGE_H - _MARGIN_Y:
+            self.new_page()
+
+    def text(self, x: float, y: float, size: float, text: str):
+        if text:
+            self.ops.append(f"BT /F1 {size:g} Tf {x:.2f} {y:.2f} Td <{_pdf_hex(text)}> Tj ET")
+
+    def rect(self, x: float, y: float, w: float, h: float, fill: bool = False):
+        self.ops.append(f"{x:.2f} {y:.2f} {w:.2f} {h:.2f} re {'f' if fill else 'S'}")
+
+    def lines(self, lines: list, size: float, leading: float, x: float = _MARGIN_X, center: bool = False):
+        for line in lines:
+            self.ensure(leading)
+            self.y -= leading
+            left = (_PAGE_W - _text_width(line, size)) / 2 if center else x
+            self.text(left, self.y + (leading - size) / 2, size, line)
+
+    def table(self, rows: list, header: bool, size: float):
+        width = _PAGE_W - 2 * _MARGIN_X
+        n = max(len(row) for row in rows)
+        # 列宽按各列最长文字分配，单列最少占 1/(2n)
+        natural = [
+            max(_text_width(row[c], size) if c < len(row) else 0.0 for row in rows) + 2 * _CELL_PAD
+            for c in range(n)
+        ]
+        natural = [max(w, width / (2 * n)) for w in natural]
+        scale = width / sum(natural)
+        widths = [w * scale for w in natural]
+        leading = size * 1.5
+        for i, row in enumerate(rows):
+            cells = [
+                _wrap(row[c] if c < len(row) else "", size, widths[c] - 2 * _CELL_PAD) for c in range(n)
+            ]
+            height = max(len(lines) for lines in cells) * leading + 2 * _CELL_PAD
+            self.ensure(height)
+            top, x = self.y, _MARGIN_X
+            if header and i == 0:
+                self.ops.append("0.92 g")
+                self.rect(x, top - height, width, height, fill=True)
+                self.ops.append("0 g")
+            for c, lines in enumerate(cells):
+                self.rect(x, top - height, widths[c], height)
+                y = top - _CELL_PAD
+                for line in lines:
+                    y -= leading
+                    self.text(x + _CELL_PAD, y + (leading - size) / 2, size, line)
+                x += widths[c]
+            self.y = top - height
+        self.y -= size
+
+
+def render_pdf(blocks: list) -> bytes:
+    pages = _PdfPages()
+    content_width = _PAGE_W - 2 * _MARGIN_X
+    cover = True
+    for block in blocks:
+        kind = block[0]
+        size = _PDF_SIZES.get(kind, 10.5)
+        if kind == "pagebreak":
+            pages.new_page()
+            cover = False
+        elif kind == "table":
+            pages.table(block[1], block[2], size)
+        elif cover:
+            if kind == "title":
+                pages.y = _PAGE_H * 0.65
+            gap = {"title": 2.0, "subtitle": 4.0}.get(kind, 1.6)
+            pages.lines(_wrap(block[1], size, content_width), size, size * gap, center=True)
+        elif kind == "heading":
+            pages.ensure(size * 4)  # 标题不单独留在页尾
+            pages.y -= size * 0.6
+            pages.lines(_wrap(block[1], size, content_width), size, size * 1.8)
+        else:
+            pages.lines(_wrap(block[1], size, content_width), size, size * 1.7)
+            pages.y -= size * 0.5
+
+    # 对象：1 目录 2 页树 3 字体 4 CIDFont 5 字体描述，其后每页一个页面对象和一个内容流
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /STSong-Light /Encoding /UniGB-UCS2-H "
+        b"/DescendantFonts [4 0 R] >>",
+        b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /STSong-Light "
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (GB1) /Supplement 2 >> "
+        b"/FontDescriptor 5 0 R /DW 1000 /W [1 95 500] >>",
+        b"<< /Type /FontDescriptor /FontName /STSong-Light /Flags 6 /FontBBox [-25 -254 1000 880] "
+        b"/ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 880 /StemV 93 >>",
+    ]
+    kids = []
+    for ops in pages.pages:
+        stream = zlib.compress("\n".join(ops).encode("ascii"))
+        page_no, content_no = len(objects) + 1, len(objects) + 2
+        kids.append(f"{page_no} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_PAGE_W:g} {_PAGE_H:g}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_no} 0 R >>".encode("ascii")
+        )
+        objects.append(
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
+            + stream
+            + b"\nendstream"
+        )
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("ascii")
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("ascii")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+    return bytes(out)
+
+
+_RENDERERS = {"docx": render_docx, "pdf": render_pdf}
+
+
+# ---------- 单个项目 ----------
+def build_blocks(project: ProjectHisModel, recommend: bool = False, template: ReportTemplate = None) -> list:
+    context, equipment = report_context(project, recommend)
+    return (template or load_template()).build(context, equipment)
+
+
+def render_project(
+    project: ProjectHisModel, path: str, recommend: bool = False, template: ReportTemplate = None
+) -> int:
+    """
+    生成单个项目的报告，格式由扩展名（.docx / .pdf）决定
+    :return: 写入字节数
+    """
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    if fmt not in _RENDERERS:
+        raise ValueError(f"不支持的报告格式：{fmt}（仅支持 {' / '.join(FORMATS)}）")
+    data = _RENDERERS[fmt](build_blocks(project, recommend, template))
+    _atomic_write(path, data)
+    return len(data)
+
+
+# ---------- 批量 ----------
+_worker_template = None
+
+
+def _init_worker(template_path: str = None):
+    """子进程初始化：模板只编译一次"""
+    global _worker_template
+    _worker_template = load_template(template_path)
+
+
+def _render_chunk(job: tuple, chunk: list) -> list:
+    """
+    子进程入口：渲染一块项目并写出文件，只把文件名和大小传回主进程
+    :return: [(project_id, [(文件名, 字节数)], 错误信息或 None)]
+    """
+    out_dir, formats, recommend = job
+    template = _worker_template or load_template()
+    results = []
+    for project_id, project in chunk:
+        try:
+            blocks = build_blocks(project, recommend, template)
+            files = []
+            for fmt in formats:
+                data = _RENDERERS[fmt](blocks)
+                name = report_filename(project, fmt, project_id)
+                _atomic_write(os.path.join(out_dir, name), data)
+                files.append((name, len(data)))
+            results.append((project_id, files, None))
+        except Exception as e:
+            results.append((project_id, [], f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _iter_history(where: str = None, params=None):
+    from .storage import open_reader
+
+    with open_reader() as db:
+        if not db.conn:
+            raise ConnectionError("数据库连接失败，无法读取历史项目")
+        yield from db.iter_projects(where, params, with_id=True)
+
+
+def _chunks(projects, chunk_size: int, limit: int = None):
+    chunk = []
+    for i, item in enumerate(projects):
+        if limit is not None and i >= limit:
+            break
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_reports(
+    out_dir: str,
+    formats=("docx",),
+    projects=None,
+    where: str = None,
+    params=None,
+    limit: int = None,
+    workers: int = None,
+    chunk_size: int = 20,
+    recommend: bool = True,
+    template_path: str = None,
+) -> dict:
+    """
+    批量生成方案报告
+    :param projects: (project_id, ProjectHisModel) 的可迭代对象；为空时从 projects_his 流式读取
+    :param where: 读取 projects_his 时的过滤条件（不含 where 关键字）
+    :param workers: 进程数，默认 CPU 核数；为 1 时在当前进程内生成
+    :param chunk_size: 每个任务包含的项目数
+    :param recommend: 没有选型的项目按设计负荷自动选型
+    :return: 统计信息（projects / files / bytes / failed / errors / seconds）
+    """
+    formats = tuple(formats)
+    unknown = [fmt for fmt in formats if fmt not in _RENDERERS]
+    if unknown or not formats:
+        raise ValueError(f"不支持的报告格式：{unknown}（仅支持 {' / '.join(FORMATS)}）")
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    source = _iter_history(where, params) if projects is None else projects
+    job = (out_dir, formats, recommend)
+    stats = {"projects": 0, "files": 0, "bytes": 0, "failed": 0, "errors": [], "seconds": 0.0}
+    start = time.perf_counter()
+
+    def collect(results):
+        for project_id, files, error in results:
+            stats["projects"] += 1
+            stats["files"] += len(files)
+            stats["bytes"] += sum(size for _, size in files)
+            if error:
+                stats["failed"] += 1
+                if len(stats["errors"]) < 100:
+                    stats["errors"].append((project_id, error))
+
+    if workers == 1:
+        _init_worker(template_path)
+        for chunk in _chunks(source, chunk_size, limit):
+            collect(_render_chunk(job, chunk))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(template_path,)
+        ) as pool:
+            pending = set()
+            for chunk in _chunks(source, chunk_size, limit):
+                # 在途任务有上限：读库速度快于渲染时不会把全部项目堆在内存里
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                pending.add(pool.submit(_render_chunk, job, chunk))
+            for future in wait(pending)[0]:
+                collect(future.result())
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="批量生成方案报告（docx / pdf）")
+    parser.add_argument("out_dir", help="输出目录")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["docx"], help="报告格式")
+    parser.add_argument("--where", help="过滤条件，如 \"location_city = '上海'\"")
+    parser.add_argument("--limit", type=int, default=None, help="最多生成的项目数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--chunk-size", type=int, default=20, help="每个任务的项目数")
+    parser.add_argument("--template", default=None, help="模板 JSON（默认 REPORT_TEMPLATE_PATH 或内置模板）")
+    parser.add_argument("--no-recommend", action="store_true", help="没有选型的项目不自动选型")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = generate_reports(
+            args.out_dir,
+            formats=args.format,
+            where=args.where,
+            limit=args.limit,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            recommend=not args.no_recommend,
+            template_path=args.template,
+        )
+    except Exception as e:
+        print(f"❌ 报告生成失败：{e}")
+        return 1
+    for project_id, error in stats["errors"][:10]:
+        print(f"❌ 项目 {project_id}：{error}")
+    rate = stats["projects"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"✅报告生成完成：{stats['projects']} 个项目，{stats['files']} 个文件，"
+        f"{stats['bytes'] / 1024 / 1024:.1f} MB，失败 {stats['failed']}，"
+        f"用时 {stats['seconds']} 秒（{rate:.1f} 个/秒）→ {args.out_dir}"
+    )
+    return 0 if not stats["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
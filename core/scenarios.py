@@ -0,0 +1,539 @@
+# core/scenarios.py
+"""
+多方案比选：同一项目在不同系统形式 / 设备组合下的初投资、全年能耗与全寿命周期费用
+
+    scenarios = build_scenarios(project, system_types=["多联机", "螺杆机+锅炉", "地源热泵"], top_k=10)
+    result = compare_scenarios(project, scenarios)
+    result["table"]                     # 按全寿命周期费用排序的比选表（不满足负荷的方案排在后面）
+    python -m ppg.core.scenarios --project-id 123 --systems 多联机 地源热泵 --top-k 10
+
+方案为字典：name、system_type、selected_products（select_equipment 的结果或条目列表，可为空），
+可选 equipment_cost_cny / first_cost_cny 覆盖估算的设备费 / 初投资。
+- 设备：由 selected_products 汇总容量、台数和 COP；未选型时按设计负荷和系统形式的缺省 COP 配置，
+  热泵类系统没有制热设备时按同样台数、系统缺省制热 COP 配置，其余按锅炉供热
+- 初投资 = 设备费 ×（1 + 安装系数）+ 面积 × 单位面积配套费 + 装机冷量 × 单位冷量附加费（如地埋管）
+- 运行费用 = 电耗 ×（1 + 输配能耗系数）× 电价 + 锅炉燃料 × 燃气价格 + 初投资 × 年维护费率
+- 全寿命周期费用（分析期 years 年、折现率 rate）= 初投资按寿命年限折算的年值 × 年金现值系数 + 运行费用 × 年金现值系数，
+  寿命不同的系统在同一分析期内可比
+- 可行性：供冷或供热的不满足小时数超过 unmet_tolerance 的方案标记为不可行（feasible 为 False），
+  排在全部可行方案之后，再按 sort_by 排序
+全部方案共用项目的逐时负荷率，按块整体做数组运算（energy.simulate_arrays）；
+方案数超过 parallel_threshold 时按块分发到进程池。
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .energy import (
+    DEFAULT_COOLING_COP,
+    DEFAULT_UNITS,
+    design_loads,
+    equipment_from_selection,
+    selection_items,
+    shared_profiles,
+    shared_weather,
+    simulate_arrays,
+)
+from .loads import building_type_code, load_climate_table
+from .models import ProjectHisModel
+
+ELECTRICITY_PRICE = 0.85  # 元/kWh
+GAS_PRICE = 0.36  # 元/kWh（燃料热值，约 3.5 元/m³ ÷ 9.8 kWh/m³）
+DISCOUNT_RATE = 0.05
+ANALYSIS_YEARS = 20
+UNMET_HOURS_TOLERANCE = 50  # 供冷 / 供热各自容许的全年不满足小时数，超过视为装机不足
+
+# 系统形式参数：安装系数、单位面积配套费(元/㎡)、单位冷量附加费(元/kW)、未选型时的设备单价(元/kW)、
+# 输配能耗系数（水泵、风机、冷却塔占主机电耗的比例）、年维护费率、寿命(年)、缺省 COP（制热为 None 表示锅炉供热）、
+# 自动选型的产品分类（为空表示按缺省参数估算）
+SYSTEM_PROFILES = {
+    "多联机": {
+        "install_factor": 0.35,
+        "cost_per_sqm": 80.0,
+        "cost_per_kw": 0.0,
+        "equipment_per_kw": 1200.0,
+        "aux_ratio": 0.05,
+        "maintenance_rate": 0.02,
+        "life_years": 15,
+        "cooling_cop": 3.8,
+        "heating_cop": 3.2,
+        "category": None,
+    },
+    "螺杆机+锅炉": {
+        "install_factor": 0.6,
+        "cost_per_sqm": 150.0,
+        "cost_per_kw": 0.0,
+        "equipment_per_kw": 900.0,
+        "aux_ratio": 0.25,
+        "maintenance_rate": 0.03,
+        "life_years": 20,
+        "cooling_cop": 5.0,
+        "heating_cop": None,
+        "category": "冷水机组",
+    },
+    "离心机+锅炉": {
+        "install_factor": 0.6,
+        "cost_per_sqm": 150.0,
+        "cost_per_kw": 0.0,
+        "equipment_per_kw": 800.0,
+        "aux_ratio": 0.25,
+        "maintenance_rate": 0.03,
+        "life_years": 25,
+        "cooling_cop": 6.0,
+        "heating_cop": None,
+        "category": "冷水机组",
+    },
+    "风冷热泵": {
+        "install_factor": 0.45,
+        "cost_per_sqm": 120.0,
+        "cost_per_kw": 0.0,
+        "equipment_per_kw": 1000.0,
+        "aux_ratio": 0.12,
+        "maintenance_rate": 0.025,
+        "life_years": 15,
+        "cooling_cop": 3.2,
+        "heating_cop": 2.8,
+        "category": None,
+    },
+    "地源热泵": {
+        "install_factor": 0.5,
+        "cost_per_sqm": 150.0,
+        "cost_per_kw": 900.0,  # 地埋管换热器
+        "equipment_per_kw": 1000.0,
+        "aux_ratio": 0.2,
+        "maintenance_rate": 0.02,
+        "life_years": 25,
+        "cooling_cop": 5.5,
+        "heating_cop": 4.2,
+        "category": "冷水机组",
+    },
+}
+DEFAULT_SYSTEM = "螺杆机+锅炉"
+# 系统形式别名：(关键词, 标准名称)，按顺序匹配
+SYSTEM_ALIASES = (
+    ("多联", "多联机"),
+    ("VRF", "多联机"),
+    ("VRV", "多联机"),
+    ("地源", "地源热泵"),
+    ("地埋", "地源热泵"),
+    ("水源", "地源热泵"),
+    ("GSHP", "地源热泵"),
+    ("风冷", "风冷热泵"),
+    ("空气源", "风冷热泵"),
+    ("离心", "离心机+锅炉"),
+    ("螺杆", "螺杆机+锅炉"),
+    ("冷水机组", "螺杆机+锅炉"),
+    ("水系统", "螺杆机+锅炉"),
+)
+SORT_KEYS = ("lifecycle_cost_cny", "first_cost_cny", "annual_cost_cny", "annual_energy_kwh")
+RESULT_COLUMNS = [
+    "first_cost_cny",
+    "annual_energy_kwh",
+    "annual_electricity_kwh",
+    "annual_fuel_kwh",
+    "annual_energy_cost_cny",
+    "annual_cost_cny",
+    "lifecycle_cost_cny",
+    "unmet_cooling_hours",
+    "unmet_heating_hours",
+    "seasonal_cooling_cop",
+]
+
+
+def system_profile(system_type) -> tuple:
+    """
+    系统形式 → (标准名称, 参数)，无法识别时按 DEFAULT_SYSTEM
+    """
+    text = str(system_type or "").strip()
+    if text in SYSTEM_PROFILES:
+        return text, SYSTEM_PROFILES[text]
+    upper = text.upper()
+    for keyword, name in SYSTEM_ALIASES:
+        if keyword in upper:
+            return name, SYSTEM_PROFILES[name]
+    return DEFAULT_SYSTEM, SYSTEM_PROFILES[DEFAULT_SYSTEM]
+
+
+def _annuity(rate: float, years) -> np.ndarray:
+    """年金现值系数 (1 - (1 + r)^-n) / r"""
+    years = np.asarray(years, dtype=np.float64)
+    if rate == 0:
+        return years
+    return (1 - (1 + rate) ** -years) / rate
+
+
+def _equipment_cost(selected, catalog) -> float:
+    """设备费 = Σ 台数 × 单价，条目缺少单价时从产品库补全；没有带价格的条目返回 NaN"""
+    total, priced = 0.0, False
+    for item in selection_items(selected):
+        qty = item.get("qty") or item.get("数量") or 1
+        price = item.get("unit_price_cny") or item.get("单价") or item.get("price_cny")
+        if price is None and catalog is not None:
+            product = catalog.product(item.get("product_id"), item.get("model_code") or item.get("主机"))
+            price = (product or {}).get("price_cny")
+        if price is not None:
+            total += float(price) * float(qty)
+            priced = True
+    return total if priced else np.nan
+
+
+# ---------- 方案 → 参数数组 ----------
+def scenario_arrays(project: ProjectHisModel, scenarios: list, catalog=None) -> dict:
+    """
+    把方案列表整理成按列的参数数组（长度为方案数），供 evaluate_arrays 使用
+    设备汇总需要逐个方案解析 selected_products，其余计算都在数组上完成
+    """
+    cooling_kw, heating_kw = design_loads(project)
+    n = len(scenarios)
+    columns = {
+        key: np.full(n, np.nan)
+        for key in (
+            "cooling_unit_kw",
+            "cooling_units",
+            "cooling_cop",
+            "heating_unit_kw",
+            "heating_units",
+            "heating_cop",
+            "cooling_curve",
+            "equipment_cost_cny",
+            "first_cost_cny",
+            "install_factor",
+            "cost_per_sqm",
+            "cost_per_kw",
+            "equipment_per_kw",
+            "aux_ratio",
+            "maintenance_rate",
+            "life_years",
+            "default_cooling_cop",
+            "default_heating_cop",
+        )
+    }
+    systems = []
+    for i, scenario in enumerate(scenarios):
+        name, profile = system_profile(scenario.get("system_type"))
+        systems.append(name)
+        selected = scenario.get("selected_products")
+        if selected:
+            for key, value in equipment_from_selection(selected, catalog).items():
+                columns[key][i] = value
+            columns["equipment_cost_cny"][i] = _equipment_cost(selected, catalog)
+        for key in ("equipment_cost_cny", "first_cost_cny"):
+            if scenario.get(key) is not None:
+                columns[key][i] = scenario[key]
+        for key in (
+            "install_factor",
+            "cost_per_sqm",
+            "cost_per_kw",
+            "equipment_per_kw",
+            "aux_ratio",
+            "maintenance_rate",
+            "life_years",
+        ):
+            columns[key][i] = scenario.get(key, profile[key])
+        columns["default_cooling_cop"][i] = profile["cooling_cop"] or DEFAULT_COOLING_COP
+        if profile["heating_cop"] is not None:
+            columns["default_heating_cop"][i] = profile["heating_cop"]
+
+    table = load_climate_table()
+    city_code = int(table.code(project.location_city))
+    if city_code == table.unknown:
+        raise ValueError(f"未收录城市的气候参数：{project.location_city}")
+    columns.update(
+        cooling_design_kw=np.full(n, cooling_kw),
+        heating_design_kw=np.full(n, heating_kw),
+        area_sqm=np.full(n, project.area_sqm if project.area_sqm else np.nan),
+    )
+    return {
+        "columns": columns,
+        "systems": systems,
+        "city_code": city_code,
+        "type_code": building_type_code(project.project_type),
+    }
+
+
+def evaluate_arrays(
+    columns: dict,
+    city_code: int,
+    type_code: int,
+    electricity_price: float = ELECTRICITY_PRICE,
+    gas_price: float = GAS_PRICE,
+    rate: float = DISCOUNT_RATE,
+    years: int = ANALYSIS_YEARS,
+) -> dict:
+    """
+    向量化评估一批方案（columns 见 scenario_arrays）
+    :return: RESULT_COLUMNS 对应的数组
+    """
+    cooling_design = np.nan_to_num(columns["cooling_design_kw"])
+    heating_design = np.nan_to_num(columns["heating_design_kw"])
+
+    # 未选型：按设计负荷、缺省台数和系统缺省 COP 配置
+    cooling_units = columns["cooling_units"]
+    no_cooling = ~(cooling_units > 0)
+    cooling_units = np.where(no_cooling, DEFAULT_UNITS, cooling_units)
+    cooling_unit_kw = np.where(no_cooling, cooling_design / DEFAULT_UNITS, columns["cooling_unit_kw"])
+    cooling_cop = np.where(np.isnan(columns["cooling_cop"]), columns["default_cooling_cop"], columns["cooling_cop"])
+
+    # 热泵类系统没有制热设备时按同样台数配置；default_heating_cop 为 NaN 的系统由锅炉供热
+    heating_units = columns["heating_units"]
+    heat_pump = ~(heating_units > 0) & ~np.isnan(columns["default_heating_cop"])
+    heating_units = np.where(heat_pump, cooling_units, heating_units)
+    heating_unit_kw = np.where(heat_pump, heating_design / cooling_units, columns["heating_unit_kw"])
+    heating_cop = np.where(heat_pump, columns["default_heating_cop"], columns["heating_cop"])
+    boiler = ~(heating_units > 0) | np.isnan(heating_cop)
+
+    cooling_profile, heating_profile = shared_profiles(city_code, type_code)
+    # 未选型的方案没有曲线，按系统缺省 COP 计算
+    sim = simulate_arrays(
+        cooling_profile,
+        heating_profile,
+        cooling_design,
+        heating_design,
+        cooling_unit_kw,
+        cooling_units,
+        cooling_cop,
+        heating_unit_kw,
+        heating_units,
+        heating_cop,
+        cooling_curve=columns["cooling_curve"],
+        outdoor_temp=shared_weather(city_code),
+    )
+
+    # 能耗与费用
+    aux = 1 + columns["aux_ratio"]
+    heating_kwh = sim["heating_energy_kwh"]
+    electricity = sim["cooling_electricity_kwh"] * aux + np.where(boiler, 0.0, heating_kwh * aux)
+    fuel = np.where(boiler, heating_kwh, 0.0)
+    energy_cost = electricity * electricity_price + fuel * gas_price
+
+    installed_kw = cooling_unit_kw * cooling_units
+    equipment = columns["equipment_cost_cny"]
+    equipment = np.where(np.isnan(equipment), installed_kw * columns["equipment_per_kw"], equipment)
+    first_cost = (
+        equipment * (1 + columns["install_factor"])
+        + np.nan_to_num(columns["area_sqm"]) * columns["cost_per_sqm"]
+        + installed_kw * columns["cost_per_kw"]
+    )
+    first_cost = np.where(np.isnan(columns["first_cost_cny"]), first_cost, columns["first_cost_cny"])
+    annual_cost = energy_cost + first_cost * columns["maintenance_rate"]
+
+    # 初投资按寿命折算为年值，再与运行费用一起折现到分析期
+    life = np.maximum(columns["life_years"], 1)
+    horizon = _annuity(rate, years)
+    lifecycle = first_cost / _annuity(rate, life) * horizon + annual_cost * horizon
+
+    return {
+        "first_cost_cny": first_cost,
+        "annual_energy_kwh": electricity + fuel,
+        "annual_electricity_kwh": electricity,
+        "annual_fuel_kwh": fuel,
+        "annual_energy_cost_cny": energy_cost,
+        "annual_cost_cny": annual_cost,
+        "lifecycle_cost_cny": lifecycle,
+        "unmet_cooling_hours": sim["unmet_cooling_hours"],
+        "unmet_heating_hours": sim["unmet_heating_hours"],
+        "seasonal_cooling_cop": sim["seasonal_cooling_cop"],
+    }
+
+
+def _evaluate_chunk(job: tuple) -> dict:
+    """子进程入口"""
+    columns, city_code, type_code, options = job
+    return evaluate_arrays(columns, city_code, type_code, **options)
+
+
+# ---------- 比选 ----------
+def compare_scenarios(
+    project: ProjectHisModel,
+    scenarios: list,
+    sort_by: str = "lifecycle_cost_cny",
+    electricity_price: float = ELECTRICITY_PRICE,
+    gas_price: float = GAS_PRICE,
+    rate: float = DISCOUNT_RATE,
+    years: int = ANALYSIS_YEARS,
+    unmet_tolerance: float = UNMET_HOURS_TOLERANCE,
+    catalog=None,
+    chunk_size: int = 256,
+    workers: int = None,
+    parallel_threshold: int = 2000,
+) -> dict:
+    """
+    评估并排序全部方案
+    :param sort_by: 排序指标，见 SORT_KEYS
+    :param unmet_tolerance: 容许的不满足小时数，供冷或供热超过时方案不可行，排在可行方案之后
+    :param chunk_size: 每块方案数（限制 方案数 × 8760 数组的内存）
+    :param workers: 进程数；方案数不超过 parallel_threshold 时在当前进程内计算
+    :return: {"results": {指标: 数组}, "table": [先可行后不可行、各自按 sort_by 升序的方案行，含 feasible], "seconds": 用时}
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"sort_by 只能是 {SORT_KEYS}")
+    start = time.perf_counter()
+    n = len(scenarios)
+    if not n:
+        return {"results": {key: np.empty(0) for key in RESULT_COLUMNS}, "table": [], "seconds": 0.0}
+    if catalog is None and any(s.get("selected_products") for s in scenarios):
+        try:
+            from .catalog import get_catalog
+
+            catalog = get_catalog()
+        except Exception as e:
+            print(f"❌ 产品库载入失败，缺少参数的设备按缺省值计算：{e}")
+
+    prepared = scenario_arrays(project, scenarios, catalog)
+    columns = prepared["columns"]
+    options = {"electricity_price": electricity_price, "gas_price": gas_price, "rate": rate, "years": years}
+    jobs = [
+        (
+            {key: values[i : i + chunk_size] for key, values in columns.items()},
+            prepared["city_code"],
+            prepared["type_code"],
+            options,
+        )
+        for i in range(0, n, chunk_size)
+    ]
+    if n > parallel_threshold and workers != 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_evaluate_chunk, jobs))
+    else:
+        parts = [_evaluate_chunk(job) for job in jobs]
+    results = {key: np.concatenate([part[key] for part in parts]) for key in RESULT_COLUMNS}
+
+    # 相对初投资最低方案的静态回收期：多花的初投资 / 每年少花的运行费用
+    base = int(np.argmin(results["first_cost_cny"]))
+    extra = results["first_cost_cny"] - results["first_cost_cny"][base]
+    saving = results["annual_cost_cny"][base] - results["annual_cost_cny"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        results["payback_years"] = np.where(saving > 0, extra / saving, np.nan)
+    results["payback_years"][base] = 0.0
+
+    # 先按可行性（不满足小时数是否超限）再按 sort_by 排序；np.lexsort 以最后一个键为主键且稳定
+    infeasible = (results["unmet_cooling_hours"] > unmet_tolerance) | (results["unmet_heating_hours"] > unmet_tolerance)
+    order = np.lexsort((results[sort_by], infeasible))
+    table = []
+    for rank, i in enumerate(order, start=1):
+        row = {
+            "rank": rank,
+            "name": scenarios[i].get("name") or f"方案{i + 1}",
+            "system_type": prepared["systems"][i],
+            "index": int(i),
+            "feasible": not bool(infeasible[i]),
+        }
+        for key, values in results.items():
+            value = float(values[i])
+            row[key] = None if math.isnan(value) else round(value, 2)
+        table.append(row)
+    return {"results": results, "table": table, "seconds": round(time.perf_counter() - start, 3)}
+
+
+def build_scenarios(
+    project: ProjectHisModel,
+    system_types=None,
+    objectives=("cost", "efficiency"),
+    redundancies=("N", "N+1"),
+    top_k: int = 5,
+    catalog=None,
+) -> list:
+    """
+    生成候选方案：系统形式 × 选型目标 × 冗余 × 前 top_k 个设备组合
+    系统形式没有对应产品分类（如多联机）或选不出组合时，生成一个按缺省参数估算的方案
+    """
+    from .selection import select_equipment
+
+    cooling_kw, heating_kw = design_loads(project)
+    system_types = system_types or list(SYSTEM_PROFILES)
+    scenarios = []
+    for system_type in system_types:
+        name, profile = system_profile(system_type)
+        if not profile["category"] or not cooling_kw or math.isnan(cooling_kw):
+            scenarios.append({"name": name, "system_type": name, "selected_products": None})
+            continue
+        seen = set()
+        for objective in objectives:
+            for redundancy in redundancies:
+                try:
+                    options = select_equipment(
+                        cooling_kw,
+                        # 热泵类系统的制热另行配置，选型只校核制冷
+                        heating_kw if profile["heating_cop"] is None else None,
+                        category=profile["category"],
+                        redundancy=redundancy,
+                        objective=objective,
+                        top_k=top_k,
+                        catalog=catalog,
+                    )
+                except ValueError as e:
+                    print(f"❌ {name} 选型失败：{e}")
+                    continue
+                for option in options:
+                    key = tuple((item["product_id"], item["qty"]) for item in option["items"])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    models = " + ".join(f"{item['model_code']}×{item['qty']}" for item in option["items"])
+                    scenarios.append(
+                        {"name": f"{name} {models}", "system_type": name, "selected_products": option}
+                    )
+        if not seen:
+            # 产品库中没有满足负荷的组合（如超出台数上限），按缺省参数估算
+            scenarios.append({"name": name, "system_type": name, "selected_products": None})
+    return scenarios
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="多方案比选：初投资 / 运行费用 / 全寿命周期费用")
+    parser.add_argument("--project-id", type=int, required=True, help="projects_his 中的项目 id")
+    parser.add_argument("--systems", nargs="+", default=None, help="参与比选的系统形式（默认全部）")
+    parser.add_argument("--top-k", type=int, default=5, help="每种选型目标 / 冗余取前 k 个组合")
+    parser.add_argument("--sort-by", choices=SORT_KEYS, default="lifecycle_cost_cny")
+    parser.add_argument("--years", type=int, default=ANALYSIS_YEARS, help="分析期（年）")
+    parser.add_argument("--rate", type=float, default=DISCOUNT_RATE, help="折现率")
+    parser.add_argument(
+        "--unmet-tolerance", type=float, default=UNMET_HOURS_TOLERANCE, help="容许的不满足小时数，超过的方案排在最后"
+    )
+    parser.add_argument("--limit", type=int, default=20, help="最多显示的方案数")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出比选表")
+    args = parser.parse_args(argv)
+
+    from .storage import open_reader
+
+    try:
+        with open_reader() as db:
+            if not db.conn:
+                raise ConnectionError("数据库连接失败，无法读取项目")
+            project = next(db.iter_projects("id = %s", [args.project_id]), None)
+        if project is None:
+            print(f"❌ 项目不存在：{args.project_id}")
+            return 1
+        scenarios = build_scenarios(project, args.systems, top_k=args.top_k)
+        result = compare_scenarios(
+            project, scenarios, args.sort_by, rate=args.rate, years=args.years, unmet_tolerance=args.unmet_tolerance
+        )
+    except Exception as e:
+        print(f"❌ 方案比选失败：{e}")
+        return 1
+
+    table = result["table"][: args.limit]
+    if args.json:
+        print(json.dumps(table, ensure_ascii=False, indent=2))
+        return 0
+    print(f"✅{project.name}：{len(scenarios)} 个方案，用时 {result['seconds']} 秒")
+    print(f"{'排名':>4}  {'初投资(万元)':>12} {'年运行费(万元)':>14} {'全寿命周期(万元)':>16} {'回收期(年)':>10}  方案")
+    for row in table:
+        payback = "—" if row["payback_years"] is None else f"{row['payback_years']:.1f}"
+        name = row["name"]
+        if not row["feasible"]:
+            name = f"❌ {name}（不满足 冷 {row['unmet_cooling_hours']:.0f} h / 热 {row['unmet_heating_hours']:.0f} h）"
+        print(
+            f"{row['rank']:>4}  {row['first_cost_cny'] / 1e4:>12,.1f} {row['annual_cost_cny'] / 1e4:>14,.1f} "
+            f"{row['lifecycle_cost_cny'] / 1e4:>16,.1f} {payback:>10}  {name}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
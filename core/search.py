@@ -0,0 +1,407 @@
+# core/search.py
+"""
+方案摘要全文检索（solution_summary）
+
+- 分词：连续汉字切成相邻二字组（bigram），单个汉字保留为单字；英文/数字按词切分
+- 倒排索引 + BM25 排序，查询时对每个词的倒排表做向量化打分，再 argpartition 取前 k
+- 持久化：data/search/ 下的 index.npz 为压缩段（CSR 格式），新增文档先进内存段并追加到
+  delta.jsonl，启动时回放；内存段达到阈值后 save() 合并成新的 index.npz
+- 增量：insert_project / insert_many 通过插入回调实时加入；COPY 导入、SQLite 同步、写前日志
+  等不经过回调的写入由 refresh() 按已同步的最大 id 补齐（get_search_index 每次调用时执行）
+
+用法：
+    python -m ppg.core.search rebuild
+    python -m ppg.core.search query "地源热泵 医院"
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from ..config import DATA_DIR
+from .models import ProjectHisModel
+from .storage import open_storage, add_insert_listener, open_reader
+
+DEFAULT_INDEX_DIR = os.path.join(DATA_DIR, "search")
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 内存段文档数超过该值时自动合并落盘
+AUTO_SAVE_THRESHOLD = 5000
+
+_TOKEN_PATTERN = re.compile(r"[㐀-鿿]+|[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def tokenize(text: str) -> list:
+    """汉字二字组 + 英文/数字词"""
+    if not text:
+        return []
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class SearchIndex:
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
+        self.index_dir = index_dir
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        # 压缩段：term -> (start, end)，对应 _base_docs / _base_tfs 切片
+        self._base_terms = {}
+        self._base_docs = np.empty(0, dtype=np.int32)
+        self._base_tfs = np.empty(0, dtype=np.int32)
+        # 内存段：term -> (文档号 array, 词频 array)
+        self._delta = {}
+        self._delta_count = 0
+        # 文档表（文档号为下标）
+        self._doc_ids = array("q")
+        self._doc_len = array("i")
+        self._alive = bytearray()
+        self._names = []
+        self._doc_of_id = {}
+        self._total_len = 0
+        self._live = 0
+        # refresh() 已检查到的最大项目 id（插入回调加入的文档不推进该值）
+        self._synced_id = 0
+
+    def __len__(self):
+        return self._live
+
+    # ---------- 路径 ----------
+    @property
+    def _base_path(self):
+        return os.path.join(self.index_dir, "index.npz")
+
+    @property
+    def _delta_path(self):
+        return os.path.join(self.index_dir, "delta.jsonl")
+
+    # ---------- 写入 ----------
+    def _add_document(self, project_id: int, text: str, name: str = ""):
+        old = self._doc_of_id.get(project_id)
+        if old is not None and self._alive[old]:
+            self._alive[old] = 0
+            self._total_len -= self._doc_len[old]
+            self._live -= 1
+
+        doc = len(self._doc_ids)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            postings = self._delta.get(term)
+            if postings is None:
+                postings = self._delta[term] = (array("i"), array("i"))
+            postings[0].append(doc)
+            postings[1].append(tf)
+
+        length = sum(counts.values())
+        self._doc_ids.append(project_id)
+        self._doc_len.append(length)
+        self._alive.append(1)
+        self._names.append(name or "")
+        self._doc_of_id[project_id] = doc
+        self._total_len += length
+        self._live += 1
+        self._delta_count += 1
+
+    def add_document(self, project_id: int, text: str, name: str = ""):
+        """加入（或替换）一篇文档，并追加到 delta 日志"""
+        with self._lock:
+            self._add_document(project_id, text, name)
+            self._log_delta([[project_id, text or "", name or ""]])
+
+    def _log_delta(self, entries: list):
+        """追加 delta 日志：文档为 [id, text, name]，同步位置为 {"synced_id": n}"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._delta_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+        if self._delta_count >= AUTO_SAVE_THRESHOLD:
+            self.save()
+
+    def add(self, project_id, project: ProjectHisModel):
+        """insert_project 成功后的回调"""
+        if project.solution_summary:
+            self.add_document(project_id, project.solution_summary, project.name)
+
+    # ---------- 查询 ----------
+    def _postings(self, term: str):
+        parts_docs, parts_tfs = [], []
+        span = self._base_terms.get(term)
+        if span is not None:
+            parts_docs.append(self._base_docs[span[0] : span[1]])
+            parts_tfs.append(self._base_tfs[span[0] : span[1]])
+        postings = self._delta.get(term)
+        if postings is not None:
+            parts_docs.append(np.frombuffer(postings[0], dtype=np.int32))
+            parts_tfs.append(np.frombuffer(postings[1], dtype=np.int32))
+        if not parts_docs:
+            return None, None
+        if len(parts_docs) == 1:
+            return parts_docs[0], parts_tfs[0]
+        return np.concatenate(parts_docs), np.concatenate(parts_tfs)
+
+    def search(self, query: str, k: int = 10) -> list:
+        """
+        BM25 检索
+        :return: [{"id", "name", "score"}]，按得分降序
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._live:
+                return []
+            n_docs = len(self._doc_ids)
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            doc_len = np.frombuffer(self._doc_len, dtype=np.int32)
+            avg_len = self._total_len / self._live
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len)
+            scores = np.zeros(n_docs, dtype=np.float32)
+
+            for term in terms:
+                docs, tfs = self._postings(term)
+                if docs is None:
+                    continue
+                df = int(alive[docs].sum())
+                if not df:
+                    continue
+                idf = np.log(1 + (self._live - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+
+            scores[~alive] = 0
+            hits = np.count_nonzero(scores)
+            if not hits:
+                return []
+            k = min(k, hits)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                {
+                    "id": int(self._doc_ids[i]),
+                    "name": self._names[i],
+                    "score": round(float(scores[i]), 4),
+                }
+                for i in top
+            ]
+
+    # ---------- 持久化 ----------
+    def save(self):
+        """合并压缩段与内存段，原子写入 index.npz 并清空 delta 日志"""
+        with self._lock:
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            terms = sorted(set(self._base_terms) | set(self._delta))
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            docs_parts, tfs_parts = [], []
+            for i, term in enumerate(terms):
+                docs, tfs = self._postings(term)
+                keep = alive[docs]
+                docs_parts.append(docs[keep])
+                tfs_parts.append(tfs[keep])
+                offsets[i + 1] = offsets[i] + int(keep.sum())
+
+            os.makedirs(self.index_dir, exist_ok=True)
+            tmp_path = self._base_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    terms=_encode_strings(terms),
+                    offsets=offsets,
+                    docs=np.concatenate(docs_parts) if docs_parts else self._base_docs,
+                    tfs=np.concatenate(tfs_parts) if tfs_parts else self._base_tfs,
+                    doc_ids=np.frombuffer(self._doc_ids, dtype=np.int64),
+                    doc_len=np.frombuffer(self._doc_len, dtype=np.int32),
+                    alive=alive,
+                    names=_encode_strings(self._names),
+                    synced_id=np.int64(self._synced_id),
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._base_path)
+            open(self._delta_path, "w").close()
+
+            self._load_base()
+
+    def _load_base(self):
+        self._reset()
+        if not os.path.exists(self._base_path):
+            return
+        with np.load(self._base_path) as data:
+            terms = _decode_strings(data["terms"])
+            offsets = data["offsets"]
+            self._base_docs = data["docs"]
+            self._base_tfs = data["tfs"]
+            self._doc_ids = array("q", data["doc_ids"].tobytes())
+            self._doc_len = array("i", data["doc_len"].tobytes())
+            self._alive = bytearray(data["alive"].astype(np.uint8).tobytes())
+            self._names = _decode_strings(data["names"])
+            # 旧索引文件没有同步位置，按已索引的最大 id 计
+            if "synced_id" in data.files:
+                self._synced_id = int(data["synced_id"])
+            elif len(self._doc_ids):
+                self._synced_id = max(self._doc_ids)
+        self._base_terms = {
+            term: (int(offsets[i]), int(offsets[i + 1])) for i, term in enumerate(terms)
+        }
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        doc_len = np.frombuffer(self._doc_len, dtype=np.int32)
+        self._doc_of_id = {
+            int(doc_id): doc
+            for doc, doc_id in enumerate(self._doc_ids)
+            if self._alive[doc]
+        }
+        self._total_len = int(doc_len[alive].sum())
+        self._live = int(alive.sum())
+
+    def load(self) -> int:
+        """载入压缩段并回放 delta 日志"""
+        with self._lock:
+            self._load_base()
+            if os.path.exists(self._delta_path):
+                with open(self._delta_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            if isinstance(entry, dict):
+                                self._synced_id = max(self._synced_id, int(entry["synced_id"]))
+                                continue
+                            project_id, text, name = entry
+                        except (ValueError, TypeError, KeyError):
+                            continue  # 崩溃时写了一半的行
+                        self._add_document(project_id, text, name)
+            return self._live
+
+    def rebuild(self, batch_size: int = 2000) -> int:
+        """从 projects_his 全量重建并落盘"""
+        with self._lock:
+            self._reset()
+            with open_reader() as db:
+                if not db.conn:
+                    raise ConnectionError("数据库连接失败，无法重建检索索引")
+                for project_id, text, name in db.iter_rows(
+                    "select id, solution_summary, name from projects_his "
+                    "where solution_summary is not null order by id",
+                    itersize=batch_size,
+                ):
+                    self._add_document(project_id, text, name)
+                    self._synced_id = project_id
+            self.save()
+            return self._live
+
+    def refresh(self, batch_size: int = 2000) -> int:
+        """
+        补齐 id 大于已同步位置的项目（COPY 导入、SQLite 同步、写前日志等不触发插入回调的写入）
+        :return: 新加入的文档数
+        """
+        with self._lock:
+            last_id = self._synced_id
+        entries = []
+        with open_reader() as db:
+            if not db.conn:
+                raise ConnectionError("数据库连接失败，无法刷新检索索引")
+            for project_id, text, name in db.iter_rows(
+                "select id, solution_summary, name from projects_his where id > %s order by id",
+                (last_id,),
+                itersize=batch_size,
+            ):
+                last_id = project_id
+                if text:
+                    entries.append([project_id, text, name or ""])
+        with self._lock:
+            if last_id <= self._synced_id:
+                return 0
+            for project_id, text, name in entries:
+                self._add_document(project_id, text, name)
+            self._synced_id = last_id
+            self._log_delta(entries + [{"synced_id": last_id}])
+        return len(entries)
+
+
+def _encode_strings(strings: list) -> np.ndarray:
+    """字符串列表以 JSON 字节存储，避免定长 Unicode 数组的空间浪费"""
+    return np.frombuffer(json.dumps(strings, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_strings(data: np.ndarray) -> list:
+    return json.loads(data.tobytes().decode("utf-8"))
+
+
+def fetch_summaries(project_ids: list) -> dict:
+    """按 id 批量读取方案摘要（一次查询），用于展示检索结果；读主库，刚保存的项目也能取到"""
+    if not project_ids:
+        return {}
+    project_ids = [int(i) for i in project_ids]
+    with open_storage() as db:
+        if not db.conn:
+            return {}
+        placeholders = ", ".join(["%s"] * len(project_ids))
+        return dict(
+            db.fetch_all(
+                f"select id, solution_summary from projects_his where id in ({placeholders})",
+                project_ids,
+            )
+        )
+
+
+# ---------- 进程级单例 ----------
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """
+    获取共享检索索引：优先载入本地索引文件，不存在时从数据库重建；每次调用都会 refresh()
+    补齐新增项目。首次调用可能需要数秒，界面中应在后台线程调用（见 views/search_dialog.py）
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SearchIndex()
+                if os.path.exists(index._base_path) or os.path.exists(index._delta_path):
+                    index.load()
+                else:
+                    index.rebuild()
+                add_insert_listener(index.add)
+                _index = index
+    try:
+        _index.refresh()
+    except Exception as e:
+        print(f"❌ 检索索引增量刷新失败，使用已有索引: {e}")
+    return _index
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="方案摘要全文检索")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="从数据库重建索引")
+    query_parser = sub.add_parser("query", help="检索")
+    query_parser.add_argument("text")
+    query_parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        count = SearchIndex().rebuild()
+        print(f"✅索引重建完成：{count} 篇")
+        return 0
+
+    index = get_search_index()
+    results = index.search(args.text, args.k)
+    summaries = fetch_summaries([r["id"] for r in results])
+    for r in results:
+        summary = (summaries.get(r["id"]) or "").replace("\n", " ")
+        print(f"{r['score']:>8.3f}  #{r['id']}  {r['name']}  {summary[:60]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+# core/selection.py
+"""
+设备组合选型：按项目冷/热负荷在产品库中搜索“型号 × 台数”组合
+
+搜索空间：
+- 单一型号 n 台（全部向量化计算）
+- 两种型号 a 台 + b 台：对每个 (a, b) 组合，按剩余负荷在按容量排序的候选中二分查找，
+  直接取“容量足够的最便宜（或能效最高）型号”，避免枚举 N² 个型号对
+冗余（N+1 等）按额外备用台数计入造价，不计入可用容量。
+
+结果可直接作为 ProjectHisModel.selected_products 保存。
+"""
+import numpy as np
+
+from .catalog import NUMERIC_COLUMNS, get_catalog
+from .models import ProjectHisModel
+
+OBJECTIVES = ("cost", "efficiency")
+
+
+def _parse_redundancy(redundancy) -> int:
+    """支持 0 / 1 / "N" / "N+1" / "N+2" 写法"""
+    if isinstance(redundancy, str):
+        text = redundancy.strip().upper().replace(" ", "")
+        if text in ("", "N"):
+            return 0
+        if text.startswith("N+") and text[2:].isdigit():
+            return int(text[2:])
+        raise ValueError(f"无法识别的冗余配置：{redundancy}")
+    return int(redundancy or 0)
+
+
+def _gather(catalog, category, brand, min_cop, need_heating):
+    """收集候选型号的列数据（可跨多个分类），返回 (位置表, 列字典)"""
+    categories = [category] if category is not None else catalog.categories
+    refs, columns = [], {col: [] for col in NUMERIC_COLUMNS}
+    for cat in categories:
+        positions = catalog.find(
+            cat,
+            cooling_capacity_kw=(1e-9, None),
+            heating_capacity_kw=(1e-9, None) if need_heating else None,
+            min_cop=min_cop,
+            brand=brand,
+            sort_by=None,
+        )
+        cols = catalog.columns(cat)
+        if cols is None:
+            continue
+        positions = positions[~np.isnan(cols.numeric["price_cny"][positions])]
+        refs.extend((cat, int(p)) for p in positions)
+        for col in NUMERIC_COLUMNS:
+            columns[col].append(cols.numeric[col][positions])
+
+    columns = {
+        col: np.concatenate(parts) if parts else np.empty(0)
+        for col, parts in columns.items()
+    }
+    return refs, columns
+
+
+def _suffix_best(key: np.ndarray, tie: np.ndarray) -> np.ndarray:
+    """best[i] = 在 [i, n) 区间内 key 最小（其次 tie 最小）的下标"""
+    n = len(key)
+    best = np.empty(n, dtype=np.int64)
+    current = n - 1
+    for i in range(n - 1, -1, -1):
+        if (key[i], tie[i]) <= (key[current], tie[current]):
+            current = i
+        best[i] = current
+    return best
+
+
+def select_equipment(
+    cooling_load_kw: float,
+    heating_load_kw: float = None,
+    category: str = None,
+    brand: str = None,
+    redundancy=0,
+    max_units: int = 8,
+    min_cop: float = None,
+    objective: str = "cost",
+    top_k: int = 5,
+    allow_mixed: bool = True,
+    catalog=None,
+) -> list:
+    """
+    搜索满足负荷的设备组合
+    :param cooling_load_kw: 总冷负荷
+    :param heating_load_kw: 总热负荷（为空则不校核制热量）
+    :param category: 产品分类，为空时在所有带制冷量的分类中搜索
+    :param brand: 限定品牌
+    :param redundancy: 冗余台数，如 "N+1"
+    :param max_units: 最多安装台数（含备用）
+    :param min_cop: 最低 COP
+    :param objective: "cost" 造价最低 / "efficiency" 综合 COP 最高
+    :param top_k: 返回前 k 个方案
+    :param allow_mixed: 是否搜索两种型号的混合组合
+    :return: selected_products 字典列表，按目标排序
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective 只能是 {OBJECTIVES}")
+    if not cooling_load_kw or cooling_load_kw <= 0:
+        raise ValueError("总冷负荷必须大于 0")
+
+    catalog = catalog or get_catalog()
+    spare = _parse_redundancy(redundancy)
+    running_max = max_units - spare
+    need_heating = bool(heating_load_kw and heating_load_kw > 0)
+    if running_max < 1:
+        return []
+
+    refs, cols = _gather(catalog, category, brand, min_cop, need_heating)
+    if not refs:
+        return []
+
+    cap = cols["cooling_capacity_kw"]
+    heat = cols["heating_capacity_kw"]
+    price = cols["price_cny"]
+    cop = cols["cop"]
+    power = np.where(np.isnan(cols["power_kw"]), cap / cop, cols["power_kw"])
+
+    # 候选组合统一用 (A, a, B, b) 表示；单一型号时 b = 0
+    idx_a, cnt_a, idx_b, cnt_b = [], [], [], []
+
+    # 单一型号：n = ceil(负荷 / 单台容量)
+    n = np.ceil(cooling_load_kw / cap)
+    if need_heating:
+        n = np.maximum(n, np.ceil(heating_load_kw / heat))
+    ok = n <= running_max
+    idx_a.append(np.nonzero(ok)[0])
+    cnt_a.append(n[ok])
+
+    # 两种型号：A × a + B × b，B 取容量足够的最优型号
+    if allow_mixed and running_max >= 2 and len(refs) > 1:
+        order = np.argsort(cap, kind="stable")
+        cap_sorted = cap[order]
+        if objective == "cost":
+            best = order[_suffix_best(price[order], -cap_sorted)]
+        else:
+            best = order[_suffix_best(-np.nan_to_num(cop[order], nan=-np.inf), price[order])]
+
+        all_a = np.arange(len(refs))
+        for a in range(1, running_max):
+            for b in range(1, running_max - a + 1):
+                threshold = (cooling_load_kw - a * cap) / b
+                need = threshold > 0  # 否则 A 单独即可满足，已在单一型号中覆盖
+                pos = np.searchsorted(cap_sorted, threshold[need], side="left")
+                found = pos < len(cap_sorted)
+                chosen_a = all_a[need][found]
+                chosen_b = best[pos[found]]
+                distinct = chosen_a != chosen_b
+                idx_a.append(chosen_a[distinct])
+                cnt_a.append(np.full(distinct.sum(), a))
+                idx_b.append(chosen_b[distinct])
+                cnt_b.append(np.full(distinct.sum(), b))
+
+    single = len(idx_a[0])
+    A = np.concatenate(idx_a).astype(np.int64)
+    a = np.concatenate(cnt_a)
+    B = np.concatenate([np.zeros(single, dtype=np.int64)] + idx_b).astype(np.int64)
+    b = np.concatenate([np.zeros(single)] + cnt_b)
+
+    def mix(values):
+        # b = 0 时不引用 B 的值，避免缺失值（NaN）污染单一型号组合
+        return a * values[A] + np.where(b > 0, b * values[B], 0.0)
+
+    total_cap = mix(cap)
+    total_heat = mix(heat)
+    total_power = mix(power)
+    valid = total_cap >= cooling_load_kw
+    if need_heating:
+        valid &= total_heat >= heating_load_kw
+    # 备用机取容量较大的型号
+    standby = np.where((b > 0) & (cap[B] > cap[A]), B, A)
+    cost = mix(price) + spare * price[standby]
+    combined_cop = total_cap / total_power
+
+    A, a, B, b, standby = A[valid], a[valid], B[valid], b[valid], standby[valid]
+    cost, total_cap, total_heat, combined_cop = (
+        cost[valid],
+        total_cap[valid],
+        total_heat[valid],
+        combined_cop[valid],
+    )
+    if objective == "cost":
+        ranking = np.lexsort((-np.nan_to_num(combined_cop, nan=0.0), total_cap, cost))
+    else:
+        ranking = np.lexsort((cost, -np.nan_to_num(combined_cop, nan=-np.inf)))
+
+    results, seen = [], set()
+    for i in ranking:
+        parts = [(int(A[i]), int(a[i])), (int(B[i]), int(b[i]))]
+        key = tuple(sorted(p for p in parts if p[1] > 0))
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append(
+            _build_selection(
+                catalog,
+                refs,
+                key,
+                int(standby[i]),
+                spare,
+                objective,
+                cooling_load_kw,
+                float(cost[i]),
+                float(total_cap[i]),
+                float(total_heat[i]),
+                float(combined_cop[i]),
+            )
+        )
+        if len(results) >= top_k:
+            break
+    return results
+
+
+def _build_selection(
+    catalog, refs, parts, standby, spare, objective, load, cost, cap, heat, cop
+) -> dict:
+    items = []
+    for idx, qty in parts:
+        category, pos = refs[idx]
+        row = catalog.columns(category).row(pos)
+        standby_qty = spare if idx == standby else 0
+        items.append(
+            {
+                "product_id": row["id"],
+                "model_code": row["model_code"],
+                "name": row["name"],
+                "brand": row["brand"],
+                "category": category,
+                "qty": qty + standby_qty,
+                "running_qty": qty,
+                "standby_qty": standby_qty,
+                "unit_price_cny": row["price_cny"],
+                "cooling_capacity_kw": row["cooling_capacity_kw"],
+                "heating_capacity_kw": row["heating_capacity_kw"],
+                "cop": row["cop"],
+            }
+        )
+    return {
+        "objective": objective,
+        "redundancy": f"N+{spare}" if spare else "N",
+        "items": items,
+        "total_units": sum(item["qty"] for item in items),
+        "total_cost_cny": round(cost, 2),
+        "total_cooling_capacity_kw": round(cap, 2),
+        "total_heating_capacity_kw": None if np.isnan(heat) else round(heat, 2),
+        "cooling_margin": round(cap / load - 1, 4),
+        "cop": None if np.isnan(cop) else round(cop, 3),
+    }
+
+
+def select_for_project(project: ProjectHisModel, **constraints) -> list:
+    """按项目的 total_cooling_load_kw / total_heating_load_kw 选型"""
+    return select_equipment(
+        project.total_cooling_load_kw,
+        project.total_heating_load_kw,
+        **constraints,
+    )
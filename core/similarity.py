@@ -0,0 +1,361 @@
+# core/similarity.py
+"""
+相似历史项目检索（k 近邻）
+
+每个项目编码为：
+- 数值特征：面积、冷/热负荷、单位面积冷/热指标、总造价（规模类特征取 log）
+- 分类特征：project_type / location_city / system_type（字典编码）
+距离采用加权 Gower 距离：数值差按特征跨度归一化并截断到 [0, 1]，分类不同记 1；
+只在双方都有值的特征上计算，再按实际参与的权重归一化，缺失字段不会拉偏结果。
+
+全部项目存放在按容量倍增的 NumPy 数组中，单次查询为整表向量化计算 + argpartition，
+10 万条记录在毫秒级返回；insert_project 成功后通过插入回调增量追加（按 id 去重，
+回调与 refresh() 拉到同一条记录时只保留一份）。
+有本地快照（core/snapshot）时从快照构建，再用 refresh() 补齐快照之后新增的项目。
+"""
+import threading
+
+import numpy as np
+
+from .models import ProjectHisModel
+from .snapshot import open_snapshot
+from .storage import add_insert_listener, open_reader, remove_insert_listener
+
+NUM_FEATURES = [
+    "area_sqm",
+    "total_cooling_load_kw",
+    "total_heating_load_kw",
+    "cooling_load_per_sqm",
+    "heating_load_per_sqm",
+    "total_cost_cny",
+]
+CAT_FEATURES = ["project_type", "location_city", "system_type"]
+# 跨数量级的规模类特征取对数后再比较
+LOG_FEATURES = {"area_sqm", "total_cooling_load_kw", "total_heating_load_kw", "total_cost_cny"}
+
+DEFAULT_WEIGHTS = {
+    "area_sqm": 1.0,
+    "total_cooling_load_kw": 1.5,
+    "total_heating_load_kw": 1.0,
+    "cooling_load_per_sqm": 1.0,
+    "heating_load_per_sqm": 0.5,
+    "total_cost_cny": 0.5,
+    "project_type": 2.0,
+    "location_city": 1.0,
+    "system_type": 1.0,
+}
+
+# 结果中附带的项目字段
+META_FIELDS = [
+    "name",
+    "client_name",
+    "project_type",
+    "location_city",
+    "system_type",
+    "area_sqm",
+    "total_cooling_load_kw",
+    "total_heating_load_kw",
+    "total_cost_cny",
+    "solution_summary",
+    "success_rating",
+]
+
+_SELECT_SQL = """
+select id, name, client_name, project_type, location_city, system_type,
+       area_sqm, total_cooling_load_kw, total_heating_load_kw,
+       total_cost_cny, solution_summary, success_rating
+from projects_his
+"""
+_ROW_FIELDS = ["id"] + META_FIELDS
+# numeric 列（PostgreSQL 读出为 Decimal）统一转为 float
+_FLOAT_FIELDS = ["area_sqm", "total_cooling_load_kw", "total_heating_load_kw", "total_cost_cny"]
+
+
+def _number(value):
+    if value is None:
+        return np.nan
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return value if value > 0 else np.nan
+
+
+_SOURCE_FIELDS = ["area_sqm", "total_cooling_load_kw", "total_heating_load_kw", "total_cost_cny"]
+
+
+def encode_numeric_columns(columns: dict) -> np.ndarray:
+    """按列编码数值特征：columns 为 {字段: 数组}，返回 (行数, 特征数) 矩阵，缺失或非正值为 NaN"""
+    area, cooling, heating, cost = (
+        np.where(values > 0, values, np.nan)
+        for values in (np.asarray(columns[f], dtype=np.float64) for f in _SOURCE_FIELDS)
+    )
+    values = {
+        "area_sqm": area,
+        "total_cooling_load_kw": cooling,
+        "total_heating_load_kw": heating,
+        # W/㎡
+        "cooling_load_per_sqm": cooling * 1000 / area,
+        "heating_load_per_sqm": heating * 1000 / area,
+        "total_cost_cny": cost,
+    }
+    matrix = np.column_stack([values[f] for f in NUM_FEATURES])
+    for i, feature in enumerate(NUM_FEATURES):
+        if feature in LOG_FEATURES:
+            matrix[:, i] = np.log(matrix[:, i])
+    return matrix
+
+
+def encode_numeric(record: dict) -> np.ndarray:
+    """把项目记录编码为数值特征向量（缺失为 NaN）"""
+    return encode_numeric_columns({f: [_number(record.get(f))] for f in _SOURCE_FIELDS})[0]
+
+
+def _as_dict(project) -> dict:
+    if isinstance(project, ProjectHisModel):
+        return project.model_dump()
+    return dict(project)
+
+
+class SimilarityIndex:
+    def __init__(self, weights: dict = None):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self._lock = threading.RLock()
+        self._size = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._num = np.empty((0, len(NUM_FEATURES)), dtype=np.float32)
+        self._cat = np.empty((0, len(CAT_FEATURES)), dtype=np.int32)
+        self._vocab = [{} for _ in CAT_FEATURES]  # 分类值 -> 编码
+        self._meta = []
+        self._scale = np.ones(len(NUM_FEATURES), dtype=np.float32)
+        self._known = set()  # 已索引的 id
+        self._synced_id = 0  # 从数据库 / 快照载入的最大 id，refresh() 从这里继续拉取
+
+    def __len__(self):
+        return self._size
+
+    # ---------- 构建 ----------
+    def _reserve(self, extra: int):
+        """容量不足时按倍增扩容，保证逐条追加的均摊成本为 O(1)"""
+        needed = self._size + extra
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name, fill in (("_ids", 0), ("_num", np.nan), ("_cat", -1)):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, name, new)
+
+    @staticmethod
+    def _category_code(vocab: dict, value) -> int:
+        value = value.strip() if isinstance(value, str) else value
+        if not value:
+            return -1
+        return vocab.setdefault(value, len(vocab))
+
+    def _clear(self):
+        self._size = 0
+        self._meta = []
+        self._vocab = [{} for _ in CAT_FEATURES]
+        self._known = set()
+        self._synced_id = 0
+
+    def _append(self, records: list):
+        """追加记录（dict，需包含 id），已索引的 id 跳过"""
+        fresh = []
+        for r in records:
+            if r["id"] not in self._known:
+                self._known.add(r["id"])
+                fresh.append(r)
+        if not fresh:
+            return
+        records = fresh
+        columns = {f: [_number(r.get(f)) for r in records] for f in _SOURCE_FIELDS}
+        columns["id"] = [r["id"] for r in records]
+        for feature in CAT_FEATURES:
+            columns[feature] = [r.get(feature) for r in records]
+        self._append_columns(columns, [{f: r.get(f) for f in META_FIELDS} for r in records])
+
+    def _append_columns(self, columns: dict, meta: list):
+        """按列追加（快照直接提供列，记录先转成列）：数值特征整列向量化编码"""
+        n = len(columns["id"])
+        self._reserve(n)
+        start, end = self._size, self._size + n
+        self._ids[start:end] = columns["id"]
+        self._known.update(self._ids[start:end].tolist())
+        self._num[start:end] = encode_numeric_columns(columns)
+        for j, (vocab, feature) in enumerate(zip(self._vocab, CAT_FEATURES)):
+            self._cat[start:end, j] = [self._category_code(vocab, v) for v in columns[feature]]
+        self._meta.extend(meta)
+        self._size = end
+
+    def _fit_scale(self):
+        """每个数值特征用 1%~99% 分位跨度归一化，抗极端值"""
+        num = self._num[: self._size]
+        for j in range(len(NUM_FEATURES)):
+            column = num[:, j]
+            column = column[~np.isnan(column)]
+            if len(column) >= 2:
+                low, high = np.percentile(column, [1, 99])
+                self._scale[j] = high - low if high > low else 1.0
+            else:
+                self._scale[j] = 1.0
+
+    def build(self, records: list):
+        """用给定记录（dict，需包含 id）重建索引"""
+        with self._lock:
+            self._clear()
+            self._append(records)
+            self._synced_id = max((r["id"] for r in records), default=0)
+            self._fit_scale()
+
+    def load(self):
+        """从 projects_his 全量构建"""
+        self.build(self._fetch())
+        return self._size
+
+    def load_snapshot(self) -> bool:
+        """从本地快照构建并从数据库补齐新增项目；没有快照时返回 False，数据库不可用时只用快照"""
+        snapshot = open_snapshot("projects_his")
+        if snapshot is None:
+            return False
+        columns = snapshot.columns(["id", *_SOURCE_FIELDS, *CAT_FEATURES])
+        meta = [dict(zip(META_FIELDS, row)) for row in snapshot.rows(META_FIELDS)]
+        with self._lock:
+            self._clear()
+            self._append_columns(columns, meta)
+            self._synced_id = int(self._ids[: self._size].max()) if self._size else 0
+            self._fit_scale()
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"❌ 历史项目增量刷新失败，使用快照数据: {e}")
+        return True
+
+    def refresh(self) -> int:
+        """
+        拉取上次载入之后新增的记录（如批量导入后）并重新计算归一化跨度
+        查询不持锁，期间插入回调追加的同一条记录按 id 去重
+        :return: 拉取的记录数
+        """
+        with self._lock:
+            last_id = self._synced_id
+        records = self._fetch("where id > %s order by id", (last_id,))
+        if records:
+            with self._lock:
+                self._append(records)
+                self._synced_id = max(self._synced_id, records[-1]["id"])
+                self._fit_scale()
+        return len(records)
+
+    def add(self, project_id, project):
+        """追加一条刚插入的项目（insert_project 回调）；归一化参数保持不变"""
+        record = _as_dict(project)
+        record["id"] = project_id
+        with self._lock:
+            self._append([record])
+
+    def _fetch(self, where: str = "", params=None) -> list:
+        with open_reader() as db:
+            if not db.conn:
+                raise ConnectionError("数据库连接失败，无法载入历史项目")
+            rows = [dict(zip(_ROW_FIELDS, r)) for r in db.fetch_all(_SELECT_SQL + where, params)]
+        for row in rows:
+            for field in _FLOAT_FIELDS:
+                if row[field] is not None:
+                    row[field] = float(row[field])
+        return rows
+
+    # ---------- 查询 ----------
+    def distances(self, project, weights: dict = None) -> np.ndarray:
+        """返回查询项目与索引中每个项目的距离（0 完全相同，1 完全不同）"""
+        record = _as_dict(project)
+        weights = dict(self.weights, **(weights or {}))
+        n = self._size
+
+        query = encode_numeric(record).astype(np.float32)
+        used = ~np.isnan(query)
+        w_num = np.array([weights[f] for f in NUM_FEATURES], dtype=np.float32)[used]
+
+        diff = np.abs(self._num[:n, used] - query[used]) / self._scale[used]
+        np.minimum(diff, 1.0, out=diff)
+        present = ~np.isnan(diff)
+        total = np.nan_to_num(diff, nan=0.0) @ w_num
+        weight_sum = present @ w_num
+
+        for j, feature in enumerate(CAT_FEATURES):
+            value = record.get(feature)
+            value = value.strip() if isinstance(value, str) else value
+            if not value:
+                continue
+            code = self._vocab[j].get(value, -2)
+            column = self._cat[:n, j]
+            present = column >= 0
+            total += weights[feature] * (present & (column != code))
+            weight_sum += weights[feature] * present
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            distance = total / weight_sum
+        distance[weight_sum == 0] = 1.0
+        return distance
+
+    def query(self, project, k: int = 5, weights: dict = None, exclude_id=None) -> list:
+        """
+        返回最相似的 k 个历史项目
+        :param project: ProjectHisModel 或字段字典
+        :param k: 返回数量
+        :param weights: 临时覆盖特征权重，如 {"location_city": 3}
+        :param exclude_id: 排除的项目 id（查询已入库项目自身时使用）
+        :return: [{"id", "similarity", "distance", "name", "solution_summary", "success_rating", ...}]
+        """
+        with self._lock:
+            if not self._size:
+                return []
+            distance = self.distances(project, weights)
+            if exclude_id is not None:
+                distance[self._ids[: self._size] == exclude_id] = np.inf
+
+            k = min(k, self._size)
+            top = np.argpartition(distance, k - 1)[:k]
+            top = top[np.argsort(distance[top], kind="stable")]
+
+            results = []
+            for i in top:
+                if not np.isfinite(distance[i]):
+                    continue
+                result = {
+                    "id": int(self._ids[i]),
+                    "similarity": round(1.0 - float(distance[i]), 4),
+                    "distance": float(distance[i]),
+                }
+                result.update(self._meta[i])
+                results.append(result)
+            return results
+
+
+# ---------- 进程级单例 ----------
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """获取共享索引：首次调用时全量构建，并注册插入回调实现增量更新"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SimilarityIndex()
+                # 先注册回调再载入：载入期间插入的项目不会漏掉（重复的按 id 去重）
+                add_insert_listener(index.add)
+                try:
+                    if not index.load_snapshot():
+                        index.load()
+                        # 全量构建会清空载入期间回调追加的记录，再补拉一次
+                        index.refresh()
+                except Exception:
+                    remove_insert_listener(index.add)
+                    raise
+                _index = index
+    return _index
@@ -0,0 +1,466 @@
+# core/snapshot.py
+"""
+products / projects_his 的本地列式快照：启动时内存映射载入，不经网络拉取全表
+
+    python -m ppg.core.snapshot refresh [--full]     # 生成 / 增量刷新快照
+    python -m ppg.core.snapshot info
+
+目录结构（SNAPSHOT_DIR/<表名>/）：
+    CURRENT             当前版本目录名，刷新时写好新版本后原子替换
+    v<N>/meta.json      行数、列类型、水位线、字符串字典
+    v<N>/<列>.npy       int / float / datetime 列，以及 category 列的字典编码（int32，-1 为空）
+    v<N>/<列>.offsets.npy + .data.npy + .valid.npy
+                        text / json 列：UTF-8 字节串接后按偏移切分（Arrow 式变长列）
+
+载入时 np.load(mmap_mode="r")，数值列零拷贝；旧版本在刷新后删除，已映射的进程不受影响（POSIX）。
+增量刷新按水位线只拉取变化的行：products 取 updated_at（为空时取 created_at），
+projects_his 取 create_at、updated_at（触发器维护，见 pgsql.SCHEMA_SQL）与 id；
+行数或 id 集合变化（有删除）时按 id 剔除。主库 projects_his 还没有 updated_at 列时
+只能发现新增行，已有行的修改需要 --full。
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from ..config import SNAPSHOT_DIR
+from .storage import open_storage
+
+# 列类型：int 不允许空值；float 缺失为 NaN；datetime 缺失为 NaT；
+# category 适合重复值多的短字符串，text 为任意字符串，json 为 JSON 文本
+TABLES = {
+    "products": {
+        "id": "int",
+        "name": "text",
+        "category": "category",
+        "brand": "category",
+        "model_code": "text",
+        "cooling_capacity_kw": "float",
+        "heating_capacity_kw": "float",
+        "power_kw": "float",
+        "cop": "float",
+        "noise_db": "float",
+        "dimensions": "json",
+        "price_cny": "float",
+        "energy_level": "float",
+        "tags": "json",
+        "documentation_link": "text",
+        "created_at": "datetime",
+        "updated_at": "datetime",
+    },
+    "projects_his": {
+        "id": "int",
+        "name": "text",
+        "client_name": "category",
+        "project_type": "category",
+        "area_sqm": "float",
+        "location_city": "category",
+        "total_heating_load_kw": "float",
+        "total_cooling_load_kw": "float",
+        "system_type": "category",
+        "selected_products": "json",
+        "total_cost_cny": "float",
+        "annual_energy_consumption_kwh": "float",
+        "solution_summary": "text",
+        "file_attachments": "json",
+        "success_rating": "float",
+        "create_at": "datetime",
+        "updated_at": "datetime",
+    },
+}
+
+# 增量刷新条件：参数依次为 (时间水位线, 时间水位线或修改时间水位线, 最大 id)
+# 时间用 >=：与水位线同一时刻、但上次刷新之后才写入 / 修改的行也会拉取；与快照中完全相同的行在合并前剔除
+_DELTA_WHERE = {
+    "products": "updated_at >= %s or (updated_at is null and created_at >= %s) or id > %s",
+    "projects_his": "create_at >= %s or updated_at >= %s or id > %s",
+}
+# 主库缺少 projects_his.updated_at 时的退化条件：参数为 (时间水位线, 最大 id)
+_INSERT_ONLY_WHERE = "create_at >= %s or id > %s"
+_EPOCH = datetime(1970, 1, 1)
+
+
+# ---------- 变长字符串列 ----------
+class TextColumn:
+    """text / json 列：offsets[i]:offsets[i+1] 为第 i 行的 UTF-8 字节，valid 为 False 表示空值"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray, valid: np.ndarray, is_json: bool = False):
+        self.offsets = offsets
+        self.data = data
+        self.valid = valid
+        self.is_json = is_json
+
+    def __len__(self):
+        return len(self.valid)
+
+    def __getitem__(self, i: int):
+        if not self.valid[i]:
+            return None
+        text = bytes(self.data[self.offsets[i] : self.offsets[i + 1]]).decode("utf-8")
+        return json.loads(text) if self.is_json else text
+
+    def to_list(self, index=None) -> list:
+        """解码为 Python 列表；index 为行号数组时只解码这些行"""
+        raw = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        valid = self.valid.tolist()
+        rows = range(len(valid)) if index is None else np.asarray(index).tolist()
+        loads = json.loads if self.is_json else None
+        values = []
+        for i in rows:
+            if not valid[i]:
+                values.append(None)
+                continue
+            text = raw[offsets[i] : offsets[i + 1]].decode("utf-8")
+            values.append(loads(text) if loads else text)
+        return values
+
+
+def _encode_text(values: list, is_json: bool):
+    valid = np.array([v is not None for v in values], dtype=bool)
+    if is_json:
+        values = [None if v is None else json.dumps(v, ensure_ascii=False) for v in values]
+    chunks = [b"" if v is None else str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in chunks], out=offsets[1:])
+    data = np.frombuffer(b"".join(chunks), dtype=np.uint8)
+    return offsets, data, valid
+
+
+def _encode_numbers(values: list, kind: str) -> np.ndarray:
+    if kind == "int":
+        return np.array(values, dtype=np.int64)
+    if kind == "float":
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    return np.array(values, dtype="datetime64[us]")
+
+
+def _encode_category(values: list, dictionary: list) -> np.ndarray:
+    """按 dictionary 编码（新值追加到 dictionary 末尾），空值为 -1"""
+    codes_of = {v: i for i, v in enumerate(dictionary)}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+            continue
+        code = codes_of.get(value)
+        if code is None:
+            code = codes_of[value] = len(dictionary)
+            dictionary.append(value)
+        codes[i] = code
+    return codes
+
+
+# ---------- 载入 ----------
+class TableSnapshot:
+    """单个表的一个快照版本，列按需内存映射"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.table = self.meta["table"]
+        self.kinds = self.meta["columns"]
+        self._columns = {}
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    @property
+    def watermark(self) -> dict:
+        return self.meta["watermark"]
+
+    def _load(self, name: str, suffix: str = "") -> np.ndarray:
+        return np.load(os.path.join(self.path, f"{name}{suffix}.npy"), mmap_mode="r")
+
+    def column(self, name: str):
+        """原始列：int / float / datetime 为内存映射数组，category 为编码数组，text / json 为 TextColumn"""
+        if name not in self._columns:
+            kind = self.kinds[name]
+            if kind in ("text", "json"):
+                self._columns[name] = TextColumn(
+                    self._load(name, ".offsets"), self._load(name, ".data"), self._load(name, ".valid"), kind == "json"
+                )
+            else:
+                self._columns[name] = self._load(name)
+        return self._columns[name]
+
+    def values(self, name: str) -> np.ndarray:
+        """
+        解码后的列，与 DB.select_columns 的结果一致：数值列为 float64 / int64（零拷贝），
+        时间列为 datetime64，字符串与 JSON 列为 object 数组（空值为 None）
+        """
+        kind = self.kinds[name]
+        column = self.column(name)
+        if kind in ("int", "float", "datetime"):
+            return column
+        if kind == "category":
+            dictionary = np.empty(len(self.meta["dictionaries"][name]) + 1, dtype=object)
+            dictionary[:-1] = self.meta["dictionaries"][name]
+            return dictionary[column]  # -1 取到末尾的 None
+        array = np.empty(len(column), dtype=object)
+        array[:] = column.to_list()
+        return array
+
+    def columns(self, names: list = None) -> dict:
+        """{列名: 数组}，用法同 DB.select_columns"""
+        return {name: self.values(name) for name in names or self.kinds}
+
+    def rows(self, names: list, index=None) -> list:
+        """
+        按行返回 Python 值的元组（NaN / NaT → None），与 DB.fetch_all 的结果形状相同
+        :param index: 行号数组，只解码这些行（默认全部）
+        """
+        lists = []
+        for name in names:
+            kind = self.kinds[name]
+            if index is not None and kind in ("text", "json"):
+                lists.append(self.column(name).to_list(index))
+                continue
+            column = self.values(name) if index is None else self.values(name)[np.asarray(index)]
+            if kind == "float":
+                values = [None if v != v else v for v in column.tolist()]
+            elif kind == "datetime":
+                values = column.astype(object).tolist()
+            else:
+                values = column.tolist()
+            lists.append(values)
+        return list(zip(*lists))
+
+
+def open_snapshot(table: str, root: str = None):
+    """打开表的当前快照版本，不存在时返回 None"""
+    table_dir = os.path.join(root or SNAPSHOT_DIR, table)
+    try:
+        with open(os.path.join(table_dir, "CURRENT"), encoding="utf-8") as f:
+            version = f.read().strip()
+        return TableSnapshot(os.path.join(table_dir, version))
+    except (OSError, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"❌ 快照读取失败（{table}）: {e}")
+        return None
+
+
+# ---------- 生成与刷新 ----------
+def _latest(stamps: np.ndarray) -> str:
+    stamps = stamps[~np.isnat(stamps)]
+    return (stamps.max().astype(datetime) if len(stamps) else _EPOCH).isoformat()
+
+
+def _watermark(table: str, columns: dict) -> dict:
+    ids = columns["id"]
+    mark = {"id": int(ids.max()) if len(ids) else 0}
+    if table == "products":
+        mark["time"] = _latest(np.where(np.isnat(columns["updated_at"]), columns["created_at"], columns["updated_at"]))
+    else:
+        # 写入时间（客户端时钟）与修改时间（数据库时钟）分开记录，互不比较
+        mark["time"] = _latest(columns["create_at"])
+        mark["updated"] = _latest(columns["updated_at"])
+    return mark
+
+
+def _table_columns(db, table: str) -> set:
+    return set(db.select_columns(f"select * from {table} where 1 = 0"))
+
+
+def _write_version(table_dir: str, version: int, table: str, arrays: dict, dictionaries: dict, rows: int) -> str:
+    """写入新版本目录并原子切换 CURRENT，返回版本目录"""
+    name = f"v{version}"
+    tmp_dir = os.path.join(table_dir, f".{name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for file_name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, file_name + ".npy"), array)
+    kinds = TABLES[table]
+    meta = {
+        "table": table,
+        "version": version,
+        "rows": rows,
+        "columns": kinds,
+        "dictionaries": dictionaries,
+        "watermark": _watermark(table, {c: arrays[c] for c in ("id", "created_at", "updated_at", "create_at") if c in arrays}),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_dir, os.path.join(table_dir, name))
+
+    current_tmp = os.path.join(table_dir, "CURRENT.tmp")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(current_tmp, os.path.join(table_dir, "CURRENT"))
+
+    # 旧版本可能仍被其他进程映射：POSIX 下删除不影响已打开的映射，其他平台删不掉时留到下次
+    for entry in os.listdir(table_dir):
+        if entry.startswith("v") and entry != name:
+            shutil.rmtree(os.path.join(table_dir, entry), ignore_errors=True)
+    return os.path.join(table_dir, name)
+
+
+def _build_arrays(table: str, old: TableSnapshot, keep: np.ndarray, new_rows: list):
+    """旧快照中保留的行（keep 为行号）+ 新拉取的行 → 按 id 排序的列文件与字典"""
+    kinds = TABLES[table]
+    names = list(kinds)
+    new_columns = dict(zip(names, map(list, zip(*new_rows)))) if new_rows else {n: [] for n in names}
+
+    ids = _encode_numbers(new_columns["id"], "int")
+    if old is not None:
+        ids = np.concatenate([np.asarray(old.column("id"))[keep], ids])
+    order = np.argsort(ids, kind="stable")
+
+    arrays, dictionaries = {}, {}
+    for name, kind in kinds.items():
+        if kind in ("int", "float", "datetime"):
+            values = _encode_numbers(new_columns[name], kind)
+            if old is not None:
+                values = np.concatenate([np.asarray(old.column(name))[keep], values])
+            arrays[name] = values[order]
+        elif kind == "category":
+            dictionary = list(old.meta["dictionaries"][name]) if old is not None else []
+            codes = _encode_category(new_columns[name], dictionary)
+            if old is not None:
+                codes = np.concatenate([np.asarray(old.column(name))[keep], codes])
+            arrays[name] = codes[order]
+            dictionaries[name] = dictionary
+        else:
+            values = (old.column(name).to_list(keep) if old is not None else []) + new_columns[name]
+            values = [values[i] for i in order.tolist()]
+            offsets, data, valid = _encode_text(values, kind == "json")
+            arrays[name + ".offsets"] = offsets
+            arrays[name + ".data"] = data
+            arrays[name + ".valid"] = valid
+    return arrays, dictionaries, len(ids)
+
+
+def _drop_unchanged(table: str, old: TableSnapshot, old_ids: np.ndarray, new_rows: list) -> list:
+    """剔除与快照中同 id 行完全相同的行（水位线用 >= 时会重复拉取水位线时刻的行）"""
+    if not new_rows or not len(old_ids):
+        return new_rows
+    kinds = list(TABLES[table].values())
+    ids = np.array([r[0] for r in new_rows], dtype=np.int64)
+    pos = np.minimum(np.searchsorted(old_ids, ids), len(old_ids) - 1)
+    found = old_ids[pos] == ids
+    if not found.any():
+        return new_rows
+    old_rows = dict(zip(ids[found].tolist(), old.rows(list(TABLES[table]), pos[found])))
+
+    def normalize(row):
+        return tuple(
+            None if v is None else float(v) if kind == "float" else v for kind, v in zip(kinds, row)
+        )
+
+    return [r for r in new_rows if r[0] not in old_rows or normalize(old_rows[r[0]]) != normalize(r)]
+
+
+def refresh_table(db, table: str, root: str = None, full: bool = False) -> dict:
+    """
+    生成或增量刷新单个表的快照
+    :param db: 已连接的 DB
+    :param full: 忽略现有快照，全量重建（同时压缩字典中已不再使用的值）
+    :return: {"rows": 快照行数, "changed": 拉取的行数, "deleted": 剔除的行数, "version": 版本号}
+    """
+    table_dir = os.path.join(root or SNAPSHOT_DIR, table)
+    os.makedirs(table_dir, exist_ok=True)
+    old = None if full else open_snapshot(table, root)
+    if old is not None and old.kinds != TABLES[table]:
+        old = None  # 列定义变化（如新增列），全量重建
+    available = _table_columns(db, table)
+    select = "select {} from {}".format(
+        ", ".join(c if c in available else f"cast(null as timestamp) as {c}" for c in TABLES[table]), table
+    )
+
+    if old is None:
+        new_rows = list(db.iter_rows(select + " order by id", itersize=10000))
+        keep = np.empty(0, dtype=np.int64)
+        deleted = 0
+    else:
+        mark = old.watermark
+        since = datetime.fromisoformat(mark["time"])
+        where = _DELTA_WHERE[table]
+        if table == "products":
+            params = (since, since, mark["id"])
+        elif "updated_at" in available:
+            params = (since, datetime.fromisoformat(mark.get("updated", _EPOCH.isoformat())), mark["id"])
+        else:
+            print("❌ projects_his 缺少 updated_at 列（见 pgsql.SCHEMA_SQL），增量刷新只包含新增行，已有行的修改需要 --full")
+            where, params = _INSERT_ONLY_WHERE, (since, mark["id"])
+        new_rows = db.fetch_all(f"{select} where {where} order by id", params)
+        old_ids = np.asarray(old.column("id"))
+        new_rows = _drop_unchanged(table, old, old_ids, new_rows)
+        current_ids = np.array([r[0] for r in db.fetch_all(f"select id from {table}")], dtype=np.int64)
+        changed_ids = np.array([r[0] for r in new_rows], dtype=np.int64)
+        alive = np.isin(old_ids, current_ids)
+        deleted = int((~alive).sum())
+        if not new_rows and not deleted:
+            return {"rows": len(old), "changed": 0, "deleted": 0, "version": old.meta["version"]}
+        keep = np.flatnonzero(alive & ~np.isin(old_ids, changed_ids))
+
+    version = old.meta["version"] + 1 if old is not None else _next_version(table_dir)
+    arrays, dictionaries, rows = _build_arrays(table, old, keep, new_rows)
+    _write_version(table_dir, version, table, arrays, dictionaries, rows)
+    return {"rows": rows, "changed": len(new_rows), "deleted": deleted, "version": version}
+
+
+def _next_version(table_dir: str) -> int:
+    versions = [int(e[1:]) for e in os.listdir(table_dir) if e.startswith("v") and e[1:].isdigit()]
+    return max(versions, default=0) + 1
+
+
+_refresh_lock = threading.Lock()
+
+
+def refresh_snapshot(tables=None, root: str = None, full: bool = False) -> dict:
+    """
+    刷新快照（默认 products 与 projects_his）
+    :return: {表名: refresh_table 的结果 + seconds}
+    """
+    stats = {}
+    with _refresh_lock, open_storage() as db:
+        if not db.conn:
+            raise ConnectionError("数据库连接失败，无法刷新快照")
+        for table in tables or TABLES:
+            start = time.perf_counter()
+            stats[table] = refresh_table(db, table, root, full)
+            stats[table]["seconds"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="products / projects_his 本地列式快照")
+    sub = parser.add_subparsers(dest="command", required=True)
+    refresh = sub.add_parser("refresh", help="生成或增量刷新快照")
+    refresh.add_argument("--full", action="store_true", help="全量重建")
+    refresh.add_argument("--table", choices=list(TABLES), action="append", help="只刷新指定表（可重复）")
+    sub.add_parser("info", help="查看当前快照")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        for table in TABLES:
+            snapshot = open_snapshot(table)
+            if snapshot is None:
+                print(f"{table}: 无快照")
+            else:
+                meta = snapshot.meta
+                print(f"{table}: v{meta['version']}，{meta['rows']} 行，生成于 {meta['created']}，水位线 {meta['watermark']}")
+        return 0
+
+    try:
+        stats = refresh_snapshot(args.table, full=args.full)
+    except Exception as e:
+        print(f"❌ 快照刷新失败: {e}")
+        return 1
+    for table, s in stats.items():
+        print(f"✅{table}: {s['rows']} 行（拉取 {s['changed']}，剔除 {s['deleted']}），v{s['version']}，{s['seconds']} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
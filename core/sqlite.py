@@ -0,0 +1,788 @@
+# core/sqlite.py
+"""
+SQLite 存储实现：单文件数据库，接口与 pgsql.DB 相同（见 core/storage.py）
+
+两种用途：
+    主库      PPG_STORAGE=sqlite，离线录入 / 测试时不需要 PostgreSQL
+    只读副本  PPG_READ_REPLICA=<文件>，产品库、历史项目等只读查询走本地文件，不经网络
+
+    python -m ppg.core.sqlite sync [--path 文件] [--full]    # 从 PostgreSQL 同步只读副本
+
+数据库使用 WAL 模式（读写互不阻塞），synchronous=NORMAL；表在首次连接时自动创建。
+JSON 字段按文本存储，读出时解析为 dict / list；时间按 ISO 文本存储，读出为 datetime
+（转换在本模块的连接与读取方法中完成，不修改 sqlite3 的全局适配器）。
+查询语句沿用 psycopg2 的写法（%s / %(name)s 占位，或 psycopg2.sql 对象），执行前转换为 SQLite 语法。
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from psycopg2 import sql
+from psycopg2.extras import Json
+
+from ..config import READ_REPLICA_PATH, SQLITE_PATH
+from . import metrics
+from .models import ProductModel, ProjectHisModel, group_errors, validate_batch
+from .storage import Storage, notify_inserted
+
+# 与 pgsql.SCHEMA_SQL 对应：numeric → real，jsonb → json（文本），timestamp 按 ISO 文本存储
+SCHEMA_SQL = """
+create table if not exists projects_his(
+  id integer primary key autoincrement,
+  name text not null,
+  client_name text not null,
+  project_type text,
+  area_sqm real,
+  location_city text,
+  total_heating_load_kw real,
+  total_cooling_load_kw real,
+  system_type text,
+  selected_products json,
+  total_cost_cny real,
+  annual_energy_consumption_kwh real,
+  solution_summary text,
+  file_attachments json,
+  success_rating integer,
+  create_at timestamp,
+  updated_at timestamp,
+  journal_key text
+);
+create index if not exists projects_his_create_at_idx on projects_his (create_at, id);
+create index if not exists projects_his_name_idx on projects_his (name, id);
+create index if not exists projects_his_area_idx on projects_his (area_sqm, id);
+create table if not exists products(
+  id integer primary key autoincrement,
+  name text not null,
+  category text,
+  brand text,
+  model_code text not null unique,
+  cooling_capacity_kw real,
+  heating_capacity_kw real,
+  power_kw real,
+  cop real,
+  noise_db real,
+  dimensions json,
+  price_cny real,
+  energy_level integer,
+  tags json,
+  documentation_link text,
+  created_at timestamp,
+  updated_at timestamp
+);
+"""
+
+# projects_his 的修改时间：旧库补列（updated_at、journal_key）后再建触发器和索引（SQLite 没有 add column if not exists）
+_TOUCH_TRIGGER_SQL = """
+create trigger if not exists projects_his_touch_updated_at
+after update on projects_his for each row when new.updated_at is old.updated_at
+begin
+  update projects_his set updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime') where id = new.id;
+end;
+"""
+
+
+def _create_schema(conn):
+    conn.executescript(SCHEMA_SQL)
+    columns = [row[1] for row in conn.execute("pragma table_info(projects_his)")]
+    if "updated_at" not in columns:
+        conn.execute("alter table projects_his add column updated_at timestamp")
+    if "journal_key" not in columns:
+        conn.execute("alter table projects_his add column journal_key text")
+    conn.execute("create unique index if not exists projects_his_journal_key_idx on projects_his (journal_key)")
+    conn.executescript(_TOUCH_TRIGGER_SQL)
+
+
+def _dump_json(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+# 参数适配与结果转换：只在本模块的连接（Connection）与 SQLiteDB 的读取方法中进行，
+# 不注册到 sqlite3 的全局表，同一进程中其他使用 sqlite3 的代码不受影响
+_ADAPTERS = {
+    Decimal: float,
+    dict: _dump_json,
+    list: _dump_json,
+    Json: lambda value: _dump_json(value.adapted),
+    datetime: lambda value: value.isoformat(" "),
+    date: lambda value: value.isoformat(),
+}
+# 按表中声明的列类型转换读出的值
+_CONVERTERS = {
+    "json": json.loads,
+    "timestamp": datetime.fromisoformat,
+}
+
+
+def _adapt_value(value):
+    adapter = _ADAPTERS.get(type(value))
+    return value if adapter is None else adapter(value)
+
+
+def _adapt(params):
+    """查询参数（序列或 dict）中的 dict / list / datetime 等转换为 SQLite 能存储的值"""
+    if isinstance(params, dict):
+        return {key: _adapt_value(value) for key, value in params.items()}
+    return list(map(_adapt_value, params))
+
+
+def _convert(rows: list, converters: list) -> list:
+    """按 converters（[(列序号, 转换函数)]）转换结果行"""
+    if not converters:
+        return rows
+    converted = []
+    for row in rows:
+        row = list(row)
+        for i, convert in converters:
+            if row[i] is not None:
+                row[i] = convert(row[i])
+        converted.append(tuple(row))
+    return converted
+
+# 字符串常量、命名占位、位置占位、转义的 %
+_PARAM_TOKENS = re.compile(r"'(?:[^']|'')*'|%\((\w+)\)s|%s|%%")
+
+# 已建表的数据库文件（每个进程每个文件只执行一次建表语句）
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+@lru_cache(maxsize=64)
+def _insert_sql(fields: tuple) -> str:
+    """按列签名缓存 projects_his 的 insert 语句（sqlite3 连接再按语句文本缓存编译结果）"""
+    return "insert into projects_his ({}) values ({})".format(", ".join(map(_quote, fields)), ", ".join("?" * len(fields)))
+
+
+def _literal(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _render(query) -> str:
+    """psycopg2.sql 对象 → SQL 文本（不需要 PostgreSQL 连接）"""
+    if isinstance(query, sql.Composed):
+        return "".join(_render(part) for part in query.seq)
+    if isinstance(query, sql.SQL):
+        return query.string
+    if isinstance(query, sql.Identifier):
+        return ".".join(_quote(s) for s in query.strings)
+    if isinstance(query, sql.Literal):
+        return _literal(query.wrapped)
+    if isinstance(query, sql.Placeholder):
+        return f"%({query.name})s" if query.name else "%s"
+    raise TypeError(f"不支持的 SQL 对象：{query!r}")
+
+
+@lru_cache(maxsize=256)
+def _translate(query: str) -> str:
+    """%s → ?，%(name)s → :name，%% → %（字符串常量内不替换）"""
+
+    def replace(match):
+        token = match.group(0)
+        if token.startswith("'"):
+            return token
+        if match.group(1):
+            return ":" + match.group(1)
+        return "?" if token == "%s" else "%"
+
+    return _PARAM_TOKENS.sub(replace, query)
+
+
+def to_sqlite(query) -> str:
+    """把 pgsql.DB 写法的查询转换为 SQLite 可执行的语句"""
+    if isinstance(query, sql.Composable):
+        query = _render(query)
+    return _translate(query)
+
+
+def _infer_column(values: list):
+    """没有声明类型的列（表达式、别名）按值推断：全为整数 → int64，全为数值 → float64，否则 object"""
+    import numpy as np
+
+    present = [v for v in values if v is not None]
+    if present and all(type(v) is int for v in present):
+        if len(present) == len(values):
+            return np.array(values, dtype=np.int64)
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _column_array(values: list, kind: str):
+    """单列值 → NumPy 数组，规则与 pgsql._column_array 相同；kind 为表中声明的 integer / real"""
+    import numpy as np
+
+    if kind == "integer" and None not in values:
+        return np.array(values, dtype=np.int64)
+    if kind in ("integer", "real"):
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    return _infer_column(values)
+
+
+class Connection(sqlite3.Connection):
+    """SQLiteDB 使用的连接：执行前按 _ADAPTERS 转换参数"""
+
+    def execute(self, sql_, parameters=()):
+        return super().execute(sql_, _adapt(parameters))
+
+    def executemany(self, sql_, parameters):
+        return super().executemany(sql_, map(_adapt, parameters))
+
+
+class TimedConnection(Connection):
+    """记录 execute / executemany / executescript / commit 的耗时，统计项与 PostgreSQL 连接相同"""
+
+    def _timed(self, name, method, sql_, *args):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = method(sql_, *args)
+            error = False
+            return result
+        finally:
+            metrics.record(name, time.perf_counter() - start, sql_, error)
+
+    def execute(self, sql_, parameters=()):
+        return self._timed("db.execute", super().execute, sql_, parameters)
+
+    def executemany(self, sql_, parameters):
+        return self._timed("db.executemany", super().executemany, sql_, parameters)
+
+    def executescript(self, sql_script):
+        return self._timed("db.execute", super().executescript, sql_script)
+
+
+class SQLiteDB(Storage):
+    """SQLite 实现：每个实例一个连接（sqlite3 连接创建很快，不需要连接池）"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = None, readonly: bool = False):
+        """
+        :param path: 数据库文件，默认 SQLITE_PATH
+        :param readonly: 只读打开（只读副本），不建表、不允许写入
+        """
+        super().__init__()
+        self.path = path or SQLITE_PATH
+        self.readonly = readonly
+        self._kinds = None
+
+    def db_connection(self) -> bool:
+        """
+        打开数据库文件（不存在时创建并建表）
+        :return: 是否连接成功
+        """
+        try:
+            options = {"timeout": 5.0, "factory": TimedConnection if metrics.enabled() else Connection}
+            with metrics.timed("db.connect"):
+                if self.readonly:
+                    uri = "file:" + os.path.abspath(self.path) + "?mode=ro"
+                    conn = sqlite3.connect(uri, uri=True, **options)
+                else:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    conn = sqlite3.connect(self.path, **options)
+            # 自动提交模式，批量写入时显式 begin / commit
+            conn.isolation_level = None
+            conn.execute("pragma synchronous = normal")
+            conn.execute("pragma mmap_size = 268435456")
+            if not self.readonly:
+                self._init_schema(conn)
+            self.conn = conn
+            return True
+        except Exception as e:
+            print(f"数据库连接失败: {e}")
+            return False
+
+    def _init_schema(self, conn):
+        key = os.path.abspath(self.path)
+        if key in _initialized:
+            return
+        with _init_lock:
+            if key not in _initialized:
+                conn.execute("pragma journal_mode = wal")
+                _create_schema(conn)
+                _initialized.add(key)
+
+    def db_close(self) -> bool:
+        """
+        关闭数据库连接
+        :return:
+        """
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+            return True
+        else:
+            return False
+
+    def _ensure(self, error=None):
+        """未连接时连接；失败时 error 为空返回 False，否则抛出异常"""
+        if self.conn or self.db_connection():
+            return True
+        if error:
+            raise ConnectionError(error)
+        return False
+
+    def _rollback(self):
+        if self.conn and self.conn.in_transaction:
+            self.conn.rollback()
+
+    # ---------- 写入 ----------
+    def insert_project(self, project: ProjectHisModel):
+        """
+        插入一条项目记录
+        :param project: 项目数据
+        :return: 新记录的 id，失败返回 None
+        """
+        if not self._ensure():
+            return None
+
+        try:
+            project_id = self._insert_one(project)
+            print("✅数据插入成功")
+            notify_inserted(project_id, project)
+            return project_id
+
+        except Exception as e:
+            print(f"❌ 插入失败: {e}")
+            return None
+
+    def _insert_many_batch(self, projects: list, page_size: int, keys: list = None) -> list:
+        """一个事务内逐行执行同一条已编译的语句（本地文件没有网络往返，page_size 不起作用）"""
+        columns = tuple(ProjectHisModel.model_fields)
+        rows = [[getattr(project, c) for c in columns] for project in projects]
+        if keys is not None:
+            rows = [row + [key] for row, key in zip(rows, keys)]
+            columns += ("journal_key",)
+        query = _insert_sql(columns)
+        try:
+            self.conn.execute("begin")
+            ids = [self.conn.execute(query, row).lastrowid for row in rows]
+            self.conn.execute("commit")
+            return ids
+        except sqlite3.Error:
+            self._rollback()
+            raise
+
+    def _insert_one(self, project: ProjectHisModel, key: str = None) -> int:
+        values = {k: v for k, v in project.model_dump().items() if v is not None}
+        if key is not None:
+            values["journal_key"] = key
+        return self.conn.execute(_insert_sql(tuple(values)), list(values.values())).lastrowid
+
+    def update_project_attachments(self, project_id, file_attachments) -> bool:
+        """
+        更新项目附件信息
+        :param project_id: 项目id
+        :param file_attachments: 附件列表（list 或 JSON 字符串）
+        :return:
+        """
+        if not self._ensure():
+            return False
+
+        if isinstance(file_attachments, str):
+            file_attachments = json.loads(file_attachments)
+        try:
+            self.conn.execute(
+                "update projects_his set file_attachments = ? where id = ?",
+                (file_attachments, project_id),
+            )
+            return True
+
+        except Exception as e:
+            print(f"❌ 附件更新失败: {e}")
+            return False
+
+    def delete_project(self, project_id) -> bool:
+        """
+        删除项目记录（后台保存被取消时撤销插入）
+        :param project_id: 项目id
+        :return:
+        """
+        if not self._ensure():
+            return False
+        try:
+            self.conn.execute("delete from projects_his where id = ?", (project_id,))
+            return True
+
+        except Exception as e:
+            print(f"❌ 删除失败: {e}")
+            return False
+
+    def bulk_insert_projects(self, projects, batch_size: int = 5000, on_reject=None) -> int:
+        """
+        批量导入历史项目：逐批校验（validate_batch）后在一个事务内 executemany
+        参数与返回值同 pgsql.DB.bulk_insert_projects；某批写入失败时逐行重试，把失败的行交给 on_reject
+        """
+        if not self._ensure():
+            return 0
+
+        columns = list(ProjectHisModel.model_fields)
+        query = "insert into projects_his ({}) values ({})".format(
+            ", ".join(map(_quote, columns)), ", ".join("?" * len(columns))
+        )
+
+        inserted = 0
+        records = iter(projects)
+        while True:
+            chunk = list(itertools.islice(records, batch_size))
+            if not chunk:
+                break
+            valid, errors = validate_batch(ProjectHisModel, chunk)
+            if on_reject:
+                for row, message in group_errors(errors).items():
+                    on_reject(chunk[row], message)
+
+            batch = [(chunk[row], tuple(getattr(project, c) for c in columns)) for row, project in valid]
+            if batch:
+                inserted += self._insert_batch(query, batch, on_reject)
+
+        print(f"✅批量导入完成：{inserted} 条")
+        return inserted
+
+    def _insert_batch(self, query, batch, on_reject) -> int:
+        try:
+            self.conn.execute("begin")
+            self.conn.executemany(query, [values for _, values in batch])
+            self.conn.execute("commit")
+            return len(batch)
+        except sqlite3.Error:
+            self._rollback()
+
+        inserted = 0
+        for record, values in batch:
+            try:
+                self.conn.execute(query, values)
+                inserted += 1
+            except sqlite3.Error as e:
+                if on_reject:
+                    on_reject(record, str(e).strip())
+        return inserted
+
+    def upsert_products(self, products, batch_size: int = 1000, on_reject=None) -> int:
+        """
+        批量写入产品库：按 model_code 执行 insert ... on conflict do update，整次刷新在同一个事务中提交
+        参数与返回值同 pgsql.DB.upsert_products
+        """
+        if not self._ensure():
+            return 0
+
+        columns = list(ProductModel.model_fields)
+        update_columns = [c for c in columns if c not in ("model_code", "created_at")]
+        compare_columns = [c for c in update_columns if c != "updated_at"]
+        query = "insert into products ({}) values ({}) on conflict (model_code) do update set {} where ({}) is not ({})".format(
+            ", ".join(map(_quote, columns)),
+            ", ".join("?" * len(columns)),
+            ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in update_columns),
+            ", ".join(f"products.{_quote(c)}" for c in compare_columns),
+            ", ".join(f"excluded.{_quote(c)}" for c in compare_columns),
+        )
+
+        upserted = 0
+        records = iter(products)
+        try:
+            self.conn.execute("begin")
+            while True:
+                chunk = list(itertools.islice(records, batch_size))
+                if not chunk:
+                    break
+                valid, errors = validate_batch(ProductModel, chunk)
+                if on_reject:
+                    for row, message in group_errors(errors).items():
+                        on_reject(chunk[row], message)
+                # rowcount 只计实际插入或更新的行（内容未变的型号被 where 条件跳过）
+                upserted += self.conn.executemany(query, [tuple(getattr(p, c) for c in columns) for _, p in valid]).rowcount
+            self.conn.execute("commit")
+            print(f"✅产品库更新完成：{upserted} 条")
+            return upserted
+
+        except Exception as e:
+            self._rollback()
+            print(f"❌ 产品库更新失败: {e}")
+            return 0
+
+    def update_rows(self, table: str, key: str, columns: list, rows: list, page_size: int = 5000) -> int:
+        """
+        按主键批量更新，整批一个事务，参数同 pgsql.DB.update_rows
+        :return: 提交的行数；失败时回滚并抛出异常
+        """
+        if not rows:
+            return 0
+        self._ensure("数据库连接失败")
+        query = "update {} set {} where {} = ?".format(
+            _quote(table), ", ".join(f"{_quote(c)} = ?" for c in columns), _quote(key)
+        )
+        try:
+            self.conn.execute("begin")
+            self.conn.executemany(query, ((*row[1:], row[0]) for row in rows))
+            self.conn.execute("commit")
+            return len(rows)
+        except Exception:
+            self._rollback()
+            raise
+
+    def create_tables(self) -> bool:
+        """创建 projects_his / products（已存在时跳过；普通连接在首次连接时已自动创建）"""
+        if not self._ensure():
+            return False
+        try:
+            _create_schema(self.conn)
+            return True
+        except Exception as e:
+            print(f"❌ 建表失败: {e}")
+            return False
+
+    # ---------- 读取 ----------
+    @staticmethod
+    def _search_clause(search: str, search_columns):
+        """关键字模糊匹配（任一列包含即命中），返回 (sql 片段, 参数) 或 (None, [])"""
+        if not search or not search_columns:
+            return None, []
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clause = "(" + " or ".join(f"{_quote(c)} like ? escape '\\'" for c in search_columns) + ")"
+        return clause, [pattern] * len(search_columns)
+
+    def select_page(
+        self,
+        table: str,
+        columns: list,
+        order_by: str = "id",
+        descending: bool = False,
+        after: tuple = None,
+        search: str = None,
+        search_columns=(),
+        limit: int = 200,
+    ) -> list:
+        """键集分页，参数与排序规则同 pgsql.DB.select_page"""
+        if not self._ensure():
+            return []
+
+        select_columns = list(columns)
+        if order_by not in select_columns:
+            select_columns.append(order_by)
+        col = _quote(order_by)
+        op = "<" if descending else ">"
+        direction = "desc" if descending else "asc"
+
+        conditions, params = [], []
+        clause, search_params = self._search_clause(search, search_columns)
+        if clause is not None:
+            conditions.append(clause)
+            params.extend(search_params)
+        if after is not None:
+            last_value, last_id = after
+            if order_by == "id":
+                conditions.append(f"id {op} ?")
+                params.append(last_id)
+            elif last_value is None:
+                conditions.append(f"({col} is null and id {op} ?)")
+                params.append(last_id)
+            else:
+                conditions.append(f"(({col}, id) {op} (?, ?) or {col} is null)")
+                params.extend([last_value, last_id])
+
+        order = f"id {direction}" if order_by == "id" else f"{col} {direction} nulls last, id {direction}"
+        query = "select {} from {} {} order by {} limit ?".format(
+            ", ".join(map(_quote, select_columns)),
+            _quote(table),
+            "where " + " and ".join(conditions) if conditions else "",
+            order,
+        )
+        params.append(limit)
+        cursor = self.conn.execute(query, params)
+        return _convert(cursor.fetchall(), self._converters(cursor))
+
+    def count_rows(self, table: str, search: str = None, search_columns=()) -> int:
+        """满足 select_page 同样检索条件的行数"""
+        if not self._ensure():
+            return 0
+        clause, params = self._search_clause(search, search_columns)
+        query = f"select count(*) from {_quote(table)}"
+        if clause is not None:
+            query += " where " + clause
+        return self.conn.execute(query, params).fetchone()[0]
+
+    def fetch_all(self, query, params=None) -> list:
+        """执行查询并返回全部行（出错时抛出异常；大结果集请用 iter_rows）"""
+        self._ensure("数据库连接失败")
+        cursor = self.conn.execute(to_sqlite(query), params or ())
+        return _convert(cursor.fetchall(), self._converters(cursor))
+
+    def iter_rows(self, query, params=None, itersize: int = 2000, as_dict: bool = False):
+        """
+        流式查询：SQLite 游标按需逐行读取，内存只保留一批数据；参数同 pgsql.DB.iter_rows
+        :return: 行生成器（需在 DB 连接关闭前迭代完）
+        """
+        self._ensure("数据库连接失败")
+        cursor = self.conn.execute(to_sqlite(query), params or ())
+        try:
+            names = [d[0] for d in cursor.description] if as_dict else None
+            converters = self._converters(cursor)
+            while True:
+                rows = _convert(cursor.fetchmany(itersize), converters)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(names, row)) if as_dict else row
+        finally:
+            cursor.close()
+
+    def _column_kinds(self) -> dict:
+        """
+        列名 → 声明类型（integer / real / json / timestamp），用于转换读出的值与列式读取时确定数组类型
+        按列名匹配：两张表中同名的列类型相同，表达式列用 as 指定同名别名时同样转换
+        """
+        if self._kinds is None:
+            kinds = {}
+            for table in ("projects_his", "products"):
+                for _, name, decl, *_ in self.conn.execute(f"pragma table_info({table})"):
+                    if decl.lower() in ("integer", "real", *_CONVERTERS):
+                        kinds[name] = decl.lower()
+            self._kinds = kinds
+        return self._kinds
+
+    def _converters(self, cursor) -> list:
+        """结果中 json / timestamp 列的 [(列序号, 转换函数)]"""
+        if cursor.description is None:
+            return []
+        kinds = self._column_kinds()
+        return [
+            (i, _CONVERTERS[kinds[d[0]]])
+            for i, d in enumerate(cursor.description)
+            if kinds.get(d[0]) in _CONVERTERS
+        ]
+
+    def _column_batches(self, query, params, batch_size: int):
+        """逐批产出 {列名: 数组}；表中的列按声明类型转换，表达式列按值推断"""
+        self._ensure("数据库连接失败")
+        kinds = self._column_kinds()
+        cursor = self.conn.execute(to_sqlite(query), params or ())
+        try:
+            names = [d[0] for d in cursor.description]
+            converters = self._converters(cursor)
+            first = True
+            while True:
+                rows = _convert(cursor.fetchmany(batch_size), converters)
+                if not rows and not first:
+                    break
+                first = False
+                yield {
+                    name: _column_array([row[i] for row in rows], kinds.get(name))
+                    for i, name in enumerate(names)
+                }
+                if not rows:
+                    break
+        finally:
+            cursor.close()
+
+    def db_select(self, query, params=None):
+        """
+        数据库查询数据（一次性返回全部结果，大结果集请用 iter_rows）
+        :param query: sql语句
+        :param params: 查询参数
+        :return: 查询结果，失败返回 None
+        """
+        if not self._ensure():
+            return None
+        try:
+            cursor = self.conn.execute(to_sqlite(query), params or ())
+            result = _convert(cursor.fetchall(), self._converters(cursor))
+            print("数据查询成功")
+            return result
+
+        except Exception as e:
+            print("数据查询失败")
+            print(e)
+            return None
+
+
+# ---------- 只读副本 ----------
+def _copy_table(src, dst: SQLiteDB, table: str, where: str = "", params=(), batch_size: int = 5000) -> int:
+    # 只同步两边都有的列（主库尚未执行新版建表语句时，副本中新增的列保持为空）
+    src_columns = set(src.select_columns(f"select * from {table} where 1 = 0"))
+    columns = [row[1] for row in dst.conn.execute(f"pragma table_info({table})") if row[1] in src_columns]
+    select = "select {} from {}{} order by id".format(", ".join(columns), table, where)
+    insert = "insert or replace into {} ({}) values ({})".format(
+        table, ", ".join(map(_quote, columns)), ", ".join("?" * len(columns))
+    )
+    copied = 0
+    rows = src.iter_rows(select, params, itersize=batch_size)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        dst.conn.executemany(insert, batch)
+        copied += len(batch)
+    return copied
+
+
+def sync_replica(path: str = None, full: bool = False, batch_size: int = 5000) -> dict:
+    """
+    从 PostgreSQL 同步只读副本，在一个事务内完成，同步期间副本仍可读
+    projects_his 按 id 增量追加（已有记录的修改如能耗回填，需要 full=True 才会同步）；
+    products 数据量小，每次整表替换
+    :param path: 副本文件，默认 READ_REPLICA_PATH，未配置时为 SQLITE_PATH
+    :param full: 清空后全量同步
+    :return: {"projects": 新增行数, "products": 行数}
+    """
+    from .pgsql import DB as PostgresDB
+
+    with PostgresDB() as src, SQLiteDB(path or READ_REPLICA_PATH or SQLITE_PATH) as dst:
+        if not src.conn or not dst.conn:
+            raise ConnectionError("数据库连接失败")
+        try:
+            dst.conn.execute("begin immediate")
+            if full:
+                dst.conn.execute("delete from projects_his")
+            last_id = dst.conn.execute("select coalesce(max(id), 0) from projects_his").fetchone()[0]
+            projects = _copy_table(src, dst, "projects_his", " where id > %s", (last_id,), batch_size)
+            dst.conn.execute("delete from products")
+            products = _copy_table(src, dst, "products", batch_size=batch_size)
+            dst.conn.execute("commit")
+        except Exception:
+            dst._rollback()
+            raise
+        dst.conn.execute("pragma optimize")
+    return {"projects": projects, "products": products}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SQLite 本地库 / 只读副本")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync = sub.add_parser("sync", help="从 PostgreSQL 同步只读副本")
+    sync.add_argument("--path", help="副本文件（默认 PPG_READ_REPLICA 或 PPG_SQLITE_PATH）")
+    sync.add_argument("--full", action="store_true", help="清空后全量同步")
+    sync.add_argument("--batch-size", type=int, default=5000, help="每批行数")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = sync_replica(args.path, args.full, args.batch_size)
+    except Exception as e:
+        print(f"❌ 同步失败: {e}")
+        return 1
+    print(f"✅同步完成：历史项目新增 {stats['projects']} 条，产品 {stats['products']} 条")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
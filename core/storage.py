@@ -0,0 +1,310 @@
+# core/storage.py
+"""
+存储接口：界面与各引擎只通过这里打开数据库，不直接依赖具体实现
+
+    with open_storage() as db:      # 主库（写入、数据浏览）；DB() 为旧名称，等价
+        db.insert_project(project)
+    with open_reader() as db:       # 只读查询（产品库、历史项目）；配置了本地只读副本时读副本
+        db.select_columns("select id, area_sqm from projects_his")
+
+实现：
+    postgres  core/pgsql.DB（默认）
+    sqlite    core/sqlite.SQLiteDB：单文件、WAL 模式、JSON 列，离线或测试时使用
+
+通过环境变量 PPG_STORAGE=postgres|sqlite 选择主库，PPG_READ_REPLICA=<sqlite 文件> 启用只读副本
+（用 python -m ppg.core.sqlite sync 从 PostgreSQL 同步），见 config.py。
+
+查询语句使用 PostgreSQL / psycopg2 的写法（%s 占位），SQLite 实现会自动转换占位符；
+跨实现使用的查询只能用两者都支持的 SQL（不含 ::类型转换、any()、ilike 等）。
+"""
+from abc import ABC, abstractmethod
+
+from ..config import READ_REPLICA_PATH, STORAGE_BACKEND
+
+# projects_his / products 中按 JSON 存储的字段
+JSON_FIELDS = ["selected_products", "file_attachments"]
+PRODUCT_JSON_FIELDS = ["dimensions", "tags"]
+
+# 插入成功后的回调列表，签名 callback(project_id, project)
+# 用于相似项目索引等内存结构的增量更新
+_insert_listeners = []
+
+
+def add_insert_listener(callback):
+    """注册插入成功回调（重复注册只保留一次）"""
+    if callback not in _insert_listeners:
+        _insert_listeners.append(callback)
+
+
+def remove_insert_listener(callback):
+    if callback in _insert_listeners:
+        _insert_listeners.remove(callback)
+
+
+def notify_inserted(project_id, project):
+    """通知所有回调；回调出错只打印，不影响保存结果"""
+    for callback in list(_insert_listeners):
+        try:
+            callback(project_id, project)
+        except Exception as e:
+            print(f"❌ 插入回调执行失败: {e}")
+
+
+class Storage(ABC):
+    """
+    存储实现的公共基类：子类实现连接与各条 SQL（下列抽象方法），这里提供与实现无关的方法
+    参数与返回值的约定以 pgsql.DB 的文档为准
+    """
+
+    name = None
+
+    def __init__(self):
+        self.conn = None
+
+    # ---------- 子类实现 ----------
+    @abstractmethod
+    def db_connection(self) -> bool:
+        """打开连接，失败时打印原因并返回 False"""
+
+    @abstractmethod
+    def db_close(self) -> bool:
+        """关闭（或归还）连接"""
+
+    @abstractmethod
+    def insert_project(self, project):
+        """插入一条项目，返回新 id，失败返回 None"""
+
+    @abstractmethod
+    def update_project_attachments(self, project_id, file_attachments) -> bool:
+        """更新项目的附件引用"""
+
+    @abstractmethod
+    def delete_project(self, project_id) -> bool:
+        """删除项目记录"""
+
+    @abstractmethod
+    def bulk_insert_projects(self, projects, batch_size: int = 5000, on_reject=None) -> int:
+        """批量导入历史项目，返回写入行数"""
+
+    @abstractmethod
+    def upsert_products(self, products, batch_size: int = 1000, on_reject=None) -> int:
+        """按 model_code 批量写入产品库，返回写入行数"""
+
+    @abstractmethod
+    def update_rows(self, table: str, key: str, columns: list, rows: list, page_size: int = 5000) -> int:
+        """按主键批量更新，返回提交的行数"""
+
+    @abstractmethod
+    def create_tables(self) -> bool:
+        """建表（已存在时跳过）"""
+
+    @abstractmethod
+    def select_page(
+        self,
+        table: str,
+        columns: list,
+        order_by: str = "id",
+        descending: bool = False,
+        after: tuple = None,
+        search: str = None,
+        search_columns=(),
+        limit: int = 200,
+    ) -> list:
+        """数据浏览的键集分页查询，按 (order_by, id) 从上一页最后一行之后继续取"""
+
+    @abstractmethod
+    def count_rows(self, table: str, search: str = None, search_columns=()) -> int:
+        """满足 select_page 检索条件的行数"""
+
+    @abstractmethod
+    def fetch_all(self, query, params=None) -> list:
+        """执行查询并返回全部行"""
+
+    @abstractmethod
+    def iter_rows(self, query, params=None, itersize: int = 2000, as_dict: bool = False):
+        """流式查询，逐行产出"""
+
+    @abstractmethod
+    def db_select(self, query, params=None):
+        """旧接口：一次性返回全部结果，失败返回 None"""
+
+    # ---------- 公共方法 ----------
+
+    def db_inert(self, project) -> bool:
+        """
+        数据库插入数据（旧接口，保留兼容，见 insert_project）
+        :param project: 项目数据
+        :return:
+        """
+        return self.insert_project(project) is not None
+
+    def insert_many(
+        self, projects, page_size: int = 500, commit_every: int = 5000, on_reject=None, keys=None
+    ) -> list:
+        """
+        批量插入项目并返回新 id：每 commit_every 行校验后一个事务写入（每条语句 page_size 行）并提交；
+        某批被数据库拒绝时回滚，改为逐条写入，把拒绝的行交给 on_reject，其余行照常写入
+        :param projects: ProjectHisModel 或 dict 的可迭代对象（可以是生成器）
+        :param on_reject: 回调 on_reject(record, error)，同 bulk_insert_projects
+        :param keys: 与 projects 一一对应的幂等键（写入 journal_key 列，唯一索引）；
+            键已在库中的行不再插入，直接返回已有的 id，重放同一批记录不会产生重复行
+        :return: 与输入顺序对应的 id 列表，未写入的行为 None
+        :raises ConnectionError: 数据库不可用（连接失败或写入中断开），已提交的批次不受影响
+        """
+        from itertools import islice
+        from .models import ProjectHisModel, group_errors, validate_batch
+
+        if not self.conn and not self.db_connection():
+            raise ConnectionError("数据库连接失败")
+
+        ids = []
+        records = iter(projects)
+        key_iter = iter(keys) if keys is not None else None
+        while True:
+            chunk = list(islice(records, commit_every))
+            if not chunk:
+                break
+            chunk_ids = [None] * len(chunk)
+            chunk_keys = list(islice(key_iter, len(chunk))) if key_iter is not None else None
+            if chunk_keys:
+                existing = self._ids_by_key([k for k in chunk_keys if k is not None])
+                for row, key in enumerate(chunk_keys):
+                    chunk_ids[row] = existing.get(key)
+            valid, errors = validate_batch(ProjectHisModel, chunk)
+            if on_reject:
+                for row, message in group_errors(errors).items():
+                    on_reject(chunk[row], message)
+            valid = [(row, project) for row, project in valid if chunk_ids[row] is None]
+            if valid:
+                try:
+                    new_ids = self._insert_many_batch(
+                        [project for _, project in valid],
+                        page_size,
+                        [chunk_keys[row] for row, _ in valid] if chunk_keys else None,
+                    )
+                    for (row, _), project_id in zip(valid, new_ids):
+                        chunk_ids[row] = project_id
+                except ConnectionError:
+                    raise
+                except Exception:
+                    # 整批已回滚：逐条写入并提交，找出被拒绝的行
+                    for row, project in valid:
+                        try:
+                            chunk_ids[row] = self._insert_one(project, chunk_keys[row] if chunk_keys else None)
+                        except ConnectionError:
+                            raise
+                        except Exception as e:
+                            if on_reject:
+                                on_reject(chunk[row], str(e).strip())
+                for row, project in valid:
+                    if chunk_ids[row] is not None:
+                        notify_inserted(chunk_ids[row], project)
+            ids.extend(chunk_ids)
+        return ids
+
+    def _ids_by_key(self, keys: list) -> dict:
+        """幂等键 → 已写入的 id（只包含库中已有的键）"""
+        if not keys:
+            return {}
+        query = "select journal_key, id from projects_his where journal_key in ({})".format(", ".join(["%s"] * len(keys)))
+        return dict(self.fetch_all(query, list(keys)))
+
+    @abstractmethod
+    def _insert_many_batch(self, projects: list, page_size: int, keys: list = None) -> list:
+        """
+        一个事务内写入并提交一批已校验的项目，返回新 id；失败时回滚后抛出，连接断开时抛出 ConnectionError
+        keys 不为空时同时写入各行的 journal_key
+        """
+
+    @abstractmethod
+    def _insert_one(self, project, key: str = None) -> int:
+        """写入并提交一条已校验的项目（key 写入 journal_key），返回新 id；失败约定同 _insert_many_batch"""
+
+    def iter_projects(self, where: str = None, params=None, itersize: int = 2000, with_id: bool = False):
+        """
+        逐条读取 projects_his 为 ProjectHisModel
+        :param where: 过滤条件（不含 where 关键字），如 "location_city = %s"
+        :param with_id: True 时返回 (id, ProjectHisModel)
+        """
+        from .models import ProjectHisModel
+
+        fields = list(ProjectHisModel.model_fields)
+        query = "select id, {} from projects_his{} order by id".format(
+            ", ".join(fields), f" where {where}" if where else ""
+        )
+        for row in self.iter_rows(query, params, itersize):
+            values = {f: v for f, v in zip(fields, row[1:]) if v is not None}
+            project = ProjectHisModel(**values)
+            yield (row[0], project) if with_id else project
+
+    @abstractmethod
+    def _column_batches(self, query, params, batch_size: int):
+        """逐批产出 {列名: 数组}，结果为空时只产出一次空数组，保证列信息可用"""
+
+    def iter_batches(self, query, params=None, batch_size: int = 10000):
+        """
+        按列分批读取，供统计分析使用
+        整数列无缺失时为 int64，数值列为 float64、缺失值为 NaN，其余列为 object 数组
+        :return: 生成器，每批为 {列名: np.ndarray}
+        """
+        for batch in self._column_batches(query, params, batch_size):
+            if len(next(iter(batch.values()), ())):
+                yield batch
+
+    def select_columns(self, query, params=None, batch_size: int = 10000) -> dict:
+        """分批读取后按列拼接成完整数组（只保存列数组，不保存行对象）；结果为空时各列为空数组"""
+        parts = {}
+        for batch in self._column_batches(query, params, batch_size):
+            for name, values in batch.items():
+                parts.setdefault(name, []).append(values)
+        return {name: concat_columns(arrays) for name, arrays in parts.items()}
+
+    def __enter__(self):
+        self.db_connection()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.db_close()
+
+
+def concat_columns(arrays: list):
+    """整数列某批含缺失值时为 float64，拼接时统一提升"""
+    # 只有列式读取用到 NumPy，延迟导入以免拖慢 core.database 等模块的导入
+    import numpy as np
+
+    arrays = [a for a in arrays if len(a)] or arrays[:1]
+    if len({a.dtype for a in arrays}) > 1:
+        arrays = [a.astype(np.float64) for a in arrays]
+    return np.concatenate(arrays)
+
+
+def get_backend(name: str = None) -> type:
+    """按名称（默认 STORAGE_BACKEND）返回存储实现类"""
+    name = name or STORAGE_BACKEND
+    if name == "postgres":
+        from .pgsql import DB as backend
+    elif name == "sqlite":
+        from .sqlite import SQLiteDB as backend
+    else:
+        raise ValueError(f"未知的存储实现：{name}（可选 postgres / sqlite）")
+    return backend
+
+
+def open_storage() -> Storage:
+    """打开主库（写入与需要最新数据的读取），用法与原来的 pgsql.DB 相同：with open_storage() as db"""
+    return get_backend()()
+
+
+# 旧名称：函数曾命名为 DB，与 pgsql.DB 类同名，保留供已有代码使用
+DB = open_storage
+
+
+def open_reader() -> Storage:
+    """打开只读查询用的库：配置了 READ_REPLICA_PATH 且文件存在时使用本地 SQLite 副本，否则为主库"""
+    import os
+
+    if READ_REPLICA_PATH and os.path.exists(READ_REPLICA_PATH):
+        from .sqlite import SQLiteDB
+
+        return SQLiteDB(READ_REPLICA_PATH, readonly=True)
+    return open_storage()
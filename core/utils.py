@@ -1,6 +1,5 @@
 # core/utils.py
 import json
-from PySide6.QtWidgets import QMessageBox
 
 
 def validate_json_string(text: str) -> bool:
@@ -14,9 +13,10 @@ def validate_json_string(text: str) -> bool:
         return False
 
 
-def show_error(parent, message: str):
-    QMessageBox.critical(parent, "错误", message)
+def __getattr__(name):
+    # 消息框已移到 views.messages，core 不再在导入时依赖 Qt；旧的导入路径仍可用
+    if name in ("show_error", "show_success"):
+        from ..views import messages
 
-
-def show_success(parent, message: str):
-    QMessageBox.information(parent, "成功", message)
+        return getattr(messages, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,18 @@
+# tests/conftest.py
+"""
+测试环境：界面测试使用 offscreen 平台（无显示器也能运行）；
+仓库目录不叫 ppg 时（直接 clone 后在仓库根目录运行 pytest），把仓库根目录注册为 ppg 包
+"""
+import importlib.util
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+if importlib.util.find_spec("ppg") is None:
+    _root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    _spec = importlib.util.spec_from_file_location(
+        "ppg", os.path.join(_root, "__init__.py"), submodule_search_locations=[_root]
+    )
+    sys.modules["ppg"] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules["ppg"])
@@ -0,0 +1,136 @@
+# tests/test_journal.py
+"""
+录入表单写前日志（core/journal.py）：重启后重放、重放不重复插入、日志重写、无效记录与进程锁
+
+    python -m pytest tests/test_journal.py
+
+日志在临时目录中，同步写入临时目录中的 SQLite 数据库（core/sqlite.py），不访问 PostgreSQL。
+"""
+import json
+
+import pytest
+
+from ppg.core import journal as journal_module
+from ppg.core import sqlite as sqlite_module
+from ppg.core import storage as storage_module
+from ppg.core.journal import JournalLocked, JournalSyncer, SaveJournal
+from ppg.core.models import ProjectHisModel
+from ppg.core.sqlite import SQLiteDB
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """open_storage() 打开临时 SQLite 数据库"""
+    path = str(tmp_path / "ppg.sqlite3")
+    monkeypatch.setattr(storage_module, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(sqlite_module, "SQLITE_PATH", path)
+    return path
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal" / "projects.jsonl")
+
+
+def _names(db_path) -> list:
+    with SQLiteDB(db_path) as db:
+        return [r[0] for r in db.fetch_all("select name from projects_his order by id")]
+
+
+def _append(journal, *names):
+    return [journal.append(ProjectHisModel(name=name, client_name="pytest")) for name in names]
+
+
+def test_replay_after_restart(db_path, journal_path):
+    journal = SaveJournal(journal_path)
+    _append(journal, "a", "b")
+    journal.close()
+
+    # 重启：未同步的记录仍在日志中，同步后日志重写为空
+    journal = SaveJournal(journal_path)
+    assert journal.depth() == 2
+    assert JournalSyncer(journal).flush_once() == 2
+    assert journal.depth() == 0
+    journal.close()
+    with open(journal_path, "rb") as f:
+        assert f.read() == b""
+    assert _names(db_path) == ["a", "b"]
+
+
+def test_replay_is_idempotent(db_path, journal_path, monkeypatch):
+    journal = SaveJournal(journal_path)
+    _append(journal, "a", "b")
+    # 模拟写入数据库后、done 行写入前崩溃
+    monkeypatch.setattr(journal, "mark_done", lambda *args, **kwargs: None)
+    JournalSyncer(journal).flush_once()
+    journal.close()
+
+    journal = SaveJournal(journal_path)
+    assert journal.depth() == 2
+    JournalSyncer(journal).flush_once()
+    assert journal.depth() == 0
+    journal.close()
+    assert _names(db_path) == ["a", "b"]
+
+
+def test_torn_tail_is_dropped(journal_path):
+    journal = SaveJournal(journal_path)
+    _append(journal, "a")
+    journal.close()
+    with open(journal_path, "ab") as f:
+        f.write(b'{"op": "put", "seq": 2, "pro')
+
+    journal = SaveJournal(journal_path)
+    assert [seq for seq, _, _ in journal.pending()[0]] == [1]
+    journal.close()
+    with open(journal_path, "rb") as f:
+        assert f.read().endswith(b"\n")
+
+
+def test_compaction_keeps_pending_entries(db_path, journal_path, monkeypatch):
+    monkeypatch.setattr(journal_module, "_COMPACT_AFTER", 2)
+    journal = SaveJournal(journal_path)
+    _append(journal, "a", "b", "c")
+    assert JournalSyncer(journal, batch_size=2).flush_once() == 2
+
+    # 已完成 2 条达到阈值：日志重写后只剩未同步的 c，之后的追加写入新文件
+    with open(journal_path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert [(e["op"], e["project"]["name"]) for e in entries] == [("put", "c")]
+    _append(journal, "d")
+    journal.close()
+
+    journal = SaveJournal(journal_path)
+    assert [p.name for _, _, p in journal.pending()[0]] == ["c", "d"]
+    assert journal._seq == 4
+    JournalSyncer(journal).flush_once()
+    journal.close()
+    assert _names(db_path) == ["a", "b", "c", "d"]
+
+
+def test_invalid_entry_does_not_block_sync(db_path, journal_path):
+    journal = SaveJournal(journal_path)
+    _append(journal, "bad", "good")
+    journal.close()
+    with open(journal_path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    entries[0]["project"]["area_sqm"] = "not a number"
+    with open(journal_path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+
+    journal = SaveJournal(journal_path)
+    assert JournalSyncer(journal).flush_once() == 1
+    assert journal.depth() == 0 and journal.rejected_count == 1
+    journal.close()
+    with open(journal.rejected_path, encoding="utf-8") as f:
+        rejected = [json.loads(line) for line in f]
+    assert rejected[0]["project"]["name"] == "bad" and "area_sqm" in rejected[0]["error"]
+    assert _names(db_path) == ["good"]
+
+
+def test_second_instance_is_refused(journal_path):
+    journal = SaveJournal(journal_path)
+    with pytest.raises(JournalLocked):
+        SaveJournal(journal_path)
+    journal.close()
+    SaveJournal(journal_path).close()
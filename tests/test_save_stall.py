@@ -0,0 +1,67 @@
+# tests/test_save_stall.py
+"""
+保存不能卡住界面：SaveWorker 在线程池中保存大附件时，界面线程的 5ms 心跳间隔不得超过阈值
+
+    QT_QPA_PLATFORM=offscreen python -m pytest tests/test_save_stall.py
+
+阈值默认 150ms，可用 PPG_STALL_LIMIT_MS 调整（慢机器 / CI）；附件大小用 PPG_STALL_SIZE_MB 调整。
+附件库与写前日志都在临时目录中，不访问数据库。
+"""
+import os
+import time
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from PySide6.QtCore import QCoreApplication, QThreadPool
+
+from ppg.benchmarks.bench_save_stall import StallMonitor, make_project
+from ppg.core.attachments import AttachmentStore
+from ppg.core.journal import SaveJournal
+from ppg.views.save_worker import SaveWorker
+
+STALL_LIMIT_MS = float(os.getenv("PPG_STALL_LIMIT_MS", "150"))
+SIZE_MB = int(os.getenv("PPG_STALL_SIZE_MB", "64"))
+TIMEOUT_S = 60
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def test_save_does_not_block_event_loop(app, tmp_path):
+    attachment = tmp_path / "drawing.dwg"
+    with open(attachment, "wb") as f:
+        for _ in range(SIZE_MB):
+            f.write(os.urandom(1024 * 1024))
+    journal = SaveJournal(str(tmp_path / "journal.jsonl"))
+    store = AttachmentStore(str(tmp_path / "save"))
+
+    result = {}
+    worker = SaveWorker(make_project("pytest"), [str(attachment)], store=store, journal=journal)
+    worker.setAutoDelete(False)
+    worker.signals.finished.connect(lambda seq: result.setdefault("seq", seq))
+    worker.signals.failed.connect(lambda message: result.setdefault("error", message))
+
+    monitor = StallMonitor()
+    monitor.start()
+    QThreadPool.globalInstance().start(worker)
+    deadline = time.monotonic() + TIMEOUT_S
+    try:
+        while not result and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.001)
+        app.processEvents()
+    finally:
+        monitor.stop()
+        QThreadPool.globalInstance().waitForDone()
+        journal.close()
+
+    assert "error" not in result, result.get("error")
+    assert "seq" in result, f"保存在 {TIMEOUT_S} 秒内没有完成"
+    assert journal.depth() == 1
+    assert monitor.max_gap_ms < STALL_LIMIT_MS, (
+        f"保存期间界面线程最长卡顿 {monitor.max_gap_ms:.1f}ms，超过 {STALL_LIMIT_MS:.0f}ms"
+    )
@@ -0,0 +1,118 @@
+# tests/test_sqlite_storage.py
+"""
+SQLite 存储实现（core/sqlite.py）：批量插入的逐条回退、键集分页、流式 / 按列读取、产品库 upsert
+
+    python -m pytest tests/test_sqlite_storage.py
+
+每个测试使用临时目录中的数据库文件，不访问 PostgreSQL。
+"""
+import numpy as np
+import pytest
+
+from ppg.core.models import ProjectHisModel
+from ppg.core.sqlite import SQLiteDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteDB(str(tmp_path / "ppg.sqlite3"))
+    assert db.db_connection()
+    yield db
+    db.db_close()
+
+
+def _project(name: str, **values) -> ProjectHisModel:
+    return ProjectHisModel(name=name, client_name="pytest", **values)
+
+
+def test_insert_many_rejects_single_rows(db):
+    # 数据库层面拒绝 name = 'bad' 的行：整批回滚后逐条写入，只有这一行被拒绝
+    db.conn.execute(
+        "create trigger reject_bad before insert on projects_his when new.name = 'bad' "
+        "begin select raise(abort, 'rejected by trigger'); end"
+    )
+    rejected = []
+    ids = db.insert_many(
+        [_project("ok1"), _project("bad"), _project("ok2"), {"name": "no client"}],
+        on_reject=lambda record, error: rejected.append(error),
+    )
+
+    assert ids[0] is not None and ids[2] is not None
+    assert ids[1] is None and ids[3] is None
+    assert len(rejected) == 2
+    assert any("rejected by trigger" in error for error in rejected)
+    assert any("client_name" in error for error in rejected)
+    assert [r[0] for r in db.fetch_all("select name from projects_his order by id")] == ["ok1", "ok2"]
+
+
+def _page_through(db, descending: bool, limit: int = 2) -> list:
+    ids, after = [], None
+    while True:
+        rows = db.select_page(
+            "projects_his", ["id", "area_sqm"], order_by="area_sqm", descending=descending, after=after, limit=limit
+        )
+        if not rows:
+            return ids
+        ids.extend(r[0] for r in rows)
+        after = (rows[-1][1], rows[-1][0])
+
+
+def test_select_page_keyset_across_nulls(db):
+    areas = [300.0, None, 100.0, None, 200.0, 100.0, None]
+    ids = db.insert_many([_project(f"p{i}", area_sqm=a) for i, a in enumerate(areas)])
+    by_id = dict(zip(ids, areas))
+    nulls = [i for i in ids if by_id[i] is None]
+
+    ascending = sorted((i for i in ids if by_id[i] is not None), key=lambda i: (by_id[i], i)) + nulls
+    descending = sorted((i for i in ids if by_id[i] is not None), key=lambda i: (-by_id[i], -i)) + nulls[::-1]
+    # 每页 2 行：空值行跨页时既不重复也不遗漏，且排在非空值之后
+    assert _page_through(db, descending=False) == ascending
+    assert _page_through(db, descending=True) == descending
+
+
+def test_iter_rows_and_select_columns(db):
+    db.insert_many(
+        [
+            _project("a", area_sqm=120.5, selected_products={"主机": "A100"}, success_rating=5),
+            _project("b"),
+            _project("c", area_sqm=80.0),
+        ]
+    )
+
+    query = "select name, area_sqm, selected_products from projects_his order by id"
+    rows = list(db.iter_rows(query, itersize=1, as_dict=True))
+    assert [r["name"] for r in rows] == ["a", "b", "c"]
+    assert rows[0]["selected_products"] == {"主机": "A100"}  # json 列解码为对象
+    assert rows[1]["area_sqm"] is None
+
+    columns = db.select_columns("select id, name, area_sqm, success_rating from projects_his order by id", batch_size=2)
+    assert columns["id"].dtype == np.int64
+    assert list(columns["name"]) == ["a", "b", "c"]
+    assert columns["area_sqm"].dtype == np.float64
+    assert columns["area_sqm"][0] == 120.5 and np.isnan(columns["area_sqm"][1])
+    assert columns["success_rating"].dtype == np.float64  # 含缺失值的整数列提升为 float64
+
+    empty = db.select_columns("select id, name from projects_his where id < 0")
+    assert set(empty) == {"id", "name"} and len(empty["id"]) == 0
+
+
+def _products(price: float = 1000.0) -> list:
+    return [
+        {"name": "冷水机组 A", "model_code": "A100", "category": "冷水机组", "cop": 5.6, "price_cny": price},
+        {"name": "冷水机组 B", "model_code": "B200", "category": "冷水机组", "cop": 6.1, "tags": ["变频"]},
+    ]
+
+
+def test_upsert_products_skips_unchanged_rows(db):
+    assert db.upsert_products(_products()) == 2
+    before = dict(db.fetch_all("select model_code, updated_at from products"))
+
+    # 内容未变：不更新，updated_at 保持不变
+    assert db.upsert_products(_products()) == 0
+    assert dict(db.fetch_all("select model_code, updated_at from products")) == before
+
+    # 只有价格变化的型号被更新
+    assert db.upsert_products(_products(price=1200.0)) == 1
+    after = dict(db.fetch_all("select model_code, updated_at from products"))
+    assert after["B200"] == before["B200"] and after["A100"] != before["A100"]
+    assert db.fetch_all("select price_cny from products where model_code = 'A100'")[0][0] == 1200.0
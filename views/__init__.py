@@ -1,9 +1,34 @@
 """
 GUI 视图模块
-包含所有界面组件
+包含所有界面组件（依赖 PySide6，按需导入）
 """
+import importlib
+from typing import TYPE_CHECKING
 
-from .main_windows import MainWindow
-from .entry_form import ProjectEntryForm
+_LAZY_EXPORTS = {
+    "MainWindow": (".main_windows", "MainWindow"),
+    "ProjectEntryForm": (".entry_form", "ProjectEntryForm"),
+    "ThemeManager": (".theme", "ThemeManager"),
+    "apply_theme": (".theme", "apply_theme"),
+}
 
-__all__ = ["MainWindow", "ProjectEntryForm"]
+__all__ = list(_LAZY_EXPORTS)
+
+if TYPE_CHECKING:
+    from .main_windows import MainWindow
+    from .entry_form import ProjectEntryForm
+    from .theme import ThemeManager, apply_theme
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
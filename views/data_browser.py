@@ -0,0 +1,288 @@
+# views/data_browser.py
+"""
+历史项目数据浏览页
+
+表格模型按需分页：只载入滚动到的行（canFetchMore / fetchMore），每页用键集分页
+从数据库读取，排序和关键字筛选都在 SQL 中完成；只取列表显示的列，
+不读取方案摘要、选型 JSON 等大字段。
+分页查询与总行数统计都在线程池中执行（QueryTask），界面线程不等待数据库；
+重新排序 / 筛选后，之前发出的查询结果按批次号丢弃。
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QObject, QRunnable, Qt, QThreadPool, QTimer, Signal
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLineEdit,
+    QPushButton,
+    QLabel,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
+)
+
+from ..core.storage import open_storage
+from .messages import show_error
+
+TABLE = "projects_his"
+# (字段, 表头)
+COLUMNS = [
+    ("id", "ID"),
+    ("name", "项目名称"),
+    ("client_name", "客户名称"),
+    ("project_type", "项目类型"),
+    ("location_city", "所在城市"),
+    ("area_sqm", "面积 (㎡)"),
+    ("total_cooling_load_kw", "总制冷负荷 (kW)"),
+    ("total_heating_load_kw", "总制热负荷 (kW)"),
+    ("system_type", "系统类型"),
+    ("total_cost_cny", "总成本 (CNY)"),
+    ("annual_energy_consumption_kwh", "年能耗 (kWh)"),
+    ("success_rating", "成功评分"),
+    ("create_at", "创建时间"),
+]
+SEARCH_COLUMNS = ["name", "client_name", "project_type", "location_city", "system_type"]
+PAGE_SIZE = 200
+
+
+class QuerySignals(QObject):
+    finished = Signal(int, object)  # 批次号, 查询结果
+    failed = Signal(int, str)
+
+
+class QueryTask(QRunnable):
+    """在线程池中执行一次数据库查询 query(db)，结果连同批次号通过信号回到界面线程"""
+
+    def __init__(self, generation: int, query):
+        super().__init__()
+        self.generation = generation
+        self.query = query
+        self.signals = QuerySignals()
+        self.done = False
+
+    def run(self):
+        try:
+            with open_storage() as db:
+                result = self.query(db)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.generation, result)
+        self.done = True
+
+
+class ProjectTableModel(QAbstractTableModel):
+    """projects_his 分页表格模型"""
+
+    count_changed = Signal(int, int)  # 已载入行数, 总行数（-1 表示正在统计）
+    load_failed = Signal(str)
+
+    def __init__(self, parent=None, page_size: int = PAGE_SIZE):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.fields = [field for field, _ in COLUMNS]
+        self.rows = []
+        self.total = -1
+        self.order_by = "id"
+        self.descending = True  # 默认最新录入的在前
+        self.search = ""
+        self._exhausted = False
+        self._fetching = False  # 已发出分页查询、结果未返回
+        self._generation = 0  # 每次 reload 加一，丢弃之前发出的查询结果
+        self._tasks = []
+
+    # ---------- Qt 接口 ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][1]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role == Qt.DisplayRole:
+            if value is None:
+                return ""
+            if isinstance(value, datetime):
+                return value.strftime("%Y-%m-%d %H:%M")
+            if isinstance(value, float):
+                return f"{value:,.2f}"
+            return str(value)
+        if role == Qt.TextAlignmentRole:
+            if isinstance(value, (int, float)):
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._fetching:
+            return
+        after = None
+        if self.rows:
+            last = self.rows[-1]
+            after = (last[self.fields.index(self.order_by)], last[0])
+        fields, order_by, descending, search, limit = (
+            self.fields, self.order_by, self.descending, self.search, self.page_size
+        )
+
+        def query(db):
+            rows = db.select_page(TABLE, fields, order_by, descending, after, search, SEARCH_COLUMNS, limit)
+            # numeric 列转为 float，Decimal 对象占用内存约为 float 的 4 倍
+            return [tuple(float(v) if isinstance(v, Decimal) else v for v in row) for row in rows]
+
+        self._fetching = True
+        self._start(query, self._on_page)
+
+    def _on_page(self, generation: int, rows: list):
+        if generation != self._generation:
+            return
+        self._fetching = False
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if rows:
+            start = len(self.rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+        self.count_changed.emit(len(self.rows), self.total)
+
+    def _on_count(self, generation: int, total: int):
+        if generation != self._generation:
+            return
+        self.total = total
+        self.count_changed.emit(len(self.rows), self.total)
+
+    def _on_failed(self, generation: int, message: str):
+        if generation != self._generation:
+            return
+        self._fetching = False
+        self._exhausted = True
+        self.load_failed.emit(f"数据加载失败：\n{message}")
+
+    def _start(self, query, on_finished):
+        """在线程池中执行 query(db)；保留任务对象直到执行完"""
+        self._tasks = [task for task in self._tasks if not task.done]
+        task = QueryTask(self._generation, query)
+        task.setAutoDelete(False)
+        task.signals.finished.connect(on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self._tasks.append(task)
+        QThreadPool.globalInstance().start(task)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        order_by = self.fields[column]
+        descending = order == Qt.DescendingOrder
+        if (order_by, descending) == (self.order_by, self.descending) and self.rows:
+            return
+        self.order_by, self.descending = order_by, descending
+        self.reload()
+
+    # ---------- 重新载入 ----------
+    def set_search(self, text: str):
+        text = text.strip()
+        if text != self.search:
+            self.search = text
+            self.reload()
+
+    def reload(self):
+        """清空已载入的行，按当前排序和筛选从第一页开始；总行数在后台另行统计"""
+        self.beginResetModel()
+        self._generation += 1
+        self.rows = []
+        self.total = -1
+        self._exhausted = False
+        self._fetching = False
+        self.endResetModel()
+        search = self.search
+        self._start(lambda db: db.count_rows(TABLE, search, SEARCH_COLUMNS), self._on_count)
+        self.fetchMore()
+
+
+class DataBrowser(QWidget):
+    """数据浏览页：关键字筛选 + 点击表头排序 + 滚动按需加载"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._loaded = False
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+
+        tool_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("筛选：项目名称 / 客户 / 类型 / 城市 / 系统类型")
+        self.search_edit.setClearButtonEnabled(True)
+        # 输入停顿后再查询，避免每个字符都访问数据库
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_edit.textChanged.connect(self.search_timer.start)
+        self.search_edit.returnPressed.connect(self.apply_search)
+        self.refresh_btn = QPushButton("🔄 刷新")
+        self.refresh_btn.clicked.connect(self.refresh)
+        tool_layout.addWidget(self.search_edit, 1)
+        tool_layout.addWidget(self.refresh_btn)
+        layout.addLayout(tool_layout)
+
+        self.model = ProjectTableModel(self)
+        self.model.count_changed.connect(self.on_count_changed)
+        self.model.load_failed.connect(lambda msg: show_error(self, msg))
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        self.table.verticalHeader().setVisible(False)
+        # 固定行高，避免按内容计算每一行
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        layout.addWidget(self.table, 1)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._loaded:
+            self.refresh()
+
+    def refresh(self):
+        self._loaded = True
+        self.model.reload()
+        # 排序交给模型（SQL）；首次载入后再开启，开启时按当前排序不会重复查询
+        if not self.table.isSortingEnabled():
+            self.table.setSortingEnabled(True)
+
+    def mark_stale(self):
+        """数据有变化：页面可见时立即刷新，否则下次显示时刷新"""
+        if self.isVisible():
+            self.refresh()
+        else:
+            self._loaded = False
+
+    def apply_search(self):
+        self.search_timer.stop()
+        self.model.set_search(self.search_edit.text())
+
+    def on_count_changed(self, loaded: int, total: int):
+        if total < 0:
+            self.status_label.setText(f"已载入 {loaded} 条，正在统计总数…")
+        else:
+            self.status_label.setText(f"已载入 {loaded} / 共 {total} 条")
@@ -0,0 +1,119 @@
+# views/diagnostics_dialog.py
+"""
+诊断窗口：各操作的耗时分布（次数、平均、p50 / p95 / p99、最大）与最近的慢操作
+数据来自 core.metrics.snapshot()，打开期间每秒刷新
+"""
+import json
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QApplication,
+    QDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from ..config import SLOW_LOG_PATH
+from ..core import metrics
+
+TIMER_COLUMNS = [
+    ("操作", None),
+    ("次数", "count"),
+    ("失败", "errors"),
+    ("平均(ms)", "mean_ms"),
+    ("p50(ms)", "p50_ms"),
+    ("p95(ms)", "p95_ms"),
+    ("p99(ms)", "p99_ms"),
+    ("最大(ms)", "max_ms"),
+    ("合计(ms)", "total_ms"),
+]
+SLOW_COLUMNS = [("时间", "time"), ("操作", "op"), ("耗时(ms)", "ms"), ("详情", "detail")]
+REFRESH_MS = 1000
+
+
+def _item(value, align_right: bool = False) -> QTableWidgetItem:
+    item = QTableWidgetItem(str(value))
+    if align_right:
+        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+    return item
+
+
+class DiagnosticsDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("性能诊断")
+        self.resize(900, 600)
+        self.setup_ui()
+        self.refresh()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.timer_table = QTableWidget(0, len(TIMER_COLUMNS))
+        self.timer_table.setHorizontalHeaderLabels([title for title, _ in TIMER_COLUMNS])
+        self.timer_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.timer_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.timer_table.verticalHeader().setVisible(False)
+        layout.addWidget(self.timer_table, 2)
+
+        layout.addWidget(QLabel(f"最近的慢操作（完整记录见 {SLOW_LOG_PATH or '内存'}）"))
+        self.slow_table = QTableWidget(0, len(SLOW_COLUMNS))
+        self.slow_table.setHorizontalHeaderLabels([title for title, _ in SLOW_COLUMNS])
+        self.slow_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.slow_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.slow_table.verticalHeader().setVisible(False)
+        layout.addWidget(self.slow_table, 1)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.copy_btn = QPushButton("📋 复制 JSON")
+        self.copy_btn.clicked.connect(self.copy_json)
+        self.reset_btn = QPushButton("🗑 清空统计")
+        self.reset_btn.clicked.connect(self.reset)
+        self.close_btn = QPushButton("关闭")
+        self.close_btn.clicked.connect(self.accept)
+        for button in (self.copy_btn, self.reset_btn, self.close_btn):
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        data = metrics.snapshot()
+        state = "已开启" if data["enabled"] else "已关闭（PPG_METRICS=0）"
+        counters = "，".join(f"{k}={v}" for k, v in sorted(data["counters"].items()))
+        self.status_label.setText(f"统计{state}，起始于 {data['since']}" + (f"；{counters}" if counters else ""))
+
+        timers = data["timers"]
+        self.timer_table.setRowCount(len(timers))
+        for row, (name, summary) in enumerate(timers.items()):
+            self.timer_table.setItem(row, 0, _item(name))
+            for col, (_, key) in enumerate(TIMER_COLUMNS[1:], start=1):
+                self.timer_table.setItem(row, col, _item(summary[key], align_right=True))
+
+        slow = data["slow"]
+        self.slow_table.setRowCount(len(slow))
+        for row, entry in enumerate(slow):
+            for col, (_, key) in enumerate(SLOW_COLUMNS):
+                self.slow_table.setItem(row, col, _item(entry.get(key, ""), align_right=key == "ms"))
+
+    def copy_json(self):
+        QApplication.clipboard().setText(json.dumps(metrics.snapshot(), ensure_ascii=False, indent=2))
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    def done(self, result):
+        self.timer.stop()
+        super().done(result)
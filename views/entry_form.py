@@ -12,11 +12,11 @@ from PySide6.QtWidgets import (
     QMessageBox,
 )
 from PySide6.QtCore import Signal, Qt
-from ..core.models import ProjectHisModel
+from ..core.journal import JournalLocked, get_journal, get_syncer
+from ..core.models import ProjectHisModel, validate_batch
 
 # from ..core.database import DatabaseManager
-from ..core.pgsql import DB
-from ..core.utils import validate_json_string, show_error, show_success
+from .messages import show_error, show_success
 
 
 class ProjectEntryForm(QWidget):
@@ -71,7 +71,7 @@ class ProjectEntryForm(QWidget):
                 widget.setMaximumHeight(80)
                 if "JSON" in label_text:
                     hint = QLabel('← 输入合法 JSON，如：{"型号": "A100"}')
-                    hint.setStyleSheet("font-size: 10px; color: gray;")
+                    hint.setProperty("role", "hint")
                     row_layout.addWidget(hint)
             else:  # QLineEdit
                 widget = QLineEdit()
@@ -129,29 +129,28 @@ class ProjectEntryForm(QWidget):
             show_error(self, "项目名称和客户名称为必填项！")
             return
 
-        # JSON 字段校验
-        for json_field in ["selected_products", "file_attachments"]:
-            if raw_data.get(json_field) and not validate_json_string(
-                raw_data[json_field]
-            ):
-                show_error(self, f"“{json_field}”字段不是合法的 JSON 格式！")
-                return
+        # Pydantic 校验 + 转换：JSON 字段只在模型中解析一次，所有出错字段一并列出
+        valid, errors = validate_batch(ProjectHisModel, [raw_data])
+        if errors:
+            # 模型级错误（跨字段校验）没有对应的列，只显示错误信息
+            lines = [
+                f"{self.fields.get(e['column'], (e['column'],))[0]}：{e['message']}" if e["column"] else e["message"]
+                for e in errors
+            ]
+            show_error(self, "数据校验失败：\n" + "\n".join(lines))
+            return
+        project = valid[0][1]
 
+        # 先写入本地写前日志（不经网络），由后台同步线程写入数据库
         try:
-            # Pydantic 自动校验 + 转换
-            project = ProjectHisModel(**raw_data)
-        except Exception as e:
-            show_error(self, f"数据校验失败：\n{str(e)}")
+            get_journal().append(project)
+            get_syncer().wake()
+        except (OSError, JournalLocked) as e:
+            show_error(self, f"❌ 保存失败：{e}")
             return
-
-        # 保存到数据库
-        with DB() as db:
-            if db.insert_project(project):
-                show_success(self, "✅ 项目保存成功！")
-                self.clear_form()
-                self.saved.emit()  # 发出信号
-            else:
-                show_error(self, "❌ 保存失败，请检查数据库连接或字段格式。")
+        show_success(self, "✅ 项目已保存，正在后台同步到数据库。")
+        self.clear_form()
+        self.saved.emit()  # 发出信号
 
     def clear_form(self):
         for widget in self.widgets.values():
@@ -14,14 +14,15 @@ from PySide6.QtWidgets import (
     QListWidget,
     QListWidgetItem,
     QFrame,
+    QProgressBar,
 )
-from PySide6.QtCore import Signal, Qt
+from PySide6.QtCore import Signal, Qt, QThreadPool, QTimer
 import os
-import shutil
-from ..core.models import ProjectHisModel
-from ..core.pgsql import DB
-from ..core.utils import validate_json_string, show_error, show_success
-from ..config import DEFAULT_THEME
+from ..core.models import ProjectHisModel, validate_batch
+from .messages import show_error, show_success
+from ..core.journal import JournalLocked, get_syncer
+from .save_worker import SaveWorker
+from .theme import apply_theme, ensure_theme
 
 
 class ProjectEntryForm(QWidget):
@@ -31,8 +32,27 @@ class ProjectEntryForm(QWidget):
         super().__init__()
         self.setup_ui()
         self.selected_files = []  # 存储选择的文件路径
+        self.save_worker = None  # 正在执行的后台保存任务
+
+        # 保存只写本地日志，由后台线程同步到数据库；启动时先同步上次未完成的记录
+        try:
+            self.syncer = get_syncer()
+        except JournalLocked as e:
+            # 另一个程序实例正在使用写前日志（并负责同步），本窗口只能浏览，不能保存
+            self.syncer = None
+            self.save_btn.setEnabled(False)
+            self.sync_label.setText(f"❌ {e}，请在该实例中录入")
+            return
+        self._synced = self.syncer.synced
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setInterval(1000)
+        self.sync_timer.timeout.connect(self.update_sync_status)
+        self.sync_timer.start()
+        self.update_sync_status()
 
     def setup_ui(self):
+        # 样式由 views/theme.py 统一设置，这里只标记 objectName / 动态属性
+        self.setObjectName("projectEntryForm")
         layout = QVBoxLayout(self)
         layout.setSpacing(15)
         layout.setContentsMargins(30, 30, 30, 30)
@@ -58,16 +78,15 @@ class ProjectEntryForm(QWidget):
 
         # 标题
         self.title_label = QLabel("项目信息录入")
+        self.title_label.setObjectName("formTitle")
         self.title_label.setAlignment(Qt.AlignCenter)
-        self.title_label.setStyleSheet(
-            "font-size: 18px; font-weight: bold; margin: 10px;"
-        )
         layout.addWidget(self.title_label)
 
         for field_name, (label_text, widget_class) in self.fields.items():
             # 创建表单行容器
             row_container = QFrame()
             row_container.setFrameStyle(QFrame.StyledPanel)
+            row_container.setProperty("role", "panel")
             self.widgets[f"{field_name}_container"] = row_container
 
             row_layout = QHBoxLayout(row_container)
@@ -76,6 +95,7 @@ class ProjectEntryForm(QWidget):
             label = QLabel(label_text)
             label.setMinimumWidth(150)
             label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            label.setProperty("role", "field-label")
             row_layout.addWidget(label)
             self.widgets[f"{field_name}_label"] = label
 
@@ -92,6 +112,7 @@ class ProjectEntryForm(QWidget):
                 widget.setMaximumHeight(80)
                 if "JSON" in label_text:
                     hint = QLabel('← 输入合法 JSON，如：{"型号": "A100"}')
+                    hint.setProperty("role", "hint")
                     self.widgets[f"{field_name}_hint"] = hint
                     row_layout.addWidget(hint)
             else:  # QLineEdit
@@ -107,35 +128,56 @@ class ProjectEntryForm(QWidget):
         # 按钮区
         btn_layout = QHBoxLayout()
         self.save_btn = QPushButton("💾 保存记录")
+        self.save_btn.setProperty("variant", "success")
         self.save_btn.clicked.connect(self.save_record)
         self.clear_btn = QPushButton("🧹 清空表单")
+        self.clear_btn.setProperty("variant", "danger")
         self.clear_btn.clicked.connect(self.clear_form)
 
+        self.cancel_btn = QPushButton("⏹ 取消保存")
+        self.cancel_btn.setProperty("variant", "warning")
+        self.cancel_btn.clicked.connect(self.cancel_save)
+        self.cancel_btn.hide()
+
+        # 保存进度（后台保存时显示）
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.hide()
+
+        # 待同步记录数（写前日志队列深度）
+        self.sync_label = QLabel()
+        self.sync_label.setProperty("role", "hint")
+
+        btn_layout.addWidget(self.progress_bar, 1)
+        btn_layout.addWidget(self.sync_label)
         btn_layout.addStretch()
         btn_layout.addWidget(self.save_btn)
+        btn_layout.addWidget(self.cancel_btn)
         btn_layout.addWidget(self.clear_btn)
         layout.addLayout(btn_layout)
         layout.addStretch()
 
-        # 应用初始主题
-        self.apply_theme(DEFAULT_THEME)
+        # 单独使用表单时应用默认主题（在主窗口中由主窗口统一设置）
+        ensure_theme()
 
     def setup_file_attachment_ui(self, layout):
         # 创建文件附件区域容器
         self.file_container = QFrame()
         self.file_container.setFrameStyle(QFrame.StyledPanel)
+        self.file_container.setProperty("role", "panel")
 
         file_layout = QVBoxLayout(self.file_container)
         file_layout.setContentsMargins(10, 10, 10, 10)
 
         # 标题
         self.file_label = QLabel("附件列表")
-        self.file_label.setStyleSheet("font-weight: bold;")
+        self.file_label.setProperty("role", "field-label")
         file_layout.addWidget(self.file_label)
 
         # 文件选择按钮和列表
         file_control_layout = QHBoxLayout()
         self.file_btn = QPushButton("📁 选择文件")
+        self.file_btn.setProperty("variant", "primary")
         self.file_btn.clicked.connect(self.select_files)
         file_control_layout.addWidget(self.file_btn)
         file_control_layout.addStretch()
@@ -150,165 +192,8 @@ class ProjectEntryForm(QWidget):
         layout.addWidget(self.file_container)
 
     def apply_theme(self, theme_name: str):
-        """应用指定主题到所有控件"""
-        if theme_name == "dark":
-            bg_color = "#333"
-            text_color = "#fff"
-            input_bg_color = "#444"
-            container_bg_color = "#444"
-            border_color = "#555"
-        else:
-            bg_color = "#f0f0f0"
-            text_color = "#333"
-            input_bg_color = "#fff"
-            container_bg_color = "#fff"
-            border_color = "#ccc"
-
-        # 设置整体背景色
-        self.setStyleSheet(f"QWidget {{ background-color: {bg_color}; }}")
-
-        # 设置标题样式
-        self.title_label.setStyleSheet(
-            f"""
-            QLabel {{
-                color: {text_color};
-                font-size: 18px; 
-                font-weight: bold; 
-                margin: 10px;
-            }}
-        """
-        )
-
-        # 设置容器样式
-        for field_name in self.fields:
-            container = self.widgets.get(f"{field_name}_container")
-            if container:
-                container.setStyleSheet(
-                    f"background-color: {container_bg_color}; border-radius: 5px;"
-                )
-
-            # 设置标签样式
-            label = self.widgets.get(f"{field_name}_label")
-            if label:
-                label.setStyleSheet(f"color: {text_color}; font-weight: bold;")
-
-            # 设置提示文本样式
-            hint = self.widgets.get(f"{field_name}_hint")
-            if hint:
-                hint.setStyleSheet("font-size: 10px; color: gray;")
-
-            # 设置输入控件样式
-            widget = self.widgets.get(field_name)
-            if widget:
-                if isinstance(widget, QTextEdit):
-                    widget.setStyleSheet(
-                        f"""
-                        QTextEdit {{
-                            padding: 5px;
-                            border: 1px solid {border_color};
-                            border-radius: 4px;
-                            background-color: {input_bg_color};
-                            color: {text_color};
-                        }}
-                        QTextEdit:focus {{
-                            border: 2px solid #4CAF50;
-                        }}
-                    """
-                    )
-                elif isinstance(widget, QLineEdit):
-                    widget.setStyleSheet(
-                        f"""
-                        QLineEdit {{
-                            padding: 5px;
-                            border: 1px solid {border_color};
-                            border-radius: 4px;
-                            background-color: {input_bg_color};
-                            color: {text_color};
-                        }}
-                        QLineEdit:focus {{
-                            border: 2px solid #4CAF50;
-                        }}
-                    """
-                    )
-                elif isinstance(widget, (QDoubleSpinBox, QSpinBox)):
-                    widget.setStyleSheet(
-                        f"""
-                        QSpinBox, QDoubleSpinBox {{
-                            padding: 5px;
-                            border: 1px solid {border_color};
-                            border-radius: 4px;
-                            background-color: {input_bg_color};
-                            color: {text_color};
-                        }}
-                        QSpinBox:focus, QDoubleSpinBox:focus {{
-                            border: 2px solid #4CAF50;
-                        }}
-                    """
-                    )
-
-        # 设置文件附件区域样式
-        self.file_container.setStyleSheet(
-            f"background-color: {container_bg_color}; border-radius: 5px;"
-        )
-        self.file_label.setStyleSheet(f"color: {text_color}; font-weight: bold;")
-
-        # 设置文件列表样式
-        self.file_list_widget.setStyleSheet(
-            f"""
-            QListWidget {{
-                background-color: {input_bg_color};
-                color: {text_color};
-                border: 1px solid {border_color};
-                border-radius: 4px;
-            }}
-        """
-        )
-
-        # 设置按钮样式
-        self.save_btn.setStyleSheet(
-            f"""
-            QPushButton {{
-                padding: 8px 15px;
-                border-radius: 4px;
-                font-weight: bold;
-                background-color: #4CAF50;
-                color: white;
-            }}
-            QPushButton:hover {{
-                background-color: #45a049;
-            }}
-        """
-        )
-
-        self.clear_btn.setStyleSheet(
-            f"""
-            QPushButton {{
-                padding: 8px 15px;
-                border-radius: 4px;
-                font-weight: bold;
-                background-color: #f44336;
-                color: white;
-            }}
-            QPushButton:hover {{
-                background-color: #da190b;
-            }}
-        """
-        )
-
-        self.file_btn.setStyleSheet(
-            f"""
-            QPushButton {{
-                padding: 8px 15px;
-                border-radius: 4px;
-                font-weight: bold;
-                background-color: #2196F3;
-                color: white;
-            }}
-            QPushButton:hover {{
-                background-color: #0b7dda;
-            }}
-        """
-        )
+        """应用指定主题（兼容旧调用，实际切换的是所在顶层窗口的样式表）"""
+        apply_theme(theme_name, self.window())
 
     def select_files(self):
         """选择文件并添加到列表"""
@@ -326,26 +211,15 @@ class ProjectEntryForm(QWidget):
 
                     # 创建带有移除按钮的项
                     widget = QWidget()
+                    widget.setProperty("role", "list-row")
                     widget_layout = QHBoxLayout(widget)
                     widget_layout.setContentsMargins(5, 2, 5, 2)
 
                     file_label = QLabel(os.path.basename(file_path))
                     remove_btn = QPushButton("移除")
                     remove_btn.setFixedSize(60, 25)
-                    remove_btn.setStyleSheet(
-                        """
-                        QPushButton {
-                            background-color: #ff9800;
-                            color: white;
-                            border-radius: 3px;
-                            font-size: 12px;
-                            padding: 2px 5px;
-                        }
-                        QPushButton:hover {
-                            background-color: #e68a00;
-                        }
-                    """
-                    )
+                    remove_btn.setProperty("variant", "warning")
+                    remove_btn.setProperty("size", "small")
                     remove_btn.clicked.connect(lambda _, i=item: self.remove_file(i))
 
                     widget_layout.addWidget(file_label)
@@ -395,25 +269,6 @@ class ProjectEntryForm(QWidget):
 
         return data
 
-    def save_files_to_project_dir(self, project_id):
-        """将选择的文件保存到项目目录下的save文件夹中"""
-        if not self.selected_files:
-            return []
-
-        # 创建项目保存目录
-        project_save_dir = os.path.join("save", str(project_id))
-        os.makedirs(project_save_dir, exist_ok=True)
-
-        saved_files = []
-        for file_path in self.selected_files:
-            if os.path.exists(file_path):
-                filename = os.path.basename(file_path)
-                destination = os.path.join(project_save_dir, filename)
-                shutil.copy2(file_path, destination)
-                saved_files.append(filename)
-
-        return saved_files
-
     def save_record(self):
         raw_data = self.get_form_data()
 
@@ -422,38 +277,78 @@ class ProjectEntryForm(QWidget):
             show_error(self, "项目名称和客户名称为必填项！")
             return
 
-        # JSON 字段校验
-        for json_field in ["selected_products"]:
-            if raw_data.get(json_field) and not validate_json_string(
-                raw_data[json_field]
-            ):
-                show_error(self, f"“{json_field}”字段不是合法的 JSON 格式！")
-                return
-
-        try:
-            # Pydantic 自动校验 + 转换
-            project = ProjectHisModel(**raw_data)
-        except Exception as e:
-            show_error(self, f"数据校验失败：\n{str(e)}")
+        # Pydantic 校验 + 转换：JSON 字段只在模型中解析一次，所有出错字段一并列出
+        valid, errors = validate_batch(ProjectHisModel, [raw_data])
+        if errors:
+            # 模型级错误（跨字段校验）没有对应的列，只显示错误信息
+            lines = [
+                f"{self.fields.get(e['column'], (e['column'],))[0]}：{e['message']}" if e["column"] else e["message"]
+                for e in errors
+            ]
+            show_error(self, "数据校验失败：\n" + "\n".join(lines))
             return
-
-        # 保存到数据库
-        with DB() as db:
-            project_id = db.insert_project(project)
-            if project_id:
-                # 保存附件文件
-                saved_files = self.save_files_to_project_dir(project_id)
-
-                # 更新数据库中的附件信息（只保存文件名）
-                if saved_files:
-                    file_attachments_json = str(saved_files).replace("'", '"')
-                    db.update_project_attachments(project_id, file_attachments_json)
-
-                show_success(self, "✅ 项目保存成功！")
-                self.clear_form()
-                self.saved.emit()  # 发出信号
-            else:
-                show_error(self, "❌ 保存失败，请检查数据库连接或字段格式。")
+        project = valid[0][1]
+
+        # 数据库写入与附件复制在后台线程执行，界面保持响应
+        self.save_worker = SaveWorker(project, self.selected_files)
+        self.save_worker.setAutoDelete(False)
+        self.save_worker.signals.progress.connect(self.on_save_progress)
+        self.save_worker.signals.finished.connect(self.on_save_finished)
+        self.save_worker.signals.failed.connect(self.on_save_failed)
+        self.save_worker.signals.cancelled.connect(self.on_save_cancelled)
+        self.set_saving(True)
+        QThreadPool.globalInstance().start(self.save_worker)
+
+    def set_saving(self, saving: bool):
+        """保存期间锁定表单，显示进度条与取消按钮"""
+        self.save_btn.setEnabled(not saving)
+        self.clear_btn.setEnabled(not saving)
+        self.file_btn.setEnabled(not saving)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.setVisible(saving)
+        self.progress_bar.setVisible(saving)
+        if saving:
+            self.progress_bar.setValue(0)
+
+    def cancel_save(self):
+        if self.save_worker:
+            self.save_worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.progress_bar.setFormat("正在取消…")
+
+    def on_save_progress(self, percent: int, message: str):
+        self.progress_bar.setValue(percent)
+        self.progress_bar.setFormat(f"{message} %p%")
+
+    def on_save_finished(self, seq):
+        self.set_saving(False)
+        show_success(self, "✅ 项目已保存，正在后台同步到数据库。")
+        self.clear_form()
+        self.update_sync_status()
+
+    def update_sync_status(self):
+        """刷新待同步条数；有记录同步到数据库时发出 saved 信号"""
+        status = self.syncer.status()
+        if status["synced"] != self._synced:
+            self._synced = status["synced"]
+            self.saved.emit()  # 发出信号
+
+        parts = []
+        if status["pending"]:
+            parts.append(f"⏳ 待同步 {status['pending']} 条")
+            if status["last_error"] and status["retry_in"] is not None:
+                parts.append(f"数据库不可用，{status['retry_in']:.0f} 秒后重试")
+        if status["rejected"]:
+            parts.append(f"❌ {status['rejected']} 条被数据库拒绝（见 {self.syncer.journal.rejected_path}）")
+        self.sync_label.setText("，".join(parts))
+        self.sync_label.setToolTip(status["last_error"] or "")
+
+    def on_save_failed(self, message: str):
+        self.set_saving(False)
+        show_error(self, message)
+
+    def on_save_cancelled(self):
+        self.set_saving(False)
 
     def clear_form(self):
         for field_name, widget in self.widgets.items():
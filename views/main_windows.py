@@ -8,8 +8,11 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QAction
 from PySide6.QtGui import QIcon
 from .entry_form_ import ProjectEntryForm
-from ..config import DEFAULT_THEME, BASE_DIR
-import os
+from .search_dialog import SearchDialog
+from .diagnostics_dialog import DiagnosticsDialog
+from .data_browser import DataBrowser
+from .theme import get_theme_manager
+from ..config import DEFAULT_THEME
 
 
 class MainWindow(QMainWindow):
@@ -18,6 +21,8 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("项目数据管理系统")
         # self.setGeometry(100, 100, 1000, 750)
         self.resize(1000, 400)  # 宽度1000，高度800
+        # 先应用主题，子页面创建时不再各自设置默认主题
+        self.load_theme(DEFAULT_THEME)
 
         self.stacked_widget = QStackedWidget()
         self.setCentralWidget(self.stacked_widget)
@@ -26,17 +31,39 @@ class MainWindow(QMainWindow):
         self.entry_form.saved.connect(self.on_project_saved)
         self.stacked_widget.addWidget(self.entry_form)
 
+        self.data_browser = DataBrowser()
+        self.stacked_widget.addWidget(self.data_browser)
+
         self.create_toolbar()
-        self.load_theme(DEFAULT_THEME)
 
     def create_toolbar(self):
         toolbar = QToolBar("主工具栏")
         self.addToolBar(toolbar)
 
+        entry_action = QAction("📝 项目录入", self)
+        entry_action.triggered.connect(
+            lambda: self.stacked_widget.setCurrentWidget(self.entry_form)
+        )
+        toolbar.addAction(entry_action)
+
+        browse_action = QAction("📋 数据浏览", self)
+        browse_action.triggered.connect(
+            lambda: self.stacked_widget.setCurrentWidget(self.data_browser)
+        )
+        toolbar.addAction(browse_action)
+
         theme_action = QAction("🌓 切换主题", self)
         theme_action.triggered.connect(self.toggle_theme)
         toolbar.addAction(theme_action)
 
+        search_action = QAction("🔍 方案检索", self)
+        search_action.triggered.connect(self.show_search)
+        toolbar.addAction(search_action)
+
+        diagnostics_action = QAction("📈 性能诊断", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        toolbar.addAction(diagnostics_action)
+
         about_action = QAction("关于", self)
         about_action.triggered.connect(self.show_about)
         toolbar.addAction(about_action)
@@ -47,19 +74,32 @@ class MainWindow(QMainWindow):
         self.load_theme(new_theme)
 
     def load_theme(self, theme_name: str):
-        qss_path = os.path.join(BASE_DIR, "resources", "style", f"{theme_name}.qss")
+        # 样式表按主题缓存，切换时只替换一次主窗口样式表（子控件、对话框随之更新）
         try:
-            with open(qss_path, "r", encoding="utf-8") as f:
-                self.setStyleSheet(f.read())
+            get_theme_manager().apply(theme_name, self)
             self.setProperty("theme", theme_name)
-            # 通知entry_form应用主题
-            self.entry_form.apply_theme(theme_name)
         except Exception as e:
             QMessageBox.warning(self, "样式加载失败", f"无法加载主题 {theme_name}: {e}")
 
     def on_project_saved(self):
-        # 可扩展：刷新数据列表、发送通知等
-        pass
+        # 可扩展：发送通知等
+        self.data_browser.mark_stale()
+
+    def show_search(self):
+        dialog = SearchDialog(self)
+        dialog.exec()
+
+    def show_diagnostics(self):
+        # 非模态：保存或浏览数据时可以同时观察统计变化
+        if getattr(self, "diagnostics_dialog", None) is None:
+            self.diagnostics_dialog = DiagnosticsDialog(self)
+            self.diagnostics_dialog.finished.connect(self._on_diagnostics_closed)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+
+    def _on_diagnostics_closed(self):
+        self.diagnostics_dialog.deleteLater()
+        self.diagnostics_dialog = None
 
     def show_about(self):
         QMessageBox.about(
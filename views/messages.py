@@ -0,0 +1,10 @@
+# views/messages.py
+from PySide6.QtWidgets import QMessageBox
+
+
+def show_error(parent, message: str):
+    QMessageBox.critical(parent, "错误", message)
+
+
+def show_success(parent, message: str):
+    QMessageBox.information(parent, "成功", message)
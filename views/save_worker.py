@@ -0,0 +1,70 @@
+# views/save_worker.py
+"""
+后台保存任务：附件存入附件库、项目写入本地写前日志（core/journal.py），界面线程只负责显示进度
+保存不经过网络；日志中的记录由后台同步线程按批写入数据库
+"""
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from ..core import metrics
+from ..core.attachments import AttachmentCancelled, AttachmentStore
+from ..core.journal import SaveJournal, get_journal, get_syncer
+from ..core.models import ProjectHisModel
+
+
+class SaveSignals(QObject):
+    progress = Signal(int, str)  # 百分比, 状态文字
+    finished = Signal(object)  # 写前日志中的记录序号
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class SaveWorker(QRunnable):
+    """
+    保存流程：附件存入附件库 → 项目与附件引用追加到写前日志（fsync）→ 唤醒同步线程
+    取消时日志中不留记录（已写入的 blob 可能被其他项目共用，保留在附件库中）
+    journal 为空时使用进程内共享的日志并由共享同步线程写入数据库；传入其他日志时只写日志
+    """
+
+    def __init__(
+        self, project: ProjectHisModel, files: list, store: AttachmentStore = None, journal: SaveJournal = None
+    ):
+        super().__init__()
+        self.project = project
+        self.files = list(files)
+        self.store = store or AttachmentStore()
+        self.journal = journal
+        self.signals = SaveSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def _on_copy_progress(self, copied, total, filename):
+        # 附件复制占 0%~95%，写日志占最后 5%
+        percent = int(95 * copied / total) if total else 95
+        self.signals.progress.emit(percent, f"正在保存附件：{filename}")
+
+    def run(self):
+        try:
+            with metrics.timed("save.project"):
+                if self._cancelled:
+                    raise AttachmentCancelled()
+                # 内容相同的附件只存一份，已存在的 blob 不再复制；项目目录下的硬链接在同步后建立
+                attachments = self.store.put_files(self.files, None, self._on_copy_progress, self.is_cancelled)
+                if self._cancelled:
+                    raise AttachmentCancelled()
+                self.signals.progress.emit(95, "正在写入本地日志…")
+                seq = (self.journal or get_journal()).append(self.project, attachments)
+
+            if self.journal is None:
+                get_syncer().wake()
+            self.signals.progress.emit(100, "保存完成")
+            self.signals.finished.emit(seq)
+
+        except AttachmentCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(f"❌ 保存失败：{e}")
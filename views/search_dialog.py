@@ -0,0 +1,122 @@
+# views/search_dialog.py
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLineEdit,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QLabel,
+)
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+from ..core.search import get_search_index, fetch_summaries
+from .messages import show_error
+
+
+class IndexSignals(QObject):
+    loaded = Signal(object)  # SearchIndex
+    failed = Signal(str)
+
+
+class IndexLoader(QRunnable):
+    """后台载入检索索引：首次需要读索引文件或从数据库重建，之后每次打开补齐新增项目"""
+
+    def __init__(self):
+        super().__init__()
+        self.signals = IndexSignals()
+
+    def run(self):
+        try:
+            index = get_search_index()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.loaded.emit(index)
+
+
+class SearchDialog(QDialog):
+    """方案摘要全文检索"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("方案检索")
+        self.resize(800, 500)
+        self.index = None
+        self.pending_query = ""
+        self.setup_ui()
+        self.load_index()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        search_layout = QHBoxLayout()
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("输入关键词，如：地源热泵 医院")
+        self.query_edit.returnPressed.connect(self.run_search)
+        self.search_btn = QPushButton("🔍 检索")
+        self.search_btn.clicked.connect(self.run_search)
+        search_layout.addWidget(self.query_edit, 1)
+        search_layout.addWidget(self.search_btn)
+        layout.addLayout(search_layout)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.result_table = QTableWidget(0, 4)
+        self.result_table.setHorizontalHeaderLabels(["得分", "项目ID", "项目名称", "方案摘要"])
+        self.result_table.horizontalHeader().setSectionResizeMode(
+            3, QHeaderView.Stretch
+        )
+        self.result_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.result_table)
+
+    def load_index(self):
+        """索引在线程池中载入，界面线程不等待；载入完成前输入的查询在完成后执行"""
+        self.status_label.setText("正在载入检索索引…")
+        self.loader = IndexLoader()
+        self.loader.setAutoDelete(False)
+        self.loader.signals.loaded.connect(self.on_index_loaded)
+        self.loader.signals.failed.connect(self.on_index_failed)
+        QThreadPool.globalInstance().start(self.loader)
+
+    def on_index_loaded(self, index):
+        self.index = index
+        self.status_label.setText(f"索引共 {len(index)} 篇方案")
+        if self.pending_query:
+            self.run_search()
+
+    def on_index_failed(self, message: str):
+        self.status_label.setText("检索索引载入失败")
+        show_error(self, f"检索索引载入失败：\n{message}")
+
+    def run_search(self):
+        query = self.query_edit.text().strip()
+        if not query:
+            return
+        if self.index is None:
+            self.pending_query = query
+            self.status_label.setText("正在载入检索索引，完成后自动检索…")
+            return
+        self.pending_query = ""
+
+        try:
+            results = self.index.search(query, k=50)
+            summaries = fetch_summaries([r["id"] for r in results])
+        except Exception as e:
+            show_error(self, f"检索失败：\n{str(e)}")
+            return
+
+        self.result_table.setRowCount(len(results))
+        for row, result in enumerate(results):
+            summary = (summaries.get(result["id"]) or "").replace("\n", " ")
+            for col, value in enumerate(
+                (f"{result['score']:.2f}", str(result["id"]), result["name"], summary)
+            ):
+                item = QTableWidgetItem(value)
+                if col < 2:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.result_table.setItem(row, col, item)
+
+        self.status_label.setText(f"共找到 {len(results)} 条结果")
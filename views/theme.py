@@ -0,0 +1,146 @@
+# views/theme.py
+"""
+主题引擎：样式表只解析一次，切换主题只替换一个缓存好的字符串
+
+- resources/style/<主题>.qss：主题基础样式 + 颜色变量定义（@名称: 值;）
+- resources/style/common.qss：各主题共用的控件样式，用 @名称 引用主题颜色；
+  控件通过 objectName / 动态属性（role、variant、size）匹配，不再逐个控件设置样式表
+- 编译结果（变量替换、去注释、压缩空白）按主题缓存，切换时只在 QApplication（或顶层窗口）上
+  设置一次样式表，不再遍历控件，也不再重复读文件
+
+用法：
+    from .theme import apply_theme, toggle_theme
+    apply_theme("dark")
+"""
+import os
+import re
+import threading
+
+from PySide6.QtWidgets import QApplication
+
+from ..config import BASE_DIR, DEFAULT_THEME
+
+STYLE_DIR = os.path.join(BASE_DIR, "resources", "style")
+COMMON_STYLE = "common"
+THEMES = ("light", "dark")
+
+_VAR_DEF = re.compile(r"^[ \t]*@([\w-]+)[ \t]*:[ \t]*([^;\n]+);[ \t]*$", re.M)
+_VAR_REF = re.compile(r"@([\w-]+)")
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_SPACES = re.compile(r"\s+")
+_AROUND_PUNCT = re.compile(r"\s*([{};:,>])\s*")
+
+
+def compile_qss(text: str, variables: dict = None) -> str:
+    """
+    编译样式表：收集 @变量 定义并替换引用，去掉注释并压缩空白
+    :param variables: 额外的变量（文本中的定义优先）
+    :return: 可直接交给 setStyleSheet 的字符串
+    """
+    variables = dict(variables or {})
+    text = _COMMENT.sub("", text)
+    variables.update((name, value.strip()) for name, value in _VAR_DEF.findall(text))
+    text = _VAR_DEF.sub("", text)
+
+    def substitute(match):
+        name = match.group(1)
+        if name not in variables:
+            raise ValueError(f"样式表引用了未定义的变量 @{name}")
+        return variables[name]
+
+    text = _VAR_REF.sub(substitute, text)
+    # 后代选择器依赖空格，只去掉标点两侧的空白
+    text = _AROUND_PUNCT.sub(r"\1", _SPACES.sub(" ", text))
+    return text.strip()
+
+
+class ThemeManager:
+    """按主题缓存编译后的样式表，并在 QApplication 或顶层窗口上切换"""
+
+    def __init__(self, style_dir: str = STYLE_DIR):
+        self.style_dir = style_dir
+        self.current = None
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _read(self, name: str) -> str:
+        path = os.path.join(self.style_dir, f"{name}.qss")
+        if not os.path.exists(path):
+            return ""
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def stylesheet(self, name: str) -> str:
+        """主题的完整样式表（首次调用时读取并编译，之后直接返回缓存）"""
+        cached = self._cache.get(name)
+        if cached is not None:
+            return cached
+        with self._lock:
+            if name not in self._cache:
+                theme_text = self._read(name)
+                if not theme_text:
+                    raise FileNotFoundError(f"找不到主题样式表：{name}.qss")
+                # 先取主题变量，再编译主题样式和共用样式
+                variables = {k: v.strip() for k, v in _VAR_DEF.findall(_COMMENT.sub("", theme_text))}
+                self._cache[name] = (
+                    compile_qss(theme_text) + compile_qss(self._read(COMMON_STYLE), variables)
+                )
+            return self._cache[name]
+
+    def preload(self, names=THEMES):
+        """预先编译全部主题，第一次切换时也不需要读文件"""
+        for name in names:
+            self.stylesheet(name)
+
+    def clear_cache(self):
+        """修改 .qss 文件后调用，下次切换时重新编译"""
+        with self._lock:
+            self._cache.clear()
+
+    def apply(self, name: str, target=None):
+        """
+        应用主题：只调用一次 setStyleSheet，字符串来自缓存
+        :param target: QApplication 或顶层窗口，默认当前 QApplication。
+            设置在顶层窗口上时，Qt 只需重新 polish 该窗口内的控件，切换更快
+        """
+        target = target or QApplication.instance()
+        if target is None:
+            raise RuntimeError("应用主题前需要先创建 QApplication")
+        stylesheet = self.stylesheet(name)
+        if target.styleSheet() != stylesheet:
+            target.setStyleSheet(stylesheet)
+        self.current = name
+
+    def toggle(self, target=None) -> str:
+        name = "dark" if self.current == "light" else "light"
+        self.apply(name, target)
+        return name
+
+
+# ---------- 进程级单例 ----------
+_manager = None
+
+
+def get_theme_manager() -> ThemeManager:
+    global _manager
+    if _manager is None:
+        _manager = ThemeManager()
+    return _manager
+
+
+def apply_theme(name: str, target=None):
+    get_theme_manager().apply(name, target)
+
+
+def toggle_theme(target=None) -> str:
+    return get_theme_manager().toggle(target)
+
+
+def current_theme() -> str:
+    return get_theme_manager().current
+
+
+def ensure_theme():
+    """尚未应用任何主题时在 QApplication 上应用默认主题（单独使用某个页面时）"""
+    if get_theme_manager().current is None:
+        apply_theme(DEFAULT_THEME)